@@ -0,0 +1,179 @@
+"""
+Employer analytics from time-bucketed counters.
+
+Every employer event (a credential verification, a view of one of their
+jobs, a candidate entering a job's top matches) increments one row per
+granularity in ``employer_activity``: its UTC hour, day and month, and an
+all-time row. A dashboard period is answered by reading the last N buckets of
+one granularity (and the N before them, for trends), so "last 30 days" is 60
+primary-key rows however many events there were. Hourly buckets are pruned
+after HOURLY_RETENTION_DAYS by the daily statistics snapshot. Candidate
+supply per skill is read from the ``skill_supply`` counters.
+
+Applications, hiring stages and per-credential analytics are not tracked;
+UNTRACKED_FIELDS names the response fields that are therefore always zero or
+empty, and the endpoints return it alongside them.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import models, rollups
+
+METRICS = ("verifications", "verified_credentials", "job_views", "new_matches")
+GRANULARITIES = ("hour", "day", "month", "total")
+
+# period -> (granularity, number of buckets)
+PERIODS = {
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+    "30d": ("day", 30),
+    "90d": ("day", 90),
+    "1y": ("month", 12),
+}
+HOURLY_RETENTION_DAYS = 7
+
+# Dashboard fields with no data source yet
+UNTRACKED_FIELDS = {
+    "stats": ["applicationsReceived"],
+    "analytics": [
+        "overview.totalApplications", "overview.applicationTrend", "applicationsByMonth",
+        "locationAnalytics.applicationCount", "locationAnalytics.averageSalary",
+        "credentialAnalytics", "hiringFunnel",
+    ],
+}
+
+ACTIVITY_KEY = ("user_id", "granularity", "bucket")
+
+
+def _bucket(granularity: str, moment: datetime) -> str:
+    if granularity == "hour":
+        return moment.strftime("%Y-%m-%dT%H")
+    if granularity == "day":
+        return moment.strftime("%Y-%m-%d")
+    if granularity == "month":
+        return moment.strftime("%Y-%m")
+    return "all"
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def record(db: Session, user_id: int, at: Optional[datetime] = None, **counts):
+    """Add event counts for an employer; runs in the caller's transaction"""
+    counts = {metric: counts.get(metric, 0) for metric in METRICS}
+    if user_id is None or not any(counts.values()):
+        return
+    at = at or _now()
+    rollups.increment(db, models.EmployerActivity, ACTIVITY_KEY, [
+        {"user_id": user_id, "granularity": granularity, "bucket": _bucket(granularity, at), **counts}
+        for granularity in GRANULARITIES
+    ])
+
+def record_for_jobs(db: Session, metric: str, counts_by_job: Dict[int, int]):
+    """Add per-job counts to the employers owning the jobs"""
+    counts_by_job = {job_id: count for job_id, count in counts_by_job.items() if count}
+    if not counts_by_job:
+        return
+    owners = db.query(models.JobRequirement.id, models.EmployerProfile.user_id).join(
+        models.EmployerProfile, models.EmployerProfile.id == models.JobRequirement.employer_id
+    ).filter(models.JobRequirement.id.in_(list(counts_by_job))).all()
+    by_user = {}
+    for job_id, user_id in owners:
+        by_user[user_id] = by_user.get(user_id, 0) + counts_by_job[job_id]
+    for user_id, count in sorted(by_user.items()):
+        record(db, user_id, **{metric: count})
+
+def _buckets(granularity: str, count: int, end: datetime) -> List[str]:
+    """The count buckets ending with the one containing end, oldest first"""
+    if granularity == "month":
+        year, month = end.year, end.month
+        buckets = []
+        for _ in range(count):
+            buckets.append(f"{year:04d}-{month:02d}")
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return buckets[::-1]
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    return [_bucket(granularity, end - step * i) for i in range(count - 1, -1, -1)]
+
+def _trend(current: int, previous: int) -> float:
+    if not previous:
+        return 0.0
+    return round((current - previous) * 100.0 / previous, 1)
+
+def activity(db: Session, user_id: int, period: str = "30d", now: Optional[datetime] = None) -> dict:
+    """Per-bucket timeline, totals and change against the previous period"""
+    granularity, count = PERIODS[period]
+    now = now or _now()
+    buckets = _buckets(granularity, 2 * count, now)
+    previous_buckets, current_buckets = buckets[:count], buckets[count:]
+
+    activity_model = models.EmployerActivity
+    rows = {row.bucket: row for row in db.query(activity_model).filter(
+        activity_model.user_id == user_id,
+        activity_model.granularity == granularity,
+        activity_model.bucket >= buckets[0],
+        activity_model.bucket <= buckets[-1]
+    )}
+
+    def sums(keys):
+        return {metric: sum(getattr(rows[key], metric) for key in keys if key in rows) for metric in METRICS}
+
+    current, previous = sums(current_buckets), sums(previous_buckets)
+    return {
+        "period": period,
+        "granularity": granularity,
+        "totals": current,
+        "previous_totals": previous,
+        "trends": {metric: _trend(current[metric], previous[metric]) for metric in METRICS},
+        "timeline": [
+            {"bucket": key, **{metric: getattr(rows[key], metric) if key in rows else 0 for metric in METRICS}}
+            for key in current_buckets
+        ],
+    }
+
+def totals(db: Session, user_id: int, granularity: str = "total", at: Optional[datetime] = None) -> dict:
+    """Counts in one bucket: all time by default, or the hour/day/month containing at"""
+    row = db.query(models.EmployerActivity).filter(
+        models.EmployerActivity.user_id == user_id,
+        models.EmployerActivity.granularity == granularity,
+        models.EmployerActivity.bucket == _bucket(granularity, at or _now())
+    ).first()
+    return {metric: getattr(row, metric) if row else 0 for metric in METRICS}
+
+def prune(db: Session, now: Optional[datetime] = None) -> int:
+    """Drop hourly buckets past retention; returns the rows deleted"""
+    cutoff = _bucket("hour", (now or _now()) - timedelta(days=HOURLY_RETENTION_DAYS))
+    deleted = db.query(models.EmployerActivity).filter(
+        models.EmployerActivity.granularity == "hour",
+        models.EmployerActivity.bucket < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def job_overview(db: Session, employer_id: int) -> dict:
+    """Active jobs, distinct matched candidates, skill demand and job locations of an employer profile"""
+    jobs = db.query(models.JobRequirement.id, models.JobRequirement.location).filter(
+        models.JobRequirement.employer_id == employer_id, models.JobRequirement.is_active == True
+    ).all()
+    if not jobs:
+        return {"active_jobs": 0, "candidates": 0, "skills": [], "locations": []}
+    job_ids = [job_id for job_id, _ in jobs]
+    locations = {}
+    for _, location in jobs:
+        if location:
+            locations[location] = locations.get(location, 0) + 1
+    candidates = db.query(func.count(func.distinct(models.JobMatch.learner_id))).filter(
+        models.JobMatch.job_id.in_(job_ids)
+    ).scalar()
+    demand = db.query(models.JobSkill.skill, func.count(models.JobSkill.job_id)).filter(
+        models.JobSkill.job_id.in_(job_ids)
+    ).group_by(models.JobSkill.skill).order_by(func.count(models.JobSkill.job_id).desc(), models.JobSkill.skill).limit(10).all()
+    supply = dict(db.query(models.SkillSupply.skill, models.SkillSupply.learner_count).filter(
+        models.SkillSupply.skill.in_([skill for skill, _ in demand])
+    )) if demand else {}
+    return {
+        "active_jobs": len(job_ids),
+        "candidates": candidates or 0,
+        "skills": [(skill, job_count, supply.get(skill, 0)) for skill, job_count in demand],
+        "locations": sorted(locations.items(), key=lambda item: (-item[1], item[0]))[:10],
+    }
@@ -0,0 +1,341 @@
+"""
+Merkle-tree batch anchoring of issued credentials.
+
+Instead of one ledger transaction per credential, credentials that are not
+anchored yet are collected in batches of up to ANCHOR_BATCH_SIZE. Each
+credential is hashed from the canonical JSON of its fingerprinted content
+plus its id, verification code and issue time; the hashes become the leaves of a Merkle tree, and only the root is
+written to the ledger: one transaction per batch. Leaves and interior nodes are
+hashed with distinct prefixes (RFC 6962), and an odd node at the end of a
+level is promoted unchanged.
+
+Every credential gets a ``blockchain_verifications`` row holding its leaf hash,
+the batch transaction and its inclusion proof, which is the sibling hash at
+each level from the leaf to the root. Checking a credential means rehashing it
+and folding the proof into a root, which takes O(log n) hashes, and then
+confirming that root once per batch against the ledger.
+
+Ledgers are pluggable, and LEDGER_BACKEND picks one. ``file`` is the default: a
+local append-only JSON-lines file at LEDGER_FILE_PATH in which every record
+chains the hash of the record before it. It stands in for a real chain until
+one is wired up with ``set_ledger``. ``start_scheduler`` anchors every
+ANCHOR_INTERVAL_SECONDS in a background thread, and
+scripts/anchor_credentials.py does the same from cron. Pending credentials are
+claimed with ``SKIP LOCKED`` where the database supports it, so several
+workers can anchor at once. A batch is committed before its root is written
+to the ledger; batches whose ledger write failed are retried first.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from . import fingerprints, models
+from .db import SessionLocal
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process lock still serializes appends
+    fcntl = None
+
+# Load environment variables from .env file
+load_dotenv()
+
+LEDGER_BACKEND = os.getenv("LEDGER_BACKEND", "file")
+LEDGER_FILE_PATH = os.getenv("LEDGER_FILE_PATH", "ledger/anchors.jsonl")
+ANCHOR_BATCH_SIZE = int(os.getenv("ANCHOR_BATCH_SIZE", "10000"))
+ANCHOR_INTERVAL_SECONDS = int(os.getenv("ANCHOR_INTERVAL_SECONDS", "300"))
+ANCHOR_SCHEDULER = os.getenv("ANCHOR_SCHEDULER", "true").lower() == "true"
+
+ANCHOR_METHOD = "merkle_batch"
+_CHUNK_SIZE = 500  # Rows per multi-row insert
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+logger = logging.getLogger(__name__)
+
+
+# Canonical credential hashing
+
+def canonical_json(credential) -> bytes:
+    """Fingerprinted content plus the identity of the issued record, as canonical JSON"""
+    return fingerprints.canonical_json({
+        **fingerprints.content(credential),
+        "id": credential.id,
+        "verification_code": credential.verification_code,
+        "issued_at": fingerprints.timestamp(credential.issued_at),
+    })
+
+def leaf_hash(credential) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + canonical_json(credential)).digest()
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """Binary Merkle tree over leaf hashes; odd nodes are promoted a level"""
+
+    def __init__(self, leaves: Sequence[bytes]):
+        if not leaves:
+            raise ValueError("A Merkle tree needs at least one leaf")
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[dict]:
+        """Sibling hashes from leaf index up to the root"""
+        steps = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                steps.append({"position": "left" if sibling < index else "right", "hash": level[sibling].hex()})
+            index //= 2
+        return steps
+
+def root_from_proof(leaf: bytes, proof: List[dict]) -> bytes:
+    """Fold an inclusion proof into the root it commits to"""
+    node = leaf
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = _node_hash(sibling, node) if step["position"] == "left" else _node_hash(node, sibling)
+    return node
+
+def verify_proof(leaf: bytes, proof: List[dict], root: bytes) -> bool:
+    try:
+        return root_from_proof(leaf, proof) == root
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+# Ledger backends
+
+class FileLedger:
+    """Append-only JSON-lines file of anchored roots, each chained to the previous record"""
+
+    name = "file"
+
+    def __init__(self, path: str = LEDGER_FILE_PATH):
+        self.path = path
+        self._records = None  # transaction id -> record, loaded on first lookup
+        self._lock = threading.Lock()
+
+    def _read(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as ledger:
+            return [json.loads(line) for line in ledger if line.strip()]
+
+    def anchor(self, root: str, leaf_count: int) -> str:
+        """Append a record for root and return its transaction id"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path, "a+", encoding="utf-8") as ledger:
+            if fcntl is not None:
+                fcntl.flock(ledger, fcntl.LOCK_EX)
+            ledger.seek(0)
+            previous = None
+            for line in ledger:
+                if line.strip():
+                    previous = json.loads(line)["transaction_id"]
+            record = {
+                "root": root,
+                "leaf_count": leaf_count,
+                "anchored_at": fingerprints.timestamp(datetime.now(timezone.utc)),
+                "previous": previous,
+            }
+            body = json.dumps(record, sort_keys=True, separators=(",", ":"))
+            record["transaction_id"] = "0x" + hashlib.sha256(body.encode("utf-8")).hexdigest()
+            ledger.write(json.dumps(record, sort_keys=True, separators=(",", ":")) + "\n")
+            ledger.flush()
+            os.fsync(ledger.fileno())
+        if self._records is not None:
+            self._records[record["transaction_id"]] = record
+        return record["transaction_id"]
+
+    def lookup(self, transaction_id: str) -> Optional[dict]:
+        """The record of a transaction (with its root), or None"""
+        if self._records is None or transaction_id not in self._records:
+            # Other processes append too; reload on a miss
+            self._records = {record["transaction_id"]: record for record in self._read()}
+        return self._records.get(transaction_id)
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_ledger():
+    """Process-wide ledger backend picked by LEDGER_BACKEND"""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                if LEDGER_BACKEND != "file":
+                    raise ValueError(f"Unknown LEDGER_BACKEND: {LEDGER_BACKEND}")
+                _ledger = FileLedger()
+    return _ledger
+
+def set_ledger(backend):
+    """Plug in a ledger: any object with name, anchor(root, leaf_count) and lookup(transaction_id)"""
+    global _ledger
+    _ledger = backend
+
+
+# Anchoring pipeline
+
+def _pending(db: Session, limit: int):
+    anchored = db.query(models.BlockchainVerification.id).filter(
+        models.BlockchainVerification.credential_id == models.Credential.id,
+        models.BlockchainVerification.verification_method == ANCHOR_METHOD
+    ).exists()
+    return db.query(models.Credential).filter(~anchored).order_by(
+        models.Credential.id
+    ).limit(limit).with_for_update(skip_locked=True).all()
+
+def _publish(db: Session, batch_id: int) -> models.AnchorBatch:
+    """Write a committed batch's root to the ledger and record the transaction.
+
+    The batch row is locked first, so of two workers that find the same
+    unpublished batch only one writes it to the ledger.
+    """
+    batch = db.query(models.AnchorBatch).filter(
+        models.AnchorBatch.id == batch_id, models.AnchorBatch.transaction_id.is_(None)
+    ).with_for_update(skip_locked=True).first()
+    if batch is not None:
+        transaction_id = get_ledger().anchor(batch.merkle_root, batch.leaf_count)
+        batch.transaction_id = transaction_id
+        db.query(models.BlockchainVerification).filter(
+            models.BlockchainVerification.anchor_batch_id == batch_id
+        ).update({"transaction_id": transaction_id}, synchronize_session=False)
+    db.commit()
+    return db.get(models.AnchorBatch, batch_id)
+
+def publish_pending(db: Session) -> List[models.AnchorBatch]:
+    """Anchor batches committed without a transaction (the ledger write failed or was interrupted)"""
+    batch_ids = [batch_id for (batch_id,) in db.query(models.AnchorBatch.id).filter(
+        models.AnchorBatch.transaction_id.is_(None)
+    ).order_by(models.AnchorBatch.id)]
+    return [_publish(db, batch_id) for batch_id in batch_ids]
+
+def anchor_batch(db: Session, batch_size: int = ANCHOR_BATCH_SIZE) -> Optional[models.AnchorBatch]:
+    """Anchor up to batch_size unanchored credentials under one root; None when there are none.
+
+    The batch and its proofs are committed before the root goes to the
+    ledger, so the ledger never holds a root the database rolled back. If the
+    ledger write fails, the batch stays without a transaction id and
+    ``publish_pending`` anchors it on the next run.
+    """
+    credentials = _pending(db, batch_size)
+    if not credentials:
+        db.rollback()
+        return None
+    leaves = [leaf_hash(credential) for credential in credentials]
+    tree = MerkleTree(leaves)
+    ledger = get_ledger()
+
+    batch = models.AnchorBatch(merkle_root=tree.root.hex(), leaf_count=len(leaves), ledger=ledger.name)
+    db.add(batch)
+    db.flush()
+    anchored_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "credential_id": credential.id,
+            "blockchain_hash": leaf.hex(),
+            "transaction_id": None,
+            "verification_url": None,
+            "verification_method": ANCHOR_METHOD,
+            "verified_at": anchored_at,
+            "verified_by": f"{ledger.name} ledger",
+            "verification_status": "verified",
+            "anchor_batch_id": batch.id,
+            "leaf_index": index,
+            "merkle_proof": tree.proof(index),
+        }
+        for index, (credential, leaf) in enumerate(zip(credentials, leaves))
+    ]
+    table = models.BlockchainVerification.__table__
+    for start in range(0, len(rows), _CHUNK_SIZE):
+        db.execute(table.insert(), rows[start:start + _CHUNK_SIZE])
+    db.commit()
+    return _publish(db, batch.id)
+
+def anchor_pending(db: Session, batch_size: int = ANCHOR_BATCH_SIZE) -> List[models.AnchorBatch]:
+    """Anchor every unanchored credential, one batch at a time, after retrying unpublished batches"""
+    batches = publish_pending(db)
+    while True:
+        batch = anchor_batch(db, batch_size)
+        if batch is None:
+            return batches
+        batches.append(batch)
+
+def inclusion_proof(db: Session, verification_code: str) -> Optional[dict]:
+    """A credential's anchor, its proof and whether the proof, ledger and current content check out"""
+    row = db.query(models.Credential, models.BlockchainVerification, models.AnchorBatch).join(
+        models.BlockchainVerification, models.BlockchainVerification.credential_id == models.Credential.id
+    ).join(
+        models.AnchorBatch, models.AnchorBatch.id == models.BlockchainVerification.anchor_batch_id
+    ).filter(
+        models.Credential.verification_code == verification_code.strip().upper(),
+        models.BlockchainVerification.verification_method == ANCHOR_METHOD
+    ).first()
+    if row is None:
+        return None
+    credential, anchor, batch = row
+    leaf = bytes.fromhex(anchor.blockchain_hash)
+    record = get_ledger().lookup(batch.transaction_id) if batch.transaction_id and batch.ledger == get_ledger().name else None
+    return {
+        "credential_id": credential.id,
+        "verification_code": credential.verification_code,
+        "leaf_hash": anchor.blockchain_hash,
+        "leaf_index": anchor.leaf_index,
+        "proof": anchor.merkle_proof or [],
+        "merkle_root": batch.merkle_root,
+        "leaf_count": batch.leaf_count,
+        "ledger": batch.ledger,
+        "transaction_id": batch.transaction_id,
+        "anchored_at": batch.anchored_at,
+        "proof_valid": verify_proof(leaf, anchor.merkle_proof or [], bytes.fromhex(batch.merkle_root)),
+        "ledger_confirmed": record is not None and record.get("root") == batch.merkle_root,
+        "content_matches": leaf_hash(credential) == leaf,
+    }
+
+
+_stop = threading.Event()
+_thread = None
+
+def _run_scheduler():
+    while not _stop.wait(ANCHOR_INTERVAL_SECONDS):
+        db = SessionLocal()
+        try:
+            batches = anchor_pending(db)
+            if batches:
+                logger.info("Anchored %d credentials in %d batches", sum(batch.leaf_count for batch in batches), len(batches))
+        except Exception:
+            logger.exception("Credential anchoring failed")
+            db.rollback()
+        finally:
+            db.close()
+
+def start_scheduler():
+    """Anchor pending credentials periodically in a background thread (unless disabled)"""
+    global _thread
+    if not ANCHOR_SCHEDULER or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run_scheduler, name="credential-anchoring", daemon=True)
+    _thread.start()
+
+def stop_scheduler():
+    _stop.set()
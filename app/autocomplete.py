@@ -0,0 +1,300 @@
+"""
+In-memory prefix index for typeahead over skills, issuers and badge templates.
+
+Every suggestion is indexed under each of its word suffixes ("Google Data
+Analytics" under "google data analytics", "data analytics" and "analytics"),
+so typing the start of any word finds it. Keys live in one sorted list and a
+prefix lookup is a binary search followed by a scan of the matching range.
+The widest ranges (one- and two-character prefixes) keep their best results
+in a small cache; new entries and popularity increases patch the cached lists
+in place, removals drop the affected prefixes.
+
+Suggestions are ordered by popularity: credentials carrying the skill, issued
+by the issuer or issued from the template. The index is built at startup,
+kept current by the crud layer as issuers, templates and credentials are
+created, and rebuilt in the background every AUTOCOMPLETE_REFRESH_SECONDS so
+that other worker processes' writes (and revocations) are picked up. A
+rebuild sorts all keys once, and updates made while it runs are replayed onto
+the new index before it is swapped in.
+"""
+import bisect
+import heapq
+import os
+import threading
+import time
+from typing import Iterable, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import models
+from .db import SessionLocal
+from .skills import normalize_skill, skill_key, tokenize
+
+# Load environment variables from .env file
+load_dotenv()
+
+AUTOCOMPLETE_REFRESH_SECONDS = int(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "300"))
+
+SUGGESTION_TYPES = ("skill", "issuer", "template")
+MAX_SUGGESTIONS = 20
+CACHED_PREFIX_LENGTH = 2
+
+
+class PrefixIndex:
+    """Sorted (key, type, ref) list with popularity-ordered prefix lookups"""
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}  # (type, ref) -> {"label", "weight", "keys"}
+        self._top = {}  # short prefix -> {types: [(type, ref), ...] best first}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _rank(self, item):
+        entry = self._entries[item]
+        return (-entry["weight"], len(entry["label"]), entry["label"])
+
+    def add(self, kind: str, ref, label: str, weight: int = 0):
+        """Insert or relabel an entry, keeping its weight when it exists"""
+        with self._lock:
+            entry = self._entries.get((kind, ref))
+            if entry is not None:
+                if entry["label"] == label:
+                    return
+                weight = entry["weight"]
+                self.remove(kind, ref)
+            tokens = tokenize(label)
+            keys = [" ".join(tokens[i:]) for i in range(len(tokens))]
+            self._entries[(kind, ref)] = {"label": label, "weight": weight, "keys": keys}
+            for key in keys:
+                bisect.insort(self._keys, (key, kind, ref))
+            self._promote((kind, ref))
+
+    def extend(self, items: Iterable[tuple]):
+        """Add many (type, ref, label, weight) entries as add does, sorting the keys once"""
+        with self._lock:
+            for kind, ref, label, weight in items:
+                entry = self._entries.get((kind, ref))
+                if entry is not None:
+                    if entry["label"] == label:
+                        continue
+                    weight = entry["weight"]
+                tokens = tokenize(label)
+                self._entries[(kind, ref)] = {"label": label, "weight": weight, "keys": [" ".join(tokens[i:]) for i in range(len(tokens))]}
+            self._keys = sorted((key, kind, ref) for (kind, ref), entry in self._entries.items() for key in entry["keys"])
+            self._top.clear()
+
+    def remove(self, kind: str, ref):
+        with self._lock:
+            entry = self._entries.pop((kind, ref), None)
+            if entry is None:
+                return
+            for key in entry["keys"]:
+                position = bisect.bisect_left(self._keys, (key, kind, ref))
+                if position < len(self._keys) and self._keys[position] == (key, kind, ref):
+                    del self._keys[position]
+            # A removed entry may leave room for one outside the cached lists
+            for prefix in self._cached_prefixes(entry["keys"]):
+                self._top.pop(prefix, None)
+
+    def bump(self, kind: str, ref, delta: int = 1):
+        with self._lock:
+            entry = self._entries.get((kind, ref))
+            if entry is None:
+                return
+            entry["weight"] = max(entry["weight"] + delta, 0)
+            if delta >= 0:
+                self._promote((kind, ref))
+            else:
+                for prefix in self._cached_prefixes(entry["keys"]):
+                    self._top.pop(prefix, None)
+
+    def _cached_prefixes(self, keys: Iterable[str]):
+        return {key[:length] for key in keys for length in range(1, CACHED_PREFIX_LENGTH + 1) if len(key) >= length}
+
+    def _promote(self, item):
+        """Patch cached lists after an entry appeared or gained weight.
+
+        Nothing else moved, so the entry either re-sorts within a list, enters
+        it (pushing out the last one) or stays outside it.
+        """
+        rank = self._rank(item)
+        for prefix in self._cached_prefixes(self._entries[item]["keys"]):
+            for kinds, top in self._top.get(prefix, {}).items():
+                if item[0] not in kinds:
+                    continue
+                if item not in top:
+                    if len(top) >= MAX_SUGGESTIONS and rank >= self._rank(top[-1]):
+                        continue
+                    top.append(item)
+                top.sort(key=self._rank)
+                del top[MAX_SUGGESTIONS:]
+
+    def _scan(self, prefix: str, kinds, limit: int):
+        keys = self._keys
+        position = bisect.bisect_left(keys, (prefix,))
+        matches = set()
+        while position < len(keys) and keys[position][0].startswith(prefix):
+            _, kind, ref = keys[position]
+            if kind in kinds:
+                matches.add((kind, ref))
+            position += 1
+        return heapq.nsmallest(limit, matches, key=self._rank)
+
+    def _suggestion(self, item):
+        entry = self._entries[item]
+        return {"type": item[0], "id": item[1], "label": entry["label"], "weight": entry["weight"]}
+
+    def complete(self, text: str, kinds: Iterable[str] = SUGGESTION_TYPES, limit: int = 10) -> List[dict]:
+        """Most popular entries with a word starting with text"""
+        prefix = " ".join(tokenize(text))
+        if not prefix:
+            return []
+        kinds = tuple(sorted(set(kinds)))
+        limit = min(limit, MAX_SUGGESTIONS)
+        with self._lock:
+            if len(prefix) > CACHED_PREFIX_LENGTH:
+                top = self._scan(prefix, kinds, limit)
+            else:
+                cached = self._top.setdefault(prefix, {})
+                if kinds not in cached:
+                    cached[kinds] = self._scan(prefix, kinds, MAX_SUGGESTIONS)
+                top = cached[kinds][:limit]
+            return [self._suggestion(item) for item in top]
+
+
+def _skill_item(name: str):
+    canonical = normalize_skill(name)
+    return ("skill", skill_key(canonical), canonical, 0) if canonical else None
+
+def build_index(db: Session) -> PrefixIndex:
+    """Build a fresh index from grouped counts (no per-row scans of JSON skills)"""
+    items = []
+
+    # Postings hold skill keys; known skills get their canonical name back and
+    # template skills below restore the display casing of the others
+    for skill, weight in db.query(
+        models.LearnerSkill.skill, func.sum(models.LearnerSkill.credential_count)
+    ).group_by(models.LearnerSkill.skill):
+        items.append(("skill", skill, normalize_skill(skill), int(weight or 0)))
+
+    issued = dict(db.query(models.Credential.issuer_id, func.count(models.Credential.id)).group_by(models.Credential.issuer_id))
+    for issuer_id, name in db.query(models.Issuer.id, models.Issuer.name):
+        if name:
+            items.append(("issuer", issuer_id, name, issued.get(issuer_id, 0)))
+
+    issued = dict(db.query(models.Credential.badge_template_id, func.count(models.Credential.id)).filter(
+        models.Credential.badge_template_id.isnot(None)
+    ).group_by(models.Credential.badge_template_id))
+    for template_id, name, template_skills in db.query(
+        models.BadgeTemplate.id, models.BadgeTemplate.name, models.BadgeTemplate.skills
+    ).filter(models.BadgeTemplate.active == True):
+        items.append(("template", template_id, name, issued.get(template_id, 0)))
+        items.extend(item for item in map(_skill_item, template_skills or []) if item)
+
+    # One sort of all keys rather than an insort per key
+    index = PrefixIndex()
+    index.extend(items)
+
+    # Single characters are the widest ranges; fill their cache up front
+    for character in "abcdefghijklmnopqrstuvwxyz0123456789":
+        index.complete(character)
+    return index
+
+
+_index = PrefixIndex()
+_loaded_at = None
+_refreshing = threading.Lock()
+_loading = threading.Lock()
+_writes = threading.Lock()
+_pending = None  # Updates made while a rebuild runs, replayed onto the new index
+
+def get_index() -> PrefixIndex:
+    return _index
+
+def load():
+    """(Re)build the index and swap it in.
+
+    Updates that arrive during the build are applied to the live index and
+    replayed onto the new one before the swap. One whose write the build had
+    already read is counted twice; the next rebuild evens that out.
+    """
+    global _index, _loaded_at, _pending
+    with _loading:
+        with _writes:
+            _pending = []
+        db = SessionLocal()
+        try:
+            index = build_index(db)
+        except Exception:
+            with _writes:
+                _pending = None
+            raise
+        finally:
+            db.close()
+        with _writes:
+            for update in _pending:
+                update(index)
+            _index, _pending = index, None
+            _loaded_at = time.monotonic()
+
+def _refresh():
+    try:
+        load()
+    finally:
+        _refreshing.release()
+
+def refresh_if_stale(max_age: int = AUTOCOMPLETE_REFRESH_SECONDS):
+    """Start a background rebuild when the index is older than max_age"""
+    if _loaded_at is not None and time.monotonic() - _loaded_at <= max_age:
+        return
+    if _refreshing.acquire(blocking=False):
+        threading.Thread(target=_refresh, daemon=True).start()
+
+def complete(text: str, kinds: Iterable[str] = SUGGESTION_TYPES, limit: int = 10) -> List[dict]:
+    refresh_if_stale()
+    return _index.complete(text, kinds, limit)
+
+# Incremental updates, called by crud after commits
+
+def _apply(update):
+    """Run update(index) on the live index, and queue it for a rebuild in progress"""
+    with _writes:
+        update(_index)
+        if _pending is not None:
+            _pending.append(update)
+
+def add_skill(name: str):
+    item = _skill_item(name)
+    if item:
+        _apply(lambda index: index.add(*item[:3]))
+
+def upsert_issuer(issuer: models.Issuer):
+    if issuer.name:
+        issuer_id, name = issuer.id, issuer.name
+        _apply(lambda index: index.add("issuer", issuer_id, name))
+
+def upsert_template(template: models.BadgeTemplate):
+    template_id, name = template.id, template.name
+    if template.active:
+        _apply(lambda index: index.add("template", template_id, name))
+        for skill in template.skills or []:
+            add_skill(skill)
+    else:
+        _apply(lambda index: index.remove("template", template_id))
+
+def record_credential(credential: models.Credential):
+    """Count a newly issued credential towards its suggestions' popularity"""
+    issuer_id, template_id, skills = credential.issuer_id, credential.badge_template_id, list(credential.skills or [])
+    for skill in skills:
+        add_skill(skill)
+
+    def bump(index):
+        index.bump("issuer", issuer_id)
+        if template_id:
+            index.bump("template", template_id)
+        for skill in skills:
+            index.bump("skill", skill_key(skill))
+    _apply(bump)
@@ -0,0 +1,278 @@
+"""
+Application-level result cache for dashboard reads.
+
+Entries are keyed per owner (``learner:<user id>``, ``issuer:<issuer id>``)
+together with a version stamp. Write paths in ``crud`` call ``bump`` after
+committing, which moves the owner to a fresh version so every entry cached
+under the old one is simply never read again and ages out.
+
+Two backends are available, picked with ``CACHE_BACKEND``:
+
+* ``memory`` - in-process LRU, the default. Invalidation is only visible to
+  the process that made the write, so use it with a single worker.
+* ``redis`` - any server speaking the Redis protocol at ``CACHE_URL``.
+  Shared by all workers.
+
+``CACHE_BACKEND=none`` disables caching entirely.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Version stamps live outside the LRU so eviction can never roll an
+        # owner back to a version that still has entries cached under it
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: int = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, key: str):
+        with self._lock:
+            return self._versions.get(key)
+
+    def set_version(self, key: str, version: str, only_if_absent: bool = False):
+        with self._lock:
+            if only_if_absent and key in self._versions:
+                return self._versions[key]
+            self._versions[key] = version
+            return version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisError(Exception):
+    """Error reply or protocol failure from a Redis-protocol server"""
+
+
+class RedisCache:
+    """Minimal Redis-protocol (RESP) client, one connection per thread.
+
+    Only the handful of commands the cache needs are used (GET, SET, FLUSHDB),
+    so any server implementing them can stand in for Redis.
+    """
+
+    def __init__(self, url: str = CACHE_URL, ttl: int = CACHE_TTL_SECONDS, timeout: float = 0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.password:
+            self._execute("AUTH", self.password)
+        if self.db:
+            self._execute("SELECT", self.db)
+
+    def _disconnect(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                self._local.reader.close()
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _execute(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._local.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise RedisError("Connection closed by server")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode("utf-8")
+        if prefix == b"-":
+            raise RedisError(body.decode("utf-8"))
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length == -1:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            count = int(body)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply prefix {prefix!r}")
+
+    def command(self, *args):
+        if getattr(self._local, "sock", None) is None:
+            self._connect()
+        try:
+            return self._execute(*args)
+        except (OSError, RedisError):
+            self._disconnect()
+            raise
+
+    def get(self, key: str):
+        data = self.command("GET", key)
+        return json.loads(data) if data is not None else None
+
+    def set(self, key: str, value, ttl: int = None):
+        ttl = self.ttl if ttl is None else ttl
+        args = ["SET", key, json.dumps(value, separators=(",", ":"), default=str)]
+        if ttl:
+            args += ["EX", ttl]
+        self.command(*args)
+
+    def get_version(self, key: str):
+        data = self.command("GET", key)
+        return data.decode("utf-8") if data is not None else None
+
+    def set_version(self, key: str, version: str, only_if_absent: bool = False):
+        if only_if_absent:
+            if self.command("SET", key, version, "NX") is None:
+                return self.get_version(key) or version
+            return version
+        self.command("SET", key, version)
+        return version
+
+    def clear(self):
+        self.command("FLUSHDB")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide cache backend, or None when caching is disabled"""
+    global _cache
+    if _cache is None and CACHE_BACKEND != "none":
+        with _cache_lock:
+            if _cache is None:
+                if CACHE_BACKEND == "redis":
+                    _cache = RedisCache(CACHE_URL)
+                else:
+                    _cache = LRUCache()
+    return _cache
+
+
+def set_cache(backend):
+    """Swap the cache backend (e.g. to point at a local stand-in server)"""
+    global _cache
+    _cache = backend
+
+
+def _new_version() -> str:
+    return f"{time.time_ns():x}"
+
+
+def _version_key(scope: str, owner_id) -> str:
+    return f"version:{scope}:{owner_id}"
+
+
+def get_version(scope: str, owner_id) -> str:
+    """Current version stamp for an owner, created on first use.
+
+    Stamps are unique tokens rather than counters, so losing a stamp (eviction,
+    server restart) can only ever produce a miss, never a stale hit.
+    """
+    backend = get_cache()
+    key = _version_key(scope, owner_id)
+    version = backend.get_version(key)
+    if version is None:
+        version = backend.set_version(key, _new_version(), only_if_absent=True)
+    return version
+
+
+def bump(scope: str, *owner_ids):
+    """Invalidate everything cached for the given owners"""
+    backend = get_cache()
+    if backend is None:
+        return
+    for owner_id in owner_ids:
+        if owner_id is None:
+            continue
+        try:
+            backend.set_version(_version_key(scope, owner_id), _new_version())
+        except (OSError, RedisError) as e:
+            logger.warning("Cache invalidation failed for %s:%s: %s", scope, owner_id, e)
+
+
+def get_or_set(scope: str, owner_id, name: str, loader, ttl: int = None):
+    """Return the cached value for (scope, owner, name), computing it with loader on a miss.
+
+    The loader must return something JSON-serializable so every backend can
+    store it. Cache errors fall back to calling the loader directly.
+    """
+    backend = get_cache()
+    if backend is None:
+        return loader()
+    try:
+        key = f"{scope}:{owner_id}:{get_version(scope, owner_id)}:{name}"
+        value = backend.get(key)
+    except (OSError, RedisError) as e:
+        logger.warning("Cache read failed for %s:%s: %s", scope, owner_id, e)
+        return loader()
+    if value is not None:
+        return value
+    value = loader()
+    try:
+        backend.set(key, value, ttl)
+    except (OSError, RedisError) as e:
+        logger.warning("Cache write failed for %s:%s: %s", scope, owner_id, e)
+    return value
@@ -1,11 +1,29 @@
+from sqlalchemy import case, event, func
 from sqlalchemy.orm import Session, joinedload
-from . import models, schemas, auth
+from . import models, schemas, auth, cache, search, skills, matching, autocomplete, pathways, rollups, locations, trending, fingerprints, signing, status_lists
 from fastapi import HTTPException, status
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 import secrets
 import string
 import uuid
 
+# Side effects queued with _after_commit run once the session's outermost
+# transaction commits, and are dropped if it rolls back or the session closes
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    for callback in session.info.pop("after_commit", []):
+        callback()
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_after_commit(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("after_commit", None)
+
+def _after_commit(db: Session, callback):
+    db.info.setdefault("after_commit", []).append(callback)
+
 # User operations
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
@@ -23,9 +41,12 @@ def create_user(db: Session, user: schemas.UserCreate):
         last_name=user.last_name,
         profile_image_url=user.profile_image_url,
         linkedin_url=user.linkedin_url,
+        location=user.location,
         public_profile=user.public_profile
     )
+    locations.stamp(db_user)
     db.add(db_user)
+    rollups.record_user(db, db_user.role)
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -42,9 +63,11 @@ def create_issuer(db: Session, issuer: schemas.IssuerCreate, user_id: int):
         location=issuer.location,
         user_id=user_id
     )
+    locations.stamp(db_issuer)
     db.add(db_issuer)
     db.commit()
     db.refresh(db_issuer)
+    autocomplete.upsert_issuer(db_issuer)
     return db_issuer
 
 def get_issuer_by_user_id(db: Session, user_id: int):
@@ -58,9 +81,13 @@ def update_issuer(db: Session, issuer_id: int, issuer_update: schemas.IssuerUpda
     update_data = issuer_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_issuer, field, value)
+    if "location" in update_data:
+        locations.stamp(db_issuer)
     
     db.commit()
     db.refresh(db_issuer)
+    cache.bump("issuer", db_issuer.id)
+    autocomplete.upsert_issuer(db_issuer)
     return db_issuer
 
 # Badge Template operations (Credly-like)
@@ -70,7 +97,7 @@ def create_badge_template(db: Session, template: schemas.BadgeTemplateCreate, is
         description=template.description,
         badge_type=template.badge_type,
         criteria=template.criteria,
-        skills=template.skills,
+        skills=skills.normalize_skills(template.skills),
         image_url=template.image_url,
         estimated_duration=template.estimated_duration,
         prerequisites=template.prerequisites,
@@ -80,14 +107,59 @@ def create_badge_template(db: Session, template: schemas.BadgeTemplateCreate, is
     db.add(db_template)
     db.commit()
     db.refresh(db_template)
+    cache.bump("issuer", issuer_id)
+    autocomplete.upsert_template(db_template)
+    matching.upsert_template(db_template)
+    pathways.invalidate()
     return db_template
 
-def get_badge_templates_by_issuer(db: Session, issuer_id: int, active_only: bool = True):
+def get_badge_templates_by_issuer(db: Session, issuer_id: int, active_only: bool = True, skip: int = 0, limit: Optional[int] = None):
     query = db.query(models.BadgeTemplate).filter(models.BadgeTemplate.issuer_id == issuer_id)
     if active_only:
         query = query.filter(models.BadgeTemplate.active == True)
+    query = query.order_by(models.BadgeTemplate.id).offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
     return query.all()
 
+def count_badge_templates_by_issuer(db: Session, issuer_id: int, active_only: bool = True):
+    query = db.query(func.count(models.BadgeTemplate.id)).filter(models.BadgeTemplate.issuer_id == issuer_id)
+    if active_only:
+        query = query.filter(models.BadgeTemplate.active == True)
+    return query.scalar()
+
+def get_badge_template_counts(db: Session, template_ids: List[int]):
+    """Issued/verified/viewed counts per template in one grouped aggregate"""
+    if not template_ids:
+        return {}
+    rows = db.query(
+        models.Credential.badge_template_id,
+        func.count(func.distinct(models.Credential.id)),
+        func.count(func.distinct(case(
+            (models.Credential.status == models.CredentialStatus.verified, models.Credential.id)
+        ))),
+        func.count(models.CredentialView.id)
+    ).outerjoin(
+        models.CredentialView, models.CredentialView.credential_id == models.Credential.id
+    ).filter(
+        models.Credential.badge_template_id.in_(template_ids)
+    ).group_by(models.Credential.badge_template_id).all()
+    
+    return {
+        template_id: {"issued_count": issued, "verified_count": verified, "view_count": viewed}
+        for template_id, issued, verified, viewed in rows
+    }
+
+def get_badge_templates_with_counts(db: Session, issuer_id: int, active_only: bool = True, skip: int = 0, limit: Optional[int] = None):
+    """A page of an issuer's badge templates with their issuance counts attached"""
+    templates = get_badge_templates_by_issuer(db, issuer_id, active_only, skip, limit)
+    counts = get_badge_template_counts(db, [template.id for template in templates])
+    empty = {"issued_count": 0, "verified_count": 0, "view_count": 0}
+    for template in templates:
+        for field, value in counts.get(template.id, empty).items():
+            setattr(template, field, value)
+    return templates
+
 def get_badge_template(db: Session, template_id: int):
     return db.query(models.BadgeTemplate).filter(models.BadgeTemplate.id == template_id).first()
 
@@ -97,14 +169,46 @@ def update_badge_template(db: Session, template_id: int, template_update: schema
         return None
     
     update_data = template_update.dict(exclude_unset=True)
+    if update_data.get("skills") is not None:
+        update_data["skills"] = skills.normalize_skills(update_data["skills"])
     for field, value in update_data.items():
         setattr(db_template, field, value)
     
     db.commit()
     db.refresh(db_template)
+    cache.bump("issuer", db_template.issuer_id)
+    autocomplete.upsert_template(db_template)
+    matching.upsert_template(db_template)
+    pathways.invalidate()
     return db_template
 
 # Credential operations
+def _stamp_fingerprint(db: Session, credential: models.Credential):
+    """Set the content fingerprint, rejecting a duplicate of another credential"""
+    if credential.status in fingerprints.RELEASED_STATUSES:
+        # Revoked and expired credentials free their content for re-issue
+        credential.fingerprint = None
+        return
+    credential.fingerprint = fingerprints.fingerprint(credential)
+    if fingerprints.find_duplicate(db, credential.fingerprint, exclude_id=credential.id):
+        raise HTTPException(status_code=409, detail="An identical credential has already been issued")
+
+def _seal(db: Session, credential: models.Credential):
+    """Fingerprint, status list position and signature of a new credential"""
+    _stamp_fingerprint(db, credential)
+    # A first key is created in its own transaction; do that before this one writes
+    signing.signing_key(db, credential.issuer_id)
+    credential.status_list_index = status_lists.allocate(db, credential.issuer_id)
+    signing.sign_credential(db, credential)
+
+def _flush_credential(db: Session):
+    # The fingerprint index catches a duplicate written concurrently since the check
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="An identical credential has already been issued")
+
 def generate_verification_code() -> str:
     """Generate a unique verification code for credentials"""
     return ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
@@ -131,10 +235,15 @@ def create_credential(db: Session, credential: schemas.CredentialCreate, issuer_
     while db.query(models.Credential).filter(models.Credential.public_url == public_url).first():
         public_url = generate_public_url()
     
+    # Canonical skill names; fall back to skills mentioned in the title/description
+    credential_skills = skills.normalize_skills(credential.skills)
+    if not credential_skills:
+        credential_skills = skills.extract_skills(f"{credential.title} {credential.description or ''}")
+    
     db_credential = models.Credential(
         title=credential.title,
         description=credential.description,
-        skills=credential.skills,
+        skills=credential_skills,
         skill_category=credential.skill_category,
         tags=credential.tags,
         completion_date=credential.completion_date,
@@ -146,11 +255,23 @@ def create_credential(db: Session, credential: schemas.CredentialCreate, issuer_
         badge_template_id=credential.badge_template_id,
         verification_code=verification_code,
         public_url=public_url,
+        state_code=db.query(models.Issuer.state_code).filter(models.Issuer.id == issuer_id).scalar(),
         status=models.CredentialStatus.issued
     )
+    _seal(db, db_credential)
     db.add(db_credential)
+    _flush_credential(db)
+    rollups.apply(db, None, rollups.snapshot(db, db_credential))
+    skill_events = trending.skill_counts([db_credential.skills])
+    trending.record(db, "issued", skill_events)
+    search.index_learner(db, learner.id)
+    matching.update_learner_matches(db, learner.id)
     db.commit()
     db.refresh(db_credential)
+    cache.bump("learner", learner.id)
+    cache.bump("issuer", issuer_id)
+    autocomplete.record_credential(db_credential)
+    trending.observe("issued", skill_events)
     return db_credential
 
 def issue_credential_from_template(db: Session, issue_data: schemas.CredentialIssue, issuer_id: int):
@@ -179,7 +300,7 @@ def issue_credential_from_template(db: Session, issue_data: schemas.CredentialIs
     db_credential = models.Credential(
         title=template.name,
         description=template.description,
-        skills=template.skills,
+        skills=skills.normalize_skills(template.skills),
         skill_category=template.badge_type.value,
         tags=template.tags,
         completion_date=issue_data.completion_date,
@@ -190,13 +311,144 @@ def issue_credential_from_template(db: Session, issue_data: schemas.CredentialIs
         badge_template_id=template.id,
         verification_code=verification_code,
         public_url=public_url,
+        state_code=db.query(models.Issuer.state_code).filter(models.Issuer.id == issuer_id).scalar(),
         status=models.CredentialStatus.issued
     )
+    _seal(db, db_credential)
     db.add(db_credential)
+    _flush_credential(db)
+    rollups.apply(db, None, rollups.snapshot(db, db_credential))
+    skill_events = trending.skill_counts([db_credential.skills])
+    trending.record(db, "issued", skill_events)
+    search.index_learner(db, learner.id)
+    matching.update_learner_matches(db, learner.id)
     db.commit()
     db.refresh(db_credential)
+    cache.bump("learner", learner.id)
+    cache.bump("issuer", issuer_id)
+    autocomplete.record_credential(db_credential)
+    trending.observe("issued", skill_events)
     return db_credential
 
+def _unique_values(db: Session, column, generate, count: int) -> List[str]:
+    """count freshly generated values not yet used in column"""
+    values = set()
+    while len(values) < count:
+        candidates = {generate() for _ in range(count - len(values))} - values
+        taken = {value for (value,) in db.query(column).filter(column.in_(candidates))}
+        values |= candidates - taken
+    return list(values)
+
+def _build_credential(row: dict, issued_at: datetime) -> models.Credential:
+    values = {key: value for key, value in row.items() if key != "nsqf_level"}
+    credential = models.Credential(status=models.CredentialStatus.issued, issued_at=issued_at, **values)
+    credential.skills = skills.normalize_skills(credential.skills) or skills.extract_skills(
+        f"{credential.title} {credential.description or ''}"
+    )
+    credential.fingerprint = fingerprints.fingerprint(credential)
+    return credential
+
+def bulk_issue_credentials(db: Session, rows: List[dict], commit: bool = True) -> Tuple[Dict[int, int], Dict[int, Optional[int]]]:
+    """Issue many credentials in one transaction and commit it.
+
+    Each row holds Credential column values (learner_id and issuer_id
+    included) and optionally an nsqf_level. Rows that duplicate an existing
+    credential or an earlier row are skipped by fingerprint. Returns
+    ({row position: credential id}, {duplicate row position: id of the
+    credential it duplicates}).
+    Credentials are issued unsigned; run signing.sign_pending afterwards.
+    With commit=False the rows are only flushed, so the caller can write more
+    in the same transaction; caches and in-memory indexes are updated once
+    the caller commits.
+    """
+    issued_at = datetime.now(timezone.utc)
+    pending, repeats, first_seen = [], {}, {}
+    for position, row in enumerate(rows):
+        credential = _build_credential(row, issued_at)
+        if credential.fingerprint in first_seen:
+            repeats[position] = first_seen[credential.fingerprint]
+            continue
+        first_seen[credential.fingerprint] = position
+        pending.append((position, credential))
+    taken = {}
+    values = list(first_seen)
+    for start in range(0, len(values), 500):
+        taken.update(db.query(models.Credential.fingerprint, models.Credential.id).filter(
+            models.Credential.fingerprint.in_(values[start:start + 500])
+        ))
+    duplicates = {position: taken[credential.fingerprint] for position, credential in pending if credential.fingerprint in taken}
+    pending = [(position, credential) for position, credential in pending if credential.fingerprint not in taken]
+    if not pending:
+        if commit:
+            db.commit()
+        return {}, {**duplicates, **{position: duplicates.get(earlier) for position, earlier in repeats.items()}}
+
+    credentials = [credential for _, credential in pending]
+    codes = _unique_values(db, models.Credential.verification_code, generate_verification_code, len(credentials))
+    urls = _unique_values(db, models.Credential.public_url, generate_public_url, len(credentials))
+    issuer_ids = sorted({credential.issuer_id for credential in credentials})
+    state_codes = dict(db.query(models.Issuer.id, models.Issuer.state_code).filter(models.Issuer.id.in_(issuer_ids)))
+    by_issuer = {}
+    for credential, code, url in zip(credentials, codes, urls):
+        credential.verification_code, credential.public_url = code, url
+        credential.state_code = state_codes.get(credential.issuer_id)
+        by_issuer.setdefault(credential.issuer_id, []).append(credential)
+    for issuer_id, group in sorted(by_issuer.items()):
+        first = status_lists.allocate(db, issuer_id, len(group))
+        for offset, credential in enumerate(group):
+            credential.status_list_index = first + offset
+
+    try:
+        with db.begin_nested():
+            db.add_all(credentials)
+    except IntegrityError:
+        # A concurrent writer issued one of them since the check; insert row by row
+        issued = []
+        for position, credential in pending:
+            retry = _build_credential(rows[position], issued_at)
+            for column in ("verification_code", "public_url", "state_code", "status_list_index"):
+                setattr(retry, column, getattr(credential, column))
+            try:
+                with db.begin_nested():
+                    db.add(retry)
+                issued.append((position, retry))
+            except IntegrityError:
+                duplicates[position] = fingerprints.find_duplicate(db, retry.fingerprint)
+        pending = issued
+        credentials = [credential for _, credential in pending]
+
+    levels = [
+        {"credential_id": credential.id, "nsqf_level": rows[position]["nsqf_level"]}
+        for position, credential in pending if rows[position].get("nsqf_level") is not None
+    ]
+    if levels:
+        db.bulk_insert_mappings(models.CredentialMetadata, levels)
+    rollups.apply_many(db, [(None, snapshot) for snapshot in rollups.snapshots(db, credentials)])
+    skill_events = trending.skill_counts(credential.skills for credential in credentials)
+    trending.record(db, "issued", skill_events)
+    learner_ids = sorted({credential.learner_id for credential in credentials})
+    search.index_learners(db, learner_ids)
+    for learner_id in learner_ids:
+        matching.update_learner_matches(db, learner_id)
+    issued = {position: credential.id for position, credential in pending}
+    for position, earlier in repeats.items():
+        duplicates[position] = issued.get(earlier, duplicates.get(earlier))
+    # Detached instances keep their loaded state through the commit
+    db.flush()
+    for credential in credentials:
+        db.expunge(credential)
+
+    def publish():
+        cache.bump("learner", *learner_ids)
+        cache.bump("issuer", *issuer_ids)
+        for credential in credentials:
+            autocomplete.record_credential(credential)
+        trending.observe("issued", skill_events)
+    _after_commit(db, publish)
+    if commit:
+        db.commit()
+    return issued, duplicates
+
 def get_credential(db: Session, credential_id: int):
     return db.query(models.Credential).options(
         joinedload(models.Credential.issuer),
@@ -213,26 +465,77 @@ def get_public_credential(db: Session, public_url: str):
     ).first()
 
 def get_credentials_by_learner(db: Session, learner_id: int, skip: int = 0, limit: int = 100):
-    credentials = db.query(models.Credential).options(
+    # NSQF level comes from the same query via an outer join on metadata
+    rows = db.query(models.Credential, models.CredentialMetadata.nsqf_level).options(
         joinedload(models.Credential.issuer),
         joinedload(models.Credential.badge_template)
+    ).outerjoin(
+        models.CredentialMetadata, models.CredentialMetadata.credential_id == models.Credential.id
     ).filter(
         models.Credential.learner_id == learner_id
     ).offset(skip).limit(limit).all()
     
-    # Enrich credentials with metadata
-    for credential in credentials:
-        # Add metadata if exists
-        metadata = db.query(models.CredentialMetadata).filter(
-            models.CredentialMetadata.credential_id == credential.id
-        ).first()
-        
+    credentials = []
+    for credential, nsqf_level in rows:
         # Set additional fields for frontend compatibility
-        credential.nsqf_level = metadata.nsqf_level if metadata else None
+        credential.nsqf_level = nsqf_level
         credential.issuer_name = credential.issuer.name if credential.issuer else "Unknown"
         credential.issue_date = credential.issued_at
         credential.verification_status = "verified" if credential.status == models.CredentialStatus.verified else "pending"
         credential.credential_type = credential.badge_template.badge_type.value if credential.badge_template else "certificate"
+        credentials.append(credential)
+    
+    return credentials
+
+# Columns needed to render schemas.CredentialWithDetails without loading ORM objects
+_RECENT_CREDENTIAL_COLUMNS = [
+    "id", "title", "description", "skills", "skill_category", "tags", "completion_date",
+    "expiry_date", "evidence_url", "is_public", "issuer_id", "learner_id", "badge_template_id",
+    "status", "verification_code", "public_url", "shared_on_linkedin", "issued_at", "updated_at",
+]
+_RECENT_ISSUER_COLUMNS = [
+    "id", "user_id", "name", "organization", "description", "website", "logo_url",
+    "industry", "location", "verified",
+]
+_RECENT_TEMPLATE_COLUMNS = [
+    "id", "issuer_id", "name", "description", "badge_type", "criteria", "skills", "image_url",
+    "estimated_duration", "prerequisites", "tags", "active", "created_at",
+]
+
+def get_recent_learner_credentials(db: Session, learner_id: int, limit: int = 5):
+    """Most recent credentials of a learner as plain dicts, in a single query"""
+    columns = [getattr(models.Credential, name) for name in _RECENT_CREDENTIAL_COLUMNS]
+    columns += [getattr(models.Issuer, name).label(f"issuer__{name}") for name in _RECENT_ISSUER_COLUMNS]
+    columns += [getattr(models.BadgeTemplate, name).label(f"template__{name}") for name in _RECENT_TEMPLATE_COLUMNS]
+    columns.append(models.CredentialMetadata.nsqf_level)
+    
+    rows = db.query(*columns).join(
+        models.Issuer, models.Issuer.id == models.Credential.issuer_id
+    ).outerjoin(
+        models.BadgeTemplate, models.BadgeTemplate.id == models.Credential.badge_template_id
+    ).outerjoin(
+        models.CredentialMetadata, models.CredentialMetadata.credential_id == models.Credential.id
+    ).filter(
+        models.Credential.learner_id == learner_id
+    ).order_by(
+        models.Credential.issued_at.desc(), models.Credential.id.desc()
+    ).limit(limit).all()
+    
+    credentials = []
+    for row in rows:
+        values = row._mapping
+        credential = {name: values[name] for name in _RECENT_CREDENTIAL_COLUMNS}
+        credential["issuer"] = {name: values[f"issuer__{name}"] for name in _RECENT_ISSUER_COLUMNS}
+        if values["template__id"] is not None:
+            credential["badge_template"] = {name: values[f"template__{name}"] for name in _RECENT_TEMPLATE_COLUMNS}
+            credential["credential_type"] = values["template__badge_type"].value
+        else:
+            credential["badge_template"] = None
+            credential["credential_type"] = "certificate"
+        credential["nsqf_level"] = values["nsqf_level"]
+        credential["issue_date"] = values["issued_at"]
+        credential["verification_status"] = "verified" if values["status"] == models.CredentialStatus.verified else "pending"
+        credentials.append(credential)
     
     return credentials
 
@@ -247,11 +550,46 @@ def get_public_credentials_by_learner(db: Session, learner_id: int, skip: int =
 
 def get_credentials_by_issuer(db: Session, issuer_id: int, skip: int = 0, limit: int = 100):
     return db.query(models.Credential).options(
+        joinedload(models.Credential.issuer),
         joinedload(models.Credential.badge_template)
     ).filter(
         models.Credential.issuer_id == issuer_id
     ).offset(skip).limit(limit).all()
 
+def stream_credentials_by_issuer(db: Session, issuer_id: int, batch_size: int = 1000):
+    """Yield an issuer's credentials in batches of rows from a server-side cursor.
+
+    Only the exported columns are selected and no ORM objects are built, so
+    memory stays bounded by batch_size however many credentials exist.
+    """
+    query = db.query(
+        models.Credential.id,
+        models.Credential.title,
+        models.Credential.description,
+        models.User.email.label("learner_email"),
+        models.Credential.badge_template_id,
+        models.Credential.skills,
+        models.Credential.skill_category,
+        models.Credential.status,
+        models.Credential.completion_date,
+        models.Credential.expiry_date,
+        models.Credential.issued_at,
+        models.Credential.verification_code,
+        models.Credential.public_url,
+        models.Credential.is_public
+    ).join(
+        models.User, models.User.id == models.Credential.learner_id
+    ).filter(
+        models.Credential.issuer_id == issuer_id
+    ).order_by(models.Credential.id).execution_options(yield_per=batch_size)
+    
+    result = db.execute(query.statement)
+    try:
+        for batch in result.partitions():
+            yield batch
+    finally:
+        result.close()
+
 def verify_credential(db: Session, verification_code: str):
     credential = db.query(models.Credential).options(
         joinedload(models.Credential.issuer),
@@ -261,12 +599,141 @@ def verify_credential(db: Session, verification_code: str):
     if not credential:
         raise HTTPException(status_code=404, detail="Credential not found")
     
+    # A public lookup never reinstates a revoked or expired credential, and only
+    # rewrites rollups, status lists and indexes when the status actually changes
+    if credential.status in (
+        models.CredentialStatus.revoked, models.CredentialStatus.expired, models.CredentialStatus.verified
+    ):
+        return credential
+    
     # Update status to verified
+    before = rollups.snapshot(db, credential)
+    old_status = credential.status
     credential.status = models.CredentialStatus.verified
+    db.flush()
+    rollups.apply(db, before, rollups.snapshot(db, credential))
+    status_lists.update(db, [(credential, old_status, credential.status)])
+    search.index_learner(db, credential.learner_id)
+    matching.update_learner_matches(db, credential.learner_id)
     db.commit()
     db.refresh(credential)
+    cache.bump("learner", credential.learner_id)
+    cache.bump("issuer", credential.issuer_id)
     return credential
 
+def update_credential(db: Session, credential_id: int, credential_update: schemas.CredentialUpdate):
+    credential = db.query(models.Credential).filter(models.Credential.id == credential_id).first()
+    if not credential:
+        return None
+    
+    before = rollups.snapshot(db, credential)
+    old_status = credential.status
+    update_data = credential_update.dict(exclude_unset=True)
+    if "skills" in update_data:
+        update_data["skills"] = skills.normalize_skills(update_data["skills"])
+    signed_content = fingerprints.fingerprint(credential)
+    for field, value in update_data.items():
+        setattr(credential, field, value)
+    _stamp_fingerprint(db, credential)
+    if fingerprints.fingerprint(credential) != signed_content or not credential.signed_credential:
+        signing.sign_credential(db, credential)
+    
+    # Skills and status (e.g. revocation) change what the credential evidences
+    _flush_credential(db)
+    rollups.apply(db, before, rollups.snapshot(db, credential))
+    status_lists.update(db, [(credential, old_status, credential.status)])
+    search.index_learner(db, credential.learner_id)
+    matching.update_learner_matches(db, credential.learner_id)
+    db.commit()
+    db.refresh(credential)
+    cache.bump("learner", credential.learner_id)
+    cache.bump("issuer", credential.issuer_id)
+    return credential
+
+def delete_credential(db: Session, credential_id: int):
+    credential = db.query(models.Credential).filter(models.Credential.id == credential_id).first()
+    if not credential:
+        return False
+    
+    learner_id, issuer_id = credential.learner_id, credential.issuer_id
+    rollups.apply(db, rollups.snapshot(db, credential), None)
+    # Deleted credentials must stop verifying for holders of the status list
+    status_lists.update(db, [(credential, credential.status, models.CredentialStatus.revoked)])
+    for dependent in (models.CredentialShare, models.CredentialView, models.CredentialMetadata,
+                      models.BlockchainVerification, models.DigiLockerIntegration):
+        db.query(dependent).filter(dependent.credential_id == credential_id).delete(synchronize_session=False)
+    db.delete(credential)
+    db.flush()
+    search.index_learner(db, learner_id)
+    matching.update_learner_matches(db, learner_id)
+    db.commit()
+    cache.bump("learner", learner_id)
+    cache.bump("issuer", issuer_id)
+    pathways.invalidate()
+    return True
+
+def upsert_credential_metadata(db: Session, credential: models.Credential, metadata: schemas.CredentialMetadata):
+    before = rollups.snapshot(db, credential)
+    db_metadata = db.query(models.CredentialMetadata).filter(
+        models.CredentialMetadata.credential_id == credential.id
+    ).first()
+    if not db_metadata:
+        db_metadata = models.CredentialMetadata(credential_id=credential.id)
+        db.add(db_metadata)
+    
+    metadata_data = metadata.dict(exclude_unset=True)
+    if metadata_data.get("qualification_pathway") is not None:
+        metadata_data["qualification_pathway"] = metadata_data["qualification_pathway"].value
+    for field, value in metadata_data.items():
+        setattr(db_metadata, field, value)
+    
+    # The NSQF level feeds the skill index, job matches and national rollups
+    db.flush()
+    rollups.apply(db, before, rollups.snapshot(db, credential))
+    search.index_learner(db, credential.learner_id)
+    matching.update_learner_matches(db, credential.learner_id)
+    db.commit()
+    db.refresh(db_metadata)
+    cache.bump("learner", credential.learner_id)
+    cache.bump("issuer", credential.issuer_id)
+    pathways.invalidate()
+    return db_metadata
+
+def expire_credentials(db: Session, now: Optional[datetime] = None, batch_size: int = 500) -> int:
+    """Mark credentials past their expiry date as expired; returns how many were expired.
+
+    Run periodically (scripts/expire_credentials.py). Each batch is committed
+    with its rollup, skill index and job match updates.
+    """
+    now = now or datetime.now(timezone.utc)
+    expired = 0
+    while True:
+        batch = db.query(models.Credential).filter(
+            models.Credential.expiry_date.isnot(None),
+            models.Credential.expiry_date < now,
+            models.Credential.status.notin_([models.CredentialStatus.revoked, models.CredentialStatus.expired])
+        ).order_by(models.Credential.id).limit(batch_size).all()
+        if not batch:
+            return expired
+        changes = []
+        for credential in batch:
+            before = rollups.snapshot(db, credential)
+            changes.append((credential, credential.status, models.CredentialStatus.expired))
+            credential.status = models.CredentialStatus.expired
+            credential.fingerprint = None
+            db.flush()
+            rollups.apply(db, before, rollups.snapshot(db, credential))
+        status_lists.update(db, changes)
+        learner_ids = {credential.learner_id for credential in batch}
+        issuer_ids = {credential.issuer_id for credential in batch}
+        for learner_id in learner_ids:
+            search.index_learner(db, learner_id)
+            matching.update_learner_matches(db, learner_id)
+        db.commit()
+        cache.bump("learner", *learner_ids)
+        cache.bump("issuer", *issuer_ids)
+        expired += len(batch)
+
 def share_credential(db: Session, credential_id: int, platform: str, user_id: int):
     # Record the share
     share = models.CredentialShare(
@@ -277,12 +744,16 @@ def share_credential(db: Session, credential_id: int, platform: str, user_id: in
     db.add(share)
     
     # Update LinkedIn sharing flag if applicable
+    credential = None
     if platform == "linkedin":
         credential = db.query(models.Credential).filter(models.Credential.id == credential_id).first()
         if credential:
             credential.shared_on_linkedin = True
     
     db.commit()
+    if credential:
+        cache.bump("learner", credential.learner_id)
+        cache.bump("issuer", credential.issuer_id)
     return share
 
 def record_credential_view(db: Session, credential_id: int, viewer_ip: str = None, user_agent: str = None):
@@ -292,55 +763,79 @@ def record_credential_view(db: Session, credential_id: int, viewer_ip: str = Non
         viewer_user_agent=user_agent
     )
     db.add(view)
+    issuer_id = db.query(models.Credential.issuer_id).filter(models.Credential.id == credential_id).scalar()
     db.commit()
+    # View counts are part of the issuer's cached template counts
+    cache.bump("issuer", issuer_id)
     return view
 
 # Dashboard data
-def get_learner_stats(db: Session, learner_id: int):
-    total = db.query(models.Credential).filter(models.Credential.learner_id == learner_id).count()
-    pending = db.query(models.Credential).filter(
-        models.Credential.learner_id == learner_id,
-        models.Credential.status == models.CredentialStatus.pending
-    ).count()
-    verified = db.query(models.Credential).filter(
-        models.Credential.learner_id == learner_id,
-        models.Credential.status == models.CredentialStatus.verified
-    ).count()
-    public = db.query(models.Credential).filter(
-        models.Credential.learner_id == learner_id,
-        models.Credential.is_public == True
-    ).count()
-    shared = db.query(models.Credential).filter(
-        models.Credential.learner_id == learner_id,
-        models.Credential.shared_on_linkedin == True
-    ).count()
+# Job requirement operations
+
+def get_job_requirement(db: Session, job_id: int):
+    return db.query(models.JobRequirement).filter(models.JobRequirement.id == job_id).first()
+
+def get_job_requirements_by_employer(db: Session, employer_id: int, active_only: bool = False):
+    query = db.query(models.JobRequirement).filter(models.JobRequirement.employer_id == employer_id)
+    if active_only:
+        query = query.filter(models.JobRequirement.is_active == True)
+    return query.order_by(models.JobRequirement.id).all()
+
+def _index_job(db: Session, job: models.JobRequirement):
+    try:
+        matching.index_job(db, job)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+def create_job_requirement(db: Session, job: schemas.JobRequirementCreate, employer_id: int):
+    job_data = job.dict()
+    job_data["required_skills"] = skills.normalize_skills(job_data["required_skills"])
+    job_data["preferred_skills"] = skills.normalize_skills(job_data["preferred_skills"])
+    if job_data["qualification_pathway"] is not None:
+        job_data["qualification_pathway"] = job_data["qualification_pathway"].value
+    db_job = models.JobRequirement(employer_id=employer_id, is_active=True, **job_data)
+    locations.stamp(db_job)
+    db.add(db_job)
+    db.flush()
+    _index_job(db, db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def update_job_requirement(db: Session, job_id: int, job_update: schemas.JobRequirementUpdate):
+    db_job = get_job_requirement(db, job_id)
+    if not db_job:
+        return None
     
-    return {
-        "total_credentials": total,
-        "pending_credentials": pending,
-        "verified_credentials": verified,
-        "public_credentials": public,
-        "shared_credentials": shared
-    }
+    update_data = job_update.dict(exclude_unset=True)
+    for field in ("required_skills", "preferred_skills"):
+        if field in update_data:
+            update_data[field] = skills.normalize_skills(update_data[field])
+    if update_data.get("qualification_pathway") is not None:
+        update_data["qualification_pathway"] = update_data["qualification_pathway"].value
+    for field, value in update_data.items():
+        setattr(db_job, field, value)
+    if "location" in update_data:
+        locations.stamp(db_job)
+    
+    # Only the matching inputs require re-ranking the job
+    if update_data.keys() & {"required_skills", "preferred_skills", "min_nsqf_level", "is_active"}:
+        db.flush()
+        _index_job(db, db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
 
-def get_issuer_stats(db: Session, issuer_id: int):
-    total = db.query(models.Credential).filter(models.Credential.issuer_id == issuer_id).count()
-    pending = db.query(models.Credential).filter(
-        models.Credential.issuer_id == issuer_id,
-        models.Credential.status == models.CredentialStatus.pending
-    ).count()
-    verified = db.query(models.Credential).filter(
-        models.Credential.issuer_id == issuer_id,
-        models.Credential.status == models.CredentialStatus.verified
-    ).count()
-    public = db.query(models.Credential).filter(
-        models.Credential.issuer_id == issuer_id,
-        models.Credential.is_public == True
-    ).count()
-    shared = db.query(models.Credential).filter(
-        models.Credential.issuer_id == issuer_id,
-        models.Credential.shared_on_linkedin == True
-    ).count()
+def _credential_stats(db: Session, *criteria):
+    """Dashboard counters for the credentials matching criteria, in one aggregate query"""
+    total, pending, verified, public, shared = db.query(
+        func.count(models.Credential.id),
+        func.count(case((models.Credential.status == models.CredentialStatus.pending, 1))),
+        func.count(case((models.Credential.status == models.CredentialStatus.verified, 1))),
+        func.count(case((models.Credential.is_public == True, 1))),
+        func.count(case((models.Credential.shared_on_linkedin == True, 1)))
+    ).filter(*criteria).one()
     
     return {
         "total_credentials": total,
@@ -350,6 +845,12 @@ def get_issuer_stats(db: Session, issuer_id: int):
         "shared_credentials": shared
     }
 
+def get_learner_stats(db: Session, learner_id: int):
+    return _credential_stats(db, models.Credential.learner_id == learner_id)
+
+def get_issuer_stats(db: Session, issuer_id: int):
+    return _credential_stats(db, models.Credential.issuer_id == issuer_id)
+
 def get_skill_categories(db: Session, learner_id: int = None):
     """Get distinct skill categories for a learner or globally"""
     query = db.query(models.Credential.skill_category).distinct()
@@ -359,7 +860,6 @@ def get_skill_categories(db: Session, learner_id: int = None):
     return categories
 
 def get_popular_skills(db: Session, limit: int = 10):
-    """Get most popular skills across all credentials"""
-    # This would require more complex JSON aggregation in a real implementation
-    # For now, return some sample skills
-    return ["Python", "Project Management", "Data Analysis", "Communication", "Leadership"]
+    """Get the currently trending skills, from recent issuance and verification"""
+    trending.refresh_if_stale()
+    return [entry["skill"] for entry in trending.get_tracker().top(limit)]
@@ -0,0 +1,321 @@
+"""
+DigiLocker document sync.
+
+Every linked DigiLocker document is checked against the provider again once
+its integration's ``last_synced`` is older than DIGILOCKER_SYNC_INTERVAL_SECONDS.
+Integrations that were never synced go first. Due integrations are paged by
+(last_synced, id) on the ``ix_digilocker_integrations_last_synced`` index, and
+each page is claimed with ``SKIP LOCKED`` where the database supports it, so
+several workers can sync at once. The documents of a page are fetched
+concurrently on one asyncio event loop. Their results are then written back
+with one executemany and one commit per page.
+
+All requests go through one pooled ``httpx.AsyncClient``. Each host has:
+
+- at most DIGILOCKER_MAX_PER_HOST requests in flight;
+- a DIGILOCKER_TIMEOUT_SECONDS timeout;
+- up to DIGILOCKER_RETRIES retries of timeouts, connection errors, 429 and
+  5xx, with full-jitter exponential backoff (or the server's Retry-After);
+- a circuit breaker. After BREAKER_FAILURES consecutive failures the host is
+  skipped for BREAKER_RESET_SECONDS, then a single probe request decides
+  whether it is healthy again.
+
+A document that could not be checked keeps its status and ``last_synced``.
+It is therefore still due, and the next run picks it up again. A document the
+provider does not know (404) is marked failed.
+
+``start_scheduler`` runs a sync every DIGILOCKER_POLL_SECONDS in a background
+thread when DIGILOCKER_API_URL is set. scripts/sync_digilocker.py does the same
+from cron.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy import and_, bindparam, or_
+from sqlalchemy.orm import Session
+from . import models
+from .db import SessionLocal
+
+# Load environment variables from .env file
+load_dotenv()
+
+DIGILOCKER_API_URL = os.getenv("DIGILOCKER_API_URL", "")
+DIGILOCKER_API_TOKEN = os.getenv("DIGILOCKER_API_TOKEN", "")
+DIGILOCKER_SYNC_INTERVAL_SECONDS = int(os.getenv("DIGILOCKER_SYNC_INTERVAL_SECONDS", "86400"))  # How stale a document may get
+DIGILOCKER_POLL_SECONDS = int(os.getenv("DIGILOCKER_POLL_SECONDS", "300"))
+DIGILOCKER_SYNC_SCHEDULER = os.getenv("DIGILOCKER_SYNC_SCHEDULER", "true").lower() == "true"
+DIGILOCKER_BATCH_SIZE = int(os.getenv("DIGILOCKER_BATCH_SIZE", "500"))
+DIGILOCKER_MAX_PER_HOST = int(os.getenv("DIGILOCKER_MAX_PER_HOST", "20"))
+DIGILOCKER_TIMEOUT_SECONDS = float(os.getenv("DIGILOCKER_TIMEOUT_SECONDS", "10"))
+DIGILOCKER_RETRIES = int(os.getenv("DIGILOCKER_RETRIES", "3"))
+
+BREAKER_FAILURES = 5
+BREAKER_RESET_SECONDS = 30.0
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 10.0
+
+STATUSES = ("pending", "verified", "failed")
+_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+_EARLIEST = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+logger = logging.getLogger(__name__)
+
+
+class SyncError(Exception):
+    """A document could not be checked; its integration stays due"""
+
+class CircuitOpenError(SyncError):
+    """The provider host is failing and is being skipped for now"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after reset_seconds lets one probe through"""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._count = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def success(self):
+        self._count = 0
+        self._opened_at = None
+        self._probing = False
+
+    def failure(self):
+        self._count += 1
+        self._probing = False
+        # A failed probe reopens the circuit straight away
+        if self._opened_at is not None or self._count >= self.failures:
+            self._opened_at = time.monotonic()
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform over the exponential backoff window"""
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return min(RETRY_MAX_SECONDS, max(0.0, float(response.headers["retry-after"])))
+    except (KeyError, ValueError):
+        return None
+
+
+class DigiLockerClient:
+    """Pooled async HTTP client with per-host concurrency limits, retries and circuit breakers.
+
+    One instance belongs to one event loop; use it as an async context manager.
+    ``transport`` is passed to httpx, e.g. to point the client at a stub.
+    """
+
+    def __init__(self, base_url: str = DIGILOCKER_API_URL, token: str = DIGILOCKER_API_TOKEN,
+                 max_per_host: int = DIGILOCKER_MAX_PER_HOST, timeout: float = DIGILOCKER_TIMEOUT_SECONDS,
+                 retries: int = DIGILOCKER_RETRIES, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self.max_per_host = max_per_host
+        self.retries = retries
+        headers = {"Accept": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        # In-flight requests are bounded per host below; the pool only keeps connections alive
+        self._http = httpx.AsyncClient(
+            headers=headers,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=max_per_host),
+            transport=transport,
+        )
+        self._slots = {}  # host -> semaphore
+        self._breakers = {}  # host -> CircuitBreaker
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def document_url(self, document_uri: str) -> str:
+        """Absolute document URLs are fetched as is, DigiLocker URIs from the API"""
+        if urlsplit(document_uri).scheme in ("http", "https"):
+            return document_uri
+        return f"{self.base_url}/documents/{quote(document_uri, safe='')}"
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker()
+        return self._breakers[host]
+
+    async def get(self, url: str) -> httpx.Response:
+        """GET with the host's concurrency limit, retries and circuit breaker"""
+        host = urlsplit(url).netloc
+        if host not in self._slots:
+            self._slots[host] = asyncio.Semaphore(self.max_per_host)
+        breaker = self.breaker(host)
+        for attempt in range(self.retries + 1):
+            delay = None
+            try:
+                async with self._slots[host]:
+                    # Checked once a slot is free, so requests queued behind failing ones see the open circuit
+                    if not breaker.allow():
+                        raise CircuitOpenError(f"Circuit open for {host}")
+                    response = await self._http.get(url)
+            except httpx.TransportError as e:  # Timeouts included
+                error = SyncError(f"{host}: {type(e).__name__}")
+            else:
+                if response.status_code not in _RETRY_STATUS_CODES:
+                    breaker.success()
+                    return response
+                error = SyncError(f"{host}: HTTP {response.status_code}")
+                delay = _retry_after(response)
+            breaker.failure()
+            if attempt == self.retries:
+                raise error
+            await asyncio.sleep(_backoff(attempt) if delay is None else delay)
+
+    async def document_status(self, document_uri: str) -> str:
+        """The provider's status of a document: pending, verified or failed"""
+        response = await self.get(self.document_url(document_uri))
+        if response.status_code == 404:
+            return "failed"
+        if response.status_code >= 400:
+            raise SyncError(f"HTTP {response.status_code} for {document_uri}")
+        try:
+            value = str(response.json().get("status", "")).lower()
+        except (ValueError, AttributeError):
+            raise SyncError(f"Malformed response for {document_uri}")
+        return value if value in STATUSES else "pending"
+
+
+# Sync pipeline
+
+def _due(db: Session, cutoff: datetime, after: Tuple[Optional[datetime], int], limit: int):
+    """Next page of due integrations after the (last_synced, id) cursor"""
+    integration = models.DigiLockerIntegration
+    query = db.query(integration.id, integration.document_uri, integration.last_synced).filter(
+        integration.document_uri.isnot(None)
+    )
+    last_synced, last_id = after
+    if last_synced is None:
+        query = query.filter(integration.last_synced.is_(None), integration.id > last_id).order_by(integration.id)
+    else:
+        query = query.filter(
+            integration.last_synced < cutoff,
+            or_(
+                integration.last_synced > last_synced,
+                and_(integration.last_synced == last_synced, integration.id > last_id)
+            )
+        ).order_by(integration.last_synced, integration.id)
+    return query.limit(limit).with_for_update(skip_locked=True).all()
+
+def _write_back(db: Session, results: List[Tuple[int, str]], synced_at: datetime):
+    table = models.DigiLockerIntegration.__table__
+    statement = table.update().where(table.c.id == bindparam("integration_id")).values(
+        verification_status=bindparam("status"), last_synced=bindparam("synced_at")
+    )
+    if results:
+        db.execute(statement, [
+            {"integration_id": integration_id, "status": value, "synced_at": synced_at}
+            for integration_id, value in results
+        ])
+    db.commit()
+
+async def sync_due(db: Session, client: Optional[DigiLockerClient] = None, batch_size: int = DIGILOCKER_BATCH_SIZE,
+                   interval: int = DIGILOCKER_SYNC_INTERVAL_SECONDS, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Check every due integration's document once; returns counts per status and errors"""
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(seconds=interval)
+    totals = {status: 0 for status in STATUSES}
+    totals["errors"] = 0
+    own_client = client is None
+    client = client or DigiLockerClient()
+    after = (None, 0)  # Never-synced integrations first, then oldest first
+    try:
+        while True:
+            rows = _due(db, cutoff, after, batch_size)
+            if not rows:
+                db.rollback()
+                if after[0] is None:
+                    after = (_EARLIEST, 0)
+                    continue
+                return totals
+            after = (rows[-1].last_synced, rows[-1].id)
+            outcomes = await asyncio.gather(
+                *(client.document_status(row.document_uri) for row in rows), return_exceptions=True
+            )
+            results = []
+            for row, outcome in zip(rows, outcomes):
+                if isinstance(outcome, SyncError):
+                    totals["errors"] += 1
+                    logger.debug("DigiLocker sync of integration %d failed: %s", row.id, outcome)
+                    continue
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                results.append((row.id, outcome))
+                totals[outcome] += 1
+            _write_back(db, results, datetime.now(timezone.utc))
+    finally:
+        if own_client:
+            await client.aclose()
+
+def run_sync(batch_size: int = DIGILOCKER_BATCH_SIZE) -> Dict[str, int]:
+    """One sync run on its own event loop and session"""
+    db = SessionLocal()
+    try:
+        return asyncio.run(sync_due(db, batch_size=batch_size))
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+_stop = threading.Event()
+_thread = None
+
+def _run_scheduler():
+    while not _stop.wait(DIGILOCKER_POLL_SECONDS):
+        try:
+            totals = run_sync()
+            if any(totals.values()):
+                logger.info("DigiLocker sync: %s", totals)
+        except Exception:
+            logger.exception("DigiLocker sync failed")
+
+def start_scheduler():
+    """Sync due integrations periodically in a background thread (when configured)"""
+    global _thread
+    if not DIGILOCKER_SYNC_SCHEDULER or not DIGILOCKER_API_URL or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run_scheduler, name="digilocker-sync", daemon=True)
+    _thread.start()
+
+def stop_scheduler():
+    _stop.set()
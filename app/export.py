@@ -0,0 +1,65 @@
+"""
+Streaming export of issued credentials as NDJSON or CSV.
+
+Rows arrive in batches from ``crud.stream_credentials_by_issuer`` and each
+batch is encoded to one chunk, so a StreamingResponse never holds more than a
+single batch in memory.
+"""
+import csv
+import io
+from . import crud, serialization
+from .db import SessionLocal
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+EXPORT_COLUMNS = [
+    "id", "title", "description", "learner_email", "badge_template_id", "skills",
+    "skill_category", "status", "completion_date", "expiry_date", "issued_at",
+    "verification_code", "public_url", "is_public",
+]
+
+def _row_to_dict(row):
+    record = dict(row._mapping)
+    record["status"] = record["status"].value if record["status"] is not None else None
+    for field in ("completion_date", "expiry_date", "issued_at"):
+        if record[field] is not None:
+            record[field] = record[field].isoformat()
+    return record
+
+def ndjson_chunks(batches):
+    for batch in batches:
+        yield b"".join(serialization.dumps(_row_to_dict(row)) + b"\n" for row in batch)
+
+def csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    for batch in batches:
+        for row in batch:
+            record = _row_to_dict(row)
+            record["skills"] = ";".join(record["skills"] or [])
+            writer.writerow([record[column] for column in EXPORT_COLUMNS])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+def stream_issuer_credentials(issuer_id: int, export_format: str, batch_size: int = 1000):
+    """Generate encoded export chunks for an issuer.
+
+    Uses its own session because the response body is produced after the
+    request handler (and its injected session) has returned.
+    """
+    db_sess = SessionLocal()
+    try:
+        batches = crud.stream_credentials_by_issuer(db_sess, issuer_id, batch_size)
+        encode = csv_chunks if export_format == "csv" else ndjson_chunks
+        for chunk in encode(batches):
+            yield chunk
+    finally:
+        db_sess.close()
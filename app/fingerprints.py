@@ -0,0 +1,186 @@
+"""
+Canonical credential fingerprints.
+
+A credential's issued content is serialized as JSON with sorted keys, no
+whitespace, UTF-8 and UTC second-precision timestamps. The content is who
+holds it, who issued it, the template, title, description, skills, category,
+completion date and expiry date. The fingerprint is the SHA-256 of that
+serialization, prefixed with a format version.
+
+Fingerprints are computed by the crud layer when a credential is issued or
+its content is updated, and they are stored under a unique index. Issuing the
+same credential twice is therefore rejected, and recomputing a fingerprint is
+a cheap way to detect content changed behind the API's back. A credential
+that is revoked or expires gives its fingerprint up, so the same content can
+be issued again (re-issue after a revocation, recertification). Identifiers
+that differ between copies (id, verification code, issue time) are left out.
+Anchoring adds them back to commit to one particular issued record.
+
+``backfill`` fingerprints existing active rows in a process pool, one id
+range per task. When existing rows duplicate each other, the first one
+fingerprinted keeps the fingerprint and the others are left NULL and
+reported. It also releases fingerprints still held by revoked or expired rows.
+"""
+import hashlib
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import bindparam, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models
+from .db import SessionLocal, engine
+
+FINGERPRINT_VERSION = "v1"
+BACKFILL_CHUNK_SIZE = 5000  # Ids per backfill task
+BACKFILL_WORKERS = 4
+
+# Credentials in these states do not hold a fingerprint
+RELEASED_STATUSES = [models.CredentialStatus.revoked, models.CredentialStatus.expired]
+
+logger = logging.getLogger(__name__)
+
+
+def timestamp(moment: Optional[datetime]) -> Optional[str]:
+    """UTC, second precision: stable across databases that keep microseconds or not"""
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def canonical_json(content: dict) -> bytes:
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def content(credential) -> dict:
+    """The fields a fingerprint covers, from a model instance or a row"""
+    return {
+        "learner_id": credential.learner_id,
+        "issuer_id": credential.issuer_id,
+        "badge_template_id": credential.badge_template_id,
+        "title": credential.title,
+        "description": credential.description,
+        "skills": list(credential.skills or []),
+        "skill_category": credential.skill_category,
+        "completion_date": timestamp(credential.completion_date),
+        "expiry_date": timestamp(credential.expiry_date),
+    }
+
+def fingerprint(credential) -> str:
+    """Hex SHA-256 of the versioned canonical content"""
+    digest = hashlib.sha256(FINGERPRINT_VERSION.encode("ascii") + b"\n" + canonical_json(content(credential)))
+    return digest.hexdigest()
+
+def find_duplicate(db: Session, value: str, exclude_id: Optional[int] = None) -> Optional[int]:
+    """Id of another credential with this fingerprint, if any"""
+    query = db.query(models.Credential.id).filter(models.Credential.fingerprint == value)
+    if exclude_id is not None:
+        query = query.filter(models.Credential.id != exclude_id)
+    row = query.first()
+    return row[0] if row else None
+
+
+# Backfill
+
+def _columns():
+    credential = models.Credential
+    return (
+        credential.id, credential.learner_id, credential.issuer_id, credential.badge_template_id,
+        credential.title, credential.description, credential.skills, credential.skill_category,
+        credential.completion_date, credential.expiry_date,
+    )
+
+def backfill_range(start_id: int, end_id: int) -> Tuple[int, List[int]]:
+    """Fingerprint unfingerprinted credentials with start_id <= id < end_id.
+
+    Returns (rows fingerprinted, ids left NULL because another credential
+    already holds their fingerprint).
+    """
+    db = SessionLocal()
+    try:
+        rows = db.query(*_columns()).filter(
+            models.Credential.id >= start_id,
+            models.Credential.id < end_id,
+            models.Credential.fingerprint.is_(None),
+            models.Credential.status.notin_(RELEASED_STATUSES)
+        ).order_by(models.Credential.id).all()
+        if not rows:
+            return 0, []
+
+        values, seen = {}, set()
+        duplicates = []
+        for row in rows:
+            value = fingerprint(row)
+            if value in seen:
+                duplicates.append(row.id)
+            else:
+                seen.add(value)
+                values[row.id] = value
+        taken = {value for (value,) in db.query(models.Credential.fingerprint).filter(
+            models.Credential.fingerprint.in_(list(values.values()))
+        )}
+        for credential_id, value in list(values.items()):
+            if value in taken:
+                duplicates.append(credential_id)
+                del values[credential_id]
+
+        table = models.Credential.__table__
+        statement = table.update().where(table.c.id == bindparam("credential_id")).values(fingerprint=bindparam("value"))
+        try:
+            if values:
+                db.execute(statement, [{"credential_id": key, "value": value} for key, value in values.items()])
+            db.commit()
+            return len(values), sorted(duplicates)
+        except IntegrityError:
+            # A concurrent task fingerprinted a duplicate first; fall back to row by row
+            db.rollback()
+        written = 0
+        for credential_id, value in values.items():
+            try:
+                with db.begin_nested():
+                    db.execute(statement, {"credential_id": credential_id, "value": value})
+                written += 1
+            except IntegrityError:
+                duplicates.append(credential_id)
+        db.commit()
+        return written, sorted(duplicates)
+    finally:
+        db.close()
+
+def _init_worker():
+    # Connections inherited from the parent process must not be shared
+    engine.dispose(close=False)
+
+def release_inactive(db: Session) -> int:
+    """Clear the fingerprints of revoked and expired credentials; returns how many"""
+    released = db.query(models.Credential).filter(
+        models.Credential.fingerprint.isnot(None),
+        models.Credential.status.in_(RELEASED_STATUSES)
+    ).update({models.Credential.fingerprint: None}, synchronize_session=False)
+    db.commit()
+    return released
+
+def backfill(db: Session, workers: int = BACKFILL_WORKERS, chunk_size: int = BACKFILL_CHUNK_SIZE) -> Tuple[int, List[int]]:
+    """Fingerprint every active credential without one; returns (fingerprinted, duplicate ids)"""
+    release_inactive(db)
+    low, high = db.query(func.min(models.Credential.id), func.max(models.Credential.id)).filter(
+        models.Credential.fingerprint.is_(None),
+        models.Credential.status.notin_(RELEASED_STATUSES)
+    ).one()
+    db.rollback()
+    if low is None:
+        return 0, []
+    ranges = [(start, min(start + chunk_size, high + 1)) for start in range(low, high + 1, chunk_size)]
+    if workers <= 1:
+        results = [backfill_range(start, end) for start, end in ranges]
+    else:
+        engine.dispose()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            results = list(executor.map(backfill_range, *zip(*ranges)))
+    written = sum(count for count, _ in results)
+    duplicates = sorted(credential_id for _, duplicate_ids in results for credential_id in duplicate_ids)
+    if duplicates:
+        logger.warning("%d credentials duplicate an existing fingerprint and were left unfingerprinted", len(duplicates))
+    return written, duplicates
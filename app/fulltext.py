@@ -0,0 +1,223 @@
+"""
+Full-text search over public credentials and active badge templates.
+
+On PostgreSQL, ``install`` adds generated ``search_vector`` columns (title or
+name weighted A, description B, skills C) with GIN indexes to credentials and
+badge templates, and one over ``multilingual_content`` translations built with
+the text search configuration of each row's language. Queries go through
+``websearch_to_tsquery`` against those indexes, rank with ``ts_rank_cd``, page
+with a (rank, id) keyset cursor and run ``ts_headline`` for the returned page
+only.
+
+Other databases (SQLite in development) fall back to a case-insensitive
+substring match in id order, without ranking or highlighting.
+"""
+from typing import List, Optional
+from sqlalchemy import String, and_, cast, func, literal_column, or_, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+from . import models
+from .search import INACTIVE_STATUSES, decode_cursor, encode_cursor
+
+# Text search configuration per content language. PostgreSQL ships no Hindi
+# stemmer, so Hindi (like the other Indian languages) uses 'simple', which
+# lowercases and splits on word boundaries without stemming.
+LANGUAGE_CONFIGS = {
+    "en": "english",
+    "hi": "simple",
+}
+DEFAULT_CONFIG = "simple"
+
+SEARCH_KINDS = ("credentials", "badge_templates")
+
+# multilingual_content.content_type values searched for each kind
+TRANSLATED_FIELDS = {
+    "credentials": {"credential_title": "title", "credential_description": "description"},
+    "badge_templates": {"badge_template_name": "title", "badge_template_description": "description"},
+}
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+def _weighted_vector(title_column: str) -> str:
+    return (
+        f"setweight(to_tsvector('english'::regconfig, coalesce({title_column}, '')), 'A') || "
+        "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('english'::regconfig, coalesce(skills, '[]'::json)), 'C')"
+    )
+
+def _language_config_sql() -> str:
+    cases = " ".join(f"WHEN '{code}' THEN '{config}'::regconfig" for code, config in LANGUAGE_CONFIGS.items())
+    return f"CASE language_code {cases} ELSE '{DEFAULT_CONFIG}'::regconfig END"
+
+SEARCH_VECTOR_DDL = [
+    f"ALTER TABLE credentials ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({_weighted_vector('title')}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_credentials_search_vector ON credentials USING GIN (search_vector)",
+    f"ALTER TABLE badge_templates ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({_weighted_vector('name')}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_badge_templates_search_vector ON badge_templates USING GIN (search_vector)",
+    f"ALTER TABLE multilingual_content ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector({_language_config_sql()}, coalesce(translated_text, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_multilingual_content_search_vector ON multilingual_content USING GIN (search_vector)",
+]
+
+def install(engine):
+    """Add the search vectors and GIN indexes (idempotent, PostgreSQL only)"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for statement in SEARCH_VECTOR_DDL:
+            conn.execute(text(statement))
+
+def search_config(language: str) -> str:
+    return LANGUAGE_CONFIGS.get(language, DEFAULT_CONFIG)
+
+def _model(kind: str):
+    return models.Credential if kind == "credentials" else models.BadgeTemplate
+
+def _title_column(kind: str):
+    return models.Credential.title if kind == "credentials" else models.BadgeTemplate.name
+
+def _visible(kind: str):
+    if kind == "credentials":
+        return [models.Credential.is_public == True, models.Credential.status.notin_(INACTIVE_STATUSES)]
+    return [models.BadgeTemplate.active == True]
+
+def _keyset(rank, id_column, position):
+    last_rank, last_id = position
+    return or_(rank < last_rank, and_(rank == last_rank, id_column > last_id))
+
+def _rank_documents(db: Session, kind: str, tsquery, position, limit: int):
+    """(id, rank) rows matching a document's own (English) search vector"""
+    model = _model(kind)
+    vector = literal_column(f"{model.__tablename__}.search_vector")
+    rank = func.ts_rank_cd(vector, tsquery)
+    query = db.query(model.id, rank.label("rank")).filter(vector.op("@@")(tsquery), *_visible(kind))
+    if position:
+        query = query.filter(_keyset(rank, model.id, position))
+    return query.order_by(rank.desc(), model.id).limit(limit).all()
+
+def _rank_translations(db: Session, kind: str, language: str, tsquery, position, limit: int):
+    """(id, rank) rows matching translations of a document in one language"""
+    model = _model(kind)
+    content = models.MultilingualContent
+    vector = literal_column("multilingual_content.search_vector")
+    rank = func.max(func.ts_rank_cd(vector, tsquery))
+    query = db.query(model.id, rank.label("rank")).join(
+        content, content.content_id == cast(model.id, String)
+    ).filter(
+        content.content_type.in_(list(TRANSLATED_FIELDS[kind])),
+        content.language_code == language,
+        vector.op("@@")(tsquery),
+        *_visible(kind)
+    ).group_by(model.id)
+    if position:
+        query = query.having(_keyset(rank, model.id, position))
+    return query.order_by(rank.desc(), model.id).limit(limit).all()
+
+def _match_substring(db: Session, kind: str, language: str, query_text: str, position, limit: int):
+    """Unranked fallback for databases without full-text search"""
+    model = _model(kind)
+    pattern = f"%{query_text}%"
+    query = db.query(model.id, literal_column("0.0").label("rank")).filter(*_visible(kind))
+    if language == "en":
+        query = query.filter(or_(_title_column(kind).ilike(pattern), model.description.ilike(pattern)))
+    else:
+        content = models.MultilingualContent
+        query = query.filter(db.query(content).filter(
+            content.content_id == cast(model.id, String),
+            content.content_type.in_(list(TRANSLATED_FIELDS[kind])),
+            content.language_code == language,
+            content.translated_text.ilike(pattern)
+        ).exists())
+    if position:
+        query = query.filter(model.id > position[1])
+    return query.order_by(model.id).limit(limit).all()
+
+def _highlights(db: Session, kind: str, language: str, ids: List[int], config: str, tsquery):
+    """{id: {"title": ..., "description": ...}} with matches wrapped in <mark>"""
+    highlights = {document_id: {} for document_id in ids}
+    if language == "en":
+        model = _model(kind)
+        rows = db.query(
+            model.id,
+            func.ts_headline(cast(config, REGCONFIG), _title_column(kind), tsquery, HEADLINE_OPTIONS),
+            func.ts_headline(cast(config, REGCONFIG), func.coalesce(model.description, ""), tsquery, HEADLINE_OPTIONS)
+        ).filter(model.id.in_(ids)).all()
+        for document_id, title, description in rows:
+            highlights[document_id] = {"title": title, "description": description}
+    else:
+        content = models.MultilingualContent
+        rows = db.query(
+            content.content_id,
+            content.content_type,
+            func.ts_headline(cast(config, REGCONFIG), content.translated_text, tsquery, HEADLINE_OPTIONS)
+        ).filter(
+            content.content_id.in_([str(document_id) for document_id in ids]),
+            content.content_type.in_(list(TRANSLATED_FIELDS[kind])),
+            content.language_code == language
+        ).all()
+        for content_id, content_type, headline in rows:
+            highlights[int(content_id)][TRANSLATED_FIELDS[kind][content_type]] = headline
+    return highlights
+
+def _load_hits(db: Session, kind: str, ranked, highlights):
+    ids = [row[0] for row in ranked]
+    model = _model(kind)
+    rows = db.query(model, models.Issuer.name).join(
+        models.Issuer, models.Issuer.id == model.issuer_id
+    ).filter(model.id.in_(ids)).all()
+    documents = {document.id: (document, issuer_name) for document, issuer_name in rows}
+
+    hits = []
+    for document_id, rank in ranked:
+        document, issuer_name = documents[document_id]
+        hit = {
+            "kind": kind,
+            "id": document_id,
+            "title": document.title if kind == "credentials" else document.name,
+            "description": document.description,
+            "skills": document.skills or [],
+            "issuer_name": issuer_name,
+            "rank": float(rank),
+            "highlights": highlights.get(document_id, {}),
+        }
+        if kind == "credentials":
+            hit["public_url"] = document.public_url
+            hit["issued_at"] = document.issued_at
+        else:
+            hit["badge_type"] = document.badge_type.value
+        hits.append(hit)
+    return hits
+
+def search_documents(
+    db: Session,
+    query_text: str,
+    kind: str = "credentials",
+    language: str = "en",
+    cursor: Optional[str] = None,
+    limit: int = 20
+):
+    """Return (hits, next_cursor) for one page of ranked search results"""
+    position = decode_cursor(cursor, 2) if cursor else None
+    full_text = db.get_bind().dialect.name == "postgresql"
+    config = search_config(language)
+    tsquery = func.websearch_to_tsquery(cast(config, REGCONFIG), query_text)
+
+    if not full_text:
+        ranked = _match_substring(db, kind, language, query_text, position, limit + 1)
+    elif language == "en":
+        ranked = _rank_documents(db, kind, tsquery, position, limit + 1)
+    else:
+        ranked = _rank_translations(db, kind, language, tsquery, position, limit + 1)
+
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        document_id, rank = ranked[-1]
+        next_cursor = encode_cursor([float(rank), document_id])
+
+    if not ranked:
+        return [], None
+    highlights = _highlights(db, kind, language, [row[0] for row in ranked], config, tsquery) if full_text else {}
+    return _load_hits(db, kind, ranked, highlights), next_cursor
@@ -0,0 +1,419 @@
+"""
+Streaming credential import from external provider dumps.
+
+A dump is a JSON Lines file with one record per line, or an XML file with one
+``<credential>`` element per record. Either may be gzip-compressed. Records
+are read one at a time: JSON Lines line by line, and XML with ``iterparse``,
+clearing every record once it has been read. Memory use therefore stays flat
+however large the dump is.
+
+Every record is mapped to credential fields through FIELD_ALIASES, and the
+mapping gets a confidence score. The score starts at 1 and loses PENALTIES
+for missing or unreadable fields and for skills outside the known
+vocabulary. It is then scaled by the provider's trust level. A record
+without an id, a title or a known learner is rejected. A record scoring below
+IMPORT_REVIEW_THRESHOLD goes to the review queue, where an admin approves or
+rejects it. Every other record is issued.
+
+Records are processed in chunks of IMPORT_CHUNK_SIZE:
+
+- records this provider sent before are skipped, by external id;
+- learners are looked up with one query per chunk;
+- accepted records are issued with ``crud.bulk_issue_credentials``, which
+  skips duplicates of existing credentials by fingerprint;
+- every record gets a ``credential_imports`` row, inserted in one executemany.
+
+The imported credentials are issued under the provider's issuer and are
+signed afterwards with ``signing.sign_pending``. Because of the external id
+check, an interrupted import can simply be run again. Run one import per
+provider at a time.
+"""
+import gzip
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from . import crud, models, signing
+from .skills import SKILL_ALIASES, extract_skills, normalize_skill
+
+# Load environment variables from .env file
+load_dotenv()
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_REVIEW_THRESHOLD = float(os.getenv("IMPORT_REVIEW_THRESHOLD", "0.7"))
+
+XML_RECORD_TAG = "credential"
+FORMATS = ("jsonl", "xml")
+
+# The first name of each field is the canonical one
+FIELD_ALIASES = {
+    "external_id": ("external_credential_id", "id", "credential_id", "certificate_id"),
+    "learner_email": ("learner_email", "email", "recipient_email", "student_email"),
+    "title": ("title", "name", "course_name", "credential_name"),
+    "description": ("description", "summary"),
+    "skills": ("skills", "competencies", "skill"),
+    "skill_category": ("skill_category", "category", "sector"),
+    "completion_date": ("completion_date", "completed_at", "issued_on", "issue_date"),
+    "expiry_date": ("expiry_date", "expires_at", "valid_until"),
+    "evidence_url": ("evidence_url", "certificate_url", "url"),
+    "nsqf_level": ("nsqf_level", "nsqf"),
+}
+
+PENALTIES = {
+    "no skills listed": 0.15,
+    "no skills found": 0.3,
+    "unknown skills": 0.2,  # Scaled by the share of unknown skills
+    "no completion date": 0.15,
+    "unreadable date": 0.25,
+    "invalid NSQF level": 0.1,
+    "no description": 0.05,
+}
+
+STATUSES = ("imported", "duplicate", "review", "rejected")
+
+logger = logging.getLogger(__name__)
+
+
+# Streaming readers
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _element_record(element) -> dict:
+    """An XML record as a dict: attributes, child texts, and lists for nested or repeated children"""
+    record = dict(element.attrib)
+    for child in element:
+        name = _local_name(child.tag)
+        value = [(item.text or "").strip() for item in child] if len(child) else (child.text or "").strip()
+        if name in record:
+            previous = record[name] if isinstance(record[name], list) else [record[name]]
+            record[name] = previous + (value if isinstance(value, list) else [value])
+        else:
+            record[name] = value
+    return record
+
+def read_xml(stream, record_tag: str = XML_RECORD_TAG) -> Iterator[dict]:
+    """Records of an XML dump, one element at a time"""
+    context = ET.iterparse(stream, events=("start", "end"))
+    _, root = next(context)
+    for event, element in context:
+        if event == "end" and _local_name(element.tag) == record_tag:
+            yield _element_record(element)
+            # Drop the records read so far so that memory stays flat
+            root.clear()
+
+def read_jsonl(stream) -> Iterator[Optional[dict]]:
+    """Records of a JSON Lines dump; None for a line that is not a JSON object"""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            logger.warning("Skipping malformed line %d", number)
+            record = None
+        yield record
+
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    return "xml" if name.endswith(".xml") else "jsonl"
+
+def read_file(path: str, fmt: Optional[str] = None) -> Iterator[Optional[dict]]:
+    """Records of a dump file, gzip-compressed or not"""
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    opener = gzip.open if path.endswith(".gz") else open
+    if fmt == "xml":
+        with opener(path, "rb") as stream:
+            yield from read_xml(stream)
+    else:
+        with opener(path, "rt", encoding="utf-8") as stream:
+            yield from read_jsonl(stream)
+
+
+# Mapping
+
+def _field(record: dict, name: str):
+    for alias in FIELD_ALIASES[name]:
+        value = record.get(alias)
+        if value not in (None, "", []):
+            return value
+    return None
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    text = " ".join(str(value).split())
+    return text or None
+
+def _date(value) -> Tuple[Optional[str], bool]:
+    """(ISO timestamp, readable) of a date field"""
+    if value is None:
+        return None, True
+    try:
+        moment = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None, False
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.isoformat(), True
+
+def _skills(value) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    return [skill for skill in (_text(item) for item in value or []) if skill]
+
+def trust_factor(provider: models.ExternalProvider) -> float:
+    """Confidence scaling by provider trust: 0.6 at level 1 up to 1.0 at level 5"""
+    level = (provider.trust_level or 3) + (1 if provider.is_ncvet_recognized else 0)
+    return 0.5 + 0.1 * max(1, min(5, level))
+
+def map_record(record: dict, trust: float = 1.0) -> dict:
+    """Credential fields of a provider record, with a confidence score and the issues that lowered it"""
+    issues = []
+    score = 1.0
+    mapped = {
+        "title": _text(_field(record, "title")),
+        "description": _text(_field(record, "description")),
+        "skills": _skills(_field(record, "skills")),
+        "skill_category": _text(_field(record, "skill_category")),
+        "evidence_url": _text(_field(record, "evidence_url")),
+    }
+    for name in ("completion_date", "expiry_date"):
+        mapped[name], readable = _date(_field(record, name))
+        if not readable and "unreadable date" not in issues:
+            issues.append("unreadable date")
+            score -= PENALTIES["unreadable date"]
+    if mapped["completion_date"] is None and "unreadable date" not in issues:
+        issues.append("no completion date")
+        score -= PENALTIES["no completion date"]
+    if mapped["description"] is None:
+        issues.append("no description")
+        score -= PENALTIES["no description"]
+
+    level = _field(record, "nsqf_level")
+    try:
+        mapped["nsqf_level"] = int(level) if level is not None else None
+        if mapped["nsqf_level"] is not None and not 1 <= mapped["nsqf_level"] <= 10:
+            raise ValueError(level)
+    except (TypeError, ValueError):
+        mapped["nsqf_level"] = None
+        issues.append("invalid NSQF level")
+        score -= PENALTIES["invalid NSQF level"]
+
+    if mapped["skills"]:
+        unknown = sum(1 for skill in mapped["skills"] if normalize_skill(skill) not in SKILL_ALIASES)
+        if unknown:
+            issues.append("unknown skills")
+            score -= PENALTIES["unknown skills"] * unknown / len(mapped["skills"])
+    else:
+        # The crud layer falls back to skills mentioned in the title and description
+        issues.append("no skills listed")
+        score -= PENALTIES["no skills listed"]
+        if not extract_skills(f"{mapped['title'] or ''} {mapped['description'] or ''}"):
+            issues.append("no skills found")
+            score -= PENALTIES["no skills found"]
+
+    external_id = _text(_field(record, "external_id"))
+    email = _text(_field(record, "learner_email"))
+    rejected = [issue for issue, missing in (
+        ("no external id", external_id is None), ("no title", mapped["title"] is None), ("no learner email", email is None)
+    ) if missing]
+    return {
+        "external_id": external_id[:200] if external_id else None,
+        "learner_email": email[:255] if email else None,
+        "record": mapped,
+        "confidence": 0.0 if rejected else round(max(0.0, score) * trust, 3),
+        "issues": rejected + issues,
+        "rejected": bool(rejected),
+    }
+
+def _credential_row(mapped: dict, learner_id: int, issuer_id: int) -> dict:
+    def moment(value):
+        return datetime.fromisoformat(value) if value else None
+    return {
+        "learner_id": learner_id,
+        "issuer_id": issuer_id,
+        "title": mapped["title"],
+        "description": mapped["description"],
+        "skills": mapped["skills"],
+        "skill_category": mapped["skill_category"],
+        "completion_date": moment(mapped["completion_date"]),
+        "expiry_date": moment(mapped["expiry_date"]),
+        "evidence_url": mapped["evidence_url"],
+        "nsqf_level": mapped["nsqf_level"],
+    }
+
+
+# Pipeline
+
+def _provider(db: Session, provider_id: int) -> models.ExternalProvider:
+    provider = db.get(models.ExternalProvider, provider_id)
+    if provider is None or not provider.is_active:
+        raise ValueError(f"No active external provider {provider_id}")
+    if provider.issuer_id is None:
+        raise ValueError(f"External provider {provider_id} has no issuer to import under")
+    return provider
+
+def _learners(db: Session, emails: Iterable[str]) -> Dict[str, Tuple[int, models.UserRole]]:
+    """(id, role) of the users with these emails, keyed by lowercased email"""
+    emails = list({variant for email in emails for variant in (email, email.lower())})
+    learners = {}
+    for start in range(0, len(emails), 500):
+        for user_id, email, role in db.query(models.User.id, models.User.email, models.User.role).filter(
+            models.User.email.in_(emails[start:start + 500])
+        ):
+            learners[email.lower()] = (user_id, role)
+    return learners
+
+def import_chunk(db: Session, provider_id: int, issuer_id: int, trust: float, records: List[dict]) -> Dict[str, int]:
+    """Import one chunk of records and commit; returns counts per outcome"""
+    counts = dict.fromkeys(STATUSES + ("skipped", "invalid"), 0)
+    mapped, seen = [], set()
+    for record in records:
+        entry = map_record(record, trust)
+        if entry["external_id"] is None:
+            counts["invalid"] += 1
+        elif entry["external_id"] in seen:
+            counts["skipped"] += 1
+        else:
+            seen.add(entry["external_id"])
+            mapped.append(entry)
+    imported_before = {external_id for (external_id,) in db.query(models.CredentialImport.external_credential_id).filter(
+        models.CredentialImport.external_provider_id == provider_id,
+        models.CredentialImport.external_credential_id.in_(list(seen))
+    )}
+    counts["skipped"] += len(imported_before)
+    mapped = [entry for entry in mapped if entry["external_id"] not in imported_before]
+    learners = _learners(db, [entry["learner_email"] for entry in mapped if entry["learner_email"]])
+
+    rows, accepted = [], []
+    for entry in mapped:
+        learner = learners.get(entry["learner_email"].lower()) if entry["learner_email"] else None
+        if not entry["rejected"] and (learner is None or learner[1] != models.UserRole.learner):
+            entry["issues"].insert(0, "unknown learner" if learner is None else "not a learner account")
+            entry["rejected"] = True
+            entry["confidence"] = 0.0
+        if entry["rejected"]:
+            entry["status"] = "rejected"
+        elif entry["confidence"] < IMPORT_REVIEW_THRESHOLD:
+            entry["status"] = "review"
+        else:
+            accepted.append(entry)
+            rows.append(_credential_row(entry["record"], learner[0], issuer_id))
+    issued, duplicates = crud.bulk_issue_credentials(db, rows) if rows else ({}, {})
+    for position, entry in enumerate(accepted):
+        entry["status"] = "imported" if position in issued else "duplicate"
+        entry["credential_id"] = issued.get(position, duplicates.get(position))
+
+    if mapped:
+        db.bulk_insert_mappings(models.CredentialImport, [
+            {
+                "external_provider_id": provider_id,
+                "external_credential_id": entry["external_id"],
+                "learner_email": entry["learner_email"],
+                "credential_id": entry.get("credential_id"),
+                "mapping_confidence": entry["confidence"],
+                "requires_manual_review": entry["status"] == "review",
+                "status": entry["status"],
+                "record": entry["record"] if entry["status"] in ("review", "rejected") else None,
+                "issues": entry["issues"] or None,
+            }
+            for entry in mapped
+        ])
+    db.commit()
+    for entry in mapped:
+        counts[entry["status"]] += 1
+    return counts
+
+def import_records(db: Session, provider_id: int, records: Iterable[Optional[dict]],
+                   chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, int]:
+    """Import a stream of records (None for unreadable ones) chunk by chunk"""
+    provider = _provider(db, provider_id)
+    issuer_id, trust = provider.issuer_id, trust_factor(provider)
+    totals = dict.fromkeys(STATUSES + ("skipped", "invalid"), 0)
+    chunk = []
+
+    def flush():
+        for key, count in import_chunk(db, provider_id, issuer_id, trust, chunk).items():
+            totals[key] += count
+        chunk.clear()
+
+    for record in records:
+        if record is None:
+            totals["invalid"] += 1
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return totals
+
+def import_file(db: Session, provider_id: int, path: str, fmt: Optional[str] = None,
+                chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, int]:
+    """Import a JSON Lines or XML dump (optionally .gz) for a provider"""
+    return import_records(db, provider_id, read_file(path, fmt), chunk_size)
+
+
+# Review queue
+
+def review_queue(db: Session, provider_id: Optional[int] = None, skip: int = 0, limit: int = 50) -> List[models.CredentialImport]:
+    query = db.query(models.CredentialImport).filter(models.CredentialImport.status == "review")
+    if provider_id is not None:
+        query = query.filter(models.CredentialImport.external_provider_id == provider_id)
+    return query.order_by(models.CredentialImport.id).offset(skip).limit(limit).all()
+
+def _pending_review(db: Session, import_id: int) -> Optional[models.CredentialImport]:
+    return db.query(models.CredentialImport).filter(
+        models.CredentialImport.id == import_id,
+        models.CredentialImport.status == "review"
+    ).with_for_update().first()
+
+def approve(db: Session, import_id: int, reviewer_id: int) -> Optional[models.CredentialImport]:
+    """Issue a reviewed record's credential; None if it is not awaiting review"""
+    entry = _pending_review(db, import_id)
+    if entry is None:
+        return None
+    provider = _provider(db, entry.external_provider_id)
+    # Matched the same way as on import
+    learner = _learners(db, [entry.learner_email]).get(entry.learner_email.lower()) if entry.learner_email else None
+    if learner is None or learner[1] != models.UserRole.learner:
+        raise ValueError("The record's learner no longer exists")
+    # The issuer's first key is created in a session of its own; do that before writing
+    signing.signing_key(db, provider.issuer_id)
+    # Issued and marked in one transaction, so the row stays locked until both are written
+    issued, duplicates = crud.bulk_issue_credentials(
+        db, [_credential_row(entry.record, learner[0], provider.issuer_id)], commit=False
+    )
+    if issued:
+        signing.sign_credential(db, db.get(models.Credential, issued[0]))
+    entry.status = "imported" if issued else "duplicate"
+    entry.credential_id = issued.get(0, duplicates.get(0))
+    entry.requires_manual_review = False
+    entry.reviewed_by = reviewer_id
+    entry.reviewed_at = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+def reject(db: Session, import_id: int, reviewer_id: int) -> Optional[models.CredentialImport]:
+    """Reject a record awaiting review; None if it is not awaiting review"""
+    entry = _pending_review(db, import_id)
+    if entry is None:
+        return None
+    entry.status = "rejected"
+    entry.requires_manual_review = False
+    entry.reviewed_by = reviewer_id
+    entry.reviewed_at = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(entry)
+    return entry
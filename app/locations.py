@@ -0,0 +1,173 @@
+"""
+Location normalization against a gazetteer of Indian states and districts.
+
+Free-text locations ("Bangalore, Karnataka", "Gurgaon", "Noida, UP") are
+mapped to a state code (ISO 3166-2:IN subdivision, without the "IN-" prefix)
+and, when a known city or district is named, a district code of the form
+"<state>-<DISTRICT-NAME>" ("KA-BENGALURU-URBAN"). Codes are stored on the
+issuer, employer profile and job requirement rows when they are written, so
+regional reports group by an indexed column instead of parsing text.
+
+Names are matched on word tokens with the skills module's Aho-Corasick
+matcher, keeping the longest match at each position ("Jammu and Kashmir" is
+the state, not the Jammu district). A district that contradicts an explicitly
+named state is dropped rather than guessed. Two-letter abbreviations ("UP",
+"TN") double as English words, so they only count as a whole comma-separated
+part of the text. Results are cached per string.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from .skills import PhraseMatcher, tokenize
+
+# State code -> (name, aliases). Names are also matched as themselves.
+STATES = {
+    "AN": ("Andaman and Nicobar Islands", ["andaman and nicobar", "andaman"]),
+    "AP": ("Andhra Pradesh", []),
+    "AR": ("Arunachal Pradesh", []),
+    "AS": ("Assam", []),
+    "BR": ("Bihar", []),
+    "CG": ("Chhattisgarh", ["chattisgarh"]),
+    "CH": ("Chandigarh", []),
+    "DH": ("Dadra and Nagar Haveli and Daman and Diu", ["dadra and nagar haveli", "daman and diu"]),
+    "DL": ("Delhi", ["nct of delhi", "delhi ncr", "new delhi"]),
+    "GA": ("Goa", []),
+    "GJ": ("Gujarat", []),
+    "HP": ("Himachal Pradesh", []),
+    "HR": ("Haryana", []),
+    "JH": ("Jharkhand", []),
+    "JK": ("Jammu and Kashmir", ["jammu kashmir"]),
+    "KA": ("Karnataka", []),
+    "KL": ("Kerala", []),
+    "LA": ("Ladakh", []),
+    "LD": ("Lakshadweep", []),
+    "MH": ("Maharashtra", []),
+    "ML": ("Meghalaya", []),
+    "MN": ("Manipur", []),
+    "MP": ("Madhya Pradesh", []),
+    "MZ": ("Mizoram", []),
+    "NL": ("Nagaland", []),
+    "OD": ("Odisha", ["orissa"]),
+    "PB": ("Punjab", []),
+    "PY": ("Puducherry", ["pondicherry"]),
+    "RJ": ("Rajasthan", []),
+    "SK": ("Sikkim", []),
+    "TN": ("Tamil Nadu", ["tamilnadu"]),
+    "TR": ("Tripura", []),
+    "TS": ("Telangana", []),
+    "UK": ("Uttarakhand", ["uttaranchal"]),
+    "UP": ("Uttar Pradesh", []),
+    "WB": ("West Bengal", []),
+}
+
+# Abbreviations that are also ordinary words ("up", "mp"); only accepted as a
+# whole comma-separated part of a location ("Noida, UP") or as the whole value
+STATE_ABBREVIATIONS = {"ap": "AP", "hp": "HP", "mp": "MP", "tn": "TN", "up": "UP", "wb": "WB"}
+
+# State code -> district -> aliases (cities and former names in the district)
+DISTRICTS = {
+    "AP": {"Visakhapatnam": ["vizag", "vishakhapatnam"], "Guntur": [], "Tirupati": []},
+    "AS": {"Kamrup Metropolitan": ["guwahati"]},
+    "BR": {"Patna": []},
+    "CG": {"Raipur": []},
+    "CH": {"Chandigarh": []},
+    "DL": {"New Delhi": []},
+    "GA": {"North Goa": ["panaji", "panjim"], "South Goa": ["margao", "madgaon"]},
+    "GJ": {"Ahmedabad": [], "Surat": [], "Vadodara": ["baroda"], "Rajkot": [], "Gandhinagar": []},
+    "HP": {"Shimla": []},
+    "HR": {"Gurugram": ["gurgaon"], "Faridabad": []},
+    "JH": {"Ranchi": [], "East Singhbhum": ["jamshedpur"]},
+    "JK": {"Srinagar": [], "Jammu": []},
+    "KA": {
+        "Bengaluru Urban": ["bengaluru", "bangalore"],
+        "Mysuru": ["mysore"],
+        "Dakshina Kannada": ["mangaluru", "mangalore"],
+        "Dharwad": ["hubballi", "hubli"],
+        "Belagavi": ["belgaum"],
+    },
+    "KL": {"Thiruvananthapuram": ["trivandrum"], "Ernakulam": ["kochi", "cochin"], "Kozhikode": ["calicut"]},
+    "LA": {"Leh": []},
+    "MH": {"Mumbai": ["bombay"], "Pune": [], "Nagpur": [], "Thane": [], "Nashik": ["nasik"]},
+    "MP": {"Bhopal": [], "Indore": [], "Gwalior": [], "Jabalpur": []},
+    "OD": {"Khordha": ["bhubaneswar", "khurda"], "Cuttack": []},
+    "PB": {"Ludhiana": [], "Amritsar": [], "Sahibzada Ajit Singh Nagar": ["mohali"]},
+    "PY": {"Puducherry": ["pondicherry"]},
+    "RJ": {"Jaipur": [], "Jodhpur": [], "Udaipur": []},
+    "TN": {"Chennai": ["madras"], "Coimbatore": [], "Madurai": [], "Tiruchirappalli": ["trichy", "tiruchi"]},
+    "TS": {"Hyderabad": ["secunderabad"], "Rangareddy": ["ranga reddy"], "Warangal": []},
+    "UK": {"Dehradun": []},
+    "UP": {
+        "Gautam Buddha Nagar": ["noida", "greater noida"],
+        "Ghaziabad": [],
+        "Lucknow": [],
+        "Kanpur Nagar": ["kanpur"],
+        "Varanasi": ["banaras", "benares"],
+        "Agra": [],
+        "Prayagraj": ["allahabad"],
+    },
+    "WB": {"Kolkata": ["calcutta"], "Howrah": []},
+}
+
+
+class Location(NamedTuple):
+    state_code: str
+    state_name: str
+    district_code: Optional[str] = None
+    district_name: Optional[str] = None
+
+
+def district_code(state_code: str, district: str) -> str:
+    return f"{state_code}-{'-'.join(tokenize(district)).upper()}"
+
+def _phrases():
+    for code, (name, aliases) in STATES.items():
+        for phrase in [name] + aliases:
+            yield phrase, ("state", code, None)
+    for code, districts in DISTRICTS.items():
+        for district, aliases in districts.items():
+            for phrase in [district] + aliases:
+                yield phrase, ("district", code, district)
+
+_matcher = PhraseMatcher(_phrases())
+
+def _longest_matches(tokens):
+    """Matches not overlapped by a longer match (equal spans are all kept)"""
+    matches = sorted(_matcher.iter_matches(tokens), key=lambda match: (match[0], match[0] - match[1]))
+    kept = []
+    for start, end, value in matches:
+        if kept and start < kept[-1][1] and (start, end) != kept[-1][:2]:
+            continue
+        kept.append((start, end, value))
+    return [value for _, _, value in kept]
+
+@lru_cache(maxsize=65536)
+def normalize(text: Optional[str]) -> Optional[Location]:
+    """State (and district, when known) of a free-text location, or None"""
+    if not text:
+        return None
+    matches = _longest_matches(tokenize(text))
+    states = [code for kind, code, _ in matches if kind == "state"]
+    states += [STATE_ABBREVIATIONS[part] for part in (
+        " ".join(tokenize(part)) for part in re.split(r"[,;/|]", text)
+    ) if part in STATE_ABBREVIATIONS]
+    districts = [(code, district) for kind, code, district in matches if kind == "district"]
+
+    # "City, State": the district must agree with any state that is named
+    for code, district in districts:
+        if not states or code in states:
+            return Location(code, STATES[code][0], district_code(code, district), district)
+    if states:
+        code = states[-1]
+        return Location(code, STATES[code][0])
+    return None
+
+def stamp(record):
+    """Store the state/district codes of record.location on the record"""
+    location = normalize(record.location)
+    record.state_code = location.state_code if location else None
+    record.district_code = location.district_code if location else None
+    return location
+
+def state_name(state_code: Optional[str]) -> Optional[str]:
+    state = STATES.get(state_code)
+    return state[0] if state else None
@@ -1,17 +1,38 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request, Query
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Query, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from sqlalchemy.orm import Session
-from . import models, schemas, crud, auth
+from . import models, schemas, crud, auth, cache, serialization, export, search, matching, fulltext, autocomplete, verification, pathways, snapshots, rollups, locations, analytics, trending, anchoring, signing, status_lists, digilocker, imports
+from .skills import normalize_skill
 from .db import get_db, engine
 from typing import List, Optional
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="MicroMerge API", description="Centralized micro-credential aggregator platform", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Issuer private keys are encrypted at rest; refuse to run with the default secret
+    signing.require_secret()
+    # Typeahead suggestions are served from memory
+    autocomplete.load()
+    trending.load()
+    snapshots.start_scheduler()
+    anchoring.start_scheduler()
+    digilocker.start_scheduler()
+    matching.start_scheduler()
+    yield
+    snapshots.stop_scheduler()
+    anchoring.stop_scheduler()
+    digilocker.stop_scheduler()
+    matching.stop_scheduler()
+    signing.shutdown_pool()
+
+app = FastAPI(title="MicroMerge API", description="Centralized micro-credential aggregator platform", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
@@ -25,6 +46,7 @@ app.add_middleware(
 
 # Create tables
 models.Base.metadata.create_all(bind=engine)
+fulltext.install(engine)
 
 # Security
 security = HTTPBearer()
@@ -48,7 +70,8 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     if user.role == models.UserRole.issuer:
         issuer_data = schemas.IssuerCreate(
             name=f"{user.first_name} {user.last_name}" if user.first_name and user.last_name else user.email,
-            organization=user.first_name or "Organization"
+            organization=user.first_name or "Organization",
+            location=user.location
         )
         crud.create_issuer(db, issuer_data, new_user.id)
     
@@ -80,10 +103,22 @@ def update_profile(
     db: Session = Depends(get_db)
 ):
     """Update user profile"""
+    # get_current_user loads the user in its own session
+    current_user = db.merge(current_user)
     update_data = profile_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(current_user, field, value)
+    if "location" in update_data:
+        locations.stamp(current_user)
     
+    if current_user.role == models.UserRole.learner:
+        # Postings carry the learner's state for filtered candidate search
+        if "location" in update_data:
+            db.flush()
+            search.index_learner(db, current_user.id)
+        # Visibility decides whether the learner is listed in job matches
+        if "public_profile" in update_data:
+            matching.update_learner_matches(db, current_user.id)
     db.commit()
     db.refresh(current_user)
     return current_user
@@ -101,17 +136,20 @@ def create_badge_template(
         raise HTTPException(status_code=404, detail="Issuer profile not found")
     return crud.create_badge_template(db=db, template=template, issuer_id=issuer.id)
 
-@app.get("/api/v1/badge-templates", response_model=List[schemas.BadgeTemplateOut])
+@app.get("/api/v1/badge-templates", response_model=List[schemas.BadgeTemplateWithCounts], response_class=serialization.FastJSONResponse)
 def get_my_badge_templates(
     active_only: bool = True,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
     current_user: models.User = Depends(auth.require_role([models.UserRole.issuer])),
     db: Session = Depends(get_db)
 ):
-    """Get badge templates for current issuer"""
+    """Get a page of badge templates for current issuer with issued/verified/viewed counts"""
     issuer = crud.get_issuer_by_user_id(db, current_user.id)
     if not issuer:
         raise HTTPException(status_code=404, detail="Issuer profile not found")
-    return crud.get_badge_templates_by_issuer(db=db, issuer_id=issuer.id, active_only=active_only)
+    templates = crud.get_badge_templates_with_counts(db, issuer.id, active_only, skip, limit)
+    return serialization.list_response(serialization.badge_template_list_adapter, templates)
 
 # Credential management - Issue from template (Credly-like)
 @app.post("/api/v1/credentials/issue", response_model=schemas.CredentialOut)
@@ -201,7 +239,7 @@ def issue_credential(
     
     return crud.create_credential(db_sess, credential, issuer.id)
 
-@app.get("/api/v1/credentials")
+@app.get("/api/v1/credentials", response_class=serialization.FastJSONResponse)
 def get_my_credentials(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
@@ -212,25 +250,21 @@ def get_my_credentials(
         credentials = crud.get_credentials_by_learner(db_sess, current_user.id, skip, limit)
         
         # Convert to dict format for frontend compatibility
+        # (nsqf_level and issuer_name are already attached by crud)
         result = []
         for cred in credentials:
-            # Get metadata
-            metadata = db_sess.query(models.CredentialMetadata).filter(
-                models.CredentialMetadata.credential_id == cred.id
-            ).first()
-            
             cred_dict = {
                 "id": str(cred.id),
                 "title": cred.title,
                 "description": cred.description,
-                "issuer": cred.issuer.name if cred.issuer else "Unknown",
-                "issue_date": cred.issued_at.isoformat(),
-                "expiry_date": cred.expiry_date.isoformat() if cred.expiry_date else None,
+                "issuer": cred.issuer_name,
+                "issue_date": cred.issued_at,
+                "expiry_date": cred.expiry_date,
                 "status": "active" if cred.status == models.CredentialStatus.issued else cred.status.value,
                 "verification_status": "verified" if cred.status in [models.CredentialStatus.issued, models.CredentialStatus.verified] else "pending",
-                "credential_type": cred.badge_template.badge_type.value if cred.badge_template else "certificate",
+                "credential_type": cred.credential_type,
                 "skills": cred.skills or [],
-                "nsqf_level": metadata.nsqf_level if metadata else None,
+                "nsqf_level": cred.nsqf_level,
                 "metadata": {
                     "verification_code": cred.verification_code,
                     "public_url": cred.public_url,
@@ -239,16 +273,34 @@ def get_my_credentials(
             }
             result.append(cred_dict)
         
-        return result
+        return serialization.list_response(serialization.credential_list_item_adapter, result)
         
     elif current_user.role == schemas.UserRole.issuer:
         issuer = crud.get_issuer_by_user_id(db_sess, current_user.id)
         if not issuer:
             raise HTTPException(status_code=404, detail="Issuer profile not found")
-        return crud.get_credentials_by_issuer(db_sess, issuer.id, skip, limit)
+        credentials = crud.get_credentials_by_issuer(db_sess, issuer.id, skip, limit)
+        return serialization.list_response(serialization.credential_list_adapter, credentials)
     else:
         raise HTTPException(status_code=403, detail="Access denied")
 
+@app.get("/api/v1/credentials/export")
+def export_issued_credentials(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: models.User = Depends(auth.require_role([schemas.UserRole.issuer])),
+    db_sess: Session = Depends(get_db)
+):
+    """Stream every credential issued by the current issuer as NDJSON or CSV"""
+    issuer = crud.get_issuer_by_user_id(db_sess, current_user.id)
+    if not issuer:
+        raise HTTPException(status_code=404, detail="Issuer profile not found")
+    
+    return StreamingResponse(
+        export.stream_issuer_credentials(issuer.id, format),
+        media_type=export.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="credentials-{issuer.id}.{format}"'}
+    )
+
 @app.get("/api/v1/credentials/{credential_id}", response_model=schemas.CredentialOut)
 def get_credential(
     credential_id: int,
@@ -310,6 +362,70 @@ def delete_credential(
     else:
         raise HTTPException(status_code=404, detail="Credential not found")
 
+# Typeahead (public)
+@app.get("/api/v1/autocomplete", response_model=List[schemas.AutocompleteSuggestion])
+def autocomplete_suggestions(
+    q: str = Query(..., min_length=1, max_length=100),
+    types: str = None,
+    limit: int = Query(10, ge=1, le=autocomplete.MAX_SUGGESTIONS)
+):
+    """Suggest skills, issuers and badge templates with a word starting with q.
+    
+    types is a comma-separated subset of skill, issuer and template; results
+    are ordered by popularity.
+    """
+    kinds = [kind.strip() for kind in types.split(",") if kind.strip()] if types else autocomplete.SUGGESTION_TYPES
+    unknown = set(kinds) - set(autocomplete.SUGGESTION_TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown suggestion types: {', '.join(sorted(unknown))}")
+    return autocomplete.complete(q, kinds, limit)
+
+# Full-text search (public)
+@app.get("/api/v1/search", response_model=List[schemas.SearchHit])
+def search_content(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str = Query("credentials", pattern="^(credentials|badge_templates)$"),
+    lang: str = Query("en", max_length=5),
+    cursor: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    db_sess: Session = Depends(get_db)
+):
+    """Search public credentials or active badge templates by text.
+    
+    q accepts web-search syntax ("quoted phrases", -exclusions, or). With
+    lang other than en, translations in that language are searched instead.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        hits, next_cursor = fulltext.search_documents(db_sess, q, kind=kind, language=lang, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return hits
+
+@app.put("/api/v1/credentials/{credential_id}/metadata", response_model=schemas.CredentialMetadataOut)
+def update_credential_metadata(
+    credential_id: int,
+    metadata: schemas.CredentialMetadata,
+    current_user: models.User = Depends(auth.require_role([schemas.UserRole.issuer, schemas.UserRole.admin])),
+    db_sess: Session = Depends(get_db)
+):
+    """Set NSQF metadata, prerequisites and stackable credentials"""
+    credential = crud.get_credential(db_sess, credential_id)
+    if not credential:
+        raise HTTPException(status_code=404, detail="Credential not found")
+    
+    # Check if issuer owns this credential
+    if current_user.role == schemas.UserRole.issuer:
+        issuer = crud.get_issuer_by_user_id(db_sess, current_user.id)
+        if not issuer or credential.issuer_id != issuer.id:
+            raise HTTPException(status_code=403, detail="Access denied")
+    
+    return crud.upsert_credential_metadata(db_sess, credential, metadata)
+
 # Verification endpoint (public)
 @app.post("/api/v1/verify", response_model=schemas.CredentialOut)
 def verify_credential(
@@ -318,40 +434,109 @@ def verify_credential(
 ):
     return crud.verify_credential(db_sess, verification_data.verification_code)
 
+@app.get("/api/v1/verify/{verification_code}/anchor", response_model=schemas.AnchorProof)
+def get_anchor_proof(
+    verification_code: str,
+    db_sess: Session = Depends(get_db)
+):
+    """Merkle inclusion proof of a credential in its anchored batch.
+    
+    The proof can be checked offline: hash the leaf with each sibling in turn
+    to reach merkle_root, then look the root up on the ledger by transaction_id.
+    """
+    proof = anchoring.inclusion_proof(db_sess, verification_code)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Credential not found or not anchored yet")
+    return proof
+
+@app.get("/api/v1/verify/{verification_code}/signed", response_model=schemas.SignedCredential)
+def get_signed_credential(
+    verification_code: str,
+    db_sess: Session = Depends(get_db)
+):
+    """The credential as a compact JWS signed with its issuer's Ed25519 key"""
+    token = db_sess.query(models.Credential.signed_credential).filter(
+        models.Credential.verification_code == verification_code.strip().upper()
+    ).scalar()
+    if not token:
+        raise HTTPException(status_code=404, detail="Credential not found or not signed yet")
+    return {"verification_code": verification_code.strip().upper(), "kid": signing.key_id(token), "jws": token}
+
+@app.post("/api/v1/verify/signed", response_model=schemas.SignedCredentialVerification)
+def verify_signed_credential(
+    body: schemas.SignedCredentialVerify,
+    db_sess: Session = Depends(get_db)
+):
+    """Check a signed credential's signature; offline verifiers can do the same with the JWKS"""
+    try:
+        return {"valid": True, "kid": signing.key_id(body.jws), "claims": signing.verify_with_db(db_sess, body.jws)}
+    except ValueError as e:
+        return {"valid": False, "error": str(e)}
+
+@app.get("/.well-known/jwks.json")
+def get_signing_keys(request: Request, db_sess: Session = Depends(get_db)):
+    """Public keys of all issuers; keys are never removed, so the set is long-cacheable"""
+    key_set = signing.jwks(db_sess)
+    etag = f'"{signing.jwks_etag(key_set)}"'
+    headers = {"Cache-Control": f"public, max-age={signing.SIGNING_KEYS_MAX_AGE}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(key_set, headers=headers)
+
+@app.get("/.well-known/jwks/{kid}.json")
+def get_signing_key(kid: str, db_sess: Session = Depends(get_db)):
+    """One public key by kid, for verifiers whose cached key set predates it"""
+    key = signing.public_key(db_sess, kid)
+    if key is None:
+        raise HTTPException(status_code=404, detail="Unknown signing key")
+    # A kid is the thumbprint of its key, so the response never changes
+    return JSONResponse(key, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+@app.get("/api/v1/status-lists/{issuer_id}/{purpose}")
+def get_status_list(issuer_id: int, purpose: str, request: Request, db_sess: Session = Depends(get_db)):
+    """An issuer's gzip-compressed revocation or expiration bitstring"""
+    if purpose not in status_lists.PURPOSES:
+        raise HTTPException(status_code=404, detail="Unknown status list purpose")
+    current = status_lists.state(db_sess, issuer_id)
+    if current is None:
+        raise HTTPException(status_code=404, detail="Status list not found")
+    etag = status_lists.etag(issuer_id, purpose, *current)
+    headers = {"Cache-Control": f"public, max-age={status_lists.STATUS_LIST_MAX_AGE}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(status_lists.published(db_sess, issuer_id, purpose), headers=headers)
+
 # Dashboard endpoints
 @app.get("/api/v1/dashboard/learner", response_model=schemas.LearnerDashboard)
 def get_learner_dashboard(
     current_user: models.User = Depends(auth.require_role([schemas.UserRole.learner])),
     db_sess: Session = Depends(get_db)
 ):
-    stats = crud.get_learner_stats(db_sess, current_user.id)
-    recent_credentials = crud.get_credentials_by_learner(db_sess, current_user.id, 0, 5)
-    
-    # Add issuer details to credentials
-    credentials_with_details = []
-    for cred in recent_credentials:
-        cred_dict = {
-            **cred.__dict__,
-            "issuer": cred.issuer,
-            "learner_email": current_user.email
-        }
-        credentials_with_details.append(cred_dict)
-    
-    # Get skill categories from user's credentials
-    skill_categories = []
-    for cred in recent_credentials:
-        if cred.skills:
-            skill_categories.extend(cred.skills)
-    skill_categories = list(set(skill_categories))  # Remove duplicates
+    def build_dashboard():
+        # One aggregate for the counters plus one narrow query for recent credentials
+        stats = crud.get_learner_stats(db_sess, current_user.id)
+        recent_credentials = crud.get_recent_learner_credentials(db_sess, current_user.id, 5)
+        
+        skills = {}
+        for cred in recent_credentials:
+            cred["learner_email"] = current_user.email
+            for skill in cred["skills"] or []:
+                skills[skill] = None
+        
+        dashboard = schemas.LearnerDashboard.model_validate({
+            "stats": stats,
+            "recent_credentials": recent_credentials,
+            "skill_categories": list(skills)
+        })
+        return dashboard.model_dump(mode="json")
     
-    return {
-        "stats": stats,
-        "recent_credentials": credentials_with_details,
-        "skill_categories": skill_categories
-    }
+    # Invalidated by crud writes that touch this learner's credentials
+    return cache.get_or_set("learner", current_user.id, "dashboard", build_dashboard)
 
 @app.get("/api/v1/dashboard/issuer", response_model=schemas.IssuerDashboard)
 def get_issuer_dashboard(
+    templates_skip: int = Query(0, ge=0),
+    templates_limit: int = Query(20, ge=1, le=100),
     current_user: models.User = Depends(auth.require_role([schemas.UserRole.issuer])),
     db_sess: Session = Depends(get_db)
 ):
@@ -359,18 +544,29 @@ def get_issuer_dashboard(
     if not issuer:
         raise HTTPException(status_code=404, detail="Issuer profile not found")
     
-    stats = crud.get_issuer_stats(db_sess, issuer.id)
-    recent_issued = crud.get_credentials_by_issuer(db_sess, issuer.id, 0, 5)
-    
-    # Get badge templates for the issuer
-    badge_templates = crud.get_badge_templates_by_issuer(db_sess, issuer.id, active_only=False)
+    def build_dashboard():
+        stats = crud.get_issuer_stats(db_sess, issuer.id)
+        recent_issued = crud.get_credentials_by_issuer(db_sess, issuer.id, 0, 5)
+        
+        # One page of the issuer's badge templates with per-template counts
+        badge_templates = crud.get_badge_templates_with_counts(
+            db_sess, issuer.id, active_only=False, skip=templates_skip, limit=templates_limit
+        )
+        
+        dashboard = schemas.IssuerDashboard.model_validate({
+            "stats": stats,
+            "recent_issued": recent_issued,
+            "badge_templates": badge_templates,
+            "total_badge_templates": crud.count_badge_templates_by_issuer(db_sess, issuer.id, active_only=False),
+            "issuer_info": issuer
+        })
+        return dashboard.model_dump(mode="json")
     
-    return {
-        "stats": stats,
-        "recent_issued": recent_issued,
-        "badge_templates": badge_templates,
-        "issuer_info": issuer
-    }
+    # Invalidated by crud writes to this issuer, its templates and credentials,
+    # and by public views of its credentials
+    return cache.get_or_set(
+        "issuer", issuer.id, f"dashboard:{templates_skip}:{templates_limit}", build_dashboard
+    )
 
 # NCVET and National Framework Endpoints
 
@@ -395,11 +591,91 @@ def create_employer_profile(
         user_id=current_user.id,
         **profile_data
     )
+    locations.stamp(db_profile)
     db.add(db_profile)
     db.commit()
     db.refresh(db_profile)
     return db_profile
 
+def get_owned_job_requirement(db: Session, job_id: int, user: models.User):
+    """Job requirement owned by the employer, or 404"""
+    job = crud.get_job_requirement(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job requirement not found")
+    profile = db.query(models.EmployerProfile).filter(models.EmployerProfile.user_id == user.id).first()
+    if not profile or job.employer_id != profile.id:
+        raise HTTPException(status_code=404, detail="Job requirement not found")
+    return job
+
+@app.post("/api/v1/employers/job-requirements", response_model=schemas.JobRequirementOut)
+def create_job_requirement(
+    job: schemas.JobRequirementCreate,
+    current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
+    db: Session = Depends(get_db)
+):
+    """Post a job requirement; its candidate matches are computed immediately"""
+    profile = db.query(models.EmployerProfile).filter(models.EmployerProfile.user_id == current_user.id).first()
+    if not profile:
+        raise HTTPException(status_code=400, detail="Create an employer profile first")
+    return crud.create_job_requirement(db, job, profile.id)
+
+@app.get("/api/v1/employers/job-requirements", response_model=List[schemas.JobRequirementOut])
+def get_job_requirements(
+    active_only: bool = False,
+    current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
+    db: Session = Depends(get_db)
+):
+    """Get the employer's job requirements"""
+    profile = db.query(models.EmployerProfile).filter(models.EmployerProfile.user_id == current_user.id).first()
+    if not profile:
+        return []
+    return crud.get_job_requirements_by_employer(db, profile.id, active_only=active_only)
+
+@app.put("/api/v1/employers/job-requirements/{job_id}", response_model=schemas.JobRequirementOut)
+def update_job_requirement(
+    job_id: int,
+    job_update: schemas.JobRequirementUpdate,
+    current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
+    db: Session = Depends(get_db)
+):
+    """Update a job requirement; changed skills or NSQF level re-rank its matches"""
+    get_owned_job_requirement(db, job_id, current_user)
+    return crud.update_job_requirement(db, job_id, job_update)
+
+@app.delete("/api/v1/employers/job-requirements/{job_id}")
+def close_job_requirement(
+    job_id: int,
+    current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
+    db: Session = Depends(get_db)
+):
+    """Deactivate a job requirement and drop its matches"""
+    get_owned_job_requirement(db, job_id, current_user)
+    crud.update_job_requirement(db, job_id, schemas.JobRequirementUpdate(is_active=False))
+    return {"message": "Job requirement closed successfully"}
+
+@app.get("/api/v1/jobs/{job_id}", response_model=schemas.JobRequirementOut)
+def view_job_requirement(job_id: int, db: Session = Depends(get_db)):
+    """Public view of an active job requirement; counted in the employer's analytics"""
+    job = crud.get_job_requirement(db, job_id)
+    if not job or not job.is_active:
+        raise HTTPException(status_code=404, detail="Job requirement not found")
+    analytics.record_for_jobs(db, "job_views", {job.id: 1})
+    db.commit()
+    db.refresh(job)
+    return job
+
+@app.get("/api/v1/employers/skill-matching/{job_id}", response_model=List[schemas.JobCandidateMatch])
+def get_job_matches(
+    job_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
+    db: Session = Depends(get_db)
+):
+    """Best matching candidates for a job, read from the precomputed matches"""
+    job = get_owned_job_requirement(db, job_id, current_user)
+    return matching.get_job_matches(db, job, skip=skip, limit=limit)
+
 @app.get("/api/v1/employer/profile")
 def get_employer_profile(
     current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
@@ -422,9 +698,12 @@ def update_employer_profile(
     if not profile:
         raise HTTPException(status_code=404, detail="Employer profile not found")
     
-    for field, value in profile_update.dict(exclude_unset=True).items():
+    update_data = profile_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
         if hasattr(profile, field):
             setattr(profile, field, value)
+    if "location" in update_data:
+        locations.stamp(profile)
     
     db.commit()
     db.refresh(profile)
@@ -435,15 +714,22 @@ def get_employer_dashboard_stats(
     current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
     db: Session = Depends(get_db)
 ):
-    """Get employer dashboard statistics"""
-    # Mock data for demonstration
+    """Get employer dashboard statistics (from activity buckets; applications are not tracked)"""
+    profile = db.query(models.EmployerProfile).filter(models.EmployerProfile.user_id == current_user.id).first()
+    jobs = analytics.job_overview(db, profile.id) if profile else {"active_jobs": 0, "candidates": 0}
+    all_time = analytics.totals(db, current_user.id)
+    today = analytics.totals(db, current_user.id, "day")
+    talent_pool = db.query(models.UserRollup.user_count).filter(
+        models.UserRollup.role == models.UserRole.learner.value
+    ).scalar()
     return {
-        "totalCandidates": 1247,
-        "verifiedCredentials": 3892,
-        "activeJobs": 8,
-        "applicationsReceived": 156,
-        "credentialsVerifiedToday": 23,
-        "talentPoolSize": 892
+        "totalCandidates": jobs["candidates"],
+        "verifiedCredentials": all_time["verified_credentials"],
+        "activeJobs": jobs["active_jobs"],
+        "applicationsReceived": 0,
+        "credentialsVerifiedToday": today["verified_credentials"],
+        "talentPoolSize": talent_pool or 0,
+        "untrackedFields": analytics.UNTRACKED_FIELDS["stats"]
     }
 
 @app.get("/api/v1/employer/recent-activity")
@@ -473,57 +759,86 @@ def get_employer_recent_activity(
 
 @app.get("/api/v1/employer/trending-skills")
 def get_trending_skills(
+    limit: int = Query(10, ge=1, le=trending.TRENDING_CAPACITY),
     current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
     db: Session = Depends(get_db)
 ):
-    """Get trending skills data"""
+    """Get trending skills from recent issuance and verification activity.
+    
+    Skills are ranked by their short-window decayed event score; demandScore
+    is that score relative to the top skill (100), and trend compares the
+    short-window event rate with the long-window one.
+    """
+    entries = trending.top_skills(db, limit)
+    best = entries[0]["score"] if entries else 0
     return [
-        {"skill": "JavaScript", "candidateCount": 245, "trend": "up", "demandScore": 92},
-        {"skill": "Python", "candidateCount": 198, "trend": "up", "demandScore": 88},
-        {"skill": "React", "candidateCount": 167, "trend": "stable", "demandScore": 85},
-        {"skill": "Node.js", "candidateCount": 134, "trend": "up", "demandScore": 82},
-        {"skill": "Digital Marketing", "candidateCount": 89, "trend": "down", "demandScore": 78},
-        {"skill": "Data Science", "candidateCount": 76, "trend": "up", "demandScore": 90}
+        {
+            "skill": entry["skill"],
+            "candidateCount": entry["candidates"],
+            "trend": entry["trend"],
+            "demandScore": round(100 * entry["score"] / best) if best else 0
+        }
+        for entry in entries
     ]
 
 @app.get("/api/v1/employer/candidates")
 def search_candidates(
+    response: Response,
     skills: str = None,
     location: str = None,
     min_experience: int = 0,
     max_experience: int = 20,
     nsqf_level: str = None,
+    cursor: str = None,
+    limit: int = Query(20, ge=1, le=100),
     current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
     db: Session = Depends(get_db)
 ):
-    """Search for candidates based on criteria"""
-    # Mock candidate data
-    return [
-        {
-            "id": "1",
-            "name": "Rahul Sharma",
-            "title": "Full Stack Developer",
-            "location": "Bangalore",
-            "experience": 4,
-            "skills": ["JavaScript", "React", "Node.js", "MongoDB"],
-            "credentials": [
-                {
-                    "id": "c1",
-                    "title": "Full Stack Web Development",
-                    "issuer": "Tech Institute",
-                    "verificationStatus": "verified",
-                    "issuedDate": "2023-06-15",
-                    "nsqfLevel": 6
-                }
-            ],
-            "rating": 4.8,
-            "isVerified": True,
-            "lastActive": "2024-10-13",
-            "availability": "available",
-            "expectedSalary": "₹8-12 LPA",
-            "summary": "Experienced full-stack developer with expertise in modern web technologies and agile methodologies."
-        }
-    ]
+    """Search for candidates based on criteria.
+    
+    skills is comma-separated; results are ranked by skill coverage, then by
+    verified coverage. location is matched by state ("Bengaluru" finds
+    learners anywhere in Karnataka); one that names no known state or city
+    matches nobody. nsqf_level is the minimum level (the lowest of a
+    comma-separated list). Experience is not tracked for learners yet, so the
+    experience bounds are accepted but not applied. The cursor for the next
+    page is returned in the X-Next-Cursor header.
+    """
+    skill_list = [skill for skill in (skills or "").split(",") if skill.strip()]
+    min_nsqf_level = None
+    if nsqf_level:
+        try:
+            min_nsqf_level = min(int(level) for level in nsqf_level.split(",") if level.strip())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="nsqf_level must be a number or comma-separated numbers")
+    
+    try:
+        candidates, next_cursor = search.search_candidates(
+            db, skill_list, location=location, min_nsqf_level=min_nsqf_level, cursor=cursor, limit=limit
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return candidates
+
+@app.post("/api/v1/employer/skill-gap", response_model=List[schemas.SkillGapAnalysis])
+def analyze_skill_gap(
+    job: schemas.JobRequirement,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
+    db: Session = Depends(get_db)
+):
+    """Rank learners against a job's skills with matches, gaps and evidence.
+    
+    Required skills weigh twice as much as preferred ones. min_nsqf_level
+    restricts results to learners holding a credential at that level or above.
+    """
+    try:
+        return matching.analyze_job(db, job, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/api/v1/employer/verify-credential")
 def verify_credential_for_employer(
@@ -533,32 +848,70 @@ def verify_credential_for_employer(
 ):
     """Verify a credential by ID, hash, or QR code"""
     search_method = verification_request.get("searchMethod")
-    search_value = verification_request.get("searchValue")
+    search_value = (verification_request.get("searchValue") or "").strip()
+    if not search_value:
+        raise HTTPException(status_code=400, detail="searchValue is required")
+    
+    # QR codes carry the public URL; IDs may be a verification code or public URL
+    result = verification.verify_values(db, [search_value], "hash" if search_method == "hash" else None)[0]
+    analytics.record(db, current_user.id, verifications=1, verified_credentials=int(result.status == "valid"))
+    skill_events = trending.skill_counts([result.skills] if result.found else [])
+    trending.record(db, "verified", skill_events)
+    db.commit()
+    trending.observe("verified", skill_events)
+    if not result.found:
+        raise HTTPException(status_code=404, detail="Credential not found")
+    recipient_email = db.query(models.User.email).join(
+        models.Credential, models.Credential.learner_id == models.User.id
+    ).filter(models.Credential.id == result.credential_id).scalar()
     
-    # Mock verification result
     return {
-        "id": f"ver_{search_value}",
-        "credentialId": search_value,
-        "title": "Full Stack Web Development Certification",
-        "issuer": "Tech Institute of Excellence",
-        "recipientName": "Rahul Sharma",
-        "recipientEmail": "rahul.sharma@email.com",
-        "issuedDate": "2023-06-15T00:00:00Z",
-        "expirationDate": "2026-06-15T00:00:00Z",
-        "status": "verified",
-        "nsqfLevel": 6,
-        "skills": ["JavaScript", "React", "Node.js", "MongoDB", "API Development"],
-        "verificationHash": "abc123def456ghi789jkl012mno345pqr678",
-        "blockchainTx": "0x1234567890abcdef1234567890abcdef12345678",
+        "id": f"ver_{result.credential_id}",
+        "credentialId": result.verification_code,
+        "title": result.title,
+        "issuer": result.issuer_name,
+        "recipientName": result.recipient_name,
+        "recipientEmail": recipient_email,
+        "issuedDate": result.issued_at,
+        "expirationDate": result.expiry_date,
+        # verified, pending, expired or revoked
+        "status": "verified" if result.status == "valid" else result.status,
+        "nsqfLevel": result.nsqf_level,
+        "skills": result.skills,
+        "verificationHash": result.blockchain_hash,
+        "blockchainTx": result.transaction_id,
         "metadata": {
-            "program": "Advanced Full Stack Development",
-            "grade": "A",
-            "creditHours": 120,
-            "institution": "Tech Institute of Excellence",
-            "certificationBody": "National Skills Development Council"
+            "program": result.title,
+            "grade": None,
+            "creditHours": None,
+            "institution": result.issuer_name,
+            "certificationBody": None
         }
     }
 
+@app.post("/api/v1/employer/verify-credentials", response_model=List[schemas.VerificationResult])
+def verify_credentials_batch(
+    batch: schemas.BatchVerificationRequest,
+    current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
+    db: Session = Depends(get_db)
+):
+    """Verify up to 1,000 codes, public URLs or blockchain hashes at once.
+    
+    Results are returned in request order, with status valid, pending,
+    expired, revoked or not_found for each value.
+    """
+    results = verification.verify_values(db, batch.values, batch.identifier_type)
+    analytics.record(
+        db, current_user.id,
+        verifications=len(results),
+        verified_credentials=sum(1 for result in results if result.status == "valid")
+    )
+    skill_events = trending.skill_counts(result.skills for result in results if result.found)
+    trending.record(db, "verified", skill_events)
+    db.commit()
+    trending.observe("verified", skill_events)
+    return results
+
 @app.get("/api/v1/employer/jobs")
 def get_employer_jobs(
     status: str = None,
@@ -649,53 +1002,69 @@ def update_job_status(
 
 @app.get("/api/v1/employer/analytics")
 def get_employer_analytics(
-    period: str = "30d",
+    period: str = Query("30d", pattern="^(24h|7d|30d|90d|1y)$"),
     current_user: models.User = Depends(auth.require_role([models.UserRole.employer])),
     db: Session = Depends(get_db)
 ):
-    """Get employer analytics data"""
+    """Employer analytics for a period, summed from hourly/daily/monthly activity buckets.
+    
+    Applications, hiring and per-credential analytics are not tracked; their
+    fields stay zero/empty and are listed in untrackedFields.
+    """
+    summary = analytics.activity(db, current_user.id, period)
+    profile = db.query(models.EmployerProfile).filter(models.EmployerProfile.user_id == current_user.id).first()
+    jobs = analytics.job_overview(db, profile.id) if profile else {"active_jobs": 0, "candidates": 0, "skills": [], "locations": []}
+    
+    totals, trends = summary["totals"], summary["trends"]
     return {
+        "period": period,
         "overview": {
-            "totalApplications": 324,
-            "totalCandidates": 1247,
-            "verificationRequests": 89,
-            "activeJobs": 12,
-            "applicationTrend": 15.3,
-            "candidateTrend": 8.7
+            "totalApplications": 0,
+            "totalCandidates": jobs["candidates"],
+            "verificationRequests": totals["verifications"],
+            "verifiedCredentials": totals["verified_credentials"],
+            "jobViews": totals["job_views"],
+            "newMatches": totals["new_matches"],
+            "activeJobs": jobs["active_jobs"],
+            "applicationTrend": 0.0,
+            "candidateTrend": trends["new_matches"],
+            "verificationTrend": trends["verifications"],
+            "jobViewTrend": trends["job_views"]
         },
-        "applicationsByMonth": [
-            {"month": "Jan", "applications": 45, "hired": 3},
-            {"month": "Feb", "applications": 52, "hired": 4},
-            {"month": "Mar", "applications": 38, "hired": 2},
-            {"month": "Apr", "applications": 67, "hired": 5},
-            {"month": "May", "applications": 78, "hired": 6},
-            {"month": "Jun", "applications": 69, "hired": 4},
-            {"month": "Jul", "applications": 84, "hired": 7},
-            {"month": "Aug", "applications": 92, "hired": 8},
-            {"month": "Sep", "applications": 76, "hired": 5},
-            {"month": "Oct", "applications": 89, "hired": 6}
+        "timeline": [
+            {
+                "bucket": point["bucket"],
+                "verificationRequests": point["verifications"],
+                "verifiedCredentials": point["verified_credentials"],
+                "jobViews": point["job_views"],
+                "newMatches": point["new_matches"]
+            }
+            for point in summary["timeline"]
         ],
+        "applicationsByMonth": [],
         "topSkillsInDemand": [
-            {"skill": "JavaScript", "jobCount": 15, "candidateCount": 245, "demandRatio": 0.061},
-            {"skill": "Python", "jobCount": 12, "candidateCount": 198, "demandRatio": 0.061},
-            {"skill": "React", "jobCount": 18, "candidateCount": 167, "demandRatio": 0.108}
+            {
+                "skill": normalize_skill(skill) or skill,
+                "jobCount": job_count,
+                "candidateCount": candidate_count,
+                "demandRatio": round(job_count / candidate_count, 3) if candidate_count else float(job_count)
+            }
+            for skill, job_count, candidate_count in jobs["skills"]
         ],
         "locationAnalytics": [
-            {"location": "Bangalore", "jobCount": 25, "applicationCount": 156, "averageSalary": 1200000},
-            {"location": "Mumbai", "jobCount": 18, "applicationCount": 134, "averageSalary": 1100000}
-        ],
-        "credentialAnalytics": [
-            {"credentialType": "Software Development", "verificationCount": 45, "successRate": 0.92, "nsqfLevel": 6},
-            {"credentialType": "Data Science", "verificationCount": 28, "successRate": 0.89, "nsqfLevel": 7}
+            {"location": location, "jobCount": job_count, "applicationCount": 0, "averageSalary": 0}
+            for location, job_count in jobs["locations"]
         ],
+        "credentialAnalytics": [],
         "hiringFunnel": {
-            "totalApplications": 324,
-            "screeningPassed": 156,
-            "interviewScheduled": 89,
-            "interviewed": 67,
-            "offered": 23,
-            "hired": 18
-        }
+            "totalApplications": 0,
+            "screeningPassed": 0,
+            "interviewScheduled": 0,
+            "interviewed": 0,
+            "offered": 0,
+            "hired": 0
+        },
+        "untrackedFields": analytics.UNTRACKED_FIELDS["analytics"]
     }
 
 @app.post("/api/v1/employer/contact/{candidate_id}")
@@ -732,27 +1101,105 @@ def get_nsqf_levels():
     }
     return {"nsqf_levels": nsqf_levels}
 
+@app.get("/api/v1/pathways/templates/{template_id}", response_model=schemas.TemplatePathways)
+def get_template_pathways(template_id: int, db: Session = Depends(get_db)):
+    """Templates that stack into a template and templates it leads to"""
+    result = pathways.template_pathways(db, template_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Badge template not found")
+    return result
+
+@app.get("/api/v1/pathways/learner", response_model=schemas.LearnerPathway)
+def get_learner_pathway(
+    target_nsqf_level: int = Query(..., ge=1, le=10),
+    current_user: models.User = Depends(auth.require_role([schemas.UserRole.learner])),
+    db: Session = Depends(get_db)
+):
+    """Shortest pathway from the learner's credentials to an NSQF level"""
+    return pathways.learner_pathway(db, current_user.id, target_nsqf_level)
+
 @app.get("/api/v1/admin/national-statistics")
 def get_national_statistics(
     current_user: models.User = Depends(auth.require_role([models.UserRole.admin])),
     db: Session = Depends(get_db)
 ):
-    """Get national-level statistics for regulatory reporting"""
-    total_credentials = db.query(models.Credential).count()
-    total_learners = db.query(models.User).filter(models.User.role == models.UserRole.learner).count()
-    total_issuers = db.query(models.User).filter(models.User.role == models.UserRole.issuer).count()
-    total_employers = db.query(models.User).filter(models.User.role == models.UserRole.employer).count()
-    
-    return {
-        "total_credentials_issued": total_credentials,
-        "total_active_learners": total_learners,
-        "total_issuers": total_issuers,
-        "total_employers": total_employers,
-        "credentials_by_nsqf_level": {},
-        "top_skill_categories": [],
-        "monthly_growth_rate": 0.0,
-        "state_wise_distribution": {}
-    }
+    """Get national-level statistics for regulatory reporting (read from rollups)"""
+    return snapshots.current_statistics(db)
+
+@app.get("/api/v1/admin/national-statistics/trends", response_model=List[schemas.NationalStatisticsSnapshot])
+def get_national_statistics_trends(
+    days: int = Query(90, ge=1, le=3660),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.admin])),
+    db: Session = Depends(get_db)
+):
+    """Daily national statistics snapshots for the last days days, oldest first"""
+    return snapshots.trend(db, days)
+
+@app.get("/api/v1/admin/regional-statistics", response_model=List[schemas.RegionalStatisticsCell])
+def get_regional_statistics(
+    state_code: Optional[str] = Query(None, pattern="^[A-Za-z]{2}$"),
+    nsqf_level: Optional[int] = Query(None, ge=1, le=10),
+    from_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    to_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.admin])),
+    db: Session = Depends(get_db)
+):
+    """Credential counts per state, NSQF level and issue month (pre-aggregated)"""
+    cells = rollups.regional_statistics(
+        db, state_code.upper() if state_code else None, nsqf_level, from_month, to_month
+    )
+    return [
+        {
+            "state_code": cell.state_code,
+            "state_name": locations.state_name(cell.state_code),
+            "nsqf_level": cell.nsqf_level or None,
+            "month": cell.month,
+            "issued_count": cell.issued_count,
+            "active_count": cell.active_count,
+            "revoked_count": cell.revoked_count,
+            "expired_count": cell.expired_count
+        }
+        for cell in cells
+    ]
+
+@app.get("/api/v1/admin/imports/review", response_model=List[schemas.CredentialImportReview])
+def get_import_review_queue(
+    provider_id: Optional[int] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: models.User = Depends(auth.require_role([models.UserRole.admin])),
+    db: Session = Depends(get_db)
+):
+    """Imported records whose mapping confidence was too low to issue them unreviewed"""
+    return imports.review_queue(db, provider_id, skip, limit)
+
+@app.post("/api/v1/admin/imports/{import_id}/approve", response_model=schemas.CredentialImportReview)
+def approve_import(
+    import_id: int,
+    current_user: models.User = Depends(auth.require_role([models.UserRole.admin])),
+    db: Session = Depends(get_db)
+):
+    """Issue the credential of a record in the review queue"""
+    try:
+        entry = imports.approve(db, import_id, current_user.id)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Import not found in the review queue")
+    return entry
+
+@app.post("/api/v1/admin/imports/{import_id}/reject", response_model=schemas.CredentialImportReview)
+def reject_import(
+    import_id: int,
+    current_user: models.User = Depends(auth.require_role([models.UserRole.admin])),
+    db: Session = Depends(get_db)
+):
+    """Drop a record from the review queue without issuing it"""
+    entry = imports.reject(db, import_id, current_user.id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Import not found in the review queue")
+    return entry
 
 @app.get("/api/v1/content/languages")
 def get_supported_languages():
@@ -0,0 +1,571 @@
+"""
+Vectorized skill-gap analysis of a job against the whole learner population.
+
+The learner x skill incidence is held column-wise (one sorted array of learner
+rows per skill, CSC-style) and loaded from the ``learner_skills`` postings.
+Scoring a job only touches the columns of its required and preferred skills:
+each column adds its weight to a per-learner score vector and sets the skill's
+bit in a per-learner uint64 bitset, so one pass yields scores for everyone and
+the bitsets give exact matches and gaps for the learners that make the cut.
+Per-learner detail (evidence credentials, profile) is then loaded for the top
+results only.
+
+The matrix is built off the request path. ``start_scheduler`` builds it at
+startup and again every MATCH_MATRIX_TTL_SECONDS in a background thread, like
+the snapshot and anchoring jobs. Requests keep reading the previous matrix
+while the next one is built, and a matrix that outlives its TTL (e.g. on a
+worker without the scheduler) is refreshed in the background as well. Only a
+process that has never built one builds it inline. Gap recommendations come
+from an in-memory index of active badge templates by skill, built alongside
+the matrix and patched whenever a template is created or updated.
+
+Stored job requirements additionally keep a materialized top-N list in
+``job_matches``. It is recomputed for one job when that job changes and
+patched incrementally when a learner's skills change: only the jobs sharing a
+skill with the learner (found through ``job_skills``) or already listing them
+are touched, and a job is re-ranked in full only when a listed learner drops
+out of a full list, since a replacement may then exist outside it.
+"""
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session, aliased
+from . import analytics, models, schemas
+from .db import SessionLocal
+from .search import INACTIVE_STATUSES
+from .skills import normalize_skill, skill_key
+
+# Load environment variables from .env file
+load_dotenv()
+
+# How long a loaded matrix is reused before it is rebuilt from learner_skills
+MATCH_MATRIX_TTL_SECONDS = int(os.getenv("MATCH_MATRIX_TTL_SECONDS", "300"))
+MATCH_MATRIX_SCHEDULER = os.getenv("MATCH_MATRIX_SCHEDULER", "true").lower() == "true"
+
+# Required skills count double towards the overall score
+REQUIRED_WEIGHT = 2
+PREFERRED_WEIGHT = 1
+MAX_JOB_SKILLS = 64  # Bitsets are uint64
+
+# Candidates kept per active job in job_matches
+JOB_MATCH_LIMIT = int(os.getenv("JOB_MATCH_LIMIT", "100"))
+
+logger = logging.getLogger(__name__)
+
+
+class SkillMatrix:
+    """Learner x skill incidence stored as per-skill columns of learner rows"""
+
+    def __init__(self, learner_ids: np.ndarray, columns: dict, max_nsqf_levels: np.ndarray):
+        self.learner_ids = learner_ids
+        self.columns = columns  # skill key -> (rows int32, verified bool)
+        self.max_nsqf_levels = max_nsqf_levels  # per learner, 0 when unknown
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, db: Session, batch_size: int = 50000):
+        """Build the matrix by streaming the learner_skills postings"""
+        row_of = {}
+        learner_ids = []
+        max_levels = []
+        skill_rows = {}
+        skill_verified = {}
+
+        query = db.query(
+            models.LearnerSkill.skill,
+            models.LearnerSkill.learner_id,
+            models.LearnerSkill.verified_count,
+            models.LearnerSkill.max_nsqf_level
+        ).join(
+            models.User, models.User.id == models.LearnerSkill.learner_id
+        ).filter(
+            models.User.public_profile == True
+        ).order_by(models.LearnerSkill.skill, models.LearnerSkill.learner_id).execution_options(yield_per=batch_size)
+
+        for skill, learner_id, verified_count, max_nsqf_level in query:
+            row = row_of.get(learner_id)
+            if row is None:
+                row = row_of[learner_id] = len(learner_ids)
+                learner_ids.append(learner_id)
+                max_levels.append(0)
+            if max_nsqf_level and max_nsqf_level > max_levels[row]:
+                max_levels[row] = max_nsqf_level
+            skill_rows.setdefault(skill, []).append(row)
+            skill_verified.setdefault(skill, []).append(bool(verified_count))
+
+        columns = {
+            skill: (np.array(rows, dtype=np.int32), np.array(skill_verified[skill], dtype=bool))
+            for skill, rows in skill_rows.items()
+        }
+        return cls(np.array(learner_ids, dtype=np.int64), columns, np.array(max_levels, dtype=np.int8))
+
+    def score(self, required: List[str], preferred: List[str], min_nsqf_level: Optional[int] = None):
+        """Score every learner against a job in one vectorized pass.
+
+        Returns (scores, required_matched, required_bits, preferred_bits,
+        eligible) where scores are 0-100, required_matched counts required
+        skills held and bit j is set when the learner has the j-th skill.
+        """
+        n = len(self.learner_ids)
+        points = np.zeros(n, dtype=np.int32)
+        required_matched = np.zeros(n, dtype=np.int32)
+        required_bits = np.zeros(n, dtype=np.uint64)
+        preferred_bits = np.zeros(n, dtype=np.uint64)
+
+        for bits, skills, weight in ((required_bits, required, REQUIRED_WEIGHT), (preferred_bits, preferred, PREFERRED_WEIGHT)):
+            for j, skill in enumerate(skills):
+                column = self.columns.get(skill)
+                if column is None:
+                    continue
+                rows = column[0]
+                points[rows] += weight
+                if weight == REQUIRED_WEIGHT:
+                    required_matched[rows] += 1
+                bits[rows] |= np.uint64(1 << j)
+
+        total = REQUIRED_WEIGHT * len(required) + PREFERRED_WEIGHT * len(preferred)
+        scores = points * (100.0 / total) if total else np.zeros(n)
+        eligible = points > 0
+        if min_nsqf_level:
+            eligible &= self.max_nsqf_levels >= min_nsqf_level
+        return scores, required_matched, required_bits, preferred_bits, eligible
+
+    def top(self, scores: np.ndarray, required_matched: np.ndarray, eligible: np.ndarray, limit: int):
+        """Row indices of the best eligible learners, best first.
+
+        Equal scores go to the learner holding more required skills, then to
+        the lower learner id.
+        """
+        candidates = np.flatnonzero(eligible)
+        if len(candidates) > limit:
+            # Partial selection of the best `limit`, then an exact sort of those
+            keep = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            threshold = scores[candidates[keep]].min()
+            candidates = candidates[scores[candidates] >= threshold]
+        order = np.lexsort((self.learner_ids[candidates], -required_matched[candidates], -scores[candidates]))
+        return candidates[order][:limit]
+
+    def verified_rows(self, skill: str) -> np.ndarray:
+        rows, verified = self.columns.get(skill, (np.empty(0, dtype=np.int32), np.empty(0, dtype=bool)))
+        return rows[verified]
+
+
+class TemplateIndex:
+    """Names of active badge templates per skill key, in template id order"""
+
+    def __init__(self):
+        self._by_skill = {}  # skill key -> {template id: name}
+        self._skills = {}  # template id -> skill keys
+        self._lock = threading.Lock()
+
+    def upsert(self, template_id: int, name: str, skills, active: bool):
+        with self._lock:
+            for key in self._skills.pop(template_id, ()):
+                names = self._by_skill[key]
+                del names[template_id]
+                if not names:
+                    del self._by_skill[key]
+            if not active:
+                return
+            keys = {skill_key(s) for s in skills or []} - {None}
+            self._skills[template_id] = keys
+            for key in keys:
+                self._by_skill.setdefault(key, {})[template_id] = name
+
+    def names(self, key: str) -> List[str]:
+        with self._lock:
+            return [name for _, name in sorted(self._by_skill.get(key, {}).items())]
+
+def build_template_index(db: Session) -> TemplateIndex:
+    index = TemplateIndex()
+    for template_id, name, template_skills in db.query(
+        models.BadgeTemplate.id, models.BadgeTemplate.name, models.BadgeTemplate.skills
+    ).filter(models.BadgeTemplate.active == True):
+        index.upsert(template_id, name, template_skills, True)
+    return index
+
+
+_matrix = None
+_templates = None
+_building = threading.Lock()  # Held while a matrix is being built
+
+def _build(db: Session):
+    global _matrix, _templates
+    matrix, templates = SkillMatrix.load(db), build_template_index(db)
+    _matrix, _templates = matrix, templates
+
+def load():
+    """Build the matrix and template index in a fresh session and swap them in"""
+    with _building:
+        db = SessionLocal()
+        try:
+            _build(db)
+        finally:
+            db.close()
+
+def _refresh():
+    try:
+        db = SessionLocal()
+        try:
+            _build(db)
+        finally:
+            db.close()
+    except Exception:
+        logger.exception("Skill matrix rebuild failed")
+    finally:
+        _building.release()
+
+def get_matrix(db: Session, max_age: int = MATCH_MATRIX_TTL_SECONDS) -> SkillMatrix:
+    """Process-wide matrix; a stale one is served while a fresh one is built in the background"""
+    matrix = _matrix
+    if matrix is None:
+        # Nothing to serve yet: wait for a build in progress or build inline
+        with _building:
+            if _matrix is None:
+                _build(db)
+        return _matrix
+    if time.monotonic() - matrix.loaded_at > max_age and _building.acquire(blocking=False):
+        threading.Thread(target=_refresh, name="skill-matrix-refresh", daemon=True).start()
+    return matrix
+
+def get_templates(db: Session) -> TemplateIndex:
+    if _templates is None:
+        get_matrix(db)
+    return _templates
+
+def upsert_template(template: models.BadgeTemplate):
+    """Keep gap recommendations current after a template is created or updated"""
+    if _templates is not None:
+        _templates.upsert(template.id, template.name, template.skills, template.active)
+
+def invalidate_matrix():
+    global _matrix, _templates
+    _matrix, _templates = None, None
+
+
+_stop = threading.Event()
+_thread = None
+
+def _run_scheduler():
+    while True:
+        try:
+            load()
+        except Exception:
+            logger.exception("Skill matrix build failed")
+        if _stop.wait(MATCH_MATRIX_TTL_SECONDS):
+            return
+
+def start_scheduler():
+    """Build the matrix now and every MATCH_MATRIX_TTL_SECONDS in a background thread (unless disabled)"""
+    global _thread
+    if not MATCH_MATRIX_SCHEDULER or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run_scheduler, name="skill-matrix", daemon=True)
+    _thread.start()
+
+def stop_scheduler():
+    _stop.set()
+
+def _job_skills(job):
+    """Normalized (required, preferred) skill keys of a job schema or model"""
+    required = [key for key in dict.fromkeys(skill_key(s) for s in job.required_skills) if key]
+    preferred = [key for key in dict.fromkeys(skill_key(s) for s in job.preferred_skills or []) if key and key not in required]
+    if len(required) > MAX_JOB_SKILLS or len(preferred) > MAX_JOB_SKILLS:
+        raise ValueError(f"A job can list at most {MAX_JOB_SKILLS} required and {MAX_JOB_SKILLS} preferred skills")
+    return required, preferred
+
+def _load_learner_details(db: Session, learner_ids: List[int]):
+    """Users plus their active credentials (with NSQF level) for a page of learners"""
+    users = {user.id: user for user in db.query(models.User).filter(models.User.id.in_(learner_ids)).all()}
+    credentials = {}
+    rows = db.query(
+        models.Credential.id,
+        models.Credential.learner_id,
+        models.Credential.skills,
+        models.Credential.skill_category,
+        models.Credential.issued_at,
+        models.CredentialMetadata.nsqf_level
+    ).outerjoin(
+        models.CredentialMetadata, models.CredentialMetadata.credential_id == models.Credential.id
+    ).filter(
+        models.Credential.learner_id.in_(learner_ids),
+        models.Credential.status.notin_(INACTIVE_STATUSES)
+    ).order_by(models.Credential.id).all()
+    for row in rows:
+        credentials.setdefault(row.learner_id, []).append(row)
+    return users, credentials
+
+def _recommended_templates(db: Session, gap_keys):
+    """Active badge template names teaching each gap skill"""
+    if not gap_keys:
+        return {}
+    templates = get_templates(db)
+    recommendations = {}
+    for key in gap_keys:
+        names = templates.names(key)
+        if names:
+            recommendations[key] = names
+    return recommendations
+
+def _learner_profile(user, credentials) -> schemas.LearnerProfile:
+    skill_counts = {}
+    for credential in credentials:
+        for skill in credential.skills or []:
+            name = normalize_skill(skill)
+            if name:
+                skill_counts[name] = skill_counts.get(name, 0) + 1
+    filled = [user.first_name, user.last_name, user.profile_image_url, user.linkedin_url, user.location]
+    return schemas.LearnerProfile(
+        learner_id=user.id,
+        full_name=" ".join(part for part in [user.first_name, user.last_name] if part) or user.email,
+        email=user.email,
+        total_credentials=len(credentials),
+        nsqf_levels_achieved=sorted({c.nsqf_level for c in credentials if c.nsqf_level}),
+        skill_categories=list(dict.fromkeys(c.skill_category for c in credentials if c.skill_category)),
+        top_skills=[name for name, _ in sorted(skill_counts.items(), key=lambda item: -item[1])[:10]],
+        last_credential_date=max((c.issued_at for c in credentials if c.issued_at), default=None),
+        profile_completeness=round(100.0 * sum(1 for value in filled if value) / len(filled), 1)
+    )
+
+def analyze_job(db: Session, job: schemas.JobRequirement, limit: int = 20, matrix: SkillMatrix = None) -> List[schemas.SkillGapAnalysis]:
+    """Rank learners for a job and return a full skill-gap analysis for the top ones"""
+    required, preferred = _job_skills(job)
+    matrix = matrix or get_matrix(db)
+    scores, required_matched, required_bits, preferred_bits, eligible = matrix.score(
+        required, preferred, int(job.min_nsqf_level) if job.min_nsqf_level else None
+    )
+    rows = matrix.top(scores, required_matched, eligible, limit)
+    if len(rows) == 0:
+        return []
+
+    learner_ids = [int(learner_id) for learner_id in matrix.learner_ids[rows]]
+    users, credentials = _load_learner_details(db, learner_ids)
+    # Verified evidence is looked up per job skill once, for all selected rows
+    verified = {skill: set(np.intersect1d(matrix.verified_rows(skill), rows).tolist()) for skill in required + preferred}
+
+    display = {skill_key(s): normalize_skill(s) for s in list(job.required_skills) + list(job.preferred_skills or [])}
+    gaps_by_row = {}
+    for row in rows.tolist():
+        bits = int(required_bits[row])
+        gaps_by_row[row] = [skill for j, skill in enumerate(required) if not bits >> j & 1]
+    recommendations = _recommended_templates(db, {skill for gaps in gaps_by_row.values() for skill in gaps})
+
+    results = []
+    for row, learner_id in zip(rows.tolist(), learner_ids):
+        user = users.get(learner_id)
+        if user is None:
+            continue
+        learner_credentials = credentials.get(learner_id, [])
+        evidence = {}
+        for credential in learner_credentials:
+            for key in {skill_key(s) for s in credential.skills or []}:
+                evidence.setdefault(key, []).append(credential.id)
+
+        skill_matches = []
+        for skills, bits in ((required, int(required_bits[row])), (preferred, int(preferred_bits[row]))):
+            for j, skill in enumerate(skills):
+                if bits >> j & 1:
+                    skill_matches.append(schemas.SkillMatch(
+                        skill_name=display.get(skill, skill),
+                        # Verified evidence counts fully, issued-only evidence partially
+                        match_percentage=100.0 if row in verified[skill] else 75.0,
+                        evidence_credentials=evidence.get(skill, [])
+                    ))
+
+        gaps = gaps_by_row[row]
+        results.append(schemas.SkillGapAnalysis(
+            job_requirement=job,
+            learner_profile=_learner_profile(user, learner_credentials),
+            skill_matches=skill_matches,
+            overall_match_score=round(float(scores[row]), 1),
+            skill_gaps=[display.get(skill, skill) for skill in gaps],
+            recommended_credentials=list(dict.fromkeys(
+                name for skill in gaps for name in recommendations.get(skill, [])
+            ))[:5]
+        ))
+    return results
+
+
+def _job_total_weight(required_count: int, preferred_count: int) -> int:
+    return REQUIRED_WEIGHT * required_count + PREFERRED_WEIGHT * preferred_count
+
+def _match_order():
+    return (models.JobMatch.score.desc(), models.JobMatch.required_matched.desc(), models.JobMatch.learner_id)
+
+def index_job(db: Session, job: models.JobRequirement):
+    """Rebuild a job's skill rows and recompute its matches.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    required, preferred = _job_skills(job)
+    db.query(models.JobSkill).filter(models.JobSkill.job_id == job.id).delete(synchronize_session=False)
+    if job.is_active:
+        db.bulk_insert_mappings(models.JobSkill, [
+            {"skill": skill, "job_id": job.id, "required": True} for skill in required
+        ] + [
+            {"skill": skill, "job_id": job.id, "required": False} for skill in preferred
+        ])
+    return refresh_job_matches(db, job)
+
+def refresh_job_matches(db: Session, job: models.JobRequirement, limit: int = JOB_MATCH_LIMIT):
+    """Recompute a job's top-N matches from scratch with one grouped query"""
+    previous = {learner_id for (learner_id,) in db.query(models.JobMatch.learner_id).filter(models.JobMatch.job_id == job.id)}
+    db.query(models.JobMatch).filter(models.JobMatch.job_id == job.id).delete(synchronize_session=False)
+    if not job.is_active:
+        return 0
+
+    required, preferred = _job_skills(job)
+    total = _job_total_weight(len(required), len(preferred))
+    points = func.sum(case((models.JobSkill.required == True, REQUIRED_WEIGHT), else_=PREFERRED_WEIGHT))
+    required_matched = func.count(case((models.JobSkill.required == True, 1)))
+
+    query = db.query(
+        models.LearnerSkill.learner_id, points.label("points"), required_matched.label("required_matched")
+    ).join(
+        models.JobSkill, (models.JobSkill.skill == models.LearnerSkill.skill) & (models.JobSkill.job_id == job.id)
+    ).join(
+        models.User, models.User.id == models.LearnerSkill.learner_id
+    ).filter(
+        models.User.public_profile == True
+    )
+    if job.min_nsqf_level:
+        # The outer query already reads learner_skills, so the subquery needs its own alias
+        levels = aliased(models.LearnerSkill)
+        query = query.filter(db.query(levels).filter(
+            levels.learner_id == models.User.id,
+            levels.max_nsqf_level >= job.min_nsqf_level
+        ).correlate(models.User).exists())
+    ranked = query.group_by(models.LearnerSkill.learner_id).order_by(
+        points.desc(), required_matched.desc(), models.LearnerSkill.learner_id
+    ).limit(limit).all()
+    if not ranked:
+        return 0
+
+    matched_skills = {}
+    for learner_id, skill in db.query(models.LearnerSkill.learner_id, models.LearnerSkill.skill).filter(
+        models.LearnerSkill.learner_id.in_([row[0] for row in ranked]),
+        models.LearnerSkill.skill.in_(required + preferred)
+    ):
+        matched_skills.setdefault(learner_id, set()).add(skill)
+
+    db.bulk_insert_mappings(models.JobMatch, [{
+        "job_id": job.id,
+        "learner_id": learner_id,
+        "score": round(100.0 * job_points / total, 1),
+        "required_matched": job_required_matched,
+        "matched_skills": [skill for skill in required + preferred if skill in matched_skills.get(learner_id, ())]
+    } for learner_id, job_points, job_required_matched in ranked])
+    analytics.record_for_jobs(db, "new_matches", {job.id: sum(1 for row in ranked if row[0] not in previous)})
+    return len(ranked)
+
+def _trim_job_matches(db: Session, job_id: int, limit: int):
+    overflow = db.query(models.JobMatch.learner_id).filter(
+        models.JobMatch.job_id == job_id
+    ).order_by(*_match_order()).offset(limit).all()
+    if overflow:
+        db.query(models.JobMatch).filter(
+            models.JobMatch.job_id == job_id,
+            models.JobMatch.learner_id.in_([row[0] for row in overflow])
+        ).delete(synchronize_session=False)
+
+def update_learner_matches(db: Session, learner_id: int, limit: int = JOB_MATCH_LIMIT):
+    """Patch job_matches after a learner's postings changed.
+
+    Call after search.index_learner, inside the caller's transaction.
+    """
+    learner = db.get(models.User, learner_id)
+    postings = {}
+    if learner is not None and learner.public_profile:
+        postings = dict(db.query(models.LearnerSkill.skill, models.LearnerSkill.max_nsqf_level).filter(
+            models.LearnerSkill.learner_id == learner_id
+        ).all())
+    max_nsqf_level = max((level for level in postings.values() if level), default=0)
+
+    current = {match.job_id: match for match in db.query(models.JobMatch).filter(models.JobMatch.learner_id == learner_id)}
+    job_ids = set(current)
+    if postings:
+        job_ids.update(row[0] for row in db.query(models.JobSkill.job_id).filter(
+            models.JobSkill.skill.in_(list(postings))
+        ).distinct())
+    if not job_ids:
+        return 0
+
+    jobs = {job.id: job for job in db.query(models.JobRequirement).filter(
+        models.JobRequirement.id.in_(job_ids), models.JobRequirement.is_active == True
+    )}
+    job_skills = {}
+    for job_id, skill, required in db.query(models.JobSkill.job_id, models.JobSkill.skill, models.JobSkill.required).filter(
+        models.JobSkill.job_id.in_(list(jobs))
+    ):
+        job_skills.setdefault(job_id, []).append((skill, required))
+    stats = {job_id: (count, floor) for job_id, count, floor in db.query(
+        models.JobMatch.job_id, func.count(models.JobMatch.learner_id), func.min(models.JobMatch.score)
+    ).filter(models.JobMatch.job_id.in_(list(jobs))).group_by(models.JobMatch.job_id)}
+
+    stale, overfull, added = [], [], {}
+    for job_id, job in jobs.items():
+        skills_of_job = job_skills.get(job_id, [])
+        total = _job_total_weight(sum(1 for _, required in skills_of_job if required), sum(1 for _, required in skills_of_job if not required))
+        matched = [skill for skill, _ in skills_of_job if skill in postings]
+        points = sum(REQUIRED_WEIGHT if required else PREFERRED_WEIGHT for skill, required in skills_of_job if skill in postings)
+        eligible = points > 0 and (not job.min_nsqf_level or max_nsqf_level >= job.min_nsqf_level)
+        score = round(100.0 * points / total, 1) if total else 0.0
+        existing = current.get(job_id)
+        count, floor = stats.get(job_id, (0, None))
+
+        if not eligible:
+            if existing is not None:
+                db.delete(existing)
+                if count >= limit:
+                    stale.append(job)
+            continue
+        required_matched = sum(1 for skill, required in skills_of_job if required and skill in postings)
+        if existing is not None:
+            if score < existing.score and count >= limit:
+                stale.append(job)
+                continue
+            existing.score = score
+            existing.required_matched = required_matched
+            existing.matched_skills = matched
+        elif count < limit or score > floor:
+            db.add(models.JobMatch(
+                job_id=job_id, learner_id=learner_id, score=score,
+                required_matched=required_matched, matched_skills=matched
+            ))
+            added[job_id] = 1
+            if count >= limit:
+                overfull.append(job_id)
+
+    db.flush()
+    for job_id in overfull:
+        _trim_job_matches(db, job_id, limit)
+    for job in stale:
+        refresh_job_matches(db, job, limit)
+    analytics.record_for_jobs(db, "new_matches", added)
+    return len(jobs)
+
+def get_job_matches(db: Session, job: models.JobRequirement, skip: int = 0, limit: int = 20) -> List[schemas.JobCandidateMatch]:
+    """One page of a job's materialized matches (a single indexed read)"""
+    required, _ = _job_skills(job)
+    display = {skill_key(s): normalize_skill(s) for s in list(job.required_skills or []) + list(job.preferred_skills or [])}
+    rows = db.query(models.JobMatch, models.User).join(
+        models.User, models.User.id == models.JobMatch.learner_id
+    ).filter(
+        models.JobMatch.job_id == job.id
+    ).order_by(*_match_order()).offset(skip).limit(limit).all()
+    return [schemas.JobCandidateMatch(
+        learner_id=user.id,
+        full_name=" ".join(part for part in [user.first_name, user.last_name] if part) or user.email,
+        location=user.location,
+        match_score=match.score,
+        required_matched=match.required_matched,
+        matched_skills=[display.get(skill, skill) for skill in match.matched_skills or []],
+        skill_gaps=[display.get(skill, skill) for skill in required if skill not in (match.matched_skills or [])],
+        updated_at=match.updated_at
+    ) for match, user in rows]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, func, Text, Boolean, JSON, Date, Float, Index
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, func, Text, Boolean, JSON, Date, Float, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from .db import Base
 import enum
@@ -33,6 +33,9 @@ class User(Base):
     last_name = Column(String, nullable=True)
     profile_image_url = Column(String, nullable=True)
     linkedin_url = Column(String, nullable=True)
+    location = Column(String, nullable=True)
+    state_code = Column(String(2), nullable=True, index=True)  # Normalized from location (see app.locations)
+    district_code = Column(String(60), nullable=True)
     public_profile = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     issuer = relationship("Issuer", back_populates="user", uselist=False)
@@ -48,11 +51,41 @@ class Issuer(Base):
     verified = Column(Boolean, default=False)
     industry = Column(String, nullable=True)
     location = Column(String, nullable=True)
+    state_code = Column(String(2), nullable=True, index=True)  # Normalized from location (see app.locations)
+    district_code = Column(String(60), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
     user = relationship("User", back_populates="issuer")
     credentials = relationship("Credential", back_populates="issuer")
     badge_templates = relationship("BadgeTemplate", back_populates="issuer")
 
+class IssuerSigningKey(Base):
+    """Ed25519 key pair an issuer's credentials are signed with; old keys stay published"""
+    __tablename__ = "issuer_signing_keys"
+    id = Column(Integer, primary_key=True, index=True)
+    issuer_id = Column(Integer, ForeignKey("issuers.id"), nullable=False, index=True)
+    kid = Column(String(64), nullable=False, unique=True)  # RFC 7638 JWK thumbprint
+    public_key = Column(String(64), nullable=False)  # Base64url raw 32-byte key (JWK "x")
+    private_key = Column(Text, nullable=False)  # Raw key, Fernet-encrypted with SIGNING_KEY_SECRET
+    active = Column(Boolean, default=True)  # The key new credentials are signed with
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class StatusList(Base):
+    """Per-issuer status list: allocated credential positions and a version bumped on every change"""
+    __tablename__ = "status_lists"
+    issuer_id = Column(Integer, ForeignKey("issuers.id"), primary_key=True)
+    next_index = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class StatusListPage(Base):
+    """Fixed-size page of an issuer's status bitstring for one purpose (revocation, expiration)"""
+    __tablename__ = "status_list_pages"
+    issuer_id = Column(Integer, ForeignKey("issuers.id"), primary_key=True)
+    purpose = Column(String(20), primary_key=True)
+    page = Column(Integer, primary_key=True)
+    bits = Column(LargeBinary, nullable=False)  # Bit i of the page is credential page * PAGE_BITS + i, most significant bit first
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class BadgeTemplate(Base):
     __tablename__ = "badge_templates"
     id = Column(Integer, primary_key=True, index=True)
@@ -76,7 +109,7 @@ class Credential(Base):
     id = Column(Integer, primary_key=True, index=True)
     learner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     issuer_id = Column(Integer, ForeignKey("issuers.id"), nullable=False)
-    badge_template_id = Column(Integer, ForeignKey("badge_templates.id"), nullable=True)
+    badge_template_id = Column(Integer, ForeignKey("badge_templates.id"), nullable=True, index=True)
     
     # Basic Info
     title = Column(String, nullable=False)
@@ -91,10 +124,14 @@ class Credential(Base):
     skills = Column(JSON, nullable=True)  # Array of skills
     skill_category = Column(String, nullable=True)
     tags = Column(JSON, nullable=True)  # Array of tags
+    state_code = Column(String(2), nullable=True)  # Issuer's state at issuance, for regional reporting
+    fingerprint = Column(String(64), nullable=True, unique=True)  # SHA-256 of the canonical content (fingerprints.py)
+    signed_credential = Column(Text, nullable=True)  # Compact JWS signed with the issuer's Ed25519 key (signing.py)
+    status_list_index = Column(Integer, nullable=True)  # Position in the issuer's status lists (status_lists.py)
     
     # Dates
     completion_date = Column(DateTime(timezone=True), nullable=True)
-    expiry_date = Column(DateTime(timezone=True), nullable=True)
+    expiry_date = Column(DateTime(timezone=True), nullable=True, index=True)
     issued_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -107,6 +144,36 @@ class Credential(Base):
     issuer = relationship("Issuer", back_populates="credentials")
     badge_template = relationship("BadgeTemplate", back_populates="credentials")
     
+    __table_args__ = (
+        # Recent-credential lookup for the learner dashboard
+        Index("ix_credentials_learner_issued_at", "learner_id", "issued_at"),
+    )
+    
+class LearnerSkill(Base):
+    """Inverted skill index: one posting per (normalized skill, learner)"""
+    __tablename__ = "learner_skills"
+    skill = Column(String(200), primary_key=True)
+    learner_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+    credential_count = Column(Integer, default=0)  # Active credentials evidencing the skill
+    verified_count = Column(Integer, default=0)  # ...of which verified
+    max_nsqf_level = Column(Integer, nullable=True)  # Highest NSQF level among them
+    state_code = Column(String(2), nullable=True)  # The learner's state, copied from users for filtered search
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Best-evidenced learners of a skill first, optionally within one state
+        Index("ix_learner_skills_skill_rank", skill, verified_count.desc(), learner_id),
+        Index("ix_learner_skills_skill_state_rank", skill, state_code, verified_count.desc(), learner_id),
+    )
+
+class SkillSupply(Base):
+    """Learners holding each skill (postings per skill key in learner_skills), kept current as postings are rebuilt"""
+    __tablename__ = "skill_supply"
+    
+    skill = Column(String(200), primary_key=True)
+    learner_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class CredentialShare(Base):
     __tablename__ = "credential_shares"
     id = Column(Integer, primary_key=True, index=True)
@@ -118,7 +185,7 @@ class CredentialShare(Base):
 class CredentialView(Base):
     __tablename__ = "credential_views"
     id = Column(Integer, primary_key=True, index=True)
-    credential_id = Column(Integer, ForeignKey("credentials.id"), nullable=False)
+    credential_id = Column(Integer, ForeignKey("credentials.id"), nullable=False, index=True)
     viewer_ip = Column(String, nullable=True)
     viewer_user_agent = Column(String, nullable=True)
     viewed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -135,9 +202,35 @@ class ExternalProvider(Base):
     authentication_method = Column(String(50))
     is_ncvet_recognized = Column(Boolean, default=False)
     trust_level = Column(Integer, default=3)  # 1-5 rating
+    issuer_id = Column(Integer, ForeignKey("issuers.id"), nullable=True)  # Issuer of imported credentials
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_active = Column(Boolean, default=True)
 
+class CredentialImport(Base):
+    """A provider record seen by the importer and what became of it"""
+    __tablename__ = "credential_imports"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    external_provider_id = Column(Integer, ForeignKey("external_providers.id"), nullable=False)
+    external_credential_id = Column(String(200), nullable=False)
+    learner_email = Column(String(255), nullable=True)
+    credential_id = Column(Integer, ForeignKey("credentials.id"), nullable=True, index=True)
+    mapping_confidence = Column(Float, nullable=False, default=0.0)
+    requires_manual_review = Column(Boolean, default=False)
+    status = Column(String(20), nullable=False)  # imported, duplicate, review, rejected
+    record = Column(JSON, nullable=True)  # Mapped fields, kept for review and rejections
+    issues = Column(JSON, nullable=True)  # Why the confidence was lowered or the record rejected
+    import_date = Column(DateTime(timezone=True), server_default=func.now())
+    reviewed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    reviewed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Re-running an import skips records already seen
+        Index("ix_credential_imports_provider_record", "external_provider_id", "external_credential_id", unique=True),
+        # The review queue
+        Index("ix_credential_imports_status", "status", "id"),
+    )
+
 class EmployerProfile(Base):
     """Employer profiles for job matching and verification"""
     __tablename__ = "employer_profiles"
@@ -148,6 +241,8 @@ class EmployerProfile(Base):
     industry = Column(String(100))
     company_size = Column(String(50))  # startup, sme, large, enterprise
     location = Column(String(100))
+    state_code = Column(String(2), index=True)  # Normalized from location
+    district_code = Column(String(60))
     website = Column(String(500))
     description = Column(Text)
     cin_number = Column(String(50))  # Corporate Identification Number
@@ -171,9 +266,59 @@ class JobRequirement(Base):
     job_description = Column(Text)
     salary_range = Column(String(100))
     location = Column(String(100))
+    state_code = Column(String(2), index=True)  # Normalized from location
+    district_code = Column(String(60))
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class JobSkill(Base):
+    """Normalized skills of a job requirement, for finding jobs affected by a learner change"""
+    __tablename__ = "job_skills"
+    skill = Column(String(200), primary_key=True)
+    job_id = Column(Integer, ForeignKey("job_requirements.id"), primary_key=True, index=True)
+    required = Column(Boolean, default=True)  # False for preferred skills
+
+class JobMatch(Base):
+    """Materialized top-N candidate matches per active job requirement"""
+    __tablename__ = "job_matches"
+    job_id = Column(Integer, ForeignKey("job_requirements.id"), primary_key=True)
+    learner_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+    score = Column(Float, nullable=False)  # 0-100, required skills weigh double
+    required_matched = Column(Integer, default=0)
+    matched_skills = Column(JSON)  # Normalized skill keys held by the learner
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_job_matches_job_score", "job_id", "score"),
+    )
+
+class EmployerActivity(Base):
+    """Per-employer event counts in hourly, daily, monthly and all-time buckets"""
+    __tablename__ = "employer_activity"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)  # Employer user
+    granularity = Column(String(5), primary_key=True)  # hour, day, month, total
+    bucket = Column(String(13), primary_key=True)  # UTC "2024-10-13T09", "2024-10-13", "2024-10" or "all"
+    verifications = Column(Integer, nullable=False, default=0)
+    verified_credentials = Column(Integer, nullable=False, default=0)  # Verifications of valid credentials
+    job_views = Column(Integer, nullable=False, default=0)
+    new_matches = Column(Integer, nullable=False, default=0)  # Candidates entering a job's top matches
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class SkillActivity(Base):
+    """Per-skill issuance and verification counts by UTC day, behind trending skills"""
+    __tablename__ = "skill_activity"
+    
+    skill = Column(String(100), primary_key=True)  # Canonical skill name
+    day = Column(String(10), primary_key=True)  # UTC "2024-10-13"
+    issued_count = Column(Integer, nullable=False, default=0)
+    verified_count = Column(Integer, nullable=False, default=0)  # Employer verifications of credentials carrying the skill
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_skill_activity_day", "day"),
+    )
+
 class CredentialMetadata(Base):
     """Enhanced metadata for credentials aligned with NSQF"""
     __tablename__ = "credential_metadata"
@@ -193,14 +338,29 @@ class CredentialMetadata(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+class AnchorBatch(Base):
+    """One Merkle tree of credential hashes whose root is anchored on a ledger"""
+    __tablename__ = "anchor_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    merkle_root = Column(String(64), nullable=False, unique=True)  # Hex SHA-256
+    leaf_count = Column(Integer, nullable=False)
+    ledger = Column(String(50), nullable=False)  # Ledger backend name
+    transaction_id = Column(String(128), nullable=True)  # Set once the root is on the ledger
+    anchored_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class BlockchainVerification(Base):
     """Blockchain-based credential verification"""
     __tablename__ = "blockchain_verifications"
     
     id = Column(Integer, primary_key=True, index=True)
-    credential_id = Column(Integer, ForeignKey("credentials.id"))
-    blockchain_hash = Column(String(128))
+    credential_id = Column(Integer, ForeignKey("credentials.id"), index=True)
+    blockchain_hash = Column(String(128), index=True)
     transaction_id = Column(String(128))
+    # Merkle batch anchoring: the credential's leaf position and sibling path to the batch root
+    anchor_batch_id = Column(Integer, ForeignKey("anchor_batches.id"), nullable=True, index=True)
+    leaf_index = Column(Integer, nullable=True)
+    merkle_proof = Column(JSON, nullable=True)  # [{"position": "left"|"right", "hash": hex}, ...] leaf to root
     verification_url = Column(String(500))
     verification_method = Column(String(50))  # blockchain, digilocker, skill_india_digital
     verified_at = Column(DateTime(timezone=True))
@@ -221,6 +381,11 @@ class DigiLockerIntegration(Base):
     last_synced = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Integrations due for a sync, oldest first, paged by (last_synced, id)
+        Index("ix_digilocker_integrations_last_synced", "last_synced", "id"),
+    )
+
 class SkillIndiaProfile(Base):
     """Integration with Skill India Digital platform"""
     __tablename__ = "skill_india_profiles"
@@ -239,7 +404,7 @@ class NationalStatistics(Base):
     __tablename__ = "national_statistics"
     
     id = Column(Integer, primary_key=True, index=True)
-    report_date = Column(Date, nullable=False)
+    report_date = Column(Date, nullable=False, unique=True, index=True)
     total_credentials_issued = Column(Integer, default=0)
     total_active_learners = Column(Integer, default=0)
     total_issuers = Column(Integer, default=0)
@@ -250,6 +415,49 @@ class NationalStatistics(Base):
     monthly_growth_rate = Column(Float, default=0.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class CredentialRollup(Base):
+    """Credential counts per value of a reporting dimension, kept current on every write"""
+    __tablename__ = "credential_rollups"
+    
+    dimension = Column(String(20), primary_key=True)  # total, nsqf_level, skill_category, issuer, day, state
+    bucket = Column(String(100), primary_key=True)  # Dimension value ("all" for total)
+    issued_count = Column(Integer, nullable=False, default=0)
+    active_count = Column(Integer, nullable=False, default=0)
+    revoked_count = Column(Integer, nullable=False, default=0)
+    expired_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Top buckets of a dimension (e.g. skill categories) without a scan
+        Index("ix_credential_rollups_dimension_active", "dimension", "active_count"),
+    )
+
+class CredentialCube(Base):
+    """Credential counts per state, NSQF level and issue month, kept current on every write"""
+    __tablename__ = "credential_cube"
+    
+    state_code = Column(String(12), primary_key=True)  # "unassigned" when the issuer's state is unknown
+    nsqf_level = Column(Integer, primary_key=True)  # 0 when no NSQF level is recorded
+    month = Column(String(7), primary_key=True)  # YYYY-MM of issue
+    issued_count = Column(Integer, nullable=False, default=0)
+    active_count = Column(Integer, nullable=False, default=0)
+    revoked_count = Column(Integer, nullable=False, default=0)
+    expired_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Slices across states for a month range
+        Index("ix_credential_cube_month", "month", "nsqf_level"),
+    )
+
+class UserRollup(Base):
+    """User counts per role, kept current on registration"""
+    __tablename__ = "user_rollups"
+    
+    role = Column(String(20), primary_key=True)
+    user_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class MultilingualContent(Base):
     """Support for multilingual content"""
     __tablename__ = "multilingual_content"
@@ -261,3 +469,7 @@ class MultilingualContent(Base):
     translated_text = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_multilingual_content_lookup", "content_type", "language_code", "content_id"),
+    )
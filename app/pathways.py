@@ -0,0 +1,325 @@
+"""
+Stackable-credential pathway graph.
+
+Nodes are badge templates: the qualifications a learner can earn. Edges come
+from the ``credential_metadata`` of issued credentials, lifted to the
+credentials' templates, and point along the direction of progression:
+
+* ``stackable_with`` on a credential lists the credentials it stacks into,
+  giving an edge from its template to each of theirs;
+* ``prerequisite_qualifications`` lists what must be held first (credential
+  ids, or template names), giving an edge from each of those to its template.
+
+A template's NSQF level is the highest level recorded for its credentials.
+
+Reachability is precomputed when the graph is built: strongly connected
+components are found with Tarjan's algorithm and each component's descendant
+and ancestor sets are OR-ed together as integer bitsets in topological order.
+"Which templates stack into X" is then a bitset read, and the shortest pathway
+search only expands nodes from which a target level is still reachable.
+
+The graph is rebuilt when ``cache.bump("pathways", "graph")`` is called after
+metadata or template changes (or after PATHWAY_GRAPH_TTL_SECONDS when caching
+is disabled), and query results are cached under the same version.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from . import cache, models
+
+# Load environment variables from .env file
+load_dotenv()
+
+PATHWAY_GRAPH_TTL_SECONDS = int(os.getenv("PATHWAY_GRAPH_TTL_SECONDS", "300"))
+
+
+class PathwayGraph:
+    """Template graph with precomputed descendant/ancestor bitsets"""
+
+    def __init__(self, nodes: dict, edges: Iterable):
+        self.nodes = nodes  # template id -> {"template_id", "name", "nsqf_level"}
+        self.ids = sorted(nodes)
+        self.position = {template_id: i for i, template_id in enumerate(self.ids)}
+        self.successors = [[] for _ in self.ids]
+        self.predecessors = [[] for _ in self.ids]
+        for source, target in set(edges):
+            if source != target and source in self.position and target in self.position:
+                self.successors[self.position[source]].append(self.position[target])
+                self.predecessors[self.position[target]].append(self.position[source])
+        self.descendants, self.ancestors = self._closure()
+
+    def _components(self):
+        """Tarjan's SCCs (iterative), emitted successors-first"""
+        n = len(self.ids)
+        index = [None] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack, components = [], []
+        counter = 0
+        for root in range(n):
+            if index[root] is not None:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work.pop()
+                if child == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                successors = self.successors[node]
+                if child < len(successors):
+                    work.append((node, child + 1))
+                    target = successors[child]
+                    if index[target] is None:
+                        work.append((target, 0))
+                    elif on_stack[target]:
+                        low[node] = min(low[node], index[target])
+                    continue
+                for target in successors:
+                    if on_stack[target]:
+                        low[node] = min(low[node], low[target])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def _closure(self):
+        components = self._components()
+        component_of = {}
+        for c, members in enumerate(components):
+            for member in members:
+                component_of[member] = c
+        members_bits = [sum(1 << member for member in members) for members in components]
+
+        # Successor components are emitted first, predecessor components last
+        down = [0] * len(components)
+        for c, members in enumerate(components):
+            bits = members_bits[c]
+            for member in members:
+                for target in self.successors[member]:
+                    bits |= down[component_of[target]]
+            down[c] = bits
+        up = [0] * len(components)
+        for c in range(len(components) - 1, -1, -1):
+            bits = members_bits[c]
+            for member in components[c]:
+                for source in self.predecessors[member]:
+                    bits |= up[component_of[source]]
+            up[c] = bits
+
+        n = len(self.ids)
+        return [down[component_of[i]] for i in range(n)], [up[component_of[i]] for i in range(n)]
+
+    def _nodes_of(self, bits: int, exclude: int) -> List[dict]:
+        bits &= ~(1 << exclude)
+        result = []
+        while bits:
+            low_bit = bits & -bits
+            result.append(self.nodes[self.ids[low_bit.bit_length() - 1]])
+            bits ^= low_bit
+        return result
+
+    def stacks_into(self, template_id: int) -> List[dict]:
+        """Templates from which template_id can be reached"""
+        i = self.position[template_id]
+        return self._nodes_of(self.ancestors[i], i)
+
+    def leads_to(self, template_id: int) -> List[dict]:
+        """Templates reachable from template_id"""
+        i = self.position[template_id]
+        return self._nodes_of(self.descendants[i], i)
+
+    def shortest_pathway(self, held: Iterable[int], min_nsqf_level: int):
+        """(start, steps) of the fewest templates to earn to reach min_nsqf_level.
+
+        start is the held template the pathway builds on (None when the
+        pathway starts from scratch at an entry-level template); steps exclude
+        it. Returns (None, []) when a held template already meets the level
+        and None when the level is unreachable.
+        """
+        targets = 0
+        for i, template_id in enumerate(self.ids):
+            level = self.nodes[template_id]["nsqf_level"]
+            if level is not None and level >= min_nsqf_level:
+                targets |= 1 << i
+        if not targets:
+            return None
+
+        sources = [self.position[template_id] for template_id in held if template_id in self.position]
+        if any(targets >> i & 1 for i in sources):
+            return None, []
+        sources = [i for i in sources if self.descendants[i] & targets]
+        if not sources:
+            # Nothing held leads there; start from templates without prerequisites
+            sources = [i for i in range(len(self.ids)) if not self.predecessors[i] and self.descendants[i] & targets]
+            if not sources:
+                return None
+            fresh = True
+        else:
+            fresh = False
+
+        parent = {i: None for i in sources}
+        queue = deque(sources)
+        while queue:
+            node = queue.popleft()
+            if targets >> node & 1:
+                path = []
+                while node is not None:
+                    path.append(self.nodes[self.ids[node]])
+                    node = parent[node]
+                path.reverse()
+                if fresh:
+                    return None, path
+                return path[0], path[1:]
+            for target in self.successors[node]:
+                if target not in parent and self.descendants[target] & targets:
+                    parent[target] = node
+                    queue.append(target)
+        return None
+
+
+def _as_int(value) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+def build_graph(db: Session) -> PathwayGraph:
+    """Build the template graph from active templates and credential metadata"""
+    nodes = {
+        template_id: {"template_id": template_id, "name": name, "nsqf_level": None}
+        for template_id, name in db.query(models.BadgeTemplate.id, models.BadgeTemplate.name).filter(
+            models.BadgeTemplate.active == True
+        )
+    }
+    template_by_name = {node["name"].strip().lower(): template_id for template_id, node in nodes.items()}
+
+    rows = db.query(
+        models.Credential.id,
+        models.Credential.badge_template_id,
+        models.CredentialMetadata.nsqf_level,
+        models.CredentialMetadata.stackable_with,
+        models.CredentialMetadata.prerequisite_qualifications
+    ).join(
+        models.CredentialMetadata, models.CredentialMetadata.credential_id == models.Credential.id
+    ).filter(models.Credential.badge_template_id.isnot(None)).all()
+
+    # Metadata references credentials by id; resolve them to templates in one query
+    referenced = set()
+    for _, _, _, stackable_with, prerequisites in rows:
+        for value in list(stackable_with or []) + list(prerequisites or []):
+            credential_id = _as_int(value)
+            if credential_id is not None:
+                referenced.add(credential_id)
+    template_of = {}
+    if referenced:
+        template_of = dict(db.query(models.Credential.id, models.Credential.badge_template_id).filter(
+            models.Credential.id.in_(referenced)
+        ))
+
+    def resolve(value):
+        credential_id = _as_int(value)
+        if credential_id is not None:
+            return template_of.get(credential_id)
+        if isinstance(value, str):
+            return template_by_name.get(value.strip().lower())
+        return None
+
+    edges = set()
+    for _, template_id, nsqf_level, stackable_with, prerequisites in rows:
+        node = nodes.get(template_id)
+        if node is None:
+            continue
+        if nsqf_level is not None and (node["nsqf_level"] is None or nsqf_level > node["nsqf_level"]):
+            node["nsqf_level"] = nsqf_level
+        for value in stackable_with or []:
+            target = resolve(value)
+            if target is not None:
+                edges.add((template_id, target))
+        for value in prerequisites or []:
+            source = resolve(value)
+            if source is not None:
+                edges.add((source, template_id))
+    return PathwayGraph(nodes, edges)
+
+
+_graph = None
+_graph_key = None
+_graph_lock = threading.Lock()
+
+def graph_version() -> Optional[str]:
+    """Shared version of the graph, or None when caching is unavailable"""
+    if cache.get_cache() is None:
+        return None
+    try:
+        return cache.get_version("pathways", "graph")
+    except (OSError, cache.RedisError):
+        return None
+
+def get_graph(db: Session) -> PathwayGraph:
+    """Process-wide graph, rebuilt when its version changes"""
+    global _graph, _graph_key
+    version = graph_version()
+    key = version if version is not None else int(time.monotonic() // PATHWAY_GRAPH_TTL_SECONDS)
+    if _graph is None or _graph_key != key:
+        with _graph_lock:
+            if _graph is None or _graph_key != key:
+                _graph = build_graph(db)
+                _graph_key = key
+    return _graph
+
+def invalidate():
+    """Call after committing changes to credential metadata or templates"""
+    global _graph
+    _graph = None
+    cache.bump("pathways", "graph")
+
+def template_pathways(db: Session, template_id: int) -> Optional[dict]:
+    """Templates stacking into a template and those it leads to (cached)"""
+    def load():
+        graph = get_graph(db)
+        if template_id not in graph.position:
+            return None
+        return {
+            "template": graph.nodes[template_id],
+            "stacks_into_this": graph.stacks_into(template_id),
+            "leads_to": graph.leads_to(template_id),
+        }
+    return cache.get_or_set("pathways", "graph", f"template:{template_id}", load)
+
+def learner_pathway(db: Session, learner_id: int, min_nsqf_level: int) -> dict:
+    """Shortest pathway from a learner's credentials to an NSQF level (cached)"""
+    def load():
+        graph = get_graph(db)
+        held = {template_id for (template_id,) in db.query(models.Credential.badge_template_id).filter(
+            models.Credential.learner_id == learner_id,
+            models.Credential.badge_template_id.isnot(None),
+            models.Credential.status.notin_([models.CredentialStatus.revoked, models.CredentialStatus.expired])
+        ).distinct()}
+        pathway = graph.shortest_pathway(held, min_nsqf_level)
+        if pathway is None:
+            return {"target_nsqf_level": min_nsqf_level, "reachable": False, "achieved": False, "start": None, "steps": []}
+        start, steps = pathway
+        return {
+            "target_nsqf_level": min_nsqf_level,
+            "reachable": True,
+            "achieved": not steps,
+            "start": start,
+            "steps": steps,
+        }
+    # Learner entries are bumped on credential changes; the graph version covers metadata
+    return cache.get_or_set("learner", learner_id, f"pathway:{graph_version()}:{min_nsqf_level}", load)
@@ -0,0 +1,351 @@
+"""
+Incrementally maintained counts behind national statistics.
+
+``credential_rollups`` holds one row per value of each reporting dimension
+(overall total, NSQF level, skill category, issuer, issue day and state) with
+the number of credentials issued and how many of those are active, revoked or
+expired. ``credential_cube`` holds the same counts per state, NSQF level and
+issue month for regional reports. ``user_rollups`` holds registered users per
+role, and ``skill_supply`` learners per skill (maintained by the search index).
+
+The crud layer takes a ``snapshot`` of a credential before and after a write
+and calls ``apply`` in the same transaction; the difference becomes a handful
+of ``INSERT ... ON CONFLICT DO UPDATE`` increments, so issuing, revoking,
+expiring, re-categorising or deleting a credential touches at most two rows
+per dimension and two cube cells. Reads never scan credentials: national statistics are a few
+primary-key lookups. ``rebuild`` recomputes everything from the base tables
+(after deploying the tables, or after bulk changes made outside the API).
+Both paths bucket days by the UTC date of issue.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import Date, case, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+from . import models
+from .db import SessionLocal
+
+DIMENSIONS = ("total", "nsqf_level", "skill_category", "issuer", "day", "state")
+COUNT_COLUMNS = ("issued_count", "active_count", "revoked_count", "expired_count")
+ROLLUP_KEY = ("dimension", "bucket")
+CUBE_KEY = ("state_code", "nsqf_level", "month")
+UNASSIGNED = "unassigned"
+UNCATEGORIZED = "uncategorized"
+GROWTH_WINDOW_DAYS = 30
+_CHUNK_SIZE = 500  # Rows per multi-row upsert during rebuilds
+
+# (((dimension, bucket), ...), state, (state_code, nsqf_level, month) cube cell)
+Snapshot = Tuple[Tuple[Tuple[str, str], ...], str, Tuple[str, int, str]]
+
+
+def _state(status) -> str:
+    if status == models.CredentialStatus.revoked:
+        return "revoked"
+    if status == models.CredentialStatus.expired:
+        return "expired"
+    return "active"
+
+def _bucket(dimension: str, value) -> str:
+    """Rollup key of a raw column value (shared by snapshots and rebuilds)"""
+    if dimension == "total":
+        return "all"
+    if dimension == "nsqf_level":
+        return str(int(value)) if value is not None else UNASSIGNED
+    if dimension == "skill_category":
+        return (value or "").strip()[:100] or UNCATEGORIZED
+    if dimension == "issuer":
+        return str(value)
+    if dimension == "state":
+        return value or UNASSIGNED
+    # day: the UTC date; SQLite returns utc_date() as text
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10] if value else UNASSIGNED
+
+def snapshot(db: Session, credential: Optional[models.Credential]) -> Optional[Snapshot]:
+    """Rollup buckets and state of a credential as currently flushed"""
+    if credential is None:
+        return None
+    nsqf_level = db.query(models.CredentialMetadata.nsqf_level).filter(
+        models.CredentialMetadata.credential_id == credential.id
+    ).scalar()
+    return _snapshot(credential, nsqf_level)
+
+def snapshots(db: Session, credentials: List[models.Credential]) -> List[Snapshot]:
+    """Snapshots of many flushed credentials, with one metadata query per chunk"""
+    levels = {}
+    ids = [credential.id for credential in credentials]
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        levels.update(db.query(models.CredentialMetadata.credential_id, models.CredentialMetadata.nsqf_level).filter(
+            models.CredentialMetadata.credential_id.in_(ids[start:start + _CHUNK_SIZE])
+        ))
+    return [_snapshot(credential, levels.get(credential.id)) for credential in credentials]
+
+def _snapshot(credential: models.Credential, nsqf_level) -> Snapshot:
+    issued_at = credential.issued_at or datetime.now(timezone.utc)
+    values = {
+        "total": None,
+        "nsqf_level": nsqf_level,
+        "skill_category": credential.skill_category,
+        "issuer": credential.issuer_id,
+        "day": issued_at,
+        "state": credential.state_code,
+    }
+    buckets = tuple((dimension, _bucket(dimension, values[dimension])) for dimension in DIMENSIONS)
+    return buckets, _state(credential.status), _cell(credential.state_code, nsqf_level, buckets[4][1])
+
+def _cell(state_code: Optional[str], nsqf_level, day: str) -> Tuple[str, int, str]:
+    return _bucket("state", state_code), int(nsqf_level or 0), day[:7]
+
+def _count(deltas: dict, key, credential_state: str, count: int):
+    row = deltas.setdefault(key, dict.fromkeys(COUNT_COLUMNS, 0))
+    row["issued_count"] += count
+    row[f"{credential_state}_count"] += count
+
+def _add(deltas: dict, cells: dict, state: Optional[Snapshot], sign: int):
+    if state is None:
+        return
+    buckets, credential_state, cell = state
+    for key in buckets:
+        _count(deltas, key, credential_state, sign)
+    _count(cells, cell, credential_state, sign)
+
+def _rows(deltas: dict, key_columns: Tuple[str, ...]) -> list:
+    return [
+        {**dict(zip(key_columns, key)), **counts}
+        for key, counts in deltas.items()
+        if any(counts.values())
+    ]
+
+def _insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+def increment(db: Session, model, key_columns: Tuple[str, ...], rows: list):
+    """Add each row's counters to the row with the same key, creating it if missing"""
+    if not rows:
+        return
+    table = model.__table__
+    counters = [column for column in rows[0] if column not in key_columns]
+    # A fixed order keeps concurrent writers from locking rows in opposite orders
+    rows = sorted(rows, key=lambda row: tuple(row[column] for column in key_columns))
+    insert = _insert(db)
+    if insert is None:
+        for row in rows:
+            criteria = [table.c[column] == row[column] for column in key_columns]
+            updated = db.execute(table.update().where(*criteria).values(
+                **{column: table.c[column] + row[column] for column in counters}
+            )).rowcount
+            if not updated:
+                db.execute(table.insert().values(**row))
+        return
+    for start in range(0, len(rows), _CHUNK_SIZE):
+        statement = insert(table).values(rows[start:start + _CHUNK_SIZE])
+        update = {column: table.c[column] + statement.excluded[column] for column in counters}
+        update["updated_at"] = func.now()
+        db.execute(statement.on_conflict_do_update(index_elements=list(key_columns), set_=update))
+
+def apply(db: Session, before: Optional[Snapshot], after: Optional[Snapshot]):
+    """Move a credential's counts from its old buckets/state to its new ones"""
+    apply_many(db, [(before, after)])
+
+def apply_many(db: Session, changes: Iterable[Tuple[Optional[Snapshot], Optional[Snapshot]]]):
+    """``apply`` for many credentials at once, with one upsert per table"""
+    deltas, cells = {}, {}
+    for before, after in changes:
+        if before != after:
+            _add(deltas, cells, before, -1)
+            _add(deltas, cells, after, 1)
+    increment(db, models.CredentialRollup, ROLLUP_KEY, _rows(deltas, ROLLUP_KEY))
+    increment(db, models.CredentialCube, CUBE_KEY, _rows(cells, CUBE_KEY))
+
+def record_user(db: Session, role, delta: int = 1):
+    role = role.value if hasattr(role, "value") else role
+    increment(db, models.UserRollup, ("role",), [{"role": role, "user_count": delta}])
+
+
+class utc_date(FunctionElement):
+    """date() of a timestamp in UTC, whatever the session time zone"""
+    type = Date()
+    inherit_cache = True
+
+@compiles(utc_date)
+def _compile_utc_date(element, compiler, **kw):
+    # SQLite keeps no session time zone; offsets in stored values are applied by date()
+    return "date(%s)" % compiler.process(element.clauses, **kw)
+
+@compiles(utc_date, "postgresql")
+def _compile_utc_date_postgresql(element, compiler, **kw):
+    return "date(timezone('UTC', %s))" % compiler.process(element.clauses, **kw)
+
+
+def _dimension_column(dimension: str):
+    if dimension == "nsqf_level":
+        return models.CredentialMetadata.nsqf_level
+    if dimension == "skill_category":
+        return models.Credential.skill_category
+    if dimension == "issuer":
+        return models.Credential.issuer_id
+    if dimension == "state":
+        return models.Credential.state_code
+    return utc_date(models.Credential.issued_at)
+
+_STATE = case(
+    (models.Credential.status == models.CredentialStatus.revoked, "revoked"),
+    (models.Credential.status == models.CredentialStatus.expired, "expired"),
+    else_="active"
+)
+PARTITIONS = DIMENSIONS[1:] + ("cube",)
+
+def _with_metadata(query):
+    return query.select_from(models.Credential).outerjoin(
+        models.CredentialMetadata, models.CredentialMetadata.credential_id == models.Credential.id
+    )
+
+def _aggregate(db: Session, partition: str) -> dict:
+    """{key: counts} for one dimension (or the cube), grouped in the database"""
+    deltas = {}
+    if partition == "cube":
+        day = utc_date(models.Credential.issued_at)
+        columns = (models.Credential.state_code, models.CredentialMetadata.nsqf_level, day, _STATE)
+        query = _with_metadata(db.query(*columns, func.count(models.Credential.id))).group_by(*columns)
+        for state_code, nsqf_level, value, credential_state, count in query:
+            _count(deltas, _cell(state_code, nsqf_level, _bucket("day", value)), credential_state, count)
+        return deltas
+
+    column = _dimension_column(partition)
+    query = db.query(column, _STATE, func.count(models.Credential.id))
+    if partition == "nsqf_level":
+        query = _with_metadata(query)
+    for value, credential_state, count in query.group_by(column, _STATE):
+        _count(deltas, (partition, _bucket(partition, value)), credential_state, count)
+        if partition == "issuer":
+            # Every credential has exactly one issuer, so these also sum to the total
+            _count(deltas, ("total", "all"), credential_state, count)
+    return deltas
+
+def _aggregate_partition(partition: str) -> dict:
+    db = SessionLocal()
+    try:
+        return _aggregate(db, partition)
+    finally:
+        db.close()
+
+def rebuild(db: Session, workers: int = 1) -> int:
+    """Recompute all rollups from the base tables; returns the credential count.
+
+    With workers > 1 each dimension (and the cube) is aggregated concurrently
+    on its own connection; the results are then written in one transaction.
+    """
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = dict(zip(PARTITIONS, pool.map(_aggregate_partition, PARTITIONS)))
+    else:
+        results = {partition: _aggregate(db, partition) for partition in PARTITIONS}
+    cells = results.pop("cube")
+    deltas = {}
+    for partition in results.values():
+        deltas.update(partition)
+    users = db.query(models.User.role, func.count(models.User.id)).group_by(models.User.role).all()
+    supply = db.query(models.LearnerSkill.skill, func.count(models.LearnerSkill.learner_id)).group_by(models.LearnerSkill.skill).all()
+
+    db.query(models.CredentialRollup).delete(synchronize_session=False)
+    db.query(models.CredentialCube).delete(synchronize_session=False)
+    db.query(models.UserRollup).delete(synchronize_session=False)
+    db.query(models.SkillSupply).delete(synchronize_session=False)
+    increment(db, models.CredentialRollup, ROLLUP_KEY, _rows(deltas, ROLLUP_KEY))
+    increment(db, models.CredentialCube, CUBE_KEY, _rows(cells, CUBE_KEY))
+    increment(db, models.UserRollup, ("role",), [
+        {"role": role.value if hasattr(role, "value") else role, "user_count": count} for role, count in users
+    ])
+    increment(db, models.SkillSupply, ("skill",), [{"skill": skill, "learner_count": count} for skill, count in supply])
+    db.commit()
+    return deltas.get(("total", "all"), {}).get("issued_count", 0)
+
+
+def issued_between(db: Session, start: date, end: date) -> int:
+    """Credentials issued on days in [start, end) that still exist"""
+    total = db.query(func.sum(models.CredentialRollup.issued_count)).filter(
+        models.CredentialRollup.dimension == "day",
+        models.CredentialRollup.bucket >= start.isoformat(),
+        models.CredentialRollup.bucket < end.isoformat()
+    ).scalar()
+    return int(total or 0)
+
+def growth_rate(db: Session, today: Optional[date] = None, window_days: int = GROWTH_WINDOW_DAYS) -> float:
+    """Percent change in issuance over the last window_days against the window before"""
+    today = today or datetime.now(timezone.utc).date()
+    end = today + timedelta(days=1)
+    current = issued_between(db, end - timedelta(days=window_days), end)
+    previous = issued_between(db, end - timedelta(days=2 * window_days), end - timedelta(days=window_days))
+    if not previous:
+        return 0.0
+    return round((current - previous) * 100.0 / previous, 2)
+
+def national_statistics(db: Session, top_categories: int = 10, today: Optional[date] = None) -> dict:
+    """National statistics from the rollups: a few indexed reads at any volume"""
+    total = db.query(models.CredentialRollup).filter(
+        models.CredentialRollup.dimension == "total", models.CredentialRollup.bucket == "all"
+    ).first()
+    users = dict(db.query(models.UserRollup.role, models.UserRollup.user_count))
+    levels = db.query(models.CredentialRollup.bucket, models.CredentialRollup.active_count).filter(
+        models.CredentialRollup.dimension == "nsqf_level",
+        models.CredentialRollup.bucket != UNASSIGNED,
+        models.CredentialRollup.active_count > 0
+    ).all()
+    categories = db.query(models.CredentialRollup.bucket, models.CredentialRollup.active_count).filter(
+        models.CredentialRollup.dimension == "skill_category",
+        models.CredentialRollup.bucket != UNCATEGORIZED,
+        models.CredentialRollup.active_count > 0
+    ).order_by(models.CredentialRollup.active_count.desc()).limit(top_categories).all()
+    states = db.query(models.CredentialRollup.bucket, models.CredentialRollup.active_count).filter(
+        models.CredentialRollup.dimension == "state",
+        models.CredentialRollup.bucket != UNASSIGNED,
+        models.CredentialRollup.active_count > 0
+    ).order_by(models.CredentialRollup.bucket).all()
+
+    return {
+        "total_credentials_issued": total.issued_count if total else 0,
+        "total_active_credentials": total.active_count if total else 0,
+        "total_revoked_credentials": total.revoked_count if total else 0,
+        "total_expired_credentials": total.expired_count if total else 0,
+        "total_active_learners": users.get(models.UserRole.learner.value, 0),
+        "total_issuers": users.get(models.UserRole.issuer.value, 0),
+        "total_employers": users.get(models.UserRole.employer.value, 0),
+        "credentials_by_nsqf_level": {level: count for level, count in sorted(levels, key=lambda row: int(row[0]))},
+        "top_skill_categories": [{"category": category, "count": count} for category, count in categories],
+        "monthly_growth_rate": growth_rate(db, today),
+        "state_wise_distribution": dict(states),
+    }
+
+def regional_statistics(
+    db: Session,
+    state_code: Optional[str] = None,
+    nsqf_level: Optional[int] = None,
+    from_month: Optional[str] = None,
+    to_month: Optional[str] = None
+):
+    """Cube cells matching the filters (months as YYYY-MM, inclusive)"""
+    cube = models.CredentialCube
+    query = db.query(cube).filter(cube.issued_count > 0)
+    if state_code is not None:
+        query = query.filter(cube.state_code == state_code)
+    if nsqf_level is not None:
+        query = query.filter(cube.nsqf_level == nsqf_level)
+    if from_month is not None:
+        query = query.filter(cube.month >= from_month)
+    if to_month is not None:
+        query = query.filter(cube.month <= to_month)
+    return query.order_by(cube.month, cube.state_code, cube.nsqf_level).all()
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field, HttpUrl
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, HttpUrl, field_validator
+from typing import Optional, List, Dict, Union
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
 
 class UserRole(str, Enum):
     learner = "learner"
@@ -31,6 +31,7 @@ class UserBase(BaseModel):
     last_name: Optional[str] = None
     profile_image_url: Optional[str] = None
     linkedin_url: Optional[str] = None
+    location: Optional[str] = None
     public_profile: bool = True
 
 class UserCreate(UserBase):
@@ -45,6 +46,7 @@ class UserUpdate(BaseModel):
     last_name: Optional[str] = None
     profile_image_url: Optional[str] = None
     linkedin_url: Optional[str] = None
+    location: Optional[str] = None
     public_profile: Optional[bool] = None
 
 class UserOut(UserBase):
@@ -79,6 +81,8 @@ class IssuerOut(IssuerBase):
     id: int
     user_id: int
     verified: bool
+    state_code: Optional[str] = None
+    district_code: Optional[str] = None
     class Config:
         from_attributes = True
 
@@ -117,6 +121,11 @@ class BadgeTemplateOut(BadgeTemplateBase):
     class Config:
         from_attributes = True
 
+class BadgeTemplateWithCounts(BadgeTemplateOut):
+    issued_count: int = 0
+    verified_count: int = 0
+    view_count: int = 0
+
 # Credential schemas
 class CredentialBase(BaseModel):
     title: str
@@ -172,12 +181,46 @@ class CredentialOut(CredentialBase):
     class Config:
         from_attributes = True
 
+    @field_validator("issuer", mode="before")
+    @classmethod
+    def issuer_name(cls, value):
+        # ORM credentials carry the Issuer relationship here; expose its name
+        if value is not None and not isinstance(value, str) and hasattr(value, "name"):
+            return value.name
+        return value
+
 class CredentialWithDetails(CredentialOut):
     issuer: IssuerOut
     badge_template: Optional[BadgeTemplateOut] = None
     learner_email: str
     learner_name: Optional[str] = None
 
+    @field_validator("issuer", mode="before")
+    @classmethod
+    def issuer_name(cls, value):
+        # Detailed views keep the full issuer object
+        return value
+
+class CredentialListMetadata(BaseModel):
+    verification_code: Optional[str] = None
+    public_url: Optional[str] = None
+    shared_on_linkedin: bool = False
+
+class CredentialListItem(BaseModel):
+    """Learner credential list entry in the shape the frontend expects"""
+    id: str
+    title: str
+    description: Optional[str] = None
+    issuer: str
+    issue_date: datetime
+    expiry_date: Optional[datetime] = None
+    status: str
+    verification_status: str
+    credential_type: str
+    skills: List[str] = []
+    nsqf_level: Optional[int] = None
+    metadata: CredentialListMetadata
+
 class PublicCredential(BaseModel):
     """Public view of credential for verification"""
     id: int
@@ -247,6 +290,14 @@ class CredentialMetadata(BaseModel):
     industry_alignment: Optional[List[str]] = []
     job_roles: Optional[List[str]] = []
     competency_framework: Optional[str] = None
+    prerequisite_qualifications: Optional[List[Union[int, str]]] = []  # Credential IDs or template names
+    stackable_with: Optional[List[int]] = []  # IDs of credentials this one stacks into
+
+class CredentialMetadataOut(CredentialMetadata):
+    credential_id: int
+
+    class Config:
+        from_attributes = True
 
 class BlockchainVerification(BaseModel):
     blockchain_hash: Optional[str] = None
@@ -275,6 +326,44 @@ class JobRequirement(BaseModel):
     experience_years: Optional[int] = Field(None, ge=0)
     qualification_pathway: Optional[QualificationPathway] = None
 
+class JobRequirementCreate(JobRequirement):
+    job_description: Optional[str] = None
+    salary_range: Optional[str] = Field(None, max_length=100)
+    location: Optional[str] = Field(None, max_length=100)
+
+class JobRequirementUpdate(BaseModel):
+    job_title: Optional[str] = Field(None, max_length=200)
+    required_skills: Optional[List[str]] = Field(None, min_items=1)
+    preferred_skills: Optional[List[str]] = None
+    min_nsqf_level: Optional[NSQFLevel] = None
+    experience_years: Optional[int] = Field(None, ge=0)
+    qualification_pathway: Optional[QualificationPathway] = None
+    job_description: Optional[str] = None
+    salary_range: Optional[str] = Field(None, max_length=100)
+    location: Optional[str] = Field(None, max_length=100)
+    is_active: Optional[bool] = None
+
+class JobRequirementOut(JobRequirementCreate):
+    id: int
+    employer_id: int
+    is_active: bool
+    state_code: Optional[str] = None
+    district_code: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class JobCandidateMatch(BaseModel):
+    learner_id: int
+    full_name: str
+    location: Optional[str] = None
+    match_score: float
+    required_matched: int
+    matched_skills: List[str]
+    skill_gaps: List[str]
+    updated_at: Optional[datetime] = None
+
 class SkillMatch(BaseModel):
     skill_name: str
     match_percentage: float = Field(..., ge=0, le=100)
@@ -299,6 +388,66 @@ class SkillGapAnalysis(BaseModel):
     skill_gaps: List[str]
     recommended_credentials: List[str]
 
+class SearchHit(BaseModel):
+    kind: str  # "credentials" or "badge_templates"
+    id: int
+    title: str
+    description: Optional[str] = None
+    skills: List[str] = []
+    issuer_name: Optional[str] = None
+    rank: float
+    highlights: Dict[str, str] = {}  # field -> snippet with <mark> around matches
+    public_url: Optional[str] = None
+    issued_at: Optional[datetime] = None
+    badge_type: Optional[str] = None
+
+class BatchVerificationRequest(BaseModel):
+    values: List[str] = Field(..., min_length=1, max_length=1000)  # Codes, public URLs or blockchain hashes
+    identifier_type: Optional[str] = Field(None, pattern="^(code|url|hash)$")  # Detected per value when omitted
+
+class VerificationResult(BaseModel):
+    input: str
+    identifier_type: str  # code, url or hash
+    found: bool
+    status: str  # valid, pending, expired, revoked or not_found
+    credential_id: Optional[int] = None
+    title: Optional[str] = None
+    issuer_name: Optional[str] = None
+    recipient_name: Optional[str] = None
+    credential_status: Optional[CredentialStatus] = None
+    issued_at: Optional[datetime] = None
+    expiry_date: Optional[datetime] = None
+    is_revoked: bool = False
+    is_expired: bool = False
+    nsqf_level: Optional[int] = None
+    skills: List[str] = []
+    verification_code: Optional[str] = None
+    blockchain_hash: Optional[str] = None
+    transaction_id: Optional[str] = None
+
+class PathwayNode(BaseModel):
+    template_id: int
+    name: str
+    nsqf_level: Optional[int] = None
+
+class TemplatePathways(BaseModel):
+    template: PathwayNode
+    stacks_into_this: List[PathwayNode]  # Templates from which this one can be reached
+    leads_to: List[PathwayNode]  # Templates reachable from this one
+
+class LearnerPathway(BaseModel):
+    target_nsqf_level: int
+    reachable: bool
+    achieved: bool
+    start: Optional[PathwayNode] = None  # Held template the pathway builds on
+    steps: List[PathwayNode]  # Templates to earn, in order
+
+class AutocompleteSuggestion(BaseModel):
+    type: str  # "skill", "issuer" or "template"
+    id: Union[int, str]  # Skill key for skills
+    label: str
+    weight: int  # Credentials carrying the skill / issued by the issuer or from the template
+
 # Multi-language support schemas
 class MultilingualContent(BaseModel):
     en: str  # English (required)
@@ -332,6 +481,18 @@ class CredentialImport(BaseModel):
     mapping_confidence: float = Field(..., ge=0, le=1)
     requires_manual_review: bool = False
 
+class CredentialImportReview(CredentialImport):
+    id: int
+    learner_email: Optional[str] = None
+    status: str
+    credential_id: Optional[int] = None
+    record: Optional[dict] = None
+    issues: Optional[List[str]] = None
+    reviewed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # Enhanced dashboard for national statistics
 class NationalStats(BaseModel):
     total_credentials_issued: int
@@ -343,6 +504,56 @@ class NationalStats(BaseModel):
     monthly_growth_rate: float
     state_wise_distribution: dict  # {state: count}
 
+class NationalStatisticsSnapshot(NationalStats):
+    report_date: date
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class RegionalStatisticsCell(BaseModel):
+    state_code: str
+    state_name: Optional[str] = None
+    nsqf_level: Optional[int] = None  # None when no NSQF level is recorded
+    month: str  # YYYY-MM
+    issued_count: int
+    active_count: int
+    revoked_count: int
+    expired_count: int
+
+class MerkleProofStep(BaseModel):
+    position: str  # Side of the sibling: left or right
+    hash: str
+
+class AnchorProof(BaseModel):
+    credential_id: int
+    verification_code: str
+    leaf_hash: str
+    leaf_index: int
+    proof: List[MerkleProofStep]  # Leaf to root
+    merkle_root: str
+    leaf_count: int
+    ledger: str
+    transaction_id: Optional[str] = None  # None until the batch root is on the ledger
+    anchored_at: Optional[datetime] = None
+    proof_valid: bool  # The proof folds the leaf into the batch root
+    ledger_confirmed: bool  # The ledger holds the batch root under its transaction
+    content_matches: bool  # The credential as stored now still hashes to the leaf
+
+class SignedCredential(BaseModel):
+    verification_code: str
+    kid: str
+    jws: str  # Compact JWS (EdDSA); verify against /.well-known/jwks.json
+
+class SignedCredentialVerify(BaseModel):
+    jws: str
+
+class SignedCredentialVerification(BaseModel):
+    valid: bool
+    kid: Optional[str] = None
+    claims: Optional[dict] = None
+    error: Optional[str] = None
+
 class RegulatorDashboard(BaseModel):
     national_stats: NationalStats
     compliance_metrics: dict
@@ -383,7 +594,8 @@ class LearnerDashboard(BaseModel):
 class IssuerDashboard(BaseModel):
     stats: DashboardStats
     recent_issued: List[CredentialOut]
-    badge_templates: List[BadgeTemplateOut]
+    badge_templates: List[BadgeTemplateWithCounts]
+    total_badge_templates: int = 0
     issuer_info: IssuerOut
 
 class EmployerDashboard(BaseModel):
@@ -0,0 +1,286 @@
+"""
+Candidate search over learners, backed by an inverted skill index.
+
+``learner_skills`` holds one posting per (skill key, learner) with the
+number of active and verified credentials evidencing the skill, the highest
+NSQF level among them and the learner's normalized state. A query is answered
+in two bounded steps:
+
+1. for each requested skill, the SEARCH_CANDIDATES_PER_SKILL best-evidenced
+   learners (most verified credentials first) are read off the
+   ``ix_learner_skills_skill_rank`` index, or ``..._skill_state_rank`` when a
+   location is given, so no step scans every posting of a popular skill;
+2. only those candidates are scored: ranked by skill coverage, then verified
+   coverage.
+
+Rankings are exact while every requested skill has at most
+SEARCH_CANDIDATES_PER_SKILL matching learners. Above that, learners outside
+every skill's pre-ranked list are not returned. Pages are addressed with an
+opaque cursor over the ranking, so deep pages cost the same as the first one.
+
+Locations are matched on the state code that ``locations.normalize`` gives
+the free-text filter, which users carry from signup and profile updates.
+
+Postings for a learner are rebuilt from their credentials whenever one of
+them is issued or changes status; that is a handful of rows per event. The
+same rebuild adjusts ``skill_supply``, the number of learners per skill.
+"""
+import base64
+import json
+import os
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import and_, case, func, literal, or_, select, union
+from sqlalchemy.orm import Session
+from . import locations, models, rollups
+from .skills import skill_key
+
+# Load environment variables from .env file
+load_dotenv()
+
+SEARCH_CANDIDATES_PER_SKILL = int(os.getenv("SEARCH_CANDIDATES_PER_SKILL", "5000"))  # Learners scored per requested skill
+
+# Credentials in these states no longer count as evidence of a skill
+INACTIVE_STATUSES = [models.CredentialStatus.revoked, models.CredentialStatus.expired]
+
+def index_learner(db: Session, learner_id: int):
+    """Rebuild a learner's postings from their active credentials.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    return index_learners(db, [learner_id])
+
+def index_learners(db: Session, learner_ids: List[int]):
+    """Rebuild the postings of several learners with one read, delete and insert"""
+    learner_ids = list(learner_ids)
+    if not learner_ids:
+        return 0
+    rows = db.query(
+        models.Credential.learner_id,
+        models.Credential.skills,
+        models.Credential.status,
+        models.CredentialMetadata.nsqf_level
+    ).outerjoin(
+        models.CredentialMetadata, models.CredentialMetadata.credential_id == models.Credential.id
+    ).filter(
+        models.Credential.learner_id.in_(learner_ids),
+        models.Credential.status.notin_(INACTIVE_STATUSES)
+    ).all()
+
+    states = dict(db.query(models.User.id, models.User.state_code).filter(models.User.id.in_(learner_ids)))
+
+    postings = {}
+    for learner_id, skills, status, nsqf_level in rows:
+        for skill in {skill_key(s) for s in skills or []} - {None}:
+            posting = postings.setdefault((skill, learner_id), {"credential_count": 0, "verified_count": 0, "max_nsqf_level": None})
+            posting["credential_count"] += 1
+            if status == models.CredentialStatus.verified:
+                posting["verified_count"] += 1
+            if nsqf_level is not None and (posting["max_nsqf_level"] is None or nsqf_level > posting["max_nsqf_level"]):
+                posting["max_nsqf_level"] = nsqf_level
+
+    # Keep the per-skill learner counts in step with the postings being replaced
+    supply = {}
+    for (skill, _) in postings:
+        supply[skill] = supply.get(skill, 0) + 1
+    for skill, count in db.query(models.LearnerSkill.skill, func.count(models.LearnerSkill.learner_id)).filter(
+        models.LearnerSkill.learner_id.in_(learner_ids)
+    ).group_by(models.LearnerSkill.skill):
+        supply[skill] = supply.get(skill, 0) - count
+    rollups.increment(db, models.SkillSupply, ("skill",), [
+        {"skill": skill, "learner_count": delta} for skill, delta in supply.items() if delta
+    ])
+
+    db.query(models.LearnerSkill).filter(
+        models.LearnerSkill.learner_id.in_(learner_ids)
+    ).delete(synchronize_session=False)
+    if postings:
+        db.bulk_insert_mappings(models.LearnerSkill, [
+            {"skill": skill, "learner_id": learner_id, "state_code": states.get(learner_id), **posting}
+            for (skill, learner_id), posting in postings.items()
+        ])
+    return len(postings)
+
+def rebuild_index(db: Session, batch_size: int = 500):
+    """Rebuild postings for every learner that holds credentials (backfill)"""
+    last_id = 0
+    indexed = 0
+    while True:
+        learner_ids = [row[0] for row in db.query(models.Credential.learner_id).filter(
+            models.Credential.learner_id > last_id
+        ).distinct().order_by(models.Credential.learner_id).limit(batch_size).all()]
+        if not learner_ids:
+            break
+        index_learners(db, learner_ids)
+        db.commit()
+        indexed += len(learner_ids)
+        last_id = learner_ids[-1]
+    return indexed
+
+def encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """The size numbers encoded in a cursor; ValueError for anything else"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size or not all(
+        isinstance(value, (int, float)) and not isinstance(value, bool) for value in values
+    ):
+        raise ValueError("Invalid cursor")
+    return values
+
+def _skill_candidates(db: Session, skill: str, state_code: Optional[str], min_nsqf_level: Optional[int], per_skill: int):
+    """The best-evidenced listed learners of one skill, as a bounded index range scan"""
+    posting = models.LearnerSkill
+    query = select(posting.learner_id).join(
+        models.User, models.User.id == posting.learner_id
+    ).where(
+        posting.skill == skill,
+        models.User.public_profile == True
+    )
+    if state_code:
+        query = query.where(posting.state_code == state_code)
+    if min_nsqf_level is not None:
+        query = query.where(posting.max_nsqf_level >= min_nsqf_level)
+    return query.order_by(posting.verified_count.desc(), posting.learner_id).limit(per_skill).subquery()
+
+def _rank_learners(db: Session, skills: List[str], state_code: Optional[str], min_nsqf_level: Optional[int], cursor, limit: int,
+                   per_skill: int = SEARCH_CANDIDATES_PER_SKILL):
+    """Ranked learner ids as (learner_id, matched, verified) rows"""
+    candidates = union(*(
+        select(top.c.learner_id) for top in (
+            _skill_candidates(db, skill, state_code, min_nsqf_level, per_skill) for skill in skills
+        )
+    )).subquery()
+    matched = func.count(models.LearnerSkill.skill)
+    verified = func.count(case((models.LearnerSkill.verified_count > 0, 1)))
+
+    query = db.query(
+        models.LearnerSkill.learner_id, matched.label("matched"), verified.label("verified")
+    ).filter(
+        models.LearnerSkill.learner_id.in_(select(candidates.c.learner_id)),
+        models.LearnerSkill.skill.in_(skills)
+    )
+    if min_nsqf_level is not None:
+        query = query.filter(models.LearnerSkill.max_nsqf_level >= min_nsqf_level)
+    query = query.group_by(models.LearnerSkill.learner_id)
+
+    if cursor:
+        last_matched, last_verified, last_id = cursor
+        query = query.having(or_(
+            matched < last_matched,
+            and_(matched == last_matched, verified < last_verified),
+            and_(matched == last_matched, verified == last_verified, models.LearnerSkill.learner_id > last_id)
+        ))
+
+    return query.order_by(
+        matched.desc(), verified.desc(), models.LearnerSkill.learner_id
+    ).limit(limit).all()
+
+def _list_learners(db: Session, state_code: Optional[str], min_nsqf_level: Optional[int], cursor, limit: int):
+    """Learners in id order when no skills are requested"""
+    query = db.query(models.User.id, literal(0), literal(0)).filter(
+        models.User.role == models.UserRole.learner,
+        models.User.public_profile == True
+    )
+    if min_nsqf_level is not None:
+        query = query.filter(db.query(models.LearnerSkill).filter(
+            models.LearnerSkill.learner_id == models.User.id,
+            models.LearnerSkill.max_nsqf_level >= min_nsqf_level
+        ).exists())
+    if state_code:
+        query = query.filter(models.User.state_code == state_code)
+    if cursor:
+        query = query.filter(models.User.id > cursor[2])
+    return query.order_by(models.User.id).limit(limit).all()
+
+def _load_candidates(db: Session, ranked, skills: List[str]):
+    """Build candidate cards for one page of ranked learners (two queries)"""
+    learner_ids = [row[0] for row in ranked]
+    users = {user.id: user for user in db.query(models.User).filter(models.User.id.in_(learner_ids)).all()}
+
+    credentials = {}
+    rows = db.query(
+        models.Credential, models.Issuer.name, models.CredentialMetadata.nsqf_level
+    ).join(
+        models.Issuer, models.Issuer.id == models.Credential.issuer_id
+    ).outerjoin(
+        models.CredentialMetadata, models.CredentialMetadata.credential_id == models.Credential.id
+    ).filter(
+        models.Credential.learner_id.in_(learner_ids),
+        models.Credential.status.notin_(INACTIVE_STATUSES)
+    ).order_by(models.Credential.issued_at.desc()).all()
+    for credential, issuer_name, nsqf_level in rows:
+        credentials.setdefault(credential.learner_id, []).append((credential, issuer_name, nsqf_level))
+
+    candidates = []
+    for learner_id, matched, verified in ranked:
+        user = users[learner_id]
+        learner_credentials = credentials.get(learner_id, [])
+        learner_skills = {}
+        for credential, _, _ in learner_credentials:
+            for skill in credential.skills or []:
+                key = skill_key(skill)
+                if key:
+                    learner_skills.setdefault(key, skill.strip())
+        name = " ".join(part for part in [user.first_name, user.last_name] if part) or user.email
+        candidates.append({
+            "id": str(learner_id),
+            "name": name,
+            "title": learner_credentials[0][0].title if learner_credentials else None,
+            "location": user.location,
+            "experience": None,  # Not tracked for learners yet
+            "skills": list(learner_skills.values()),
+            "matchedSkills": [learner_skills[skill] for skill in skills if skill in learner_skills],
+            "skillCoverage": round(100.0 * matched / len(skills), 1) if skills else None,
+            "credentials": [{
+                "id": str(credential.id),
+                "title": credential.title,
+                "issuer": issuer_name,
+                "verificationStatus": "verified" if credential.status == models.CredentialStatus.verified else "pending",
+                "issuedDate": credential.issued_at.date().isoformat() if credential.issued_at else None,
+                "nsqfLevel": nsqf_level
+            } for credential, issuer_name, nsqf_level in learner_credentials],
+            "isVerified": any(credential.status == models.CredentialStatus.verified for credential, _, _ in learner_credentials),
+            "profileImageUrl": user.profile_image_url,
+            "linkedinUrl": user.linkedin_url
+        })
+    return candidates
+
+def search_candidates(
+    db: Session,
+    skills: List[str] = None,
+    location: Optional[str] = None,
+    min_nsqf_level: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20
+):
+    """Return (candidates, next_cursor) for one page of ranked learners"""
+    normalized = [key for key in dict.fromkeys(skill_key(s) for s in skills or []) if key]
+    position = decode_cursor(cursor, 3) if cursor else None
+    state_code = None
+    if location and location.strip():
+        place = locations.normalize(location)
+        if place is None:
+            # No learner can be placed in a location that does not resolve to a state
+            return [], None
+        state_code = place.state_code
+
+    if normalized:
+        ranked = _rank_learners(db, normalized, state_code, min_nsqf_level, position, limit + 1)
+    else:
+        ranked = _list_learners(db, state_code, min_nsqf_level, position, limit + 1)
+
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        learner_id, matched, verified = ranked[-1]
+        next_cursor = encode_cursor([matched, verified, learner_id])
+
+    if not ranked:
+        return [], None
+    return _load_candidates(db, ranked, normalized), next_cursor
@@ -0,0 +1,59 @@
+"""
+Fast JSON serialization for large list responses.
+
+Endpoints opt in by returning ``FastJSONResponse`` (or declaring it as their
+``response_class``). List payloads are validated and dumped in one pass by a
+Pydantic ``TypeAdapter``, so the rows never go through FastAPI's recursive
+``jsonable_encoder``.
+"""
+import json
+from datetime import date, datetime, time
+from typing import List
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from . import schemas
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+
+def _default(value):
+    # Match orjson: dates and times as ISO 8601, anything else as its string form
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+def dumps(content) -> bytes:
+    """Serialize plain Python data to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when available.
+
+    Content that is already serialized (``bytes``) is sent as-is.
+    """
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+# Adapters are built once; building one compiles the validator/serializer
+credential_list_adapter = TypeAdapter(List[schemas.CredentialOut])
+credential_list_item_adapter = TypeAdapter(List[schemas.CredentialListItem])
+badge_template_list_adapter = TypeAdapter(List[schemas.BadgeTemplateWithCounts])
+
+
+def dump_list(adapter: TypeAdapter, items) -> bytes:
+    """Validate ORM objects or dicts and serialize them to JSON bytes in one pass"""
+    return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+
+def list_response(adapter: TypeAdapter, items) -> FastJSONResponse:
+    return FastJSONResponse(dump_list(adapter, items))
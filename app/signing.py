@@ -0,0 +1,317 @@
+"""
+Signed credentials that can be verified offline.
+
+Every issuer has an Ed25519 key pair. At issuance a credential's claims are
+signed with the issuer's active key as a compact JWS
+(``base64url(header).base64url(claims).base64url(signature)``, alg
+``EdDSA``), which is stored on the credential. The claims are who issued it
+and to whom, the verification code, the fingerprinted content, the expiry
+and the credential's position in its issuer's status lists. Public keys are published as a JWKS at ``/.well-known/jwks.json`` with
+a long cache lifetime. A verifier that holds the key set can check any signed
+credential with one signature verification in memory, with no API call;
+``verify`` does exactly that. A token whose kid is not in a cached key set
+comes from a new or rotated key: fetch that one key from
+``/.well-known/jwks/{kid}.json`` (a key never changes, so it is cacheable
+forever) or refetch the set, rather than waiting for the cache to expire.
+
+Private keys are stored Fernet-encrypted with SIGNING_KEY_SECRET (derived from
+SECRET_KEY when unset) and cached decrypted per process. The development
+default SECRET_KEY is not accepted: without a real secret the API refuses to
+start and nothing can be signed. Keys are created in
+their own committed transaction. Rotating a key deactivates the old one but
+keeps it published, so credentials signed earlier still verify (other
+processes keep signing with the old key until they restart).
+
+Single issuances sign inline, which takes well under a millisecond.
+``sign_pending`` signs credentials that have no signature yet (from bulk
+imports, or issued before signing existed) in batches. It spreads the signing
+over a pool of SIGNING_WORKERS processes, so bulk issuance is not held up by
+signing.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from cryptography.exceptions import InvalidSignature
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from dotenv import load_dotenv
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+from . import fingerprints, models, status_lists
+from .auth import DEFAULT_SECRET_KEY, SECRET_KEY
+from .db import SessionLocal
+
+# Load environment variables from .env file
+load_dotenv()
+
+SIGNING_KEY_SECRET = os.getenv("SIGNING_KEY_SECRET") or (SECRET_KEY if SECRET_KEY != DEFAULT_SECRET_KEY else None)
+SIGNING_WORKERS = int(os.getenv("SIGNING_WORKERS", "4"))
+SIGNING_KEYS_MAX_AGE = int(os.getenv("SIGNING_KEYS_MAX_AGE", "86400"))  # JWKS Cache-Control max-age
+
+SIGNING_BATCH_SIZE = 1000
+_POOL_THRESHOLD = 200  # Smaller batches are signed in-process
+_POOL_CHUNK_SIZE = 250  # Payloads per pool task
+ALGORITHM = "EdDSA"
+
+_fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(SIGNING_KEY_SECRET.encode("utf-8")).digest())) if SIGNING_KEY_SECRET else None
+
+def require_secret():
+    """Raise unless private keys can be encrypted with a real secret"""
+    if _fernet is None:
+        raise RuntimeError("Set SIGNING_KEY_SECRET (or a non-default SECRET_KEY) to encrypt issuer signing keys")
+
+def _cipher() -> Fernet:
+    require_secret()
+    return _fernet
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _json(value) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def thumbprint(public_key: str) -> str:
+    """RFC 7638 JWK thumbprint of a base64url Ed25519 public key"""
+    members = '{"crv":"Ed25519","kty":"OKP","x":"%s"}' % public_key
+    return _b64encode(hashlib.sha256(members.encode("ascii")).digest())
+
+def jwk(key: models.IssuerSigningKey) -> dict:
+    return {"kty": "OKP", "crv": "Ed25519", "x": key.public_key, "kid": key.kid, "use": "sig", "alg": ALGORITHM}
+
+
+# Keys
+
+_private_keys = {}  # issuer id -> (kid, raw private key bytes) of the active key
+_keys_lock = threading.Lock()
+
+def create_key(db: Session, issuer_id: int) -> Tuple[models.IssuerSigningKey, bytes]:
+    """New active key for an issuer (uncommitted); earlier keys stay published but stop signing"""
+    private_key = Ed25519PrivateKey.generate()
+    raw_private = private_key.private_bytes(
+        serialization.Encoding.Raw, serialization.PrivateFormat.Raw, serialization.NoEncryption()
+    )
+    public_key = _b64encode(private_key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw))
+    db.query(models.IssuerSigningKey).filter(
+        models.IssuerSigningKey.issuer_id == issuer_id, models.IssuerSigningKey.active == True
+    ).update({"active": False}, synchronize_session=False)
+    key = models.IssuerSigningKey(
+        issuer_id=issuer_id,
+        kid=thumbprint(public_key),
+        public_key=public_key,
+        private_key=_cipher().encrypt(raw_private).decode("ascii"),
+        active=True
+    )
+    db.add(key)
+    db.flush()
+    return key, raw_private
+
+def rotate_key(issuer_id: int) -> models.IssuerSigningKey:
+    """Create and commit a new active key in its own session.
+
+    Keys are only cached for signing once committed: a credential must never
+    be signed with a key that a rollback could leave unpublished.
+    """
+    db = SessionLocal()
+    try:
+        key, raw_private = create_key(db, issuer_id)
+        db.commit()
+        db.refresh(key)
+        db.expunge(key)
+    finally:
+        db.close()
+    with _keys_lock:
+        _private_keys[issuer_id] = (key.kid, raw_private)
+    return key
+
+def signing_key(db: Session, issuer_id: int) -> Tuple[str, bytes]:
+    """(kid, raw private key) of the issuer's active key, created on first use"""
+    cached = _private_keys.get(issuer_id)
+    if cached is not None:
+        return cached
+    key = db.query(models.IssuerSigningKey).filter(
+        models.IssuerSigningKey.issuer_id == issuer_id, models.IssuerSigningKey.active == True
+    ).order_by(models.IssuerSigningKey.id.desc()).first()
+    if key is None:
+        rotate_key(issuer_id)
+        return _private_keys[issuer_id]
+    with _keys_lock:
+        _private_keys[issuer_id] = (key.kid, _cipher().decrypt(key.private_key.encode("ascii")))
+    return _private_keys[issuer_id]
+
+def jwks(db: Session, issuer_id: Optional[int] = None) -> dict:
+    """Published public keys (all issuers, or one), oldest first"""
+    query = db.query(models.IssuerSigningKey)
+    if issuer_id is not None:
+        query = query.filter(models.IssuerSigningKey.issuer_id == issuer_id)
+    return {"keys": [jwk(key) for key in query.order_by(models.IssuerSigningKey.id)]}
+
+
+def public_key(db: Session, kid: str) -> Optional[dict]:
+    """The published JWK with this kid, or None"""
+    key = db.query(models.IssuerSigningKey).filter(models.IssuerSigningKey.kid == kid).first()
+    return jwk(key) if key is not None else None
+
+def jwks_etag(key_set: dict) -> str:
+    return hashlib.sha256(_json(key_set)).hexdigest()[:32]
+
+
+# Signing
+
+def claims(credential, issuer_name: Optional[str], recipient_name: Optional[str], signed_at: Optional[datetime] = None) -> dict:
+    """JWT claims of a credential: identity, fingerprinted content and expiry"""
+    signed_at = signed_at or datetime.now(timezone.utc)
+    content = fingerprints.content(credential)
+    payload = {
+        "iss": str(credential.issuer_id),
+        "sub": str(credential.learner_id),
+        "jti": credential.verification_code,
+        "iat": int(signed_at.timestamp()),
+        "credential": {
+            **content,
+            "issuer_name": issuer_name,
+            "recipient_name": recipient_name,
+            "public_url": credential.public_url,
+            "fingerprint": fingerprints.fingerprint(credential),
+        },
+    }
+    status = status_lists.entry(credential)
+    if status is not None:
+        payload["credentialStatus"] = status
+    expiry = credential.expiry_date
+    if expiry is not None:
+        payload["exp"] = int((expiry if expiry.tzinfo else expiry.replace(tzinfo=timezone.utc)).timestamp())
+    return payload
+
+def _compact(private_key: Ed25519PrivateKey, kid: str, payload: dict) -> str:
+    header = {"alg": ALGORITHM, "kid": kid, "typ": "JWT"}
+    signing_input = f"{_b64encode(_json(header))}.{_b64encode(_json(payload))}"
+    return f"{signing_input}.{_b64encode(private_key.sign(signing_input.encode('ascii')))}"
+
+def _sign_chunk(raw_private: bytes, kid: str, payloads: List[dict]) -> List[str]:
+    private_key = Ed25519PrivateKey.from_private_bytes(raw_private)
+    return [_compact(private_key, kid, payload) for payload in payloads]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SIGNING_WORKERS)
+        return _pool
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+def sign_batch(raw_private: bytes, kid: str, payloads: List[dict], workers: int = SIGNING_WORKERS) -> List[str]:
+    """Compact JWS for each payload, in order; large batches are split across the pool"""
+    if workers <= 1 or len(payloads) < _POOL_THRESHOLD:
+        return _sign_chunk(raw_private, kid, payloads)
+    chunks = [payloads[start:start + _POOL_CHUNK_SIZE] for start in range(0, len(payloads), _POOL_CHUNK_SIZE)]
+    futures = [_get_pool().submit(_sign_chunk, raw_private, kid, chunk) for chunk in chunks]
+    return [token for future in futures for token in future.result()]
+
+def _names(db: Session, issuer_id: int, learner_id: int) -> Tuple[Optional[str], Optional[str]]:
+    issuer_name = db.query(models.Issuer.name).filter(models.Issuer.id == issuer_id).scalar()
+    learner = db.query(models.User.first_name, models.User.last_name).filter(models.User.id == learner_id).first()
+    recipient = " ".join(part for part in (learner or ()) if part) or None
+    return issuer_name, recipient
+
+def sign_credential(db: Session, credential: models.Credential) -> str:
+    """Sign a credential in the caller's transaction and store the token on it"""
+    kid, raw_private = signing_key(db, credential.issuer_id)
+    issuer_name, recipient = _names(db, credential.issuer_id, credential.learner_id)
+    credential.signed_credential = _sign_chunk(raw_private, kid, [claims(credential, issuer_name, recipient)])[0]
+    return credential.signed_credential
+
+def sign_pending(db: Session, batch_size: int = SIGNING_BATCH_SIZE, workers: int = SIGNING_WORKERS) -> int:
+    """Sign every credential without a signature, batch by batch; returns how many were signed"""
+    signed = 0
+    last_id = 0
+    table = models.Credential.__table__
+    statement = table.update().where(table.c.id == bindparam("credential_id")).values(
+        signed_credential=bindparam("token")
+    )
+    while True:
+        rows = db.query(
+            models.Credential, models.Issuer.name, models.User.first_name, models.User.last_name
+        ).join(
+            models.Issuer, models.Issuer.id == models.Credential.issuer_id
+        ).join(
+            models.User, models.User.id == models.Credential.learner_id
+        ).filter(
+            models.Credential.signed_credential.is_(None), models.Credential.id > last_id
+        ).order_by(models.Credential.id).limit(batch_size).all()
+        if not rows:
+            return signed
+        last_id = rows[-1][0].id
+        by_issuer = {}
+        for credential, issuer_name, first_name, last_name in rows:
+            recipient = " ".join(part for part in (first_name, last_name) if part) or None
+            by_issuer.setdefault(credential.issuer_id, []).append((credential.id, claims(credential, issuer_name, recipient)))
+        updates = []
+        for issuer_id, items in sorted(by_issuer.items()):
+            kid, raw_private = signing_key(db, issuer_id)
+            tokens = sign_batch(raw_private, kid, [payload for _, payload in items], workers)
+            updates.extend({"credential_id": credential_id, "token": token} for (credential_id, _), token in zip(items, tokens))
+        db.execute(statement, updates)
+        db.commit()
+        db.expunge_all()
+        signed += len(updates)
+
+
+# Verification
+
+def public_keys(key_set: dict) -> Dict[str, Ed25519PublicKey]:
+    """kid -> public key from a JWKS document"""
+    return {
+        key["kid"]: Ed25519PublicKey.from_public_bytes(_b64decode(key["x"]))
+        for key in key_set.get("keys", [])
+        if key.get("kty") == "OKP" and key.get("crv") == "Ed25519"
+    }
+
+def verify(token: str, keys: Dict[str, Ed25519PublicKey]) -> dict:
+    """Claims of a compact JWS signed by one of keys; raises ValueError when it does not verify"""
+    try:
+        encoded_header, encoded_payload, encoded_signature = token.split(".")
+        header = json.loads(_b64decode(encoded_header))
+        key = keys[header["kid"]]
+        if header.get("alg") != ALGORITHM:
+            raise ValueError("Unsupported algorithm")
+        key.verify(_b64decode(encoded_signature), f"{encoded_header}.{encoded_payload}".encode("ascii"))
+        return json.loads(_b64decode(encoded_payload))
+    except KeyError:
+        raise ValueError("Unknown signing key")
+    except InvalidSignature:
+        raise ValueError("Invalid signature")
+    except (TypeError, ValueError) as e:
+        raise ValueError(str(e) or "Malformed token")
+
+def key_id(token: str) -> str:
+    """kid from a compact JWS header"""
+    try:
+        return json.loads(_b64decode(token.split(".")[0]))["kid"]
+    except (IndexError, KeyError, TypeError, ValueError):
+        raise ValueError("Malformed token")
+
+def verify_with_db(db: Session, token: str) -> dict:
+    """verify() against the issuers' published keys"""
+    key = public_key(db, key_id(token))
+    if key is None:
+        raise ValueError("Unknown signing key")
+    return verify(token, public_keys({"keys": [key]}))
@@ -0,0 +1,235 @@
+"""
+Incremental Skill India Digital profile sync.
+
+Every run asks the provider for the changes to each linked profile since its
+``last_synced``. A change record is a PMKVY course or apprenticeship that was
+enrolled in, completed or removed. Profiles are fetched in pages of
+SKILL_INDIA_BATCH_SIZE by a pool of SKILL_INDIA_WORKERS threads, since the
+calls spend their time waiting on the network. Each page is then written in
+one transaction:
+
+- the linked course and apprenticeship ids and the RPL flag of every profile,
+  with one executemany;
+- a credential for each newly completed course, issued in bulk under the
+  SKILL_INDIA_ISSUER_ID issuer (when set). A course whose title matches one
+  of that issuer's active badge templates is issued from the template.
+  Credentials that were imported before are skipped by fingerprint;
+- the new ``last_synced``, which is the provider's ``as_of`` time.
+
+A profile whose changes could not be fetched is left as it was, and the next
+run asks for the same changes again. Imported credentials are signed
+afterwards with ``signing.sign_pending``.
+
+Providers are pluggable, and SKILL_INDIA_PROVIDER picks one. ``http`` calls
+the Skill India Digital API at SKILL_INDIA_API_URL. Anything with
+``changes(skill_india_id, since)`` can be plugged in with ``set_provider``,
+e.g. a local fake.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, func
+from sqlalchemy.orm import Session
+from . import crud, fingerprints, models
+
+# Load environment variables from .env file
+load_dotenv()
+
+SKILL_INDIA_PROVIDER = os.getenv("SKILL_INDIA_PROVIDER", "http")
+SKILL_INDIA_API_URL = os.getenv("SKILL_INDIA_API_URL", "")
+SKILL_INDIA_API_TOKEN = os.getenv("SKILL_INDIA_API_TOKEN", "")
+SKILL_INDIA_TIMEOUT_SECONDS = float(os.getenv("SKILL_INDIA_TIMEOUT_SECONDS", "10"))
+SKILL_INDIA_ISSUER_ID = int(os.getenv("SKILL_INDIA_ISSUER_ID", "0")) or None  # Issuer of imported credentials
+SKILL_INDIA_WORKERS = int(os.getenv("SKILL_INDIA_WORKERS", "8"))
+SKILL_INDIA_BATCH_SIZE = int(os.getenv("SKILL_INDIA_BATCH_SIZE", "200"))
+
+logger = logging.getLogger(__name__)
+
+
+class HttpProvider:
+    """Skill India Digital change feed over HTTP.
+
+    ``GET {SKILL_INDIA_API_URL}/profiles/{id}/changes?since=...`` returns
+    ``{"courses": [...], "recognition_of_prior_learning": bool, "as_of": ...,
+    "next": cursor}``. The feed is paged; ``next`` is passed back as ``cursor``.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: str = SKILL_INDIA_API_URL, token: str = SKILL_INDIA_API_TOKEN,
+                 timeout: float = SKILL_INDIA_TIMEOUT_SECONDS):
+        headers = {"Accept": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        # One pooled client shared by the worker threads
+        self._http = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=SKILL_INDIA_WORKERS, max_keepalive_connections=SKILL_INDIA_WORKERS),
+        )
+
+    def changes(self, skill_india_id: str, since: Optional[datetime]) -> dict:
+        params = {"since": fingerprints.timestamp(since)} if since else {}
+        courses, result = [], {}
+        while True:
+            response = self._http.get(f"/profiles/{skill_india_id}/changes", params=params)
+            response.raise_for_status()
+            result = response.json()
+            courses.extend(result.get("courses") or [])
+            if not result.get("next"):
+                return {**result, "courses": courses}
+            params["cursor"] = result["next"]
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_provider():
+    """Process-wide provider picked by SKILL_INDIA_PROVIDER"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if SKILL_INDIA_PROVIDER != "http":
+                    raise ValueError(f"Unknown SKILL_INDIA_PROVIDER: {SKILL_INDIA_PROVIDER}")
+                _provider = HttpProvider()
+    return _provider
+
+def set_provider(provider):
+    """Plug in a provider: any object with changes(skill_india_id, since) -> dict"""
+    global _provider
+    _provider = provider
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def merge_links(linked: Optional[List[str]], courses: List[dict], kind: str) -> List[str]:
+    """Linked ids of one kind after applying change records in order"""
+    links = list(linked or [])
+    for course in courses:
+        if course.get("kind", "pmkvy") != kind or not course.get("id"):
+            continue
+        course_id = str(course["id"])
+        if course.get("status") == "removed":
+            if course_id in links:
+                links.remove(course_id)
+        elif course_id not in links:
+            links.append(course_id)
+    return links
+
+def _title_key(title: Optional[str]) -> str:
+    return " ".join((title or "").lower().split())
+
+def _credential_row(profile, course: dict, templates: Dict[str, dict]) -> dict:
+    template = templates.get(_title_key(course.get("title"))) or {}
+    return {
+        "learner_id": profile.user_id,
+        "issuer_id": SKILL_INDIA_ISSUER_ID,
+        "badge_template_id": template.get("id"),
+        "title": course.get("title") or str(course["id"]),
+        "description": course.get("description") or template.get("description"),
+        "skills": course.get("skills") or template.get("skills"),
+        "skill_category": course.get("sector") or template.get("skill_category"),
+        "tags": [course.get("kind", "pmkvy"), str(course["id"])],
+        "completion_date": _parse_time(course.get("completed_at")),
+        "evidence_url": course.get("certificate_url"),
+        "nsqf_level": course.get("nsqf_level"),
+    }
+
+def _fetch(provider, profile) -> Optional[dict]:
+    try:
+        return provider.changes(profile.skill_india_id, profile.last_synced)
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("Skill India sync of profile %d failed: %s", profile.id, e)
+        return None
+
+def _templates(db: Session) -> Dict[str, dict]:
+    """The import issuer's active templates by normalized name"""
+    if SKILL_INDIA_ISSUER_ID is None:
+        return {}
+    templates = db.query(models.BadgeTemplate).filter(
+        models.BadgeTemplate.issuer_id == SKILL_INDIA_ISSUER_ID,
+        models.BadgeTemplate.active == True
+    ).all()
+    return {
+        _title_key(template.name): {
+            "id": template.id,
+            "description": template.description,
+            "skills": template.skills,
+            "skill_category": template.badge_type.value,
+        }
+        for template in templates
+    }
+
+def _apply(db: Session, profiles, results, templates) -> Dict[str, int]:
+    """Write one page of fetched changes and commit"""
+    table = models.SkillIndiaProfile.__table__
+    statement = table.update().where(table.c.id == bindparam("profile_id")).values(
+        linked_pmkvy_courses=bindparam("pmkvy"),
+        linked_apprenticeships=bindparam("apprenticeships"),
+        recognition_of_prior_learning=bindparam("rpl"),
+        last_synced=bindparam("synced_at"),
+    )
+    updates, rows, errors = [], [], 0
+    for profile, result in zip(profiles, results):
+        if result is None:
+            errors += 1
+            continue
+        courses = result.get("courses") or []
+        rpl = result.get("recognition_of_prior_learning")
+        updates.append({
+            "profile_id": profile.id,
+            "pmkvy": merge_links(profile.linked_pmkvy_courses, courses, "pmkvy"),
+            "apprenticeships": merge_links(profile.linked_apprenticeships, courses, "apprenticeship"),
+            "rpl": profile.recognition_of_prior_learning if rpl is None else bool(rpl),
+            "synced_at": _parse_time(result.get("as_of")) or datetime.now(timezone.utc),
+        })
+        if SKILL_INDIA_ISSUER_ID is not None:
+            rows.extend(
+                _credential_row(profile, course, templates) for course in courses
+                if course.get("status") == "completed" and course.get("id")
+            )
+    if updates:
+        db.execute(statement, updates)
+    # The bulk import commits the profile updates with the credentials
+    imported, duplicates = crud.bulk_issue_credentials(db, rows) if rows else ({}, [])
+    if not rows:
+        db.commit()
+    return {"profiles": len(updates), "imported": len(imported), "duplicates": len(duplicates), "errors": errors}
+
+def sync_profiles(db: Session, provider=None, workers: int = SKILL_INDIA_WORKERS,
+                  batch_size: int = SKILL_INDIA_BATCH_SIZE) -> Dict[str, int]:
+    """Pull and apply the changes of every linked profile; returns counts"""
+    provider = provider or get_provider()
+    templates = _templates(db)
+    profile = models.SkillIndiaProfile
+    totals = {"profiles": 0, "imported": 0, "duplicates": 0, "errors": 0}
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            profiles = db.query(
+                profile.id, profile.user_id, profile.skill_india_id, profile.linked_pmkvy_courses,
+                profile.linked_apprenticeships, profile.recognition_of_prior_learning, profile.last_synced
+            ).filter(
+                profile.skill_india_id.isnot(None), func.length(profile.skill_india_id) > 0, profile.id > last_id
+            ).order_by(profile.id).limit(batch_size).all()
+            # No transaction stays open while the provider is called
+            db.rollback()
+            if not profiles:
+                return totals
+            last_id = profiles[-1].id
+            results = list(pool.map(lambda row: _fetch(provider, row), profiles))
+            for key, count in _apply(db, profiles, results, templates).items():
+                totals[key] += count
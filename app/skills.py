@@ -0,0 +1,310 @@
+"""
+Skill normalization and extraction.
+
+* ``normalize_skill`` maps free-text skill names onto a canonical name through
+  an alias table ("python3", "Python Programming" -> "Python").
+* ``extract_skills`` finds canonical skills mentioned in a title or
+  description.
+* ``classify_title`` picks the best title profile (skills, NSQF level,
+  industry) for a credential title; it replaces the keyword loops that the
+  backfill scripts used to carry.
+
+Matching runs on word tokens through a precompiled Aho-Corasick automaton, so
+the cost per title is linear in its length regardless of how many phrases are
+known. Profile selection is deterministic: the highest total weight of
+distinct matched phrases wins and ties go to the earlier profile.
+"""
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+# Words, keeping programming-language punctuation: "c++", "c#", "node.js"
+_token_re = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    return _token_re.findall(text.lower())
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over word tokens.
+
+    Phrases match whole words only, so "js" never matches inside "json".
+    """
+
+    def __init__(self, phrases: Iterable):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase, value in phrases:
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][token] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append((len(tokens), value))
+
+        # Breadth-first pass to link each state to its longest proper suffix
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(token, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def iter_matches(self, tokens: List[str]):
+        """Yield (start, end, value) for every phrase occurring in tokens"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for length, value in out[state]:
+                yield position + 1 - length, position + 1, value
+
+
+# Canonical skill -> aliases. Canonical names are also matched as themselves.
+SKILL_ALIASES = {
+    "Python": ["python programming", "python3", "python 3"],
+    "JavaScript": ["js", "javascript programming", "ecmascript", "es6", "es6+"],
+    "TypeScript": ["ts"],
+    "Node.js": ["node", "nodejs", "node js"],
+    "React": ["react.js", "reactjs", "react js"],
+    "Java": ["java programming", "core java"],
+    "C++": ["cpp"],
+    "C#": ["csharp", "c sharp"],
+    "SQL": ["structured query language"],
+    "PostgreSQL": ["postgres"],
+    "MongoDB": ["mongo"],
+    "Django": [],
+    "Flask": [],
+    "REST APIs": ["rest api", "restful apis", "restful api"],
+    "API Development": ["api design"],
+    "Web Development": ["web dev"],
+    "Frontend Development": ["front end development", "front-end development"],
+    "Database Management": ["dbms", "database administration"],
+    "Machine Learning": ["ml"],
+    "Artificial Intelligence": ["ai"],
+    "Data Science": [],
+    "Data Analysis": ["data analytics"],
+    "Data Visualization": ["data visualisation", "data viz"],
+    "Statistics": [],
+    "Pandas": [],
+    "Scikit-learn": ["sklearn", "scikit learn"],
+    "Cloud Computing": ["cloud"],
+    "DevOps": ["dev ops"],
+    "Cybersecurity": ["cyber security", "information security"],
+    "UI/UX Design": ["ui ux", "ux design", "ui design", "ux ui design"],
+    "Digital Marketing": [],
+    "SEO": ["search engine optimization", "search engine optimisation"],
+    "Social Media Marketing": ["smm"],
+    "Content Marketing": [],
+    "Google Ads": ["adwords", "google adwords"],
+    "Google Analytics": [],
+    "Analytics": [],
+    "Microsoft Excel": ["excel", "ms excel"],
+    "Project Management": ["project mgmt"],
+    "Leadership": ["leadership skills"],
+    "Team Management": [],
+    "Communication": ["communication skills"],
+    "Strategic Planning": [],
+    "Decision Making": ["decision-making"],
+    "Problem Solving": ["problem-solving"],
+}
+
+# Names too ambiguous to detect in running text ("cloud", "excel", "react"
+# as verbs...). They still normalize when given explicitly as a skill name.
+_NON_EXTRACTABLE = {"ts", "node", "ai", "ml", "cloud", "excel", "react", "es6", "java programming"}
+
+def _key(text: str) -> str:
+    return " ".join(tokenize(text))
+
+_canonical_by_key = {}
+for _canonical, _aliases in SKILL_ALIASES.items():
+    _canonical_by_key[_key(_canonical)] = _canonical
+    for _alias in _aliases:
+        _canonical_by_key[_key(_alias)] = _canonical
+
+_skill_matcher = PhraseMatcher(
+    [(canonical, canonical) for canonical in SKILL_ALIASES if _key(canonical) not in _NON_EXTRACTABLE]
+    + [(alias, canonical) for canonical, aliases in SKILL_ALIASES.items()
+       for alias in aliases if alias not in _NON_EXTRACTABLE]
+)
+
+def normalize_skill(name: str) -> Optional[str]:
+    """Canonical display name for a skill; unknown skills are whitespace-cleaned"""
+    if not name:
+        return None
+    key = _key(name)
+    if not key:
+        return None
+    canonical = _canonical_by_key.get(key)
+    if canonical:
+        return canonical
+    return " ".join(name.split())
+
+def skill_key(name: str) -> Optional[str]:
+    """Index/lookup key for a skill: lowercase tokens of its canonical name"""
+    canonical = normalize_skill(name)
+    return _key(canonical) if canonical else None
+
+def normalize_skills(names: Optional[Iterable[str]]) -> List[str]:
+    """Canonicalize and de-duplicate a skill list, keeping first-seen order"""
+    result = {}
+    for name in names or []:
+        canonical = normalize_skill(name)
+        if canonical:
+            result.setdefault(_key(canonical), canonical)
+    return list(result.values())
+
+def extract_skills(text: Optional[str]) -> List[str]:
+    """Canonical skills mentioned in free text, in order of first mention.
+
+    Where matches overlap the leftmost one wins, and of those the longest,
+    so "node js" yields Node.js and not JavaScript as well.
+    """
+    if not text:
+        return []
+    matches = sorted(_skill_matcher.iter_matches(tokenize(text)), key=lambda m: (m[0], m[0] - m[1]))
+    skills = {}
+    covered_until = 0
+    for start, end, value in matches:
+        if start < covered_until:
+            continue
+        skills.setdefault(value, None)
+        covered_until = end
+    return list(skills)
+
+
+# Title profiles: weighted phrases -> skills, NSQF level and industries.
+# Specific programme names carry high weights so they beat generic keywords.
+TITLE_PROFILES = [
+    {
+        "phrases": {"python developer certification": 10, "python developer": 6},
+        "skills": ["Python", "Web Development", "API Development", "Database Management", "Problem Solving"],
+        "nsqf_level": 6,
+        "industry": ["Information Technology", "Software Development"],
+    },
+    {
+        "phrases": {"javascript intermediate": 10},
+        "skills": ["JavaScript", "Frontend Development", "DOM Manipulation", "Asynchronous Programming", "Web APIs"],
+        "nsqf_level": 5,
+        "industry": ["Web Development", "Software Development"],
+    },
+    {
+        "phrases": {"data science fundamentals": 10, "data science": 6, "machine learning": 5},
+        "skills": ["Data Analysis", "Statistics", "Python", "Machine Learning", "Data Visualization"],
+        "nsqf_level": 7,
+        "industry": ["Data Science", "Analytics", "Research"],
+    },
+    {
+        "phrases": {"leadership excellence badge": 10, "leadership excellence": 6},
+        "skills": ["Leadership", "Team Management", "Strategic Planning", "Communication", "Decision Making"],
+        "nsqf_level": 8,
+        "industry": ["Management", "Human Resources", "Business Administration"],
+    },
+    {
+        "phrases": {"digital marketing specialist": 10, "digital marketing": 6},
+        "skills": ["Digital Marketing", "SEO", "Social Media Marketing", "Content Marketing", "Analytics"],
+        "nsqf_level": 6,
+        "industry": ["Marketing", "Digital Media", "E-commerce"],
+    },
+    {
+        "phrases": {"python": 3},
+        "skills": ["Python", "Software Development", "Problem Solving"],
+        "nsqf_level": 5,
+        "industry": ["Information Technology", "Software Development"],
+    },
+    {
+        "phrases": {"javascript": 3, "js": 3},
+        "skills": ["JavaScript", "Web Development", "Programming"],
+        "nsqf_level": 5,
+        "industry": ["Web Development", "Software Development"],
+    },
+    {
+        "phrases": {"data": 2, "analytics": 2},
+        "skills": ["Data Analysis", "Statistics", "Analytics"],
+        "nsqf_level": 6,
+        "industry": ["Analytics"],
+    },
+    {
+        "phrases": {"leadership": 3, "management": 2},
+        "skills": ["Leadership", "Management", "Communication"],
+        "nsqf_level": 7,
+        "industry": ["Management"],
+    },
+    {
+        "phrases": {"marketing": 3},
+        "skills": ["Marketing", "Digital Marketing", "Communication"],
+        "nsqf_level": 6,
+        "industry": ["Marketing"],
+    },
+    {
+        "phrases": {"certification": 1, "certificate": 1},
+        "skills": ["Professional Skills", "Industry Knowledge", "Compliance"],
+        "nsqf_level": 5,
+        "industry": ["General"],
+    },
+    {
+        "phrases": {"course": 1},
+        "skills": ["Learning", "Knowledge Application", "Skill Development"],
+        "nsqf_level": 4,
+        "industry": ["Education", "Training"],
+    },
+    {
+        "phrases": {"badge": 1},
+        "skills": ["Achievement", "Competency", "Skill Validation"],
+        "nsqf_level": 3,
+        "industry": ["General"],
+    },
+]
+
+DEFAULT_PROFILE = {
+    "skills": ["Professional Development", "Skill Building"],
+    "nsqf_level": 4,
+    "industry": ["General"],
+}
+
+# Profile skills are canonicalized once so outputs agree with normalize_skill
+_profiles = [
+    (tuple(normalize_skills(profile["skills"])), profile["nsqf_level"], tuple(profile["industry"]))
+    for profile in TITLE_PROFILES
+]
+_default_profile = (tuple(normalize_skills(DEFAULT_PROFILE["skills"])), DEFAULT_PROFILE["nsqf_level"], tuple(DEFAULT_PROFILE["industry"]))
+
+_title_matcher = PhraseMatcher(
+    (phrase, (index, phrase, weight))
+    for index, profile in enumerate(TITLE_PROFILES)
+    for phrase, weight in profile["phrases"].items()
+)
+
+@lru_cache(maxsize=65536)
+def _classify(title: str):
+    scores = {}
+    seen = set()
+    for _, _, (index, phrase, weight) in _title_matcher.iter_matches(tokenize(title)):
+        if (index, phrase) not in seen:
+            seen.add((index, phrase))
+            scores[index] = scores.get(index, 0) + weight
+    if not scores:
+        return _default_profile
+    best = min(scores, key=lambda index: (-scores[index], index))
+    return _profiles[best]
+
+def classify_title(title: Optional[str]) -> dict:
+    """Skills, NSQF level and industries for a credential title"""
+    skills, nsqf_level, industry = _classify(title or "")
+    return {"skills": list(skills), "nsqf_level": nsqf_level, "industry": list(industry)}
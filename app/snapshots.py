@@ -0,0 +1,140 @@
+"""
+Daily national statistics snapshots.
+
+Each run stores one ``national_statistics`` row for its report date, read from
+the rollups. Every credential change was already folded into the rollups when
+it was written, so building a snapshot costs a few indexed reads at any data
+volume; the only credentials a run touches are those that passed their expiry
+date since the last run (stale hourly employer analytics buckets are pruned
+in the same pass). With ``reconcile`` the rollups are first recomputed
+from the base tables, one dimension per worker, to repair drift from bulk
+changes made outside the API.
+
+Historical trend queries read these rows instead of the credentials table.
+``start_scheduler`` runs the snapshot daily at STATISTICS_SNAPSHOT_TIME (UTC)
+in a background thread; scripts/snapshot_national_statistics.py does the same
+from cron. Runs are idempotent per report date, so several workers may race.
+The rollups only hold current totals, so a snapshot can only be taken for
+today: history cannot be backfilled, only recorded as it happens.
+"""
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import analytics, crud, models, rollups
+from .db import SessionLocal
+
+# Load environment variables from .env file
+load_dotenv()
+
+STATISTICS_SNAPSHOT_SCHEDULER = os.getenv("STATISTICS_SNAPSHOT_SCHEDULER", "true").lower() == "true"
+STATISTICS_SNAPSHOT_TIME = os.getenv("STATISTICS_SNAPSHOT_TIME", "23:55")  # HH:MM, UTC
+RECONCILE_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = (
+    "total_credentials_issued",
+    "total_active_learners",
+    "total_issuers",
+    "total_employers",
+    "credentials_by_nsqf_level",
+    "top_skill_categories",
+    "state_wise_distribution",
+    "monthly_growth_rate",
+)
+
+
+def current_statistics(db: Session, report_date: Optional[date] = None) -> dict:
+    """National statistics as of now, labelled for report_date's growth window"""
+    return rollups.national_statistics(db, today=report_date)
+
+def _store(db: Session, report_date: date, statistics: dict) -> models.NationalStatistics:
+    row = db.query(models.NationalStatistics).filter(
+        models.NationalStatistics.report_date == report_date
+    ).first()
+    if row is None:
+        row = models.NationalStatistics(report_date=report_date)
+        db.add(row)
+    for field in SNAPSHOT_FIELDS:
+        setattr(row, field, statistics[field])
+    db.commit()
+    db.refresh(row)
+    return row
+
+def build_snapshot(
+    db: Session,
+    report_date: Optional[date] = None,
+    reconcile: bool = False,
+    workers: int = RECONCILE_WORKERS
+) -> models.NationalStatistics:
+    """Store (or replace) today's national statistics row.
+
+    Raises ValueError for any other report_date, since the totals are read
+    from the rollups as of now.
+    """
+    today = datetime.now(timezone.utc).date()
+    report_date = report_date or today
+    if report_date != today:
+        raise ValueError(f"Snapshots can only be taken for today ({today}), not {report_date}")
+    crud.expire_credentials(db)
+    analytics.prune(db)
+    if reconcile:
+        rollups.rebuild(db, workers=workers)
+    statistics = current_statistics(db, report_date)
+    try:
+        return _store(db, report_date, statistics)
+    except IntegrityError:
+        # Another worker inserted the same date first; overwrite its row
+        db.rollback()
+        return _store(db, report_date, statistics)
+
+def trend(db: Session, days: int = 90, until: Optional[date] = None) -> List[models.NationalStatistics]:
+    """Snapshots of the last days days, oldest first"""
+    until = until or datetime.now(timezone.utc).date()
+    return db.query(models.NationalStatistics).filter(
+        models.NationalStatistics.report_date > until - timedelta(days=days),
+        models.NationalStatistics.report_date <= until
+    ).order_by(models.NationalStatistics.report_date).all()
+
+
+_stop = threading.Event()
+_thread = None
+
+def _next_run(now: datetime) -> datetime:
+    hour, minute = (int(part) for part in STATISTICS_SNAPSHOT_TIME.split(":"))
+    run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if run <= now:
+        run += timedelta(days=1)
+    return run
+
+def _run_scheduler():
+    while True:
+        now = datetime.now(timezone.utc)
+        if _stop.wait((_next_run(now) - now).total_seconds()):
+            return
+        db = SessionLocal()
+        try:
+            row = build_snapshot(db)
+            logger.info("Stored national statistics snapshot for %s", row.report_date)
+        except Exception:
+            logger.exception("National statistics snapshot failed")
+            db.rollback()
+        finally:
+            db.close()
+
+def start_scheduler():
+    """Snapshot daily in a background thread (unless disabled)"""
+    global _thread
+    if not STATISTICS_SNAPSHOT_SCHEDULER or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run_scheduler, name="statistics-snapshots", daemon=True)
+    _thread.start()
+
+def stop_scheduler():
+    _stop.set()
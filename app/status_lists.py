@@ -0,0 +1,198 @@
+"""
+Bitstring status lists for revoked and expired credentials.
+
+Each issuer has one bitstring per purpose (``revocation`` and ``expiration``),
+in the style of the W3C Bitstring Status List. At issuance every credential
+is given the next free position in its issuer's lists, and the position goes
+into its signed form. The bit at that position is set while the credential is
+revoked (or deleted) or expired.
+
+The bitstrings are stored in pages of PAGE_BYTES. A status change rewrites one
+page row in the writer's transaction and bumps the issuer's list version, so
+a list is updated in place rather than rebuilt. A published list is the pages
+concatenated, gzip-compressed and base64url-encoded. It is cached per version
+and served with the version as its ETag. A list of mostly zeros compresses to
+a few hundred bytes, so a verifier can download it once and then check any
+number of that issuer's credentials locally, in O(1) each, with ``is_set``.
+"""
+import base64
+import gzip
+import os
+from typing import Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import cache, models, rollups
+
+# Load environment variables from .env file
+load_dotenv()
+
+STATUS_LIST_MAX_AGE = int(os.getenv("STATUS_LIST_MAX_AGE", "300"))  # Cache-Control max-age of published lists
+
+PURPOSES = ("revocation", "expiration")
+PAGE_BYTES = 16384
+PAGE_BITS = PAGE_BYTES * 8  # 131,072 credentials per page; also the smallest published list
+
+
+def _pages(allocated: int) -> int:
+    return max(1, -(-allocated // PAGE_BITS))
+
+def _flags(status) -> Dict[str, bool]:
+    return {
+        "revocation": status == models.CredentialStatus.revoked,
+        "expiration": status == models.CredentialStatus.expired,
+    }
+
+def allocate(db: Session, issuer_id: int, count: int = 1) -> int:
+    """First of count consecutive unused positions in the issuer's lists.
+
+    The issuer's counter row stays locked until the caller commits, so
+    concurrent issuances for one issuer take positions one after another.
+    """
+    rollups.increment(db, models.StatusList, ("issuer_id",), [{"issuer_id": issuer_id, "next_index": count, "version": 0}])
+    next_index = db.query(models.StatusList.next_index).filter(models.StatusList.issuer_id == issuer_id).scalar()
+    return next_index - count
+
+def _page(db: Session, issuer_id: int, purpose: str, page: int) -> models.StatusListPage:
+    query = db.query(models.StatusListPage).filter(
+        models.StatusListPage.issuer_id == issuer_id,
+        models.StatusListPage.purpose == purpose,
+        models.StatusListPage.page == page
+    ).with_for_update()
+    row = query.first()
+    if row is not None:
+        return row
+    try:
+        with db.begin_nested():
+            row = models.StatusListPage(issuer_id=issuer_id, purpose=purpose, page=page, bits=bytes(PAGE_BYTES))
+            db.add(row)
+        return row
+    except IntegrityError:
+        # Another writer created the page first
+        return query.first()
+
+def set_bits(db: Session, issuer_id: int, purpose: str, changes: Dict[int, bool]) -> int:
+    """Set or clear bits of one list in place; returns how many bits changed"""
+    by_page = {}
+    for index, value in changes.items():
+        by_page.setdefault(index // PAGE_BITS, {})[index % PAGE_BITS] = value
+    changed = 0
+    for page, bits in sorted(by_page.items()):
+        row = _page(db, issuer_id, purpose, page)
+        data = bytearray(row.bits)
+        for offset, value in bits.items():
+            mask = 0x80 >> (offset % 8)
+            if bool(data[offset // 8] & mask) != value:
+                data[offset // 8] ^= mask
+                changed += 1
+        if data != row.bits:
+            row.bits = bytes(data)
+    if changed:
+        rollups.increment(db, models.StatusList, ("issuer_id",), [{"issuer_id": issuer_id, "next_index": 0, "version": 1}])
+    return changed
+
+def update(db: Session, changes: Iterable[Tuple[models.Credential, object, object]]) -> int:
+    """Apply (credential, old status, new status) changes to the lists in the caller's transaction"""
+    grouped = {}
+    for credential, old_status, new_status in changes:
+        if credential.status_list_index is None:
+            continue
+        before, after = _flags(old_status), _flags(new_status)
+        for purpose in PURPOSES:
+            if before[purpose] != after[purpose]:
+                grouped.setdefault((credential.issuer_id, purpose), {})[credential.status_list_index] = after[purpose]
+    changed = 0
+    for (issuer_id, purpose), bits in sorted(grouped.items()):
+        changed += set_bits(db, issuer_id, purpose, bits)
+    return changed
+
+def entry(credential) -> Optional[dict]:
+    """Status entry for a credential's signed claims"""
+    if credential.status_list_index is None:
+        return None
+    return {
+        "statusListIndex": credential.status_list_index,
+        "lists": {purpose: f"/api/v1/status-lists/{credential.issuer_id}/{purpose}" for purpose in PURPOSES},
+    }
+
+
+# Publishing
+
+def state(db: Session, issuer_id: int) -> Optional[Tuple[int, int]]:
+    """(version, allocated positions) of an issuer's lists, or None"""
+    row = db.query(models.StatusList.version, models.StatusList.next_index).filter(
+        models.StatusList.issuer_id == issuer_id
+    ).first()
+    return (row.version, row.next_index) if row else None
+
+def etag(issuer_id: int, purpose: str, version: int, allocated: int) -> str:
+    return f'"{issuer_id}-{purpose}-{version}-{_pages(allocated)}"'
+
+def published(db: Session, issuer_id: int, purpose: str) -> Optional[dict]:
+    """Compressed list of one issuer and purpose (cached per version)"""
+    current = state(db, issuer_id)
+    if current is None:
+        return None
+    version, allocated = current
+    pages = _pages(allocated)
+
+    def load():
+        stored = dict(db.query(models.StatusListPage.page, models.StatusListPage.bits).filter(
+            models.StatusListPage.issuer_id == issuer_id,
+            models.StatusListPage.purpose == purpose,
+            models.StatusListPage.page < pages
+        ))
+        raw = b"".join(stored.get(page, bytes(PAGE_BYTES)) for page in range(pages))
+        return {
+            "issuer_id": issuer_id,
+            "purpose": purpose,
+            "version": version,
+            "size": pages * PAGE_BITS,
+            "allocated": allocated,
+            "encodedList": base64.urlsafe_b64encode(gzip.compress(raw, mtime=0)).rstrip(b"=").decode("ascii"),
+        }
+    return cache.get_or_set("status_list", issuer_id, f"{purpose}:{version}:{pages}", load)
+
+
+# Verifier side
+
+def decode(encoded_list: str) -> bytes:
+    """Bitstring of a published list"""
+    return gzip.decompress(base64.urlsafe_b64decode(encoded_list + "=" * (-len(encoded_list) % 4)))
+
+def is_set(bitstring: bytes, index: int) -> bool:
+    if index < 0 or index >= len(bitstring) * 8:
+        raise IndexError("Status list index out of range")
+    return bool(bitstring[index // 8] & (0x80 >> (index % 8)))
+
+
+# Backfill
+
+def assign_missing(db: Session, batch_size: int = 1000) -> int:
+    """Give positions to credentials issued before status lists existed; returns how many.
+
+    Their current revoked/expired state is written to the lists, and their
+    signatures are cleared so that ``signing.sign_pending`` re-signs them
+    with the status entry.
+    """
+    assigned = 0
+    while True:
+        batch = db.query(models.Credential).filter(
+            models.Credential.status_list_index.is_(None)
+        ).order_by(models.Credential.id).limit(batch_size).all()
+        if not batch:
+            return assigned
+        by_issuer = {}
+        for credential in batch:
+            by_issuer.setdefault(credential.issuer_id, []).append(credential)
+        changes = []
+        for issuer_id, credentials in sorted(by_issuer.items()):
+            first = allocate(db, issuer_id, len(credentials))
+            for offset, credential in enumerate(credentials):
+                credential.status_list_index = first + offset
+                credential.signed_credential = None
+                changes.append((credential, models.CredentialStatus.issued, credential.status))
+        db.flush()
+        update(db, changes)
+        db.commit()
+        assigned += len(batch)
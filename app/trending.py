@@ -0,0 +1,282 @@
+"""
+Trending skills from exponentially decayed event counters.
+
+Issuing a credential counts once for each of its skills, and an employer
+verifying a credential counts VERIFICATION_WEIGHT times for each of its skills,
+since it shows demand from the hiring side. Each skill keeps two decayed sums
+of its events, with half-lives of TRENDING_SHORT_HALF_LIFE_DAYS and
+TRENDING_LONG_HALF_LIFE_DAYS. An event's weight halves every half-life, so the
+short sum follows roughly the last week and the long sum roughly the last
+quarter.
+
+The sums are scaled to a fixed epoch instead of being decayed in place: an
+event at time t adds w * 2^((t - epoch) / half_life). Adding an event is then
+one update to one skill, and no other skill is touched. Every skill decays at
+the same rate, so the value as of now is the scaled sum divided by
+2^((now - epoch) / half_life). The sums are stored as natural logarithms so
+that they never overflow.
+
+Scaled sums only grow, so a skill's rank can only change when it gets an
+event. The top TRENDING_CAPACITY skills by short-window score are kept in a
+min-heap, and stale entries are dropped lazily. An event either raises a
+member or lets its skill displace the smallest member, in O(log K).
+
+A skill's trend compares the event rates of its two windows. The rate of a
+window is its sum divided by its half-life (the ln 2 factors cancel). If the
+short-window rate exceeds the long-window rate by TREND_THRESHOLD, the trend
+is "up". If it is that far below, the trend is "down". Otherwise it is
+"stable".
+
+The crud layer and the verification endpoints also count events per skill and
+UTC day in ``skill_activity``, inside the writer's transaction. At startup the
+tracker is built from the last TRENDING_LOOKBACK_DAYS of those rows. It is
+rebuilt in the background every TRENDING_REFRESH_SECONDS, which picks up
+events written by other worker processes; events this process observes while
+a rebuild runs are replayed onto the new tracker.
+"""
+import heapq
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from . import models, rollups
+from .db import SessionLocal
+from .skills import normalize_skills, skill_key
+
+# Load environment variables from .env file
+load_dotenv()
+
+TRENDING_SHORT_HALF_LIFE_DAYS = float(os.getenv("TRENDING_SHORT_HALF_LIFE_DAYS", "7"))
+TRENDING_LONG_HALF_LIFE_DAYS = float(os.getenv("TRENDING_LONG_HALF_LIFE_DAYS", "28"))
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", "300"))
+
+TRENDING_CAPACITY = 100
+TRENDING_LOOKBACK_DAYS = int(4 * TRENDING_LONG_HALF_LIFE_DAYS)  # Older events weigh under 1/16
+ISSUE_WEIGHT = 1.0
+VERIFICATION_WEIGHT = 2.0
+TREND_THRESHOLD = 0.2
+
+ACTIVITY_KEY = ("skill", "day")
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+_DAY_SECONDS = 86400
+_WEIGHTS = {"issued": ISSUE_WEIGHT, "verified": VERIFICATION_WEIGHT}
+
+
+def _exponent(half_life_days: float, at: float) -> float:
+    """Natural log of the epoch scaling of an event at unix time at"""
+    return (at - _EPOCH) * math.log(2) / (half_life_days * _DAY_SECONDS)
+
+def _log_add(a: float, b: float) -> float:
+    """log(exp(a) + exp(b)) without overflow"""
+    if a < b:
+        a, b = b, a
+    return a + math.log1p(math.exp(b - a))
+
+def _trend(short_value: float, long_value: float) -> str:
+    if not long_value:
+        return "up" if short_value else "stable"
+    ratio = (short_value / TRENDING_SHORT_HALF_LIFE_DAYS) / (long_value / TRENDING_LONG_HALF_LIFE_DAYS)
+    if ratio >= 1 + TREND_THRESHOLD:
+        return "up"
+    if ratio <= 1 / (1 + TREND_THRESHOLD):
+        return "down"
+    return "stable"
+
+
+class TrendTracker:
+    """Per-skill decayed sums over two windows, with a heap-maintained top-K"""
+
+    def __init__(self, capacity: int = TRENDING_CAPACITY):
+        self.capacity = capacity
+        self._scores = {}  # skill key -> [short, long] log-scaled sums
+        self._labels = {}  # skill key -> display name
+        self._top = {}  # member skill key -> its short sum as pushed on the heap
+        self._heap = []  # (short sum, skill key); entries not matching _top are stale
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def add(self, key: str, label: str, weight: float, at: float):
+        """Count an event of weight for a skill (by key) at unix time at"""
+        if weight <= 0:
+            return
+        short = math.log(weight) + _exponent(TRENDING_SHORT_HALF_LIFE_DAYS, at)
+        long = math.log(weight) + _exponent(TRENDING_LONG_HALF_LIFE_DAYS, at)
+        with self._lock:
+            scores = self._scores.get(key)
+            if scores is None:
+                scores = self._scores[key] = [short, long]
+            else:
+                scores[0] = _log_add(scores[0], short)
+                scores[1] = _log_add(scores[1], long)
+            self._labels[key] = label
+            self._offer(key, scores[0])
+
+    def _floor(self):
+        """Smallest member, discarding stale entries from the top of the heap"""
+        while True:
+            score, key = self._heap[0]
+            if self._top.get(key) == score:
+                return score, key
+            heapq.heappop(self._heap)
+
+    def _offer(self, key: str, score: float):
+        if key not in self._top and len(self._top) >= self.capacity:
+            floor_score, floor_key = self._floor()
+            if score <= floor_score:
+                return
+            heapq.heappop(self._heap)
+            del self._top[floor_key]
+        self._top[key] = score
+        heapq.heappush(self._heap, (score, key))
+        # Members raised repeatedly leave stale entries behind; compact now and then
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(score, key) for key, score in self._top.items()]
+            heapq.heapify(self._heap)
+
+    def _entry(self, key: str, at: float) -> dict:
+        short, long = self._scores[key]
+        short_value = math.exp(short - _exponent(TRENDING_SHORT_HALF_LIFE_DAYS, at))
+        long_value = math.exp(long - _exponent(TRENDING_LONG_HALF_LIFE_DAYS, at))
+        return {
+            "key": key,
+            "skill": self._labels[key],
+            "score": short_value,
+            "long_score": long_value,
+            "trend": _trend(short_value, long_value),
+        }
+
+    def top(self, limit: int = 10, at: Optional[float] = None) -> List[dict]:
+        """Highest short-window scores as of at (default now), best first"""
+        at = time.time() if at is None else at
+        with self._lock:
+            members = heapq.nlargest(min(limit, self.capacity), self._top.items(), key=lambda item: (item[1], item[0]))
+            return [self._entry(key, at) for key, _ in members]
+
+    def get(self, key: str, at: Optional[float] = None) -> Optional[dict]:
+        """Scores and trend of one skill, top-K member or not"""
+        at = time.time() if at is None else at
+        with self._lock:
+            return self._entry(key, at) if key in self._scores else None
+
+
+def _day(at: datetime) -> str:
+    return at.strftime("%Y-%m-%d")
+
+def build_tracker(db: Session, now: Optional[datetime] = None) -> TrendTracker:
+    """Tracker over the last TRENDING_LOOKBACK_DAYS of daily counts"""
+    now = now or datetime.now(timezone.utc)
+    tracker = TrendTracker()
+    activity = models.SkillActivity
+    rows = db.query(activity.skill, activity.day, activity.issued_count, activity.verified_count).filter(
+        activity.day >= _day(now - timedelta(days=TRENDING_LOOKBACK_DAYS))
+    ).order_by(activity.day, activity.skill)
+    keys = {}
+    for name, day, issued, verified in rows:
+        # Daily counts are placed at midday, and no later than now
+        at = datetime.strptime(day, "%Y-%m-%d").replace(hour=12, tzinfo=timezone.utc)
+        at = min(at, now).timestamp()
+        if name not in keys:
+            keys[name] = skill_key(name)
+        if keys[name]:
+            tracker.add(keys[name], name, issued * ISSUE_WEIGHT + verified * VERIFICATION_WEIGHT, at)
+    return tracker
+
+
+_tracker = TrendTracker()
+_loaded_at = None
+_refreshing = threading.Lock()
+_loading = threading.Lock()
+_writes = threading.Lock()
+_pending = None  # Events observed while a rebuild runs, replayed onto the new tracker
+
+def get_tracker() -> TrendTracker:
+    return _tracker
+
+def load():
+    """(Re)build the tracker and swap it in.
+
+    Events observed during the build go to the live tracker and are replayed
+    onto the new one before the swap. One whose row the build had already
+    read is counted twice; the next rebuild evens that out.
+    """
+    global _tracker, _loaded_at, _pending
+    with _loading:
+        with _writes:
+            _pending = []
+        db = SessionLocal()
+        try:
+            tracker = build_tracker(db)
+        except Exception:
+            with _writes:
+                _pending = None
+            raise
+        finally:
+            db.close()
+        with _writes:
+            for event in _pending:
+                tracker.add(*event)
+            _tracker, _pending = tracker, None
+            _loaded_at = time.monotonic()
+
+def _refresh():
+    try:
+        load()
+    finally:
+        _refreshing.release()
+
+def refresh_if_stale(max_age: int = TRENDING_REFRESH_SECONDS):
+    """Start a background rebuild when the tracker is older than max_age"""
+    if _loaded_at is not None and time.monotonic() - _loaded_at <= max_age:
+        return
+    if _refreshing.acquire(blocking=False):
+        threading.Thread(target=_refresh, daemon=True).start()
+
+# Event recording: count in the writer's transaction, then observe after commit
+
+def skill_counts(skill_lists: Iterable[Optional[Iterable[str]]]) -> Dict[str, int]:
+    """Events per canonical skill name for a group of credentials' skill lists"""
+    counts = {}
+    for names in skill_lists:
+        for name in normalize_skills(names):
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+def record(db: Session, kind: str, counts: Dict[str, int], at: Optional[datetime] = None):
+    """Add per-skill event counts to today's skill_activity rows"""
+    column = f"{kind}_count"
+    other = "verified_count" if kind == "issued" else "issued_count"
+    day = _day(at or datetime.now(timezone.utc))
+    rollups.increment(db, models.SkillActivity, ACTIVITY_KEY, [
+        {"skill": name[:100], "day": day, column: count, other: 0}
+        for name, count in counts.items() if count
+    ])
+
+def observe(kind: str, counts: Dict[str, int], at: Optional[datetime] = None):
+    """Apply committed events to this process's tracker"""
+    moment = (at or datetime.now(timezone.utc)).timestamp()
+    with _writes:
+        for name, count in counts.items():
+            if count:
+                event = (skill_key(name[:100]), name[:100], count * _WEIGHTS[kind], moment)
+                _tracker.add(*event)
+                if _pending is not None:
+                    _pending.append(event)
+
+def top_skills(db: Session, limit: int = 10) -> List[dict]:
+    """Trending skills with their scores, trend and number of learners holding them"""
+    refresh_if_stale()
+    entries = _tracker.top(limit)
+    if not entries:
+        return []
+    candidates = dict(db.query(models.SkillSupply.skill, models.SkillSupply.learner_count).filter(
+        models.SkillSupply.skill.in_([entry["key"] for entry in entries])
+    ))
+    for entry in entries:
+        entry["candidates"] = candidates.get(entry["key"], 0)
+    return entries
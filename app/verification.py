@@ -0,0 +1,163 @@
+"""
+Batch credential verification for employers.
+
+Each submitted value is classified as a verification code, a public URL (or
+its token) or a blockchain hash, and all values of a kind are resolved with
+``IN`` queries in chunks, so a batch of 1,000 mixed values costs a handful of
+round trips instead of one lookup per value. Results come back in input
+order with the credential's issuer, dates and revocation/expiry state.
+Hashes match with or without a ``0x`` prefix.
+"""
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from . import models, schemas
+
+IDENTIFIER_TYPES = ("code", "url", "hash")
+MAX_BATCH_SIZE = 1000
+_CHUNK_SIZE = 500  # Keeps IN lists well under driver parameter limits
+
+_uuid_re = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+_hash_re = re.compile(r"^(0x)?[0-9a-f]{32,128}$", re.IGNORECASE)
+
+def classify(value: str, identifier_type: Optional[str] = None):
+    """(identifier_type, lookup key) for a submitted value"""
+    value = value.strip()
+    if "/" in value:
+        # Pasted links: the last path segment carries the public token
+        value = value.rstrip("/").rsplit("/", 1)[-1].split("?", 1)[0]
+        identifier_type = identifier_type or "url"
+    if identifier_type is None:
+        if _uuid_re.match(value):
+            identifier_type = "url"
+        elif _hash_re.match(value):
+            identifier_type = "hash"
+        else:
+            identifier_type = "code"
+    if identifier_type == "code":
+        return identifier_type, value.upper()
+    if identifier_type == "hash":
+        return identifier_type, hash_key(value)
+    return identifier_type, value
+
+def hash_key(value: str) -> str:
+    """A hash as lowercase hex without a 0x prefix"""
+    value = value.lower()
+    return value[2:] if value.startswith("0x") else value
+
+def _chunks(values: List[str]):
+    for start in range(0, len(values), _CHUNK_SIZE):
+        yield values[start:start + _CHUNK_SIZE]
+
+def _credential_query(db: Session, *extra_columns):
+    return db.query(
+        models.Credential.id,
+        models.Credential.title,
+        models.Credential.status,
+        models.Credential.issued_at,
+        models.Credential.expiry_date,
+        models.Credential.skills,
+        models.Credential.verification_code,
+        models.Credential.public_url,
+        models.Issuer.name.label("issuer_name"),
+        models.User.first_name,
+        models.User.last_name,
+        models.CredentialMetadata.nsqf_level,
+        *extra_columns
+    ).join(
+        models.Issuer, models.Issuer.id == models.Credential.issuer_id
+    ).join(
+        models.User, models.User.id == models.Credential.learner_id
+    ).outerjoin(
+        models.CredentialMetadata, models.CredentialMetadata.credential_id == models.Credential.id
+    )
+
+def _resolve(db: Session, keys_by_type: dict):
+    """{(type, key): row} for every value that resolves to a credential"""
+    found = {}
+    for chunk in _chunks(sorted(keys_by_type.get("code", ()))):
+        for row in _credential_query(db).filter(models.Credential.verification_code.in_(chunk)):
+            found[("code", row.verification_code)] = (row, None)
+    for chunk in _chunks(sorted(keys_by_type.get("url", ()))):
+        for row in _credential_query(db).filter(models.Credential.public_url.in_(chunk)):
+            found[("url", row.public_url)] = (row, None)
+    for chunk in _chunks(sorted(keys_by_type.get("hash", ()))):
+        for row in _credential_query(
+            db, models.BlockchainVerification.blockchain_hash, models.BlockchainVerification.transaction_id
+        ).join(
+            models.BlockchainVerification, models.BlockchainVerification.credential_id == models.Credential.id
+        ).filter(models.BlockchainVerification.blockchain_hash.in_(chunk + ["0x" + key for key in chunk])):
+            found[("hash", hash_key(row.blockchain_hash))] = (row, (row.blockchain_hash, row.transaction_id))
+
+    # Anchors for credentials found by code or URL, in one more query per chunk
+    missing = sorted({row.id for row, anchor in found.values() if anchor is None})
+    anchors = {}
+    for chunk in _chunks(missing):
+        for credential_id, blockchain_hash, transaction_id in db.query(
+            models.BlockchainVerification.credential_id,
+            models.BlockchainVerification.blockchain_hash,
+            models.BlockchainVerification.transaction_id
+        ).filter(
+            models.BlockchainVerification.credential_id.in_(chunk)
+        ).order_by(models.BlockchainVerification.id):
+            anchors[credential_id] = (blockchain_hash, transaction_id)
+    return {
+        key: (row, anchor if anchor is not None else anchors.get(row.id))
+        for key, (row, anchor) in found.items()
+    }
+
+def _is_past(moment: Optional[datetime], now: datetime) -> bool:
+    if moment is None:
+        return False
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment < now
+
+def _result(value: str, identifier_type: str, match, now: datetime) -> schemas.VerificationResult:
+    if match is None:
+        return schemas.VerificationResult(input=value, identifier_type=identifier_type, found=False, status="not_found")
+    row, anchor = match
+    is_revoked = row.status == models.CredentialStatus.revoked
+    is_expired = row.status == models.CredentialStatus.expired or _is_past(row.expiry_date, now)
+    if is_revoked:
+        result_status = "revoked"
+    elif is_expired:
+        result_status = "expired"
+    elif row.status == models.CredentialStatus.pending:
+        result_status = "pending"
+    else:
+        result_status = "valid"
+    return schemas.VerificationResult(
+        input=value,
+        identifier_type=identifier_type,
+        found=True,
+        status=result_status,
+        credential_id=row.id,
+        title=row.title,
+        issuer_name=row.issuer_name,
+        recipient_name=" ".join(part for part in [row.first_name, row.last_name] if part) or None,
+        credential_status=row.status.value,
+        issued_at=row.issued_at,
+        expiry_date=row.expiry_date,
+        is_revoked=is_revoked,
+        is_expired=is_expired,
+        nsqf_level=row.nsqf_level,
+        skills=row.skills or [],
+        verification_code=row.verification_code,
+        blockchain_hash=anchor[0] if anchor else None,
+        transaction_id=anchor[1] if anchor else None
+    )
+
+def verify_values(db: Session, values: List[str], identifier_type: Optional[str] = None) -> List[schemas.VerificationResult]:
+    """Resolve verification codes, public URLs and hashes; results in input order"""
+    classified = [classify(value, identifier_type) for value in values]
+    keys_by_type = {}
+    for kind, key in classified:
+        keys_by_type.setdefault(kind, set()).add(key)
+    found = _resolve(db, keys_by_type)
+    now = datetime.now(timezone.utc)
+    return [
+        _result(value, kind, found.get((kind, key)), now)
+        for value, (kind, key) in zip(values, classified)
+    ]
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Anchor credentials that are not anchored yet, in Merkle-tree batches.
+
+Each batch's root is written to the ledger (LEDGER_BACKEND) and every
+credential gets its inclusion proof. Run periodically from cron when the
+in-process anchoring scheduler is disabled.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, anchoring
+
+def anchor_credentials():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("⛓️  Anchoring pending credentials...")
+        batches = anchoring.anchor_pending(db)
+        for batch in batches:
+            print(f"   Batch {batch.id}: {batch.leaf_count} credentials, root {batch.merkle_root}, tx {batch.transaction_id}")
+        print(f"✅ Anchored {sum(batch.leaf_count for batch in batches)} credentials in {len(batches)} batches")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    anchor_credentials()
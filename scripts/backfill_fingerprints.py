@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Fingerprint credentials issued before content fingerprints existed.
+
+Usage: backfill_fingerprints.py [--workers=N] [--chunk-size=N]
+
+Id ranges of --chunk-size credentials are fingerprinted in parallel by
+--workers processes. Credentials duplicating an existing fingerprint are
+left unfingerprinted and listed. Revoked and expired credentials are not
+fingerprinted, and any fingerprints they still hold are cleared.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, fingerprints
+
+def backfill_fingerprints(workers=fingerprints.BACKFILL_WORKERS, chunk_size=fingerprints.BACKFILL_CHUNK_SIZE):
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"🔏 Fingerprinting credentials ({workers} workers, {chunk_size} ids per chunk)...")
+        written, duplicates = fingerprints.backfill(db, workers=workers, chunk_size=chunk_size)
+        print(f"✅ Fingerprinted {written} credentials")
+        if duplicates:
+            print(f"⚠️  {len(duplicates)} duplicate credentials left unfingerprinted: {duplicates[:50]}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    options = dict(arg[2:].split("=", 1) for arg in sys.argv[1:] if arg.startswith("--") and "=" in arg)
+    backfill_fingerprints(
+        workers=int(options.get("workers", fingerprints.BACKFILL_WORKERS)),
+        chunk_size=int(options.get("chunk-size", fingerprints.BACKFILL_CHUNK_SIZE))
+    )
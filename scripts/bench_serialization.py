@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-page serialization cost of credential list responses.
+
+Compares FastAPI's default path (per-item model validation + jsonable_encoder
++ JSONResponse) with the TypeAdapter + FastJSONResponse path used by
+GET /api/v1/credentials. No database is needed; pages are built from
+transient ORM objects.
+
+Usage: python scripts/bench_serialization.py [page_size] [iterations]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeit
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app import models, schemas, serialization
+
+def build_page(page_size):
+    """Build one page of issuer-side ORM credentials and learner-side dicts"""
+    issuer = models.Issuer(id=1, name="TechSkills Academy", user_id=1, verified=True)
+    template = models.BadgeTemplate(
+        id=1, name="Python Developer Certification", badge_type=models.BadgeType.certification,
+        criteria="Complete the course", issuer_id=1, active=True,
+        created_at=datetime.now(timezone.utc)
+    )
+    issued_at = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    credentials = []
+    for i in range(page_size):
+        credentials.append(models.Credential(
+            id=i + 1, learner_id=10, issuer_id=1, badge_template_id=1,
+            title=f"Python Developer Certification {i}",
+            description="Covers Python fundamentals, web APIs and databases",
+            skills=["Python Programming", "Web Development", "API Development", "Database Management"],
+            skill_category="certification", tags=["python", "backend"],
+            completion_date=issued_at, expiry_date=issued_at + timedelta(days=730),
+            issued_at=issued_at + timedelta(minutes=i),
+            verification_code=f"CODE{i:04d}", public_url=f"00000000-0000-0000-0000-{i:012d}",
+            status=models.CredentialStatus.issued, is_public=True, shared_on_linkedin=False,
+            issuer=issuer, badge_template=template
+        ))
+    learner_items = [{
+        "id": str(cred.id),
+        "title": cred.title,
+        "description": cred.description,
+        "issuer": issuer.name,
+        "issue_date": cred.issued_at,
+        "expiry_date": cred.expiry_date,
+        "status": "active",
+        "verification_status": "verified",
+        "credential_type": template.badge_type.value,
+        "skills": cred.skills,
+        "nsqf_level": 6,
+        "metadata": {
+            "verification_code": cred.verification_code,
+            "public_url": cred.public_url,
+            "shared_on_linkedin": cred.shared_on_linkedin
+        }
+    } for cred in credentials]
+    return credentials, learner_items
+
+def default_issuer_page(credentials):
+    validated = [schemas.CredentialOut.model_validate(cred) for cred in credentials]
+    return JSONResponse(jsonable_encoder(validated)).body
+
+def default_learner_page(items):
+    # The previous handler pre-formatted dates with isoformat()
+    items = [dict(
+        item,
+        issue_date=item["issue_date"].isoformat(),
+        expiry_date=item["expiry_date"].isoformat() if item["expiry_date"] else None
+    ) for item in items]
+    return JSONResponse(jsonable_encoder(items)).body
+
+def fast_issuer_page(credentials):
+    return serialization.list_response(serialization.credential_list_adapter, credentials).body
+
+def fast_learner_page(items):
+    return serialization.list_response(serialization.credential_list_item_adapter, items).body
+
+def run(page_size=100, iterations=200):
+    credentials, learner_items = build_page(page_size)
+    print(f"📦 Page size: {page_size}, iterations: {iterations}, orjson: {'yes' if serialization.orjson else 'no'}")
+    print("=" * 60)
+    for label, before, after, payload in [
+        ("Issuer list (CredentialOut)", default_issuer_page, fast_issuer_page, credentials),
+        ("Learner list (CredentialListItem)", default_learner_page, fast_learner_page, learner_items),
+    ]:
+        before_ms = min(timeit.repeat(lambda: before(payload), number=iterations, repeat=3)) / iterations * 1000
+        after_ms = min(timeit.repeat(lambda: after(payload), number=iterations, repeat=3)) / iterations * 1000
+        print(f"{label}")
+        print(f"   before: {before_ms:.3f} ms/page")
+        print(f"   after:  {after_ms:.3f} ms/page ({before_ms / after_ms:.1f}x faster)")
+
+if __name__ == "__main__":
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    run(page_size, iterations)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Give status list positions to credentials issued before status lists existed.
+
+Their revoked/expired state is written to their issuer's lists, and they are
+re-signed so that their signed form carries the status entry.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, signing, status_lists
+
+def build_status_lists():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("📋 Assigning status list positions...")
+        assigned = status_lists.assign_missing(db)
+        print(f"✅ Assigned {assigned} credentials")
+        print("✍️  Re-signing credentials with their status entries...")
+        signed = signing.sign_pending(db)
+        print(f"✅ Signed {signed} credentials")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+        signing.shutdown_pool()
+
+if __name__ == "__main__":
+    build_status_lists()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Mark credentials past their expiry date as expired.
+
+Run periodically (e.g. hourly from cron) so that expiry shows up in the
+national statistics rollups, candidate search and job matches.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, crud
+
+def expire_credentials():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("⏳ Expiring credentials past their expiry date...")
+        expired = crud.expire_credentials(db)
+        print(f"✅ Expired {expired} credentials")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    expire_credentials()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Import credentials from an external provider's dump.
+
+Usage: import_credentials.py --provider-id=N [--format=jsonl|xml] [--chunk-size=N] PATH
+
+PATH is a JSON Lines or XML file, optionally gzip-compressed; the format is
+taken from the extension unless --format is given. The provider must have an
+issuer to import under (external_providers.issuer_id). Low-confidence records
+are held in the review queue. Imported credentials are signed at the end.
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, imports, signing
+
+def import_credentials(provider_id, path, fmt=None, chunk_size=imports.IMPORT_CHUNK_SIZE):
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"📥 Importing {path} for provider {provider_id} ({chunk_size} records per chunk)...")
+        started = time.monotonic()
+        totals = imports.import_file(db, provider_id, path, fmt, chunk_size)
+        elapsed = max(time.monotonic() - started, 0.001)
+        seen = sum(totals.values())
+        print(f"✅ Imported {totals['imported']} credentials from {seen} records ({seen / elapsed:,.0f} records/s)")
+        print(f"   Duplicates: {totals['duplicate']}, already imported: {totals['skipped']}")
+        if totals["review"]:
+            print(f"⚠️  {totals['review']} records held for review")
+        if totals["rejected"] or totals["invalid"]:
+            print(f"⚠️  {totals['rejected']} records rejected, {totals['invalid']} unreadable")
+        if totals["imported"]:
+            print(f"✍️  Signed {signing.sign_pending(db)} credentials")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+        signing.shutdown_pool()
+
+if __name__ == "__main__":
+    options = dict(arg[2:].split("=", 1) for arg in sys.argv[1:] if arg.startswith("--") and "=" in arg)
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "provider-id" not in options or len(paths) != 1:
+        print(__doc__)
+        sys.exit(1)
+    import_credentials(
+        int(options["provider-id"]),
+        paths[0],
+        fmt=options.get("format"),
+        chunk_size=int(options.get("chunk-size", imports.IMPORT_CHUNK_SIZE))
+    )
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Normalize stored locations to state/district codes and rebuild the rollups.
+
+Needed once after deploying location normalization (existing users, issuers,
+employer profiles and job requirements were written before it existed) and
+after gazetteer changes. Credentials take their issuer's state, then the
+rollups and the state x NSQF level x month cube are recomputed, and the skill
+index picks up each learner's state for candidate search.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, locations, rollups, search
+
+def normalize_locations():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("🗺️  Normalizing locations...")
+        for model in (models.User, models.Issuer, models.EmployerProfile, models.JobRequirement):
+            records = db.query(model).all()
+            resolved = sum(1 for record in records if locations.stamp(record))
+            print(f"   {model.__tablename__}: {resolved}/{len(records)} resolved to a state")
+        db.flush()
+        for issuer_id, state_code in db.query(models.Issuer.id, models.Issuer.state_code):
+            db.query(models.Credential).filter(models.Credential.issuer_id == issuer_id).update(
+                {models.Credential.state_code: state_code}, synchronize_session=False
+            )
+        db.commit()
+        credentials = rollups.rebuild(db, workers=4)
+        print(f"✅ Rebuilt rollups for {credentials} credentials")
+        learners = search.rebuild_index(db)
+        print(f"✅ Reindexed skills of {learners} learners")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    normalize_locations()
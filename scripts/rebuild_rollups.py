@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Rebuild the national statistics rollups from the credentials and users tables.
+
+Needed once after deploying the rollup tables (existing credentials were
+issued before they existed) and after bulk changes made outside the API. The
+per-skill learner counts behind employer analytics are recounted too.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, rollups
+
+def rebuild_rollups():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("📊 Rebuilding national statistics rollups...")
+        credentials = rollups.rebuild(db)
+        buckets = db.query(models.CredentialRollup).count()
+        print(f"✅ Rolled up {credentials} credentials into {buckets} buckets")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_rollups()
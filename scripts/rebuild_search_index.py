@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Rebuild the learner skill index used by candidate search.
+
+Needed once after deploying the index (existing credentials were issued before
+it existed) and after bulk changes made outside the API.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, search
+
+def rebuild_search_index():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("🔍 Rebuilding learner skill index...")
+        indexed = search.rebuild_index(db)
+        postings = db.query(models.LearnerSkill).count()
+        print(f"✅ Indexed {indexed} learners ({postings} skill postings)")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_search_index()
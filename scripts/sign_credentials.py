@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Sign credentials that have no signed (JWS) form yet.
+
+Needed once after deploying credential signing, and after bulk imports that
+skip inline signing. Large batches are signed in a pool of SIGNING_WORKERS
+processes.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, signing
+
+def sign_credentials():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("✍️  Signing unsigned credentials...")
+        signed = signing.sign_pending(db)
+        print(f"✅ Signed {signed} credentials")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+        signing.shutdown_pool()
+
+if __name__ == "__main__":
+    sign_credentials()
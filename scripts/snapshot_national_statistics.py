@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Store the daily national statistics snapshot.
+
+The API schedules this itself (STATISTICS_SNAPSHOT_SCHEDULER); run it from cron
+instead when the scheduler is disabled. Usage:
+
+    python scripts/snapshot_national_statistics.py [--reconcile]
+
+--reconcile recomputes the rollups from the base tables first. Snapshots are
+always for today (UTC): the rollups hold current totals, so past dates cannot
+be backfilled.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, snapshots
+
+def snapshot_national_statistics(reconcile=False):
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("📈 Building national statistics snapshot...")
+        row = snapshots.build_snapshot(db, reconcile=reconcile)
+        print(f"✅ Stored snapshot for {row.report_date}: {row.total_credentials_issued} credentials issued")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    snapshot_national_statistics(reconcile="--reconcile" in sys.argv)
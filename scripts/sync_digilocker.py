@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Re-check DigiLocker documents whose last sync is older than
+DIGILOCKER_SYNC_INTERVAL_SECONDS.
+
+Run periodically from cron when the in-process sync scheduler is disabled.
+Documents that could not be checked stay due for the next run.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import engine
+from app import models, digilocker
+
+def sync_digilocker():
+    models.Base.metadata.create_all(bind=engine)
+    if not digilocker.DIGILOCKER_API_URL:
+        print("❌ DIGILOCKER_API_URL is not set")
+        return
+    try:
+        print("🔄 Syncing due DigiLocker documents...")
+        totals = digilocker.run_sync()
+        print(f"✅ Verified {totals['verified']}, failed {totals['failed']}, pending {totals['pending']}")
+        if totals["errors"]:
+            print(f"⚠️  {totals['errors']} documents could not be checked and stay due")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+if __name__ == "__main__":
+    sync_digilocker()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Pull changes to linked Skill India Digital profiles since their last sync.
+
+Linked PMKVY courses and apprenticeships are updated, and completed courses
+are imported as credentials when SKILL_INDIA_ISSUER_ID is set. The imported
+credentials are signed at the end.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal, engine
+from app import models, signing, skill_india
+
+def sync_skill_india():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("🔄 Syncing Skill India profiles...")
+        totals = skill_india.sync_profiles(db)
+        print(f"✅ Synced {totals['profiles']} profiles, imported {totals['imported']} credentials ({totals['duplicates']} already imported)")
+        if totals["errors"]:
+            print(f"⚠️  {totals['errors']} profiles could not be fetched and will be retried next run")
+        if totals["imported"]:
+            print(f"✍️  Signed {signing.sign_pending(db)} credentials")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+        signing.shutdown_pool()
+
+if __name__ == "__main__":
+    sync_skill_india()
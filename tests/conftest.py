@@ -0,0 +1,65 @@
+import itertools
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway SQLite database before it is imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("SIGNING_KEY_SECRET", "test-signing-secret")
+
+import pytest
+from fastapi.testclient import TestClient
+from app import crud, main, models, schemas
+from app.db import SessionLocal
+
+_sequence = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def signup(client):
+    """Create a user with a unique email and return (email, auth headers)"""
+    def create(role: str, **fields):
+        email = f"{role}{next(_sequence)}@example.com"
+        response = client.post("/api/v1/auth/signup", json={
+            "email": email, "password": "secret1", "role": role,
+            "first_name": "Test", "last_name": role.title(), **fields
+        })
+        assert response.status_code == 200, response.text
+        token = client.post("/api/v1/auth/login", json={"email": email, "password": "secret1"}).json()["access_token"]
+        return email, {"Authorization": f"Bearer {token}"}
+    return create
+
+
+@pytest.fixture
+def issuer(signup, db):
+    """An issuer account: (issuer id, auth headers)"""
+    email, headers = signup("issuer")
+    user = db.query(models.User).filter(models.User.email == email).one()
+    issuer = db.query(models.Issuer).filter(models.Issuer.user_id == user.id).one()
+    return issuer.id, headers
+
+
+@pytest.fixture
+def issue(db):
+    """Issue a credential to a learner email under an issuer id"""
+    def create(issuer_id: int, learner_email: str, **fields):
+        fields.setdefault("completion_date", datetime(2024, 1, 1) + timedelta(minutes=next(_sequence)))
+        body = {"title": "Data Science Fundamentals", "learner_email": learner_email,
+                "skills": ["Python", "Statistics"], "skill_category": "Data", **fields}
+        return crud.create_credential(db, schemas.CredentialCreate(**body), issuer_id)
+    return create
@@ -0,0 +1,56 @@
+"""
+Local stand-in for the DigiLocker documents API.
+
+Serves ``GET /documents/{uri}`` from a script: ``documents[uri]`` is a list
+of (status code, JSON body, headers) replies, used in order with the last one
+repeating. Unknown documents get a 404. Every request is counted per URI.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        uri = unquote(self.path.rsplit("/", 1)[-1])
+        code, body, headers = self.server.reply(uri)
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class DigiLockerStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.documents = {}
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def reply(self, uri: str):
+        with self._lock:
+            count = self.requests[uri] = self.requests.get(uri, 0) + 1
+            replies = self.documents.get(uri) or [(404, {"error": "not found"}, {})]
+            return replies[min(count, len(replies)) - 1]
@@ -0,0 +1,107 @@
+"""
+Local stand-in for a Redis server, speaking just enough RESP for app.cache.
+
+Supports PING, AUTH, SELECT, GET, SET (with EX and NX) and FLUSHDB, with
+expiry. Run it in a background thread with ``RespStub().start()``.
+"""
+import socket
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.server.connections.add(self.connection)
+
+    def finish(self):
+        self.server.connections.discard(self.connection)
+        super().finish()
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            raise ValueError("Inline commands are not supported")
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (ValueError, OSError):
+                return
+            if args is None:
+                return
+            self.server.commands.append(args[0].upper().decode())
+            self.wfile.write(self.server.execute(args))
+
+
+class RespStub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password: str = None, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.password = password
+        self.data = {}  # key -> (value, expires_at)
+        self.commands = []
+        self.connections = set()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.server_address[1]}/0"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stop serving and drop open connections, like a server going away"""
+        self.shutdown()
+        self.server_close()
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args) -> bytes:
+        command = args[0].upper()
+        with self._lock:
+            if command == b"PING":
+                return b"+PONG\r\n"
+            if command == b"AUTH":
+                return b"+OK\r\n" if args[1].decode() == self.password else b"-WRONGPASS invalid password\r\n"
+            if command in (b"SELECT", b"FLUSHDB"):
+                if command == b"FLUSHDB":
+                    self.data.clear()
+                return b"+OK\r\n"
+            if command == b"GET":
+                value = self._get(args[1])
+                return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            if command == b"SET":
+                key, value, options = args[1], args[2], [arg.upper() for arg in args[3:]]
+                if b"NX" in options and self._get(key) is not None:
+                    return b"$-1\r\n"
+                expires_at = None
+                if b"EX" in options:
+                    expires_at = time.monotonic() + int(options[options.index(b"EX") + 1])
+                self.data[key] = (value, expires_at)
+                return b"+OK\r\n"
+            return b"-ERR unknown command '%s'\r\n" % command
@@ -0,0 +1,46 @@
+"""
+In-memory stand-in for the Skill India Digital change feed.
+
+Change records are stamped with the fake clock when they are recorded.
+``changes(skill_india_id, since)`` returns the records stamped after
+``since`` and reports the clock as ``as_of``, like the real feed, so the
+caller's watermark decides what it sees next time.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+import httpx
+from app import fingerprints
+
+
+class FakeSkillIndia:
+    def __init__(self, now: datetime = datetime(2026, 1, 1, tzinfo=timezone.utc)):
+        self.now = now
+        self.feeds = {}  # skill_india_id -> [(recorded at, change record)]
+        self.rpl = {}
+        self.down = set()  # Profiles whose requests fail
+        self.ignore_since = False  # Replay whole feeds, like a provider that lost its cursor
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def tick(self, hours: int = 1):
+        self.now += timedelta(hours=hours)
+
+    def record(self, skill_india_id: str, **course):
+        self.feeds.setdefault(skill_india_id, []).append((self.now, course))
+
+    def changes(self, skill_india_id: str, since):
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        with self._lock:
+            self.calls.append((skill_india_id, since))
+        if skill_india_id in self.down:
+            raise httpx.ConnectError("Skill India Digital is unreachable")
+        courses = [
+            course for recorded_at, course in self.feeds.get(skill_india_id, [])
+            if since is None or self.ignore_since or recorded_at > since
+        ]
+        return {
+            "courses": courses,
+            "recognition_of_prior_learning": self.rpl.get(skill_india_id),
+            "as_of": fingerprints.timestamp(self.now),
+        }
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import func
+from app import analytics, models, rollups
+
+
+@pytest.fixture
+def employer_id(db, signup):
+    email, _ = signup("employer")
+    return db.query(models.User.id).filter(models.User.email == email).scalar()
+
+
+def _at(*parts):
+    return datetime(*parts, tzinfo=timezone.utc)
+
+
+def test_events_roll_over_into_the_next_bucket(db, employer_id):
+    analytics.record(db, employer_id, at=_at(2024, 12, 31, 23, 30), verifications=2)
+    analytics.record(db, employer_id, at=_at(2025, 1, 1, 0, 10), verifications=1, job_views=4)
+    db.commit()
+
+    assert analytics.totals(db, employer_id, "day", _at(2024, 12, 31))["verifications"] == 2
+    assert analytics.totals(db, employer_id, "month", _at(2025, 1, 15))["verifications"] == 1
+    assert analytics.totals(db, employer_id)["verifications"] == 3
+
+    day = analytics.activity(db, employer_id, "24h", now=_at(2025, 1, 1, 0, 45))
+    assert day["totals"]["verifications"] == 3 and day["timeline"][-2:] == [
+        {"bucket": "2024-12-31T23", "verifications": 2, "verified_credentials": 0, "job_views": 0, "new_matches": 0},
+        {"bucket": "2025-01-01T00", "verifications": 1, "verified_credentials": 0, "job_views": 4, "new_matches": 0},
+    ]
+    year = analytics.activity(db, employer_id, "1y", now=_at(2025, 1, 20))
+    assert [point["bucket"] for point in year["timeline"]][-2:] == ["2024-12", "2025-01"]
+    assert year["totals"]["verifications"] == 3
+
+
+def test_trends_compare_with_the_previous_period(db, employer_id):
+    analytics.record(db, employer_id, at=_at(2025, 3, 2), job_views=4)
+    analytics.record(db, employer_id, at=_at(2025, 3, 9), job_views=6)
+    db.commit()
+    week = analytics.activity(db, employer_id, "7d", now=_at(2025, 3, 9, 12))
+    assert week["totals"]["job_views"] == 6 and week["previous_totals"]["job_views"] == 4
+    assert week["trends"]["job_views"] == 50.0 and week["trends"]["verifications"] == 0.0
+
+
+def test_prune_drops_only_old_hourly_buckets(db, employer_id):
+    now = _at(2025, 6, 10, 12)
+    analytics.record(db, employer_id, at=_at(2025, 6, 1, 9), verifications=1)
+    analytics.record(db, employer_id, at=_at(2025, 6, 9, 9), verifications=1)
+    db.commit()
+    analytics.prune(db, now)
+    hours = {bucket for (bucket,) in db.query(models.EmployerActivity.bucket).filter(
+        models.EmployerActivity.user_id == employer_id, models.EmployerActivity.granularity == "hour"
+    )}
+    assert hours == {"2025-06-09T09"}
+    assert analytics.totals(db, employer_id, "day", _at(2025, 6, 1))["verifications"] == 1
+
+
+def _supply(db, skill):
+    db.expire_all()
+    return db.query(models.SkillSupply.learner_count).filter(models.SkillSupply.skill == skill).scalar() or 0
+
+def _postings(db, skill):
+    return db.query(func.count(models.LearnerSkill.learner_id)).filter(models.LearnerSkill.skill == skill).scalar()
+
+
+def test_skill_supply_follows_postings(client, db, signup, issuer, issue):
+    issuer_id, headers = issuer
+    emails = [signup("learner")[0] for _ in range(2)]
+    first = issue(issuer_id, emails[0], skills=["Haskell"])
+    issue(issuer_id, emails[0], skills=["Haskell", "Erlang"])
+    other = issue(issuer_id, emails[1], skills=["Haskell"])
+    assert (_supply(db, "haskell"), _supply(db, "erlang")) == (2, 1)
+
+    client.put(f"/api/v1/credentials/{first.id}", headers=headers, json={"status": "revoked"})
+    assert _supply(db, "haskell") == 2
+    client.put(f"/api/v1/credentials/{other.id}", headers=headers, json={"status": "revoked"})
+    assert _supply(db, "haskell") == 1 == _postings(db, "haskell")
+
+    rollups.rebuild(db)
+    assert _supply(db, "haskell") == _postings(db, "haskell") and _supply(db, "erlang") == 1
+
+
+def test_analytics_lists_untracked_fields(client, signup):
+    _, headers = signup("employer")
+    body = client.get("/api/v1/employer/analytics", headers=headers, params={"period": "7d"}).json()
+    assert "hiringFunnel" in body["untrackedFields"] and body["hiringFunnel"]["hired"] == 0
+    stats = client.get("/api/v1/employer/stats", headers=headers).json()
+    assert stats["untrackedFields"] == ["applicationsReceived"]
@@ -0,0 +1,101 @@
+import hashlib
+import pytest
+from app import anchoring, models
+
+
+def _leaves(count):
+    return [hashlib.sha256(b"leaf %d" % index).digest() for index in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 5, 7, 8, 9, 16, 33])
+def test_every_proof_folds_into_the_root(count):
+    leaves = _leaves(count)
+    tree = anchoring.MerkleTree(leaves)
+    for index, leaf in enumerate(leaves):
+        proof = tree.proof(index)
+        assert anchoring.root_from_proof(leaf, proof) == tree.root
+        assert anchoring.verify_proof(leaf, proof, tree.root)
+
+
+def test_odd_leaf_is_promoted_unchanged():
+    a, b, c = _leaves(3)
+    tree = anchoring.MerkleTree([a, b, c])
+    assert tree.root == anchoring._node_hash(anchoring._node_hash(a, b), c)
+    assert tree.proof(2) == [{"position": "left", "hash": anchoring._node_hash(a, b).hex()}]
+    assert anchoring.MerkleTree([a]).root == a and anchoring.MerkleTree([a]).proof(0) == []
+    with pytest.raises(ValueError):
+        anchoring.MerkleTree([])
+
+
+def test_tampered_leaves_and_proofs_fail():
+    leaves = _leaves(5)
+    tree = anchoring.MerkleTree(leaves)
+    proof = tree.proof(1)
+    assert not anchoring.verify_proof(leaves[2], proof, tree.root)
+    flipped = [dict(step, position="right" if step["position"] == "left" else "left") for step in proof]
+    assert not anchoring.verify_proof(leaves[1], flipped, tree.root)
+    assert not anchoring.verify_proof(leaves[1], [{"position": "left", "hash": "zz"}], tree.root)
+    assert not anchoring.verify_proof(leaves[1], [{"hash": proof[0]["hash"]}], tree.root)
+
+
+class FailingLedger(anchoring.FileLedger):
+    def anchor(self, root, leaf_count):
+        raise ConnectionError("ledger unavailable")
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = anchoring.FileLedger(str(tmp_path / "anchors.jsonl"))
+    anchoring.set_ledger(ledger)
+    yield ledger
+    anchoring.set_ledger(None)
+
+
+@pytest.fixture
+def credentials(signup, issuer, issue):
+    issuer_id, _ = issuer
+    email = signup("learner")[0]
+    return [issue(issuer_id, email, title=f"Anchored {index}") for index in range(3)]
+
+
+def test_inclusion_proof_checks_proof_ledger_and_content(client, db, ledger, credentials):
+    batches = anchoring.anchor_pending(db)
+    assert batches and all(batch.transaction_id for batch in batches)
+    assert len(ledger._read()) == len(batches)
+
+    response = client.get(f"/api/v1/verify/{credentials[1].verification_code}/anchor")
+    assert response.status_code == 200, response.text
+    proof = response.json()
+    assert proof["proof_valid"] and proof["ledger_confirmed"] and proof["content_matches"]
+
+    db.get(models.Credential, credentials[1].id).title = "Forged Title"
+    db.commit()
+    proof = anchoring.inclusion_proof(db, credentials[1].verification_code)
+    assert proof["proof_valid"] and proof["ledger_confirmed"] and not proof["content_matches"]
+
+
+def test_ledger_is_written_only_after_the_batch_commits(db, ledger, credentials, monkeypatch):
+    def fail():
+        raise RuntimeError("database went away")
+    monkeypatch.setattr(db, "commit", fail)
+    with pytest.raises(RuntimeError):
+        anchoring.anchor_batch(db)
+    monkeypatch.undo()
+    db.rollback()
+    assert ledger._read() == []
+
+    anchoring.set_ledger(FailingLedger(ledger.path))
+    with pytest.raises(ConnectionError):
+        anchoring.anchor_batch(db)
+    db.rollback()
+    unpublished = db.query(models.AnchorBatch).filter(models.AnchorBatch.transaction_id.is_(None)).all()
+    assert len(unpublished) == 1 and ledger._read() == []
+
+    anchoring.set_ledger(ledger)
+    published = anchoring.anchor_pending(db)
+    assert published[0].id == unpublished[0].id and published[0].transaction_id
+    assert [record["root"] for record in ledger._read()] == [batch.merkle_root for batch in published]
+    anchor = db.query(models.BlockchainVerification).filter(
+        models.BlockchainVerification.credential_id == credentials[0].id
+    ).one()
+    assert anchor.transaction_id == published[0].transaction_id
@@ -0,0 +1,66 @@
+import bisect
+import threading
+from app import autocomplete, models
+
+
+def _labels(index, text, **options):
+    return [suggestion["label"] for suggestion in index.complete(text, **options)]
+
+
+def test_prefixes_match_any_word_by_popularity():
+    index = autocomplete.PrefixIndex()
+    index.add("template", 1, "Google Data Analytics", 5)
+    index.add("skill", "data science", "Data Science", 9)
+    index.add("issuer", 2, "Data Academy", 1)
+    assert _labels(index, "data") == ["Data Science", "Google Data Analytics", "Data Academy"]
+    assert _labels(index, "ana") == ["Google Data Analytics"]
+    assert _labels(index, "d", kinds=["issuer"]) == ["Data Academy"]
+
+    # Cached short prefixes follow bumps, relabels and removals
+    assert _labels(index, "d") == ["Data Science", "Google Data Analytics", "Data Academy"]
+    index.bump("issuer", 2, 10)
+    assert _labels(index, "d")[0] == "Data Academy"
+    index.add("issuer", 2, "Analytics Academy")
+    assert _labels(index, "d") == ["Data Science", "Google Data Analytics"]
+    assert index.complete("aca")[0]["weight"] == 11
+    index.remove("template", 1)
+    assert _labels(index, "an") == ["Analytics Academy"]
+
+
+def test_extend_matches_add_without_insorting(monkeypatch):
+    items = [("skill", "sql", "SQL", 3), ("issuer", 1, "Skill Hub", 2), ("skill", "sql", "Sql", 0),
+             ("template", 4, "SQL for Analysts", 1), ("skill", "sql", "SQL", 0)]
+    one_by_one = autocomplete.PrefixIndex()
+    for item in items:
+        one_by_one.add(*item)
+
+    def insort(*args, **kwargs):
+        raise AssertionError("extend must sort once")
+    monkeypatch.setattr(bisect, "insort", insort)
+    bulk = autocomplete.PrefixIndex()
+    bulk.extend(items)
+    assert bulk._keys == one_by_one._keys
+    assert bulk.complete("s") == one_by_one.complete("s")
+
+
+def test_writes_during_a_rebuild_are_kept(db, monkeypatch):
+    build_index = autocomplete.build_index
+    building, release = threading.Event(), threading.Event()
+
+    def slow_build(session):
+        index = build_index(session)
+        building.set()
+        release.wait(5)
+        return index
+    monkeypatch.setattr(autocomplete, "build_index", slow_build)
+    rebuild = threading.Thread(target=autocomplete.load)
+    rebuild.start()
+    assert building.wait(5)
+
+    issuer = models.Issuer(id=987654, name="Quokka Skills Institute")
+    autocomplete.upsert_issuer(issuer)
+    assert _labels(autocomplete.get_index(), "quokka") == ["Quokka Skills Institute"]
+    release.set()
+    rebuild.join(5)
+    assert _labels(autocomplete.get_index(), "quokka") == ["Quokka Skills Institute"]
+    assert autocomplete._pending is None
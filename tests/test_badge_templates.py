@@ -0,0 +1,68 @@
+import pytest
+from app import crud, models
+
+
+@pytest.fixture
+def templates(client, issuer):
+    """Three templates for a fresh issuer, the last one inactive; returns their ids"""
+    issuer_id, headers = issuer
+    ids = []
+    for name in ("Alpha", "Beta", "Gamma"):
+        response = client.post("/api/v1/badge-templates", headers=headers, json={
+            "name": name, "badge_type": "skill_badge", "criteria": "Pass", "skills": ["Python"]
+        })
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+def _deactivate(db, template_id):
+    db.get(models.BadgeTemplate, template_id).active = False
+    db.commit()
+
+
+def test_templates_are_paged_with_counts(client, db, issuer, issue, signup, templates):
+    issuer_id, headers = issuer
+    alpha, beta, gamma = templates
+    _deactivate(db, gamma)
+    email, _ = signup("learner")
+    first = issue(issuer_id, email, title="Alpha one", badge_template_id=alpha)
+    issue(issuer_id, email, title="Alpha two", badge_template_id=alpha)
+    issue(issuer_id, email, title="Beta one", badge_template_id=beta)
+    client.put(f"/api/v1/credentials/{first.id}", headers=headers, json={"status": "verified"})
+    for _ in range(3):
+        crud.record_credential_view(db, first.id, "127.0.0.1", "pytest")
+
+    listed = client.get("/api/v1/badge-templates", headers=headers).json()
+    assert [template["id"] for template in listed] == [alpha, beta]
+    counts = {template["id"]: (template["issued_count"], template["verified_count"], template["view_count"])
+              for template in listed}
+    assert counts == {alpha: (2, 1, 3), beta: (1, 0, 0)}
+
+    page = client.get("/api/v1/badge-templates", headers=headers,
+                      params={"active_only": False, "skip": 1, "limit": 2}).json()
+    assert [template["id"] for template in page] == [beta, gamma]
+    assert (page[1]["active"], page[1]["issued_count"]) == (False, 0)
+    assert client.get("/api/v1/badge-templates", headers=headers, params={"limit": 101}).status_code == 422
+    assert client.get("/api/v1/badge-templates", headers=headers, params={"skip": -1}).status_code == 422
+
+
+def test_issuer_dashboard_pages_templates(client, db, issuer, issue, signup, templates):
+    issuer_id, headers = issuer
+    alpha, beta, gamma = templates
+    _deactivate(db, gamma)
+    issue(issuer_id, signup("learner")[0], badge_template_id=beta)
+
+    dashboard = client.get("/api/v1/dashboard/issuer", headers=headers, params={"templates_limit": 2}).json()
+    assert dashboard["total_badge_templates"] == 3
+    assert [(template["id"], template["issued_count"]) for template in dashboard["badge_templates"]] == [(alpha, 0), (beta, 1)]
+    assert dashboard["stats"]["total_credentials"] == 1
+
+    # Each page is cached under its own key
+    dashboard = client.get("/api/v1/dashboard/issuer", headers=headers,
+                           params={"templates_skip": 2, "templates_limit": 2}).json()
+    assert [template["id"] for template in dashboard["badge_templates"]] == [gamma]
+
+    issue(issuer_id, signup("learner")[0], badge_template_id=alpha)
+    dashboard = client.get("/api/v1/dashboard/issuer", headers=headers, params={"templates_limit": 2}).json()
+    assert [template["issued_count"] for template in dashboard["badge_templates"]] == [1, 1]
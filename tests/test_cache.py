@@ -0,0 +1,139 @@
+import socket
+import time
+import pytest
+from app import cache, crud
+from .resp_stub import RespStub
+
+
+@pytest.fixture
+def stub():
+    server = RespStub().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def backend():
+    """Run a test against its own backend and restore the app's afterwards"""
+    previous = cache.get_cache()
+    yield lambda new: cache.set_cache(new)
+    cache.set_cache(previous)
+
+
+def _closed_port() -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+# In-process LRU
+
+def test_lru_evicts_least_recently_used():
+    lru = cache.LRUCache(max_entries=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+
+
+def test_lru_expires_entries():
+    lru = cache.LRUCache(max_entries=10, ttl=60)
+    lru.set("a", 1, ttl=1)
+    lru._entries["a"] = (1, time.monotonic() - 1)
+    assert lru.get("a") is None
+
+
+def test_lru_eviction_keeps_version_stamps():
+    lru = cache.LRUCache(max_entries=1, ttl=60)
+    lru.set_version("version:learner:1", "v1")
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get_version("version:learner:1") == "v1"
+
+
+# Version stamps
+
+def test_bump_invalidates_only_that_owner(backend):
+    backend(cache.LRUCache(max_entries=100, ttl=60))
+    calls = []
+
+    def loader(value):
+        return lambda: calls.append(value) or value
+
+    assert cache.get_or_set("learner", 1, "dashboard", loader("one")) == "one"
+    assert cache.get_or_set("learner", 2, "dashboard", loader("two")) == "two"
+    assert cache.get_or_set("learner", 1, "dashboard", loader("stale")) == "one"
+
+    cache.bump("learner", 1)
+    assert cache.get_or_set("learner", 1, "dashboard", loader("fresh")) == "fresh"
+    assert cache.get_or_set("learner", 2, "dashboard", loader("stale")) == "two"
+    assert calls == ["one", "two", "fresh"]
+
+
+# Redis-protocol backend
+
+def test_redis_backend_against_stub(backend, stub):
+    redis = cache.RedisCache(stub.url, ttl=60)
+    backend(redis)
+    assert cache.get_or_set("issuer", 7, "dashboard", lambda: {"total": 1}) == {"total": 1}
+    assert cache.get_or_set("issuer", 7, "dashboard", lambda: {"total": 2}) == {"total": 1}
+    cache.bump("issuer", 7)
+    assert cache.get_or_set("issuer", 7, "dashboard", lambda: {"total": 2}) == {"total": 2}
+    assert "SET" in stub.commands and "GET" in stub.commands
+
+
+def test_redis_version_is_only_set_if_absent(stub):
+    redis = cache.RedisCache(stub.url)
+    assert redis.set_version("version:issuer:1", "first", only_if_absent=True) == "first"
+    assert redis.set_version("version:issuer:1", "second", only_if_absent=True) == "first"
+    assert redis.set_version("version:issuer:1", "third") == "third"
+
+
+def test_redis_authenticates():
+    server = RespStub(password="secret").start()
+    try:
+        redis = cache.RedisCache(server.url)
+        redis.set("key", [1, 2])
+        assert redis.get("key") == [1, 2]
+        assert server.commands[0] == "AUTH"
+    finally:
+        server.stop()
+
+
+def test_unreachable_redis_falls_back_to_loader(backend):
+    backend(cache.RedisCache(f"redis://127.0.0.1:{_closed_port()}/0", timeout=0.2))
+    assert cache.get_or_set("learner", 1, "dashboard", lambda: "loaded") == "loaded"
+    cache.bump("learner", 1)  # Logged, not raised
+
+
+def test_redis_reconnects_after_server_restart(backend, stub):
+    redis = cache.RedisCache(stub.url, ttl=60)
+    backend(redis)
+    assert cache.get_or_set("learner", 3, "dashboard", lambda: "first") == "first"
+    port = stub.server_address[1]
+    stub.stop()
+    assert cache.get_or_set("learner", 3, "dashboard", lambda: "fallback") == "fallback"
+
+    restarted = RespStub(port=port).start()
+    try:
+        assert cache.get_or_set("learner", 3, "dashboard", lambda: "second") == "second"
+        assert cache.get_or_set("learner", 3, "dashboard", lambda: "stale") == "second"
+    finally:
+        restarted.stop()
+
+
+# Write paths
+
+def test_credential_view_invalidates_issuer_dashboard(db, signup, issuer, issue, backend):
+    backend(cache.LRUCache(max_entries=100, ttl=60))
+    issuer_id, _ = issuer
+    email, _ = signup("learner")
+    credential = issue(issuer_id, email)
+
+    assert cache.get_or_set("issuer", issuer_id, "dashboard", lambda: {"view_count": 0}) == {"view_count": 0}
+    crud.record_credential_view(db, credential.id, "127.0.0.1", "pytest")
+    assert cache.get_or_set("issuer", issuer_id, "dashboard", lambda: {"view_count": 1}) == {"view_count": 1}
@@ -0,0 +1,77 @@
+import contextlib
+from datetime import datetime
+from sqlalchemy import event
+from app import crud, models, schemas
+from app.db import engine
+
+
+@contextlib.contextmanager
+def _statements():
+    """Collect the SQL statements run inside the block"""
+    statements = []
+
+    def collect(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", collect)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", collect)
+
+
+def test_learner_dashboard_counts_and_recent_credentials(client, db, issuer, issue, signup):
+    issuer_id, issuer_headers = issuer
+    email, headers = signup("learner")
+    template = crud.create_badge_template(db, schemas.BadgeTemplateCreate(
+        name="Cloud Badge", badge_type=schemas.BadgeType.skill_badge, criteria="Pass the lab"
+    ), issuer_id)
+    credentials = [issue(issuer_id, email, title=f"Course {n}", skills=["Python", f"Skill {n % 2}"],
+                         is_public=n != 0) for n in range(6)]
+    latest = issue(issuer_id, email, title="Templated", skills=["Go"], badge_template_id=template.id)
+    crud.upsert_credential_metadata(db, latest, schemas.CredentialMetadata(nsqf_level=5))
+    client.put(f"/api/v1/credentials/{credentials[1].id}", headers=issuer_headers, json={"status": "verified"})
+
+    response = client.get("/api/v1/dashboard/learner", headers=headers)
+    assert response.status_code == 200, response.text
+    dashboard = response.json()
+    assert dashboard["stats"] == {"total_credentials": 7, "pending_credentials": 0, "verified_credentials": 1,
+                                  "public_credentials": 6, "shared_credentials": 0}
+
+    recent = dashboard["recent_credentials"]
+    assert [item["title"] for item in recent] == ["Templated", "Course 5", "Course 4", "Course 3", "Course 2"]
+    assert recent[0]["credential_type"] == "skill_badge" and recent[0]["nsqf_level"] == 5
+    assert recent[0]["badge_template"]["name"] == "Cloud Badge"
+    assert recent[1]["credential_type"] == "certificate" and recent[1]["badge_template"] is None
+    assert recent[1]["issuer"]["id"] == issuer_id and recent[1]["learner_email"] == email
+    assert dashboard["skill_categories"] == ["Go", "Python", "Skill 1", "Skill 0"]
+
+
+def test_learner_dashboard_is_two_queries(db, issuer, issue, signup):
+    email, _ = signup("learner")
+    for n in range(4):
+        issue(issuer[0], email, skills=[f"Skill {n}"])
+    learner_id = db.query(models.User.id).filter(models.User.email == email).scalar()
+
+    with _statements() as statements:
+        stats = crud.get_learner_stats(db, learner_id)
+        recent = crud.get_recent_learner_credentials(db, learner_id, 5)
+    assert len(statements) == 2
+    assert stats["total_credentials"] == 4 and len(recent) == 4
+    assert all(isinstance(credential, dict) for credential in recent)
+    assert schemas.LearnerDashboard.model_validate({
+        "stats": stats, "recent_credentials": [dict(credential, learner_email=email) for credential in recent],
+        "skill_categories": [],
+    })
+
+
+def test_learner_dashboard_follows_new_credentials(client, issuer, issue, signup):
+    email, headers = signup("learner")
+    empty = client.get("/api/v1/dashboard/learner", headers=headers).json()
+    assert empty == {"stats": {"total_credentials": 0, "pending_credentials": 0, "verified_credentials": 0,
+                               "public_credentials": 0, "shared_credentials": 0},
+                     "recent_credentials": [], "skill_categories": []}
+
+    issue(issuer[0], email, skills=["Rust"], completion_date=datetime(2025, 1, 1))
+    dashboard = client.get("/api/v1/dashboard/learner", headers=headers).json()
+    assert dashboard["stats"]["total_credentials"] == 1 and dashboard["skill_categories"] == ["Rust"]
+    assert client.get("/api/v1/dashboard/learner", headers=signup("issuer")[1]).status_code == 403
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import digilocker, models
+from .digilocker_stub import DigiLockerStub
+
+VERIFIED = (200, {"status": "verified"}, {})
+UNAVAILABLE = (503, {}, {})
+
+
+@pytest.fixture
+def stub():
+    server = DigiLockerStub().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Record backoff attempts instead of sleeping"""
+    attempts = []
+    monkeypatch.setattr(digilocker, "_backoff", lambda attempt: attempts.append(attempt) or 0)
+    return attempts
+
+
+def _statuses(stub, uris, **options):
+    async def check():
+        async with digilocker.DigiLockerClient(base_url=stub.url, **options) as client:
+            return await asyncio.gather(*(client.document_status(uri) for uri in uris), return_exceptions=True)
+    return asyncio.run(check())
+
+
+# Retries and backoff
+
+def test_transient_errors_are_retried(stub, backoffs):
+    stub.documents["in.gov.doc-1"] = [UNAVAILABLE, (429, {}, {"Retry-After": "0"}), VERIFIED]
+    assert _statuses(stub, ["in.gov.doc-1"], retries=3) == ["verified"]
+    assert stub.requests["in.gov.doc-1"] == 3
+    assert backoffs == [0]  # The 429 waited for Retry-After instead
+
+
+def test_retries_give_up_after_the_limit(stub, backoffs):
+    stub.documents["in.gov.doc-2"] = [UNAVAILABLE]
+    [outcome] = _statuses(stub, ["in.gov.doc-2"], retries=2)
+    assert isinstance(outcome, digilocker.SyncError)
+    assert stub.requests["in.gov.doc-2"] == 3
+    assert backoffs == [0, 1]
+
+
+def test_unknown_document_is_failed_without_retrying(stub, backoffs):
+    assert _statuses(stub, ["in.gov.missing"], retries=3) == ["failed"]
+    assert stub.requests["in.gov.missing"] == 1
+
+
+def test_backoff_is_full_jitter_within_the_window():
+    for attempt in range(10):
+        window = min(digilocker.RETRY_MAX_SECONDS, digilocker.RETRY_BASE_SECONDS * 2 ** attempt)
+        delays = [digilocker._backoff(attempt) for _ in range(50)]
+        assert all(0 <= delay <= window for delay in delays)
+        assert len(set(delays)) > 1
+
+
+# Circuit breaker
+
+def test_circuit_breaker_opens_and_closes():
+    breaker = digilocker.CircuitBreaker(failures=3, reset_seconds=0.05)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()  # A single probe
+    breaker.failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_open_circuit_stops_calling_the_host(stub, backoffs):
+    uris = [f"in.gov.down-{i}" for i in range(10)]
+    for uri in uris:
+        stub.documents[uri] = [(500, {}, {})]
+
+    async def check():
+        async with digilocker.DigiLockerClient(base_url=stub.url, max_per_host=1, retries=0) as client:
+            outcomes = await asyncio.gather(*(client.document_status(uri) for uri in uris), return_exceptions=True)
+            breaker = client.breaker(f"127.0.0.1:{stub.server_address[1]}")
+            state = breaker.state
+            # Once the reset time has passed, a healthy probe closes the circuit
+            breaker.reset_seconds = 0
+            stub.documents["in.gov.up"] = [VERIFIED]
+            recovered = await client.document_status("in.gov.up")
+            return outcomes, state, recovered, breaker.state
+
+    outcomes, state, recovered, final_state = asyncio.run(check())
+    assert all(isinstance(outcome, digilocker.SyncError) for outcome in outcomes)
+    assert sum(isinstance(outcome, digilocker.CircuitOpenError) for outcome in outcomes) == 10 - digilocker.BREAKER_FAILURES
+    assert sum(stub.requests.get(uri, 0) for uri in uris) == digilocker.BREAKER_FAILURES
+    assert state == "open"
+    assert (recovered, final_state) == ("verified", "closed")
+
+
+# Sync pipeline
+
+def test_sync_writes_back_one_batch_per_page(stub, backoffs, db, signup, monkeypatch):
+    email, _ = signup("learner")
+    db.query(models.DigiLockerIntegration).delete()
+    user_id = db.query(models.User.id).filter(models.User.email == email).scalar()
+    now = datetime.now(timezone.utc)
+    stale, fresh = now - timedelta(days=2), now - timedelta(hours=1)
+    stub.documents.update({
+        "in.gov.a": [VERIFIED], "in.gov.b": [(200, {"status": "pending"}, {})],
+        "in.gov.c": [VERIFIED], "in.gov.down": [UNAVAILABLE], "in.gov.fresh": [VERIFIED],
+    })
+    for uri, last_synced in [("in.gov.a", None), ("in.gov.b", stale), ("in.gov.c", None),
+                             ("in.gov.missing", stale), ("in.gov.down", None), ("in.gov.fresh", fresh)]:
+        db.add(models.DigiLockerIntegration(user_id=user_id, document_uri=uri, last_synced=last_synced))
+    db.commit()
+
+    pages = []
+    write_back = digilocker._write_back
+    monkeypatch.setattr(digilocker, "_write_back", lambda db, results, synced_at: pages.append(len(results)) or write_back(db, results, synced_at))
+
+    async def sync():
+        async with digilocker.DigiLockerClient(base_url=stub.url, retries=0) as client:
+            return await digilocker.sync_due(db, client=client, batch_size=2, interval=86400, now=now)
+
+    totals = asyncio.run(sync())
+    assert totals == {"pending": 1, "verified": 2, "failed": 1, "errors": 1}
+    assert pages == [2, 0, 2]  # Never synced: a, c | down (an error) | stale: b, missing
+    assert "in.gov.fresh" not in stub.requests
+
+    db.expire_all()
+    rows = {row.document_uri: row for row in db.query(models.DigiLockerIntegration)}
+    assert {uri: row.verification_status for uri, row in rows.items() if uri != "in.gov.down"} == {
+        "in.gov.a": "verified", "in.gov.b": "pending", "in.gov.c": "verified",
+        "in.gov.missing": "failed", "in.gov.fresh": "pending",
+    }
+    assert rows["in.gov.down"].last_synced is None  # Still due next run
+
+    stub.documents["in.gov.down"] = [VERIFIED]
+    assert asyncio.run(sync())["verified"] == 1
+    db.expire_all()
+    assert db.query(models.DigiLockerIntegration.verification_status).filter(
+        models.DigiLockerIntegration.document_uri == "in.gov.down"
+    ).scalar() == "verified"
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import pytest
+from app import export
+
+
+@pytest.fixture
+def issued(issuer, issue, signup):
+    """An issuer with three credentials, one of them with a comma and a quote in its title"""
+    issuer_id, headers = issuer
+    email, _ = signup("learner")
+    credentials = [
+        issue(issuer_id, email, skills=["Python", "SQL"]),
+        issue(issuer_id, email, title='Data, "Advanced"', skills=[]),
+        issue(issuer_id, email, skills=["Statistics"]),
+    ]
+    return issuer_id, headers, email, credentials
+
+
+def test_ndjson_export_streams_every_credential(client, issued, signup):
+    issuer_id, headers, email, credentials = issued
+    response = client.get("/api/v1/credentials/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == f'attachment; filename="credentials-{issuer_id}.ndjson"'
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [credential.id for credential in credentials]
+    assert set(rows[0]) == set(export.EXPORT_COLUMNS)
+    assert rows[0]["learner_email"] == email and rows[0]["skills"] == ["Python", "SQL"]
+    assert rows[0]["status"] == "issued" and rows[0]["issued_at"].startswith(credentials[0].issued_at.date().isoformat())
+    assert rows[1]["title"] == 'Data, "Advanced"'
+
+    # Another issuer's export is empty, not a leak of these rows
+    assert client.get("/api/v1/credentials/export", headers=signup("issuer")[1]).text == ""
+
+
+def test_csv_export_quotes_fields_and_joins_skills(client, issued):
+    _, headers, email, credentials = issued
+    response = client.get("/api/v1/credentials/export", headers=headers, params={"format": "csv"})
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/csv")
+
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == export.EXPORT_COLUMNS
+    records = [dict(zip(header, row)) for row in rows]
+    assert [int(record["id"]) for record in records] == [credential.id for credential in credentials]
+    assert records[0]["skills"] == "Python;SQL" and records[1]["skills"] == ""
+    assert records[1]["title"] == 'Data, "Advanced"' and records[2]["learner_email"] == email
+
+
+def test_export_is_encoded_one_chunk_per_batch(issued):
+    issuer_id = issued[0]
+    chunks = list(export.stream_issuer_credentials(issuer_id, "ndjson", batch_size=2))
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 1]
+    chunks = list(export.stream_issuer_credentials(issuer_id, "csv", batch_size=2))
+    assert [chunk.count(b"\n") for chunk in chunks] == [1, 2, 1]
+
+
+def test_export_rejects_unknown_formats_and_non_issuers(client, issued, signup):
+    assert client.get("/api/v1/credentials/export", headers=issued[1], params={"format": "xml"}).status_code == 422
+    assert client.get("/api/v1/credentials/export", headers=signup("learner")[1]).status_code == 403
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from app import crud, fingerprints, models
+
+
+def test_identical_active_credential_is_rejected(signup, issuer, issue):
+    issuer_id, _ = issuer
+    email, _ = signup("learner")
+    issue(issuer_id, email, completion_date=datetime(2024, 5, 1))
+    with pytest.raises(HTTPException) as error:
+        issue(issuer_id, email, completion_date=datetime(2024, 5, 1))
+    assert error.value.status_code == 409
+
+
+def test_revoked_credential_can_be_reissued(client, db, signup, issuer, issue):
+    issuer_id, headers = issuer
+    email, _ = signup("learner")
+    first = issue(issuer_id, email, completion_date=datetime(2024, 5, 1))
+    assert client.put(f"/api/v1/credentials/{first.id}", headers=headers, json={"status": "revoked"}).status_code == 200
+
+    second = issue(issuer_id, email, completion_date=datetime(2024, 5, 1))
+    db.expire_all()
+    assert db.get(models.Credential, first.id).fingerprint is None
+    assert db.get(models.Credential, second.id).fingerprint == fingerprints.fingerprint(second)
+
+    # Reinstating the revoked copy would duplicate the new one
+    response = client.put(f"/api/v1/credentials/{first.id}", headers=headers, json={"status": "issued"})
+    assert response.status_code == 409
+
+
+def test_expired_credential_can_be_recertified(db, signup, issuer, issue):
+    issuer_id, _ = issuer
+    email, _ = signup("learner")
+    expiry = datetime.now(timezone.utc) + timedelta(days=1)
+    first = issue(issuer_id, email, completion_date=datetime(2023, 1, 1), expiry_date=expiry)
+    assert crud.expire_credentials(db, now=expiry + timedelta(days=1)) >= 1
+
+    db.expire_all()
+    assert db.get(models.Credential, first.id).fingerprint is None
+    issue(issuer_id, email, completion_date=datetime(2023, 1, 1), expiry_date=expiry)
+
+
+def test_backfill_releases_fingerprints_of_revoked_credentials(db, signup, issuer, issue):
+    issuer_id, _ = issuer
+    email, _ = signup("learner")
+    credential = issue(issuer_id, email)
+    value = credential.fingerprint
+    db.query(models.Credential).filter(models.Credential.id == credential.id).update(
+        {"status": models.CredentialStatus.revoked}, synchronize_session=False
+    )
+    db.commit()
+
+    fingerprints.backfill(db, workers=1)
+    db.expire_all()
+    assert db.get(models.Credential, credential.id).fingerprint is None
+    assert fingerprints.find_duplicate(db, value) is None
@@ -0,0 +1,69 @@
+from app import crud, fulltext, models, schemas
+
+
+def _search(client, q, **params):
+    response = client.get("/api/v1/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json(), response.headers.get("x-next-cursor")
+
+
+def test_only_visible_credentials_match_on_title_or_description(client, db, issuer, issue, signup):
+    issuer_id, headers = issuer
+    email, _ = signup("learner")
+    by_title = issue(issuer_id, email, title="Zephyrine Basics")
+    by_description = issue(issuer_id, email, title="Networking", description="Covers ZEPHYRINE routing")
+    issue(issuer_id, email, title="Private Zephyrine", is_public=False)
+    revoked = issue(issuer_id, email, title="Revoked Zephyrine")
+    client.put(f"/api/v1/credentials/{revoked.id}", headers=headers, json={"status": "revoked"})
+
+    hits, cursor = _search(client, "zephyrine")
+    assert [hit["id"] for hit in hits] == [by_title.id, by_description.id] and cursor is None
+    assert hits[0]["kind"] == "credentials" and hits[0]["public_url"] == by_title.public_url
+    assert hits[0]["issuer_name"] == db.get(models.Issuer, issuer_id).name
+    assert hits[0]["highlights"] == {} and hits[0]["rank"] == 0.0
+
+
+def test_cursor_pages_through_every_match(client, issuer, issue, signup):
+    email, _ = signup("learner")
+    ids = [issue(issuer[0], email, title=f"Quillwort {n}").id for n in range(5)]
+
+    seen, cursor = [], None
+    while True:
+        hits, cursor = _search(client, "quillwort", limit=2, **({"cursor": cursor} if cursor else {}))
+        seen += [hit["id"] for hit in hits]
+        if not cursor:
+            break
+    assert seen == ids
+    assert client.get("/api/v1/search", params={"q": "quillwort", "cursor": "garbage"}).status_code == 400
+
+
+def test_badge_templates_and_translations(client, db, issuer, issue, signup):
+    issuer_id, _ = issuer
+    active = crud.create_badge_template(db, schemas.BadgeTemplateCreate(
+        name="Marrowfat Badge", badge_type=schemas.BadgeType.achievement, criteria="Pass"), issuer_id)
+    inactive = crud.create_badge_template(db, schemas.BadgeTemplateCreate(
+        name="Old Marrowfat", badge_type=schemas.BadgeType.achievement, criteria="Pass"), issuer_id)
+    inactive.active = False
+    credential = issue(issuer_id, signup("learner")[0], title="Pottery")
+    db.add_all([
+        models.MultilingualContent(content_type="credential_title", content_id=str(credential.id),
+                                   language_code="hi", translated_text="मिट्टी के बर्तन"),
+        models.MultilingualContent(content_type="skill_name", content_id=str(credential.id),
+                                   language_code="hi", translated_text="बर्तन कौशल"),
+    ])
+    db.commit()
+
+    hits, _ = _search(client, "marrowfat", kind="badge_templates")
+    assert [(hit["id"], hit["badge_type"]) for hit in hits] == [(active.id, "achievement")]
+    assert client.get("/api/v1/search", params={"q": "marrowfat", "kind": "jobs"}).status_code == 422
+
+    hits, _ = _search(client, "बर्तन", lang="hi")
+    assert [hit["id"] for hit in hits] == [credential.id] and hits[0]["title"] == "Pottery"
+    assert _search(client, "कौशल", lang="hi")[0] == []
+    assert _search(client, "pottery", lang="hi")[0] == []
+
+
+def test_language_configs():
+    assert fulltext.search_config("en") == "english"
+    assert fulltext.search_config("hi") == fulltext.search_config("ta") == "simple"
+    assert "WHEN 'hi' THEN 'simple'::regconfig" in fulltext._language_config_sql()
@@ -0,0 +1,158 @@
+import gzip
+import itertools
+import json
+import pytest
+from app import imports, models, signing
+
+_ids = itertools.count()
+
+
+@pytest.fixture
+def admin(signup):
+    return signup("admin")[1]
+
+
+@pytest.fixture
+def provider(db, issuer):
+    """A fully trusted provider importing under a fresh issuer"""
+    issuer_id, _ = issuer
+    provider = models.ExternalProvider(provider_name="Open Campus", provider_type="edtech", trust_level=5,
+                                       is_ncvet_recognized=True, issuer_id=issuer_id)
+    db.add(provider)
+    db.commit()
+    return provider.id
+
+
+@pytest.fixture
+def learner(signup):
+    return signup("learner")[0]
+
+
+def _record(email, **fields):
+    record = {"id": f"EXT-{next(_ids)}", "email": email, "course_name": f"Course {next(_ids)}",
+              "summary": "Hands-on course", "competencies": ["Python", "SQL"], "completed_at": "2025-06-01"}
+    record.update(fields)
+    return {key: value for key, value in record.items() if value is not None}
+
+def _imports(db, provider_id):
+    db.expire_all()
+    return {
+        entry.external_credential_id: entry for entry in db.query(models.CredentialImport).filter(
+            models.CredentialImport.external_provider_id == provider_id
+        )
+    }
+
+
+def test_map_record_scores_missing_and_unknown_fields():
+    full = imports.map_record(_record("a@x.com"))
+    assert full["confidence"] == 1.0 and full["issues"] == []
+
+    sparse = imports.map_record(_record("a@x.com", summary=None, completed_at="last spring",
+                                        competencies=["Python", "Basket Weaving"]), trust=0.8)
+    assert sparse["issues"] == ["unreadable date", "no description", "unknown skills"]
+    assert sparse["confidence"] == round((1 - 0.25 - 0.05 - 0.1) * 0.8, 3)
+
+    untitled = imports.map_record(_record("a@x.com", course_name=None))
+    assert untitled["rejected"] and untitled["confidence"] == 0.0 and untitled["issues"][0] == "no title"
+
+
+def test_jsonl_and_xml_dumps_are_streamed(db, provider, learner, tmp_path):
+    jsonl = tmp_path / "dump.jsonl.gz"
+    with gzip.open(jsonl, "wt", encoding="utf-8") as stream:
+        stream.write(json.dumps(_record(learner, id="J1")) + "\n")
+        stream.write("{not json\n\n")
+        stream.write(json.dumps(["not", "an", "object"]) + "\n")
+        stream.write(json.dumps(_record(learner, id="J2")) + "\n")
+    xml = tmp_path / "dump.xml"
+    xml.write_text(
+        '<dump xmlns="urn:provider">'
+        f'<credential id="X1"><email>{learner}</email><course_name>Cloud Basics</course_name>'
+        '<summary>Intro</summary><completed_at>2025-06-01</completed_at>'
+        '<competencies><skill>Python</skill><skill>DevOps</skill></competencies></credential>'
+        f'<credential id="X2"><email>{learner}</email><course_name>Data Basics</course_name>'
+        '<summary>Intro</summary><completed_at>2025-06-02</completed_at>'
+        '<skill>SQL</skill><skill>Statistics</skill></credential>'
+        '</dump>'
+    )
+
+    assert [record["id"] for record in imports.read_file(str(jsonl)) if record] == ["J1", "J2"]
+    totals = imports.import_file(db, provider, str(jsonl), chunk_size=1)
+    assert (totals["imported"], totals["invalid"]) == (2, 2)
+    totals = imports.import_file(db, provider, str(xml))
+    assert totals["imported"] == 2
+
+    entries = _imports(db, provider)
+    credentials = {key: db.get(models.Credential, entries[key].credential_id) for key in ("X1", "X2")}
+    assert credentials["X1"].skills == ["Python", "DevOps"]
+    assert credentials["X2"].skills == ["SQL", "Statistics"]
+
+
+def test_records_are_routed_by_confidence_and_seen_ids_skipped(db, provider, learner):
+    records = [
+        _record(learner, id="HIGH"),
+        _record(learner, id="LOW", summary=None, completed_at=None, competencies=None, course_name="Pottery"),
+        _record(learner, id="NOTITLE", course_name=None),
+        _record("nobody@example.com", id="STRANGER"),
+        _record(learner, id="HIGH"),
+        {"course_name": "No id"},
+    ]
+    totals = imports.import_records(db, provider, records)
+    assert totals == {"imported": 1, "duplicate": 0, "review": 1, "rejected": 2, "skipped": 1, "invalid": 1}
+    entries = _imports(db, provider)
+    assert {key: entry.status for key, entry in entries.items()} == {
+        "HIGH": "imported", "LOW": "review", "NOTITLE": "rejected", "STRANGER": "rejected"
+    }
+    assert entries["LOW"].requires_manual_review and entries["LOW"].record["title"] == "Pottery"
+    assert entries["STRANGER"].issues[0] == "unknown learner"
+    assert entries["HIGH"].record is None
+
+    issued = db.query(models.Credential).filter(models.Credential.issuer_id == db.get(models.ExternalProvider, provider).issuer_id).count()
+    totals = imports.import_records(db, provider, records[:4])
+    assert totals["skipped"] == 4 and totals["imported"] == 0
+    assert db.query(models.Credential).filter(models.Credential.issuer_id == db.get(models.ExternalProvider, provider).issuer_id).count() == issued
+
+
+def _queue_one(db, provider, email, external_id):
+    imports.import_records(db, provider, [_record(email, id=external_id, summary=None, completed_at=None,
+                                                  competencies=None, course_name=f"Pottery {external_id}")])
+    return _imports(db, provider)[external_id].id
+
+
+def test_approve_matches_the_learner_case_insensitively(client, db, provider, learner, admin):
+    import_id = _queue_one(db, provider, learner.upper(), "CASE")
+    queue = client.get("/api/v1/admin/imports/review", params={"provider_id": provider}, headers=admin).json()
+    assert [entry["id"] for entry in queue] == [import_id]
+
+    response = client.post(f"/api/v1/admin/imports/{import_id}/approve", headers=admin)
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "imported"
+    credential = db.get(models.Credential, response.json()["credential_id"])
+    assert db.get(models.User, credential.learner_id).email == learner and credential.signed_credential
+
+    assert client.post(f"/api/v1/admin/imports/{import_id}/approve", headers=admin).status_code == 404
+    assert client.post(f"/api/v1/admin/imports/{import_id}/reject", headers=admin).status_code == 404
+
+
+def test_reject_leaves_nothing_issued(client, db, provider, learner, admin):
+    import_id = _queue_one(db, provider, learner, "NOPE")
+    response = client.post(f"/api/v1/admin/imports/{import_id}/reject", headers=admin)
+    assert response.status_code == 200 and response.json()["status"] == "rejected"
+    assert response.json()["credential_id"] is None
+    assert client.post(f"/api/v1/admin/imports/{import_id}/approve", headers=admin).status_code == 404
+
+
+def test_failed_approve_issues_nothing(client, db, provider, learner, admin, monkeypatch):
+    import_id = _queue_one(db, provider, learner, "ATOMIC")
+    before = db.query(models.Credential).count()
+
+    def fail(db, credential):
+        raise RuntimeError("signing key unavailable")
+    monkeypatch.setattr(signing, "sign_credential", fail)
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/v1/admin/imports/{import_id}/approve", headers=admin)
+
+    assert _imports(db, provider)["ATOMIC"].status == "review"
+    assert db.query(models.Credential).count() == before
+    monkeypatch.undo()
+    response = client.post(f"/api/v1/admin/imports/{import_id}/approve", headers=admin)
+    assert response.status_code == 200 and response.json()["status"] == "imported"
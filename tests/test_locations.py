@@ -0,0 +1,33 @@
+import pytest
+from app import locations
+
+
+@pytest.mark.parametrize("text, state, district", [
+    ("Bangalore, Karnataka", "KA", "KA-BENGALURU-URBAN"),
+    ("Gurgaon", "HR", "HR-GURUGRAM"),
+    ("Noida, UP", "UP", "UP-GAUTAM-BUDDHA-NAGAR"),
+    ("Chennai / TN", "TN", "TN-CHENNAI"),
+    ("UP", "UP", None),
+    ("wb", "WB", None),
+    ("Jammu and Kashmir", "JK", None),
+    ("Mumbai, Madhya Pradesh", "MP", None),
+])
+def test_normalize(text, state, district):
+    location = locations.normalize(text)
+    assert (location.state_code, location.district_code) == (state, district)
+
+
+@pytest.mark.parametrize("text, state, district", [
+    ("Set up in Pune", "MH", "MH-PUNE"),
+    ("Grew up in Kolkata", "WB", "WB-KOLKATA"),
+    ("Remote, up to 2 days in Hyderabad", "TS", "TS-HYDERABAD"),
+])
+def test_abbreviations_inside_text_are_words(text, state, district):
+    location = locations.normalize(text)
+    assert (location.state_code, location.district_code) == (state, district)
+
+
+def test_unknown_locations():
+    assert locations.normalize("Set up shop") is None
+    assert locations.normalize("") is None
+    assert locations.normalize(None) is None
@@ -0,0 +1,108 @@
+import threading
+import time
+import pytest
+from app import crud, matching, models, schemas
+
+
+@pytest.fixture
+def employer(client, signup):
+    _, headers = signup("employer")
+    response = client.post("/api/v1/employers/profile", headers=headers, json={
+        "company_name": "Acme", "industry": "IT", "company_size": "sme", "location": "Pune"
+    })
+    assert response.status_code == 200, response.text
+    return headers
+
+
+def _learner(client, db, signup, issue, issuer, nsqf_level):
+    issuer_id, headers = issuer
+    email, _ = signup("learner")
+    credential = issue(issuer_id, email, skills=["Terraform", "Ansible"])
+    response = client.put(f"/api/v1/credentials/{credential.id}/metadata", headers=headers, json={"nsqf_level": nsqf_level})
+    assert response.status_code == 200, response.text
+    return db.query(models.User).filter(models.User.email == email).one().id
+
+
+def _matches(client, employer, job_id):
+    response = client.get(f"/api/v1/employers/skill-matching/{job_id}", headers=employer)
+    assert response.status_code == 200, response.text
+    return {match["learner_id"] for match in response.json()}
+
+
+def test_job_with_min_nsqf_level_only_matches_qualified_learners(client, db, signup, issue, issuer, employer):
+    qualified = _learner(client, db, signup, issue, issuer, 6)
+    unqualified = _learner(client, db, signup, issue, issuer, 3)
+
+    response = client.post("/api/v1/employers/job-requirements", headers=employer, json={
+        "job_title": "Platform Engineer", "required_skills": ["Terraform"], "preferred_skills": ["Ansible"],
+        "min_nsqf_level": 5
+    })
+    assert response.status_code == 200, response.text
+    job_id = response.json()["id"]
+    matches = _matches(client, employer, job_id)
+    assert qualified in matches
+    assert unqualified not in matches
+
+    # Raising the bar re-ranks through the same query
+    response = client.put(f"/api/v1/employers/job-requirements/{job_id}", headers=employer, json={"min_nsqf_level": 7})
+    assert response.status_code == 200, response.text
+    assert not _matches(client, employer, job_id) & {qualified, unqualified}
+
+
+# Skill matrix and template index
+
+def test_template_index_follows_upserts():
+    index = matching.TemplateIndex()
+    index.upsert(2, "Rust Systems", ["Rust", "Linux"], True)
+    index.upsert(1, "Rust Basics", ["rust"], True)
+    assert index.names("rust") == ["Rust Basics", "Rust Systems"]
+
+    index.upsert(2, "Linux Admin", ["Linux"], True)
+    assert index.names("rust") == ["Rust Basics"]
+    assert index.names("linux") == ["Linux Admin"]
+    index.upsert(1, "Rust Basics", ["rust"], False)
+    assert index.names("rust") == []
+
+
+def test_recommendations_track_template_changes(client, db, issuer):
+    _, headers = issuer
+    matching.load()
+    template = client.post("/api/v1/badge-templates", headers=headers, json={
+        "name": "Zig Programming", "badge_type": "certification", "criteria": "Project", "skills": ["Zig"]
+    }).json()
+    assert matching._recommended_templates(db, {"zig"}) == {"zig": ["Zig Programming"]}
+
+    crud.update_badge_template(db, template["id"], schemas.BadgeTemplateUpdate(active=False))
+    assert matching._recommended_templates(db, {"zig"}) == {}
+
+
+def test_stale_matrix_is_served_while_rebuilt_in_background(db, monkeypatch):
+    matching.load()
+    stale = matching.get_matrix(db)
+    stale.loaded_at -= matching.MATCH_MATRIX_TTL_SECONDS + 1
+    builders = []
+    load = matching.SkillMatrix.load.__func__
+    monkeypatch.setattr(matching.SkillMatrix, "load", classmethod(
+        lambda cls, session, **options: builders.append(threading.current_thread().name) or load(cls, session, **options)
+    ))
+
+    assert matching.get_matrix(db) is stale
+    deadline = time.monotonic() + 5
+    while matching.get_matrix(db) is stale and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert matching.get_matrix(db) is not stale
+    assert builders == ["skill-matrix-refresh"]
+
+
+def test_scheduler_builds_the_matrix_off_the_request_path(db, monkeypatch):
+    matching.invalidate_matrix()
+    monkeypatch.setattr(matching, "MATCH_MATRIX_SCHEDULER", True)
+    matching.start_scheduler()
+    try:
+        deadline = time.monotonic() + 5
+        while matching._matrix is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert matching._matrix is not None and matching._templates is not None
+    finally:
+        matching.stop_scheduler()
+        matching._thread.join(5)
@@ -0,0 +1,89 @@
+from app import crud, pathways, schemas
+
+
+def _graph(levels, edges):
+    return pathways.PathwayGraph(
+        {template_id: {"template_id": template_id, "name": f"T{template_id}", "nsqf_level": level}
+         for template_id, level in levels.items()},
+        edges,
+    )
+
+def _ids(nodes):
+    return sorted(node["template_id"] for node in nodes)
+
+
+def test_cycles_collapse_into_one_component():
+    # 1 -> 2 <-> 3 -> 4, and 5 on its own; self-loops and unknown ids are ignored
+    graph = _graph({1: 3, 2: 4, 3: 4, 4: 6, 5: None}, [(1, 2), (2, 3), (3, 2), (3, 4), (4, 4), (4, 99), (1, 2)])
+    components = sorted(sorted(graph.ids[i] for i in members) for members in graph._components())
+    assert components == [[1], [2, 3], [4], [5]]
+
+    assert _ids(graph.leads_to(1)) == [2, 3, 4]
+    assert _ids(graph.leads_to(2)) == [3, 4] and _ids(graph.leads_to(3)) == [2, 4]
+    assert _ids(graph.stacks_into(4)) == [1, 2, 3]
+    assert _ids(graph.stacks_into(3)) == [1, 2]
+    assert graph.leads_to(5) == [] and graph.stacks_into(5) == []
+
+
+def test_long_chains_do_not_recurse():
+    n = 5000
+    graph = _graph({i: i for i in range(n)}, [(i, i + 1) for i in range(n - 1)] + [(n - 1, 0)])
+    assert len(graph._components()) == 1
+    assert len(graph.leads_to(0)) == n - 1
+
+    graph = _graph({i: None for i in range(n)}, [(i, i + 1) for i in range(n - 1)])
+    assert len(graph.leads_to(0)) == n - 1 and len(graph.stacks_into(n - 1)) == n - 1
+
+
+def test_shortest_pathway():
+    # 1 (L3) -> 2 (L4) -> 4 (L6); 1 -> 3 (L5) -> 5 (L5) -> 4; 6 (L2) -> 7 (L7)
+    graph = _graph({1: 3, 2: 4, 3: 5, 4: 6, 5: 5, 6: 2, 7: 7},
+                   [(1, 2), (2, 4), (1, 3), (3, 5), (5, 4), (6, 7)])
+    start, steps = graph.shortest_pathway({1}, 6)
+    assert start["template_id"] == 1 and _ids(steps) == [2, 4]
+
+    assert graph.shortest_pathway({4}, 6) == (None, [])
+    # Nothing held leads to level 7, so the pathway starts from an entry template
+    assert graph.shortest_pathway({1}, 7) == (None, [graph.nodes[6], graph.nodes[7]])
+    assert graph.shortest_pathway({1}, 9) is None
+    # A held template that cannot progress is not used as a start
+    start, steps = graph.shortest_pathway({4, 6}, 7)
+    assert start["template_id"] == 6 and steps == [graph.nodes[7]]
+
+
+def _template(db, issuer_id, name):
+    return crud.create_badge_template(db, schemas.BadgeTemplateCreate(
+        name=name, badge_type=schemas.BadgeType.certification, criteria="Pass"), issuer_id).id
+
+
+def test_graph_is_built_from_credential_metadata(client, db, issuer, issue, signup):
+    issuer_id, _ = issuer
+    email, headers = signup("learner")
+    basics, applied, advanced = (_template(db, issuer_id, name) for name in
+                                 ("Pathway Basics", "Pathway Applied", "Pathway Advanced"))
+    first = issue(issuer_id, email, title="Basics", badge_template_id=basics)
+    second = issue(issuer_id, signup("learner")[0], title="Applied", badge_template_id=applied)
+    third = issue(issuer_id, signup("learner")[0], title="Advanced", badge_template_id=advanced)
+    crud.upsert_credential_metadata(db, first, schemas.CredentialMetadata(nsqf_level=8, stackable_with=[second.id]))
+    crud.upsert_credential_metadata(db, second, schemas.CredentialMetadata(nsqf_level=9))
+    crud.upsert_credential_metadata(db, third, schemas.CredentialMetadata(
+        nsqf_level=10, prerequisite_qualifications=[" pathway applied ", "Unknown Course"]))
+
+    response = client.get(f"/api/v1/pathways/templates/{applied}")
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["template"]["nsqf_level"] == 9
+    assert _ids(body["stacks_into_this"]) == [basics] and _ids(body["leads_to"]) == [advanced]
+    assert client.get("/api/v1/pathways/templates/999999").status_code == 404
+
+    response = client.get("/api/v1/pathways/learner", headers=headers, params={"target_nsqf_level": 10})
+    assert response.status_code == 200, response.text
+    pathway = response.json()
+    assert pathway["reachable"] and not pathway["achieved"]
+    assert pathway["start"]["template_id"] == basics
+    assert [step["template_id"] for step in pathway["steps"]] == [applied, advanced]
+
+    # Metadata changes invalidate the graph and cached results
+    crud.upsert_credential_metadata(db, first, schemas.CredentialMetadata(stackable_with=[third.id]))
+    pathway = client.get("/api/v1/pathways/learner", headers=headers, params={"target_nsqf_level": 10}).json()
+    assert [step["template_id"] for step in pathway["steps"]] == [advanced]
@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import text
+from app import models, search
+
+
+@pytest.fixture
+def employer(signup):
+    return signup("employer")[1]
+
+
+@pytest.fixture
+def learner(client, db, signup, issuer, issue):
+    """A learner at a location holding credentials with the given skills; returns their id"""
+    issuer_id, headers = issuer
+
+    def create(location, skills, verified=False):
+        email, _ = signup("learner", location=location)
+        credential = issue(issuer_id, email, skills=skills)
+        if verified:
+            client.put(f"/api/v1/credentials/{credential.id}", headers=headers, json={"status": "verified"})
+        return db.query(models.User.id).filter(models.User.email == email).scalar()
+    return create
+
+
+def _search(client, employer, **params):
+    response = client.get("/api/v1/employer/candidates", headers=employer, params=params)
+    assert response.status_code == 200, response.text
+    return [int(candidate["id"]) for candidate in response.json()], response.headers.get("x-next-cursor")
+
+
+def test_location_filter_matches_the_normalized_state(client, employer, learner):
+    bengaluru = learner("Bengaluru", ["Kotlin"])
+    mysore = learner("Mysore, Karnataka", ["Kotlin"])
+    pune = learner("Pune", ["Kotlin"])
+
+    found, _ = _search(client, employer, skills="kotlin", location="Karnataka")
+    assert set(found) >= {bengaluru, mysore} and pune not in found
+    found, _ = _search(client, employer, location="bangalore")
+    assert bengaluru in found and mysore in found and pune not in found
+    assert _search(client, employer, skills="kotlin", location="Atlantis") == ([], None)
+
+
+def test_location_change_moves_learner_between_states(client, db, employer, signup, issuer, issue):
+    email, headers = signup("learner", location="Chennai")
+    issue(issuer[0], email, skills=["Elixir"])
+    learner_id = db.query(models.User.id).filter(models.User.email == email).scalar()
+    assert _search(client, employer, skills="elixir", location="Tamil Nadu")[0] == [learner_id]
+
+    assert client.put("/api/v1/users/profile", headers=headers, json={"location": "Hyderabad"}).status_code == 200
+    assert _search(client, employer, skills="elixir", location="Tamil Nadu")[0] == []
+    assert _search(client, employer, skills="elixir", location="Telangana")[0] == [learner_id]
+
+
+def test_ranking_and_paging(client, employer, learner):
+    both = learner("Delhi", ["Clojure", "Scala"])
+    verified = learner("Delhi", ["Clojure"], verified=True)
+    plain = learner("Delhi", ["Clojure"])
+
+    first, cursor = _search(client, employer, skills="clojure,scala", limit=2)
+    assert first == [both, verified]
+    second, cursor = _search(client, employer, skills="clojure,scala", limit=2, cursor=cursor)
+    assert second == [plain] and cursor is None
+
+
+def test_candidates_are_bounded_per_skill(db, learner):
+    verified = learner("Kolkata", ["Fortran"], verified=True)
+    others = [learner("Kolkata", ["Fortran"]) for _ in range(4)]
+
+    ranked = search._rank_learners(db, ["fortran"], None, None, None, 10, per_skill=2)
+    assert [row[0] for row in ranked] == [verified, others[0]]
+    ranked = search._rank_learners(db, ["fortran"], "WB", None, None, 10, per_skill=10)
+    assert [row[0] for row in ranked] == [verified] + others
+
+
+def test_candidate_lookup_uses_the_skill_state_index(db):
+    subquery = search._skill_candidates(db, "fortran", "WB", None, 100)
+    compiled = subquery.element.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = " ".join(str(row[-1]) for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "ix_learner_skills_skill_state_rank" in plan
+
+
+@pytest.mark.parametrize("values", [5, "abc", {"a": 1}, [], [1, 2], [1, 2, 3, 4], [1, "2", 3], [True, 1, 2], None])
+def test_malformed_cursors_are_rejected(client, employer, values):
+    cursor = search.encode_cursor(values)
+    with pytest.raises(ValueError):
+        search.decode_cursor(cursor, 3)
+    response = client.get("/api/v1/employer/candidates", headers=employer, params={"skills": "python", "cursor": cursor})
+    assert response.status_code == 400
+    # Full-text cursors are (rank, id) pairs
+    if values != [1, 2]:
+        response = client.get("/api/v1/search", params={"q": "python", "cursor": cursor})
+        assert response.status_code == 400
+
+
+def test_cursor_round_trip():
+    assert search.decode_cursor(search.encode_cursor([2, 5, 17]), 3) == [2, 5, 17]
+    with pytest.raises(ValueError):
+        search.decode_cursor("not base64!", 3)
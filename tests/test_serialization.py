@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from app import models, schemas, serialization
+
+
+def test_dumps_is_compact_with_and_without_orjson(monkeypatch):
+    content = {"name": "Café", "at": datetime(2025, 6, 1, 12, 30), "tags": ["a", "b"], 1: None}
+    fast = serialization.dumps(content)
+    monkeypatch.setattr(serialization, "orjson", None)
+    plain = serialization.dumps(content)
+
+    for encoded in (fast, plain):
+        assert b", " not in encoded and "Café".encode() in encoded
+        assert json.loads(encoded) == {"name": "Café", "at": "2025-06-01T12:30:00", "tags": ["a", "b"], "1": None}
+
+
+def test_fast_response_sends_bytes_as_is():
+    assert serialization.FastJSONResponse(b'{"ready":1}').body == b'{"ready":1}'
+    assert json.loads(serialization.FastJSONResponse({"ready": 1}).body) == {"ready": 1}
+
+
+def test_dump_list_matches_per_item_serialization(db, issuer, issue, signup):
+    email, _ = signup("learner")
+    credentials = [issue(issuer[0], email, skills=[f"Skill {n}"]) for n in range(3)]
+    dumped = json.loads(serialization.dump_list(serialization.credential_list_adapter, credentials))
+    expected = [jsonable_encoder(schemas.CredentialOut.model_validate(credential)) for credential in credentials]
+    assert dumped == json.loads(json.dumps(expected))
+    assert serialization.dump_list(serialization.credential_list_adapter, []) == b"[]"
+
+
+def test_credential_lists_keep_their_response_shapes(client, db, issuer, issue, signup):
+    issuer_id, issuer_headers = issuer
+    email, learner_headers = signup("learner")
+    credential = issue(issuer_id, email, skills=["Python"])
+    name = db.get(models.Issuer, issuer_id).name
+
+    response = client.get("/api/v1/credentials", headers=learner_headers)
+    assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+    [item] = response.json()
+    assert item["id"] == str(credential.id) and item["issuer"] == name
+    assert (item["status"], item["credential_type"], item["skills"]) == ("active", "certificate", ["Python"])
+    assert item["metadata"]["verification_code"] == credential.verification_code
+
+    response = client.get("/api/v1/credentials", headers=issuer_headers, params={"limit": 100})
+    assert response.status_code == 200
+    issued = {row["id"]: row for row in response.json()}
+    assert issued[credential.id]["issuer"] == name
+    assert issued[credential.id]["learner_id"] == credential.learner_id
+    assert issued[credential.id]["status"] == "issued"
@@ -0,0 +1,84 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app import main, models, signing
+
+
+def _keys(client):
+    return signing.public_keys(client.get("/.well-known/jwks.json").json())
+
+def _tamper(token):
+    header, payload, signature = token.split(".")
+    claims = json.loads(signing._b64decode(payload))
+    claims["credential"]["title"] = "Something Else"
+    return f"{header}.{signing._b64encode(signing._json(claims))}.{signature}"
+
+
+def test_issued_credentials_verify_offline(client, db, signup, issuer, issue):
+    issuer_id, _ = issuer
+    credential = issue(issuer_id, signup("learner")[0], title="Signed Course")
+    token = db.get(models.Credential, credential.id).signed_credential
+
+    claims = signing.verify(token, _keys(client))
+    assert claims["iss"] == str(issuer_id) and claims["jti"] == credential.verification_code
+    assert claims["credential"]["title"] == "Signed Course"
+    assert claims["credential"]["fingerprint"] == credential.fingerprint
+
+    with pytest.raises(ValueError, match="Invalid signature"):
+        signing.verify(_tamper(token), _keys(client))
+    with pytest.raises(ValueError, match="Unknown signing key"):
+        signing.verify(token, {})
+    with pytest.raises(ValueError):
+        signing.verify("not.a-token", _keys(client))
+
+    response = client.post("/api/v1/verify/signed", json={"jws": _tamper(token)})
+    assert response.json()["valid"] is False
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sign_pending_signs_in_batches(db, signup, issuer, issue, monkeypatch, workers):
+    issuer_id, _ = issuer
+    email = signup("learner")[0]
+    ids = [issue(issuer_id, email, title=f"Batch {n}").id for n in range(5)]
+    db.query(models.Credential).filter(models.Credential.id.in_(ids)).update(
+        {"signed_credential": None}, synchronize_session=False
+    )
+    db.commit()
+    # Send even these few through the process pool
+    monkeypatch.setattr(signing, "_POOL_THRESHOLD", 2)
+    monkeypatch.setattr(signing, "_POOL_CHUNK_SIZE", 2)
+    try:
+        assert signing.sign_pending(db, batch_size=2, workers=workers) >= 5
+    finally:
+        signing.shutdown_pool()
+    for credential_id in ids:
+        token = db.get(models.Credential, credential_id).signed_credential
+        assert signing.verify_with_db(db, token)["credential"]["title"].startswith("Batch")
+
+
+def test_key_set_etag_and_single_keys(client, issuer):
+    issuer_id, _ = issuer
+    signing.rotate_key(issuer_id)
+    first = client.get("/.well-known/jwks.json")
+    etag = first.headers["etag"]
+    assert "max-age" in first.headers["cache-control"]
+    assert client.get("/.well-known/jwks.json", headers={"If-None-Match": etag}).status_code == 304
+
+    key = signing.rotate_key(issuer_id)
+    refreshed = client.get("/.well-known/jwks.json", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200 and refreshed.headers["etag"] != etag
+    assert key.kid in signing.public_keys(refreshed.json())
+
+    response = client.get(f"/.well-known/jwks/{key.kid}.json")
+    assert response.status_code == 200 and response.json()["x"] == key.public_key
+    assert "immutable" in response.headers["cache-control"]
+    assert client.get("/.well-known/jwks/unknown.json").status_code == 404
+
+
+def test_refuses_to_run_without_a_secret(monkeypatch):
+    monkeypatch.setattr(signing, "_fernet", None)
+    with pytest.raises(RuntimeError, match="SIGNING_KEY_SECRET"):
+        signing.require_secret()
+    with pytest.raises(RuntimeError):
+        with TestClient(main.app):
+            pass
@@ -0,0 +1,116 @@
+from datetime import timezone
+import pytest
+from app import models, skill_india
+from .skill_india_fake import FakeSkillIndia
+
+
+@pytest.fixture
+def fake():
+    return FakeSkillIndia()
+
+
+@pytest.fixture
+def profiles(db, signup, issuer, monkeypatch):
+    """Two linked learner profiles, A and B, importing under a fresh issuer"""
+    issuer_id, headers = issuer
+    monkeypatch.setattr(skill_india, "SKILL_INDIA_ISSUER_ID", issuer_id)
+    emails = [signup("learner")[0] for _ in range(2)]
+    db.query(models.SkillIndiaProfile).delete()
+    users = {}
+    for name, email in zip(("A", "B"), emails):
+        user_id = db.query(models.User.id).filter(models.User.email == email).scalar()
+        db.add(models.SkillIndiaProfile(user_id=user_id, skill_india_id=f"SID-{name}"))
+        users[name] = user_id
+    db.commit()
+    return users, headers
+
+
+def _profile(db, name):
+    db.expire_all()
+    return db.query(models.SkillIndiaProfile).filter(models.SkillIndiaProfile.skill_india_id == f"SID-{name}").one()
+
+def _credentials(db, learner_id):
+    return {
+        credential.tags[1]: credential for credential in db.query(models.Credential).filter(
+            models.Credential.learner_id == learner_id
+        )
+    }
+
+def _completed(course_id, title, **fields):
+    return {"id": course_id, "kind": "pmkvy", "status": "completed", "title": title,
+            "completed_at": "2025-12-01T00:00:00Z", **fields}
+
+
+def test_sync_only_asks_for_changes_since_the_watermark(db, fake, profiles):
+    users, _ = profiles
+    fake.record("SID-A", **_completed("PM1", "Solar Panel Technician"))
+    fake.record("SID-A", id="AP1", kind="apprenticeship", status="enrolled", title="Welding")
+    fake.record("SID-B", **_completed("PM2", "Retail Sales Associate"))
+
+    totals = skill_india.sync_profiles(db, provider=fake, workers=2)
+    assert totals == {"profiles": 2, "imported": 2, "duplicates": 0, "errors": 0}
+    assert sorted(fake.calls) == [("SID-A", None), ("SID-B", None)]
+    first_sync = fake.now
+    assert _profile(db, "A").last_synced.replace(tzinfo=timezone.utc) == first_sync
+
+    fake.tick()
+    fake.calls.clear()
+    fake.record("SID-A", **_completed("PM3", "Drone Pilot"))
+    fake.record("SID-A", id="AP1", kind="apprenticeship", status="removed")
+    totals = skill_india.sync_profiles(db, provider=fake, workers=2)
+    assert totals == {"profiles": 2, "imported": 1, "duplicates": 0, "errors": 0}
+    assert sorted(fake.calls) == [("SID-A", first_sync), ("SID-B", first_sync)]
+
+    profile = _profile(db, "A")
+    assert profile.linked_pmkvy_courses == ["PM1", "PM3"]
+    assert profile.linked_apprenticeships == []
+    assert profile.last_synced.replace(tzinfo=timezone.utc) == fake.now
+    assert sorted(_credentials(db, users["A"])) == ["PM1", "PM3"]
+
+    fake.tick()
+    assert skill_india.sync_profiles(db, provider=fake)["imported"] == 0
+
+
+def test_completed_courses_are_imported_in_bulk(client, db, fake, profiles):
+    users, headers = profiles
+    template = client.post("/api/v1/badge-templates", headers=headers, json={
+        "name": "Solar Panel Technician", "badge_type": "certification", "criteria": "Assessment",
+        "skills": ["Solar Installation", "Electrical Safety"]
+    }).json()
+    fake.record("SID-A", **_completed("PM1", "solar  panel technician", nsqf_level=4))
+    fake.record("SID-A", **_completed("PM2", "Retail Sales Associate", skills=["Retail"], sector="Retail"))
+    fake.record("SID-A", id="PM3", kind="pmkvy", status="enrolled", title="Drone Pilot")
+
+    assert skill_india.sync_profiles(db, provider=fake)["imported"] == 2
+    credentials = _credentials(db, users["A"])
+    assert sorted(credentials) == ["PM1", "PM2"]
+    from_template = credentials["PM1"]
+    assert from_template.badge_template_id == template["id"]
+    assert from_template.skills == ["Solar Installation", "Electrical Safety"]
+    assert all(credential.fingerprint and credential.status_list_index is not None for credential in credentials.values())
+    assert db.query(models.CredentialMetadata.nsqf_level).filter(
+        models.CredentialMetadata.credential_id == from_template.id
+    ).scalar() == 4
+    postings = {skill for (skill,) in db.query(models.LearnerSkill.skill).filter(models.LearnerSkill.learner_id == users["A"])}
+    assert {"retail", "electrical safety"} <= postings
+
+    # A provider replaying its whole feed does not import anything twice
+    fake.tick()
+    fake.ignore_since = True
+    totals = skill_india.sync_profiles(db, provider=fake)
+    assert (totals["imported"], totals["duplicates"]) == (0, 2)
+    assert len(_credentials(db, users["A"])) == 2
+
+
+def test_failed_profile_keeps_its_watermark(db, fake, profiles):
+    fake.record("SID-B", **_completed("PM9", "Data Entry Operator"))
+    fake.down.add("SID-B")
+    totals = skill_india.sync_profiles(db, provider=fake)
+    assert (totals["profiles"], totals["errors"]) == (1, 1)
+    assert _profile(db, "B").last_synced is None
+
+    fake.down.clear()
+    fake.tick()
+    fake.calls.clear()
+    assert skill_india.sync_profiles(db, provider=fake)["imported"] == 1
+    assert ("SID-B", None) in fake.calls
@@ -0,0 +1,63 @@
+import pytest
+from app import skills
+
+
+@pytest.mark.parametrize("name, canonical", [
+    ("python3", "Python"),
+    ("  Python   Programming ", "Python"),
+    ("NODE JS", "Node.js"),
+    ("c sharp", "C#"),
+    ("excel", "Microsoft Excel"),
+    ("Basket   Weaving", "Basket Weaving"),
+    ("", None),
+    ("  ", None),
+    ("!!!", None),
+])
+def test_normalize_skill(name, canonical):
+    assert skills.normalize_skill(name) == canonical
+
+
+def test_normalize_skills_dedupes_in_first_seen_order():
+    assert skills.normalize_skills(["py", "Python3", "SQL", "python", "structured query language", None, ""]) == \
+        ["py", "Python", "SQL"]
+    assert skills.normalize_skills(None) == []
+    assert skills.skill_key("Python Programming") == "python" and skills.skill_key("Node JS") == "node.js"
+
+
+def test_phrase_matcher_matches_whole_words_and_overlaps():
+    matcher = skills.PhraseMatcher([("a b", "AB"), ("b", "B"), ("b c d", "BCD"), ("c", "C"), ("", "empty")])
+    tokens = skills.tokenize("A B C D")
+    assert sorted(matcher.iter_matches(tokens)) == [(0, 2, "AB"), (1, 2, "B"), (1, 4, "BCD"), (2, 3, "C")]
+    assert list(matcher.iter_matches(skills.tokenize("abc bb"))) == []
+
+
+def test_extract_skills_prefers_the_longest_overlapping_match():
+    assert skills.extract_skills("Full-stack with Node JS, PostgreSQL and REST API design") == \
+        ["Node.js", "PostgreSQL", "REST APIs"]
+    assert skills.extract_skills("Python3 data analytics with pandas and sklearn; more Python") == \
+        ["Python", "Data Analysis", "Pandas", "Scikit-learn"]
+    assert skills.extract_skills("JSON parsing in C++ and C#") == ["C++", "C#"]
+
+
+def test_extract_skills_ignores_ambiguous_aliases_in_running_text():
+    assert skills.extract_skills("Learners react to cloud events and excel at ML") == []
+    assert skills.extract_skills(None) == [] and skills.extract_skills("") == []
+
+
+def test_classify_title_picks_the_heaviest_profile():
+    assert skills.classify_title("Python Developer Certification")["nsqf_level"] == 6
+    data = skills.classify_title("Data Science Fundamentals with Python")
+    assert data["nsqf_level"] == 7 and data["skills"][0] == "Data Analysis"
+    # "python" and "javascript" weigh the same, so the earlier profile wins
+    assert skills.classify_title("Python and JavaScript")["skills"][0] == "Python"
+    assert skills.classify_title("Underwater Basket Weaving") == {
+        "skills": ["Professional Development", "Skill Building"], "nsqf_level": 4, "industry": ["General"]
+    }
+    assert skills.classify_title(None)["nsqf_level"] == 4
+
+
+def test_credentials_get_normalized_or_extracted_skills(issuer, issue, signup):
+    email, _ = signup("learner")
+    assert issue(issuer[0], email, skills=["python3", "SQL", "Python"]).skills == ["Python", "SQL"]
+    extracted = issue(issuer[0], email, title="Intro to Django", skills=[], description="Built REST APIs with postgres")
+    assert extracted.skills == ["Django", "REST APIs", "PostgreSQL"]
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import models, snapshots
+
+
+def test_snapshot_stores_todays_totals(db, issuer, signup, issue):
+    issuer_id, _ = issuer
+    issue(issuer_id, signup("learner")[0])
+    row = snapshots.build_snapshot(db)
+    issued = row.total_credentials_issued
+    assert row.report_date == datetime.now(timezone.utc).date()
+    assert issued == snapshots.current_statistics(db)["total_credentials_issued"]
+
+    issue(issuer_id, signup("learner")[0])
+    again = snapshots.build_snapshot(db)
+    assert again.id == row.id and again.total_credentials_issued == issued + 1
+
+
+def test_past_dates_are_not_backfilled_with_current_totals(db):
+    yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+    with pytest.raises(ValueError):
+        snapshots.build_snapshot(db, yesterday)
+    assert db.query(models.NationalStatistics).filter(models.NationalStatistics.report_date == yesterday).count() == 0
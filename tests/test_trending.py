@@ -0,0 +1,93 @@
+import threading
+from datetime import datetime, timezone
+import pytest
+from app import trending
+
+_DAY = 86400
+_NOW = datetime(2025, 6, 1, tzinfo=timezone.utc).timestamp()
+
+
+def test_scores_halve_every_half_life():
+    tracker = trending.TrendTracker()
+    tracker.add("python", "Python", 8.0, _NOW)
+    fresh = tracker.get("python", _NOW)
+    assert fresh["score"] == pytest.approx(8.0) and fresh["long_score"] == pytest.approx(8.0)
+
+    later = tracker.get("python", _NOW + trending.TRENDING_SHORT_HALF_LIFE_DAYS * _DAY)
+    assert later["score"] == pytest.approx(4.0)
+    later = tracker.get("python", _NOW + trending.TRENDING_LONG_HALF_LIFE_DAYS * _DAY)
+    assert later["long_score"] == pytest.approx(4.0)
+
+    tracker.add("python", "Python", 8.0, _NOW + trending.TRENDING_SHORT_HALF_LIFE_DAYS * _DAY)
+    assert tracker.get("python", _NOW + trending.TRENDING_SHORT_HALF_LIFE_DAYS * _DAY)["score"] == pytest.approx(12.0)
+    tracker.add("python", "Python", 0, _NOW)
+    assert tracker.get("missing") is None
+
+
+def test_top_keeps_the_highest_scores_within_capacity():
+    tracker = trending.TrendTracker(capacity=3)
+    for weight, key in enumerate("abcd", start=1):
+        tracker.add(key, key.upper(), weight, _NOW)
+    assert [entry["key"] for entry in tracker.top(10, _NOW)] == ["d", "c", "b"]
+
+    # A score at or below the floor does not displace it, but the skill is still counted
+    tracker.add("e", "E", 2.0, _NOW)
+    assert [entry["key"] for entry in tracker.top(10, _NOW)] == ["d", "c", "b"]
+    assert tracker.get("e", _NOW)["score"] == pytest.approx(2.0)
+
+    # A second event raises it above the floor, which is evicted
+    tracker.add("e", "E", 2.0, _NOW)
+    assert [entry["key"] for entry in tracker.top(10, _NOW)] == ["e", "d", "c"]
+    assert len(tracker) == 5 and tracker.top(2, _NOW)[1]["skill"] == "D"
+
+
+def test_repeated_raises_compact_the_heap():
+    tracker = trending.TrendTracker(capacity=2)
+    tracker.add("a", "A", 1.0, _NOW)
+    tracker.add("b", "B", 1.0, _NOW)
+    for _ in range(20):
+        tracker.add("a", "A", 1.0, _NOW)
+    assert len(tracker._heap) <= 4 * tracker.capacity
+    assert [entry["key"] for entry in tracker.top(10, _NOW)] == ["a", "b"]
+    assert tracker.top(1, _NOW)[0]["score"] == pytest.approx(21.0)
+
+
+def test_trend_compares_window_rates():
+    short, long = trending.TRENDING_SHORT_HALF_LIFE_DAYS, trending.TRENDING_LONG_HALF_LIFE_DAYS
+    assert trending._trend(short, long) == "stable"
+    assert trending._trend(short * 1.5, long) == "up"
+    assert trending._trend(short * 0.5, long) == "down"
+    assert trending._trend(1.0, 0) == "up"
+    assert trending._trend(0, 0) == "stable"
+
+
+def test_events_observed_during_a_rebuild_are_kept(monkeypatch):
+    building, release = threading.Event(), threading.Event()
+
+    def slow_build(db):
+        building.set()
+        release.wait(5)
+        return trending.TrendTracker()
+    monkeypatch.setattr(trending, "build_tracker", slow_build)
+
+    worker = threading.Thread(target=trending.load)
+    worker.start()
+    assert building.wait(5)
+    trending.observe("verified", {"Rebuild Race Skill": 3})
+    release.set()
+    worker.join(5)
+
+    entry = trending.get_tracker().get("rebuild race skill")
+    assert entry is not None and entry["score"] == pytest.approx(3 * trending.VERIFICATION_WEIGHT, rel=1e-3)
+    assert trending._pending is None
+
+
+def test_failed_rebuild_keeps_the_live_tracker(monkeypatch):
+    live = trending.get_tracker()
+
+    def broken_build(db):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(trending, "build_tracker", broken_build)
+    with pytest.raises(RuntimeError):
+        trending.load()
+    assert trending.get_tracker() is live and trending._pending is None
@@ -0,0 +1,128 @@
+import hashlib
+import pytest
+from app import models, status_lists, verification
+
+
+def _bit(client, credential, purpose):
+    body = client.get(f"/api/v1/status-lists/{credential.issuer_id}/{purpose}").json()
+    return status_lists.is_set(status_lists.decode(body["encodedList"]), credential.status_list_index)
+
+
+def test_verify_marks_issued_credential_verified(client, signup, issuer, issue):
+    issuer_id, _ = issuer
+    learner_email, _ = signup("learner")
+    credential = issue(issuer_id, learner_email)
+
+    response = client.post("/api/v1/verify", json={"verification_code": credential.verification_code})
+    assert response.status_code == 200
+    assert response.json()["status"] == "verified"
+
+
+def test_verify_leaves_revoked_credential_revoked(client, db, signup, issuer, issue):
+    issuer_id, headers = issuer
+    learner_email, _ = signup("learner")
+    credential = issue(issuer_id, learner_email)
+    assert client.put(f"/api/v1/credentials/{credential.id}", headers=headers, json={"status": "revoked"}).status_code == 200
+    assert _bit(client, credential, "revocation")
+
+    response = client.post("/api/v1/verify", json={"verification_code": credential.verification_code})
+    assert response.status_code == 200
+    assert response.json()["status"] == "revoked"
+    assert _bit(client, credential, "revocation")
+    db.expire_all()
+    assert db.get(models.Credential, credential.id).status == models.CredentialStatus.revoked
+
+
+def _totals(db):
+    db.expire_all()
+    row = db.get(models.CredentialRollup, ("total", "all"))
+    return (row.issued_count, row.active_count, row.revoked_count, row.expired_count)
+
+
+def test_verify_does_not_rewrite_rollups_of_inactive_credentials(client, db, signup, issuer, issue):
+    issuer_id, headers = issuer
+    learner_email, _ = signup("learner")
+    revoked = issue(issuer_id, learner_email)
+    expired = issue(issuer_id, learner_email)
+    client.put(f"/api/v1/credentials/{revoked.id}", headers=headers, json={"status": "revoked"})
+    client.put(f"/api/v1/credentials/{expired.id}", headers=headers, json={"status": "expired"})
+    before = _totals(db)
+
+    for credential in (revoked, expired, revoked):
+        client.post("/api/v1/verify", json={"verification_code": credential.verification_code})
+    assert _totals(db) == before
+
+
+# Employer verification
+
+@pytest.mark.parametrize("value, expected", [
+    ("abcd1234", ("code", "ABCD1234")),
+    ("https://micromerge.in/credentials/7f0c2f4e-3a1b-4c5d-8e9f-0a1b2c3d4e5f/", ("url", "7f0c2f4e-3a1b-4c5d-8e9f-0a1b2c3d4e5f")),
+    ("7F0C2F4E-3A1B-4C5D-8E9F-0A1B2C3D4E5F", ("url", "7F0C2F4E-3A1B-4C5D-8E9F-0A1B2C3D4E5F")),
+    ("0X" + "AB" * 32, ("hash", "ab" * 32)),
+    (" " + "ab" * 32 + " ", ("hash", "ab" * 32)),
+])
+def test_classify(value, expected):
+    assert verification.classify(value) == expected
+
+
+@pytest.fixture
+def employer(signup):
+    return signup("employer")[1]
+
+
+@pytest.fixture
+def credentials(db, signup, issuer, issue):
+    """A pending, a revoked and an anchored verified credential"""
+    issuer_id, _ = issuer
+    email, _ = signup("learner")
+    pending, revoked, anchored = (issue(issuer_id, email, title=f"Course {n}") for n in range(3))
+    db.get(models.Credential, pending.id).status = models.CredentialStatus.pending
+    db.get(models.Credential, revoked.id).status = models.CredentialStatus.revoked
+    db.get(models.Credential, anchored.id).status = models.CredentialStatus.verified
+    leaf = hashlib.sha256(anchored.verification_code.encode()).hexdigest()
+    db.add(models.BlockchainVerification(credential_id=anchored.id, blockchain_hash=leaf, transaction_id="0xfeed"))
+    db.commit()
+    return {"pending": pending, "revoked": revoked, "anchored": anchored, "leaf": leaf, "email": email}
+
+
+def test_batch_results_come_back_in_input_order(client, employer, credentials):
+    leaf = credentials["leaf"]
+    values = [
+        credentials["revoked"].verification_code.lower(),
+        "0x" + leaf.upper(),
+        "https://example.com/c/" + credentials["pending"].public_url,
+        "NOPE0000",
+        leaf,
+    ]
+    response = client.post("/api/v1/employer/verify-credentials", headers=employer, json={"values": values})
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [result["input"] for result in results] == values
+    assert [result["status"] for result in results] == ["revoked", "valid", "pending", "not_found", "valid"]
+    assert [result["identifier_type"] for result in results] == ["code", "hash", "url", "code", "hash"]
+    assert results[1]["credential_id"] == credentials["anchored"].id
+    assert results[1]["blockchain_hash"] == leaf and results[1]["transaction_id"] == "0xfeed"
+    assert results[0]["is_revoked"] and not results[3]["found"]
+
+    too_many = client.post("/api/v1/employer/verify-credentials", headers=employer, json={"values": ["x"] * 1001})
+    assert too_many.status_code == 422
+
+
+def test_single_verification_keeps_its_response(client, employer, credentials):
+    response = client.post("/api/v1/employer/verify-credential", headers=employer,
+                           json={"searchMethod": "id", "searchValue": credentials["pending"].verification_code})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "pending"
+    assert body["recipientEmail"] == credentials["email"]
+    assert set(body) >= {"id", "credentialId", "title", "issuer", "recipientName", "recipientEmail", "issuedDate",
+                         "expirationDate", "status", "nsqfLevel", "skills", "verificationHash", "blockchainTx", "metadata"}
+
+    response = client.post("/api/v1/employer/verify-credential", headers=employer,
+                           json={"searchMethod": "hash", "searchValue": "0x" + credentials["leaf"]})
+    assert response.json()["status"] == "verified" and response.json()["blockchainTx"] == "0xfeed"
+
+    response = client.post("/api/v1/employer/verify-credential", headers=employer,
+                           json={"searchMethod": "id", "searchValue": "NOPE0000"})
+    assert response.status_code == 404